@@ -0,0 +1,209 @@
+# backend/art_store.py
+"""Shared album art cache: decode once, keep pre-scaled thumbnails."""
+
+from __future__ import annotations
+
+import hashlib
+import mimetypes
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, QRunnable, QThreadPool, QTimer, Qt, pyqtSignal
+from PyQt6.QtGui import QImage, QPixmap
+
+# Square bounding boxes (px) used by the screens: home screen min/max artwork
+# label, music player at 1x and at the largest fixed scaling step.
+THUMBNAIL_SIZES = (100, 200, 360)
+MAX_ENTRIES = 32
+PLACEHOLDER_ASSET = "gui/html/assets/media/album_placeholder.svg"
+
+
+class ArtEntry:
+    """Decoded artwork: original bytes plus one QImage per thumbnail size."""
+
+    __slots__ = ("art_id", "binary", "mime", "thumbnails")
+
+    def __init__(self, art_id: str, binary: bytes, mime: str, thumbnails: dict):
+        self.art_id = art_id
+        self.binary = binary
+        self.mime = mime
+        self.thumbnails = thumbnails
+
+
+class _DecodeTask(QRunnable):
+    """Runs ArtStore.ingest on the global thread pool."""
+
+    def __init__(self, store: "ArtStore", binary: bytes, mime: str | None):
+        super().__init__()
+        self._store = store
+        self._binary = binary
+        self._mime = mime
+
+    def run(self) -> None:
+        art_id = self._store.ingest(self._binary, self._mime)
+        self._store.art_ready.emit(art_id)
+
+
+def art_id_for(binary: bytes) -> str:
+    """Content hash used as the art handle, so identical covers share an entry."""
+    return hashlib.sha1(binary).hexdigest()[:20]
+
+
+class ArtStore(QObject):
+    """
+    Thread-safe LRU of decoded album art keyed by content hash.
+
+    Decoding and scaling happen in `ingest`, which is meant to be called from
+    worker threads (QImage is safe off the GUI thread). Screens only ever ask
+    for a ready thumbnail via `pixmap`, which converts it once per size.
+    """
+
+    # Emitted (from the pool thread) when a `submit` decode is done.
+    art_ready = pyqtSignal(str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[str, ArtEntry]" = OrderedDict()
+        self._pixmaps: dict[tuple[str, int, int], QPixmap] = {}
+        self._evicted: list[str] = []
+        self._placeholder_id = ""
+
+    # --- Ingestion (any thread) ---
+    def ingest(self, binary: bytes, mime: str | None = None) -> str:
+        """Decode `binary` once and cache its thumbnails. Returns the art id or ""."""
+        if not binary:
+            return ""
+        art_id = art_id_for(binary)
+        with self._lock:
+            if art_id in self._entries:
+                self._entries.move_to_end(art_id)
+                return art_id
+
+        image = QImage.fromData(binary)
+        if image.isNull():
+            print("[ArtStore] Could not decode artwork payload.")
+            return ""
+
+        thumbnails = {}
+        for size in THUMBNAIL_SIZES:
+            thumbnails[size] = image.scaled(
+                size,
+                size,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        entry = ArtEntry(art_id, bytes(binary), mime or "image/jpeg", thumbnails)
+
+        with self._lock:
+            self._entries[art_id] = entry
+            self._entries.move_to_end(art_id)
+            while len(self._entries) > MAX_ENTRIES:
+                evicted_id, evicted = self._entries.popitem(last=False)
+                if evicted_id == self._placeholder_id:
+                    # Never drop the fallback artwork; re-append it.
+                    self._entries[evicted_id] = evicted
+                    continue
+                # QPixmaps must be released on the GUI thread: defer the purge.
+                self._evicted.append(evicted_id)
+        return art_id
+
+    def submit(self, binary: bytes, mime: str | None = None) -> str:
+        """
+        Queue `binary` for decoding on the thread pool and return its id at once.
+        `art_ready` fires when the thumbnails are available; for art already
+        cached it is posted to the event loop, so it always arrives after
+        `submit` has returned and the caller has stored the id.
+        """
+        if not binary:
+            return ""
+        art_id = art_id_for(binary)
+        if self.has(art_id):
+            QTimer.singleShot(0, lambda: self.art_ready.emit(art_id))
+            return art_id
+        QThreadPool.globalInstance().start(_DecodeTask(self, bytes(binary), mime))
+        return art_id
+
+    # --- Lookup ---
+    def has(self, art_id: str | None) -> bool:
+        if not art_id:
+            return False
+        with self._lock:
+            return art_id in self._entries
+
+    def entry(self, art_id: str) -> ArtEntry | None:
+        with self._lock:
+            entry = self._entries.get(art_id)
+            if entry is not None:
+                self._entries.move_to_end(art_id)
+            return entry
+
+    def image(self, art_id: str, size: int) -> QImage | None:
+        """Smallest cached thumbnail that covers `size` (largest one otherwise)."""
+        entry = self.entry(art_id)
+        if entry is None:
+            return None
+        for thumb_size in THUMBNAIL_SIZES:
+            if thumb_size >= size:
+                return entry.thumbnails[thumb_size]
+        return entry.thumbnails[THUMBNAIL_SIZES[-1]]
+
+    def pixmap(self, art_id: str, width: int, height: int | None = None) -> QPixmap | None:
+        """GUI-thread only: cached QPixmap fitted to width x height."""
+        height = height or width
+        self._purge_evicted()
+        key = (art_id, width, height)
+        cached = self._pixmaps.get(key)
+        if cached is not None:
+            return cached
+        image = self.image(art_id, max(width, height))
+        if image is None:
+            return None
+        if image.width() > width or image.height() > height:
+            image = image.scaled(
+                width,
+                height,
+                Qt.AspectRatioMode.KeepAspectRatio,
+                Qt.TransformationMode.SmoothTransformation,
+            )
+        pixmap = QPixmap.fromImage(image)
+        self._pixmaps[key] = pixmap
+        return pixmap
+
+    def _purge_evicted(self) -> None:
+        with self._lock:
+            evicted, self._evicted = self._evicted, []
+        for art_id in evicted:
+            for key in [k for k in self._pixmaps if k[0] == art_id]:
+                del self._pixmaps[key]
+
+    def raw(self, art_id: str) -> tuple[bytes, str] | None:
+        """Original encoded bytes and MIME type, e.g. for the HTML UI."""
+        entry = self.entry(art_id)
+        if entry is None:
+            return None
+        return entry.binary, entry.mime
+
+    # --- Placeholder ---
+    def placeholder_id(self) -> str:
+        """Art id of the bundled fallback cover (loaded on first use)."""
+        if self._placeholder_id:
+            return self._placeholder_id
+        asset_path = Path(__file__).resolve().parents[1] / PLACEHOLDER_ASSET
+        if not asset_path.exists():
+            return ""
+        mime = mimetypes.guess_type(asset_path.name)[0] or "image/png"
+        self._placeholder_id = self.ingest(asset_path.read_bytes(), mime)
+        return self._placeholder_id
+
+
+_shared_store: ArtStore | None = None
+
+
+def get_art_store() -> ArtStore:
+    """Process-wide art store. The first call must happen on the GUI thread."""
+    global _shared_store
+    if _shared_store is None:
+        _shared_store = ArtStore()
+    return _shared_store
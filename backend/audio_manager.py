@@ -2,25 +2,99 @@
 
 import subprocess
 import re
+import threading
+from collections import OrderedDict
 from PyQt6.QtCore import QObject, QThread, pyqtSignal, pyqtSlot
 
+from .art_store import get_art_store
+from .audio_probe import probe_duration
+from .connectivity import get_connectivity_monitor
+from .lyrics import load_cached_lyrics, save_cached_lyrics
 from .media_info import (
-    get_album_art_data_url,
+    LYRICS_NETWORK_ERROR,
+    LYRICS_NOT_FOUND,
+    LYRICS_UNAVAILABLE,
+    fetch_album_art,
     get_lyrics,
-    load_local_placeholder_data_url,
+    is_online,
 )
+
+# Quante tracce successive precaricare (copertina, testo, durata)
+PREFETCH_AHEAD = 3
+METADATA_CACHE_SIZE = 64
+
+
+class MetadataCache:
+    """
+    Piccola LRU thread-safe: (title, artist) -> (art_id, lyrics).
+    `has_art` (ArtStore.has) scarta le voci la cui copertina è già stata
+    espulsa dall'ArtStore, più piccolo di questa cache: vanno ricaricate.
+    """
+
+    def __init__(self, max_entries=METADATA_CACHE_SIZE, has_art=None):
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()
+        self._max_entries = max_entries
+        self._has_art = has_art
+
+    @staticmethod
+    def key(title, artist):
+        return ((title or "").strip().casefold(), (artist or "").strip().casefold())
+
+    def get(self, title, artist):
+        key = self.key(title, artist)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is None:
+                return None
+            if value[0] and self._has_art is not None and not self._has_art(value[0]):
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def put(self, title, artist, art_id, lyrics):
+        # Gli errori di rete non vanno in cache: si riproverà alla prossima richiesta
+        if lyrics == LYRICS_NETWORK_ERROR:
+            return
+        key = self.key(title, artist)
+        with self._lock:
+            self._entries[key] = (art_id, lyrics)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+
+
+def _lookup_metadata(art_store, title, artist):
+    """
+    Chiamate di rete bloccanti: ritorna (art_id, lyrics, complete).
+    art_id è "" se non trovata; complete è False se eravamo offline
+    (risultato parziale, da non mettere in cache).
+    """
+    binary, content_type = fetch_album_art(title, artist)
+    art_id = art_store.ingest(binary, content_type) if binary else ""
+    # Testi già scaricati (o LRC salvati a mano) sono nella cache su disco
+    lyrics = load_cached_lyrics(title, artist)
+    if lyrics is None:
+        lyrics = get_lyrics(title, artist)
+        if lyrics not in (LYRICS_NETWORK_ERROR, LYRICS_NOT_FOUND, LYRICS_UNAVAILABLE):
+            save_cached_lyrics(title, artist, lyrics)
+    return art_id, lyrics, is_online()
 
 
 # Questa classe farà il lavoro bloccante in un thread separato.
 class MetadataWorker(QObject):
-    # Segnale per comunicare i risultati: (data_url_copertina, testo_canzone)
+    # Segnale per comunicare i risultati: (art_id copertina, testo_canzone)
     finished = pyqtSignal(str, str)
+    # Richiesta servita offline (title, artist): l'AudioManager la riproverà
+    went_offline = pyqtSignal(str, str)
 
-    def __init__(self):
+    def __init__(self, art_store, cache, foreground):
         super().__init__()
-        self._placeholder_art = load_local_placeholder_data_url(
-            "gui/html/assets/media/album_placeholder.svg"
-        )
+        self.art_store = art_store
+        self.cache = cache
+        self.foreground = foreground
+        self._placeholder_art = art_store.placeholder_id()
 
     @pyqtSlot(str, str)
     def do_work(self, title, artist):
@@ -29,14 +103,112 @@ class MetadataWorker(QObject):
         Contiene le chiamate di rete bloccanti.
         """
         print(f"[Worker Thread] Ricevuto lavoro: {artist} - {title}")
+        try:
+            cached = self.cache.get(title, artist)
+            if cached is not None:
+                # Già precaricata: la copertina è in memoria, nessuna richiesta di rete
+                art_id, lyrics = cached
+            else:
+                # La copertina viene decodificata e ridimensionata qui, una sola volta,
+                # così la UI riceve solo l'id e prende la miniatura già pronta.
+                art_id, lyrics, complete = _lookup_metadata(self.art_store, title, artist)
+                if complete:
+                    self.cache.put(title, artist, art_id, lyrics)
+                else:
+                    self.went_offline.emit(title, artist)
+        finally:
+            self.foreground.done()
 
-        art_data_url = get_album_art_data_url(title, artist)
-        if not art_data_url:
-            art_data_url = self._placeholder_art or ""
-        lyrics = get_lyrics(title, artist)
+        if not art_id:
+            art_id = self._placeholder_art or ""
 
         # Emette i risultati quando ha finito
-        self.finished.emit(art_data_url, lyrics)
+        self.finished.emit(art_id, lyrics)
+
+
+class ForegroundGate:
+    """Conta le richieste in primo piano; il prefetch aspetta che siano zero."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._idle = threading.Event()
+        self._idle.set()
+
+    def begin(self):
+        with self._lock:
+            self._pending += 1
+            self._idle.clear()
+
+    def done(self):
+        with self._lock:
+            self._pending = max(0, self._pending - 1)
+            if self._pending == 0:
+                self._idle.set()
+
+    def wait_idle(self, timeout):
+        return self._idle.wait(timeout)
+
+
+class PrefetchWorker(QObject):
+    """
+    Precarica a bassa priorità i metadati delle prossime tracce.
+    Si mette in pausa finché c'è una richiesta in primo piano in corso,
+    e si ferma (lasciando la coda intatta) quando siamo offline.
+    """
+
+    # Emesso quando la coda si è fermata per mancanza di rete
+    went_offline = pyqtSignal()
+
+    def __init__(self, art_store, cache, foreground):
+        super().__init__()
+        self.art_store = art_store
+        self.cache = cache
+        self.foreground = foreground
+        self._lock = threading.Lock()
+        self._queue = []
+        self._stopping = False
+
+    def replace_queue(self, items):
+        """Chiamato dal thread della GUI: la nuova lista sostituisce quella vecchia."""
+        with self._lock:
+            self._queue = list(items)
+
+    def stop(self):
+        self._stopping = True
+
+    def _next_item(self):
+        with self._lock:
+            return self._queue.pop(0) if self._queue else None
+
+    @pyqtSlot()
+    def run_queue(self):
+        while not self._stopping:
+            # Pausa mentre una richiesta in primo piano è in volo
+            if not self.foreground.wait_idle(0.2):
+                continue
+            if not is_online():
+                # Inutile martellare la rete: si riprende quando torna la connessione
+                self.went_offline.emit()
+                return
+            item = self._next_item()
+            if item is None:
+                return
+            title, artist, file_path = item
+            if file_path:
+                probe_duration(file_path)
+            if not (title or artist) or self.cache.get(title, artist) is not None:
+                continue
+            print(f"[Prefetch] Precarico: {artist} - {title}")
+            art_id, lyrics, complete = _lookup_metadata(self.art_store, title, artist)
+            if complete:
+                self.cache.put(title, artist, art_id, lyrics)
+            else:
+                # Persa la connessione a metà: rimetti in coda e fermati
+                with self._lock:
+                    self._queue.insert(0, item)
+                self.went_offline.emit()
+                return
 
 
 class AudioManager(QObject):
@@ -47,8 +219,10 @@ class AudioManager(QObject):
     
     # Segnale per dire al worker di iniziare a lavorare
     start_work = pyqtSignal(str, str)
+    # Segnale per svegliare il worker di prefetch
+    start_prefetch = pyqtSignal()
 
-    # Nuovo segnale che l'AudioManager emetterà quando i dati sono pronti
+    # Nuovo segnale che l'AudioManager emetterà quando i dati sono pronti: (art_id, lyrics)
     metadata_ready = pyqtSignal(str, str)
 
     # Come hai scoperto, il controllo creato da PipeWire si chiama "Master".
@@ -57,9 +231,18 @@ class AudioManager(QObject):
     def __init__(self):
         super().__init__()
         
+        # Cache condivisa delle copertine e monitor di connettività
+        # (creati qui, nel thread della GUI)
+        self.art_store = get_art_store()
+        self.connectivity = get_connectivity_monitor()
+        self._current_request = None
+
+        self.metadata_cache = MetadataCache(has_art=self.art_store.has)
+        self._foreground = ForegroundGate()
+
         # --- Creazione del thread e del worker una sola volta ---
         self.worker_thread = QThread()
-        self.worker = MetadataWorker()
+        self.worker = MetadataWorker(self.art_store, self.metadata_cache, self._foreground)
         
         # Sposta il worker sul thread
         self.worker.moveToThread(self.worker_thread)
@@ -70,6 +253,7 @@ class AudioManager(QObject):
         
         # 2. Quando il worker finisce, i suoi risultati vengono emessi dal segnale di AudioManager
         self.worker.finished.connect(self.metadata_ready)
+        self.worker.went_offline.connect(self._on_foreground_offline)
         
         # 3. Gestisci la pulizia quando l'applicazione si chiude
         self.worker_thread.finished.connect(self.worker.deleteLater)
@@ -78,6 +262,17 @@ class AudioManager(QObject):
         self.worker_thread.start()
         print("[AudioManager] Worker thread avviato e in attesa di lavoro.")
 
+        # --- Thread separato (priorità minima) per il prefetch ---
+        self.prefetch_thread = QThread()
+        self.prefetch_worker = PrefetchWorker(
+            self.art_store, self.metadata_cache, self._foreground
+        )
+        self.prefetch_worker.moveToThread(self.prefetch_thread)
+        self.start_prefetch.connect(self.prefetch_worker.run_queue)
+        self.prefetch_worker.went_offline.connect(self._on_prefetch_offline)
+        self.prefetch_thread.finished.connect(self.prefetch_worker.deleteLater)
+        self.prefetch_thread.start(QThread.Priority.LowestPriority)
+
 
     def request_media_info(self, title, artist):
         """
@@ -86,22 +281,51 @@ class AudioManager(QObject):
         """
         # Emette un segnale per dire al worker di iniziare a lavorare con i nuovi dati.
         # Questa operazione è asincrona e non blocca nulla.
+        # Il prefetch si ferma finché questa richiesta non è conclusa.
+        self._current_request = MetadataCache.key(title, artist)
+        self._foreground.begin()
         self.start_work.emit(title, artist)
 
+    @pyqtSlot(str, str)
+    def _on_foreground_offline(self, title, artist):
+        # Una sola richiesta in attesa: quella della traccia in riproduzione
+        def retry():
+            if self._current_request == MetadataCache.key(title, artist):
+                print(f"[AudioManager] Di nuovo online, riprovo: {artist} - {title}")
+                self.request_media_info(title, artist)
+
+        self.connectivity.defer("metadata-foreground", retry)
+
+    @pyqtSlot()
+    def _on_prefetch_offline(self):
+        self.connectivity.defer("metadata-prefetch", self.start_prefetch.emit)
+
+    def prefetch_media_info(self, tracks):
+        """
+        Accoda il precaricamento di copertina, testo e durata delle prossime tracce.
+        `tracks` è una lista di (title, artist, file_path); file_path può essere None
+        (es. coda AVRCP del Bluetooth). Una nuova lista sostituisce la precedente.
+        """
+        self.prefetch_worker.replace_queue(tracks[:PREFETCH_AHEAD])
+        self.start_prefetch.emit()
+
     def cleanup(self):
         """Metodo da chiamare alla chiusura dell'app per pulire il thread."""
         print("[AudioManager] Pulizia del worker thread...")
-        if self.worker_thread.isRunning():
-            self.worker_thread.quit()
-            self.worker_thread.wait(2000) # Attendi max 2 secondi
+        self.prefetch_worker.stop()
+        self.connectivity.stop()
+        for thread in (self.worker_thread, self.prefetch_thread):
+            if thread.isRunning():
+                thread.quit()
+                thread.wait(2000) # Attendi max 2 secondi
 
-    def on_worker_finished(self, cover_url, lyrics):
+    def on_worker_finished(self, art_id, lyrics):
         """
         Questo slot viene eseguito quando il worker ha finito.
         Emette il segnale pubblico che la UI sta ascoltando.
         """
         print("[AudioManager] Worker ha finito. Emetto il segnale metadata_ready.")
-        self.metadata_ready.emit(cover_url, lyrics)
+        self.metadata_ready.emit(art_id, lyrics)
 
     def _run_amixer_command(self, args):
         """Helper function to run amixer commands on the default card."""
@@ -0,0 +1,164 @@
+# backend/audio_probe.py
+"""Cheap, cached duration/stream lookups from audio file headers (no decoding)."""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+import wave
+from collections import OrderedDict
+from dataclasses import dataclass
+
+try:
+    from mutagen import File as MutagenFile
+except ImportError:  # pragma: no cover - mutagen is listed in requirements.txt
+    MutagenFile = None
+
+
+@dataclass(frozen=True)
+class StreamInfo:
+    """Stream parameters from the file header; 0 / "" when unknown."""
+
+    duration: float = 0.0  # seconds
+    sample_rate: int = 0
+    channels: int = 0
+    bitrate: int = 0  # bit/s
+    codec: str = ""
+    track_gain: float | None = None  # ReplayGain dB, None se il tag manca
+    track_peak: float = 0.0  # 1.0 = fondo scala
+
+    def describe(self) -> str:
+        """Short label like "MP3 · 44.1 kHz · stereo · 320 kbps"."""
+        parts = []
+        if self.codec:
+            parts.append(self.codec)
+        if self.sample_rate:
+            parts.append(f"{self.sample_rate / 1000:g} kHz")
+        if self.channels:
+            parts.append({1: "mono", 2: "stereo"}.get(self.channels, f"{self.channels} ch"))
+        if self.bitrate:
+            parts.append(f"{self.bitrate // 1000} kbps")
+        return " · ".join(parts)
+
+
+_UNKNOWN = StreamInfo()
+_NUMBER_RE = re.compile(r"[-+]?\d+(?:\.\d+)?")
+# LRU: l'analisi della libreria passa da tutti i file, la cache non deve seguirla
+CACHE_MAX_ENTRIES = 512
+_cache: "OrderedDict[str, tuple[tuple[int, int], StreamInfo]]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _file_key(path: str) -> tuple[int, int] | None:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def _tag_text(value) -> str:
+    # ID3 frame (.text), liste Vorbis/MP4, MP4FreeForm (bytes)
+    if hasattr(value, "text"):
+        value = value.text
+    if isinstance(value, (list, tuple)):
+        value = value[0] if value else ""
+    if isinstance(value, bytes):
+        value = value.decode("utf-8", "replace")
+    return str(value)
+
+
+def _read_replaygain(tags) -> tuple[float | None, float]:
+    """(track gain dB, track peak) from ID3 TXXX, Vorbis comments or MP4 freeform tags."""
+    gain, peak = None, 0.0
+    if not tags:
+        return gain, peak
+    for key in tags.keys():
+        name = key.lower()
+        if not name.endswith(("replaygain_track_gain", "replaygain_track_peak")):
+            continue
+        match = _NUMBER_RE.search(_tag_text(tags[key]))
+        if not match:
+            continue
+        if name.endswith("gain"):
+            gain = float(match.group())
+        else:
+            peak = float(match.group())
+    return gain, peak
+
+
+def _read_mutagen(path: str) -> StreamInfo | None:
+    if MutagenFile is None:
+        return None
+    audio = MutagenFile(path)
+    info = getattr(audio, "info", None) if audio is not None else None
+    if info is None:
+        return None
+    codec = type(audio).__name__.upper()
+    if codec == "EASYMP3":
+        codec = "MP3"
+    gain, peak = _read_replaygain(getattr(audio, "tags", None))
+    return StreamInfo(
+        duration=float(getattr(info, "length", 0.0) or 0.0),
+        sample_rate=int(getattr(info, "sample_rate", 0) or 0),
+        channels=int(getattr(info, "channels", 0) or 0),
+        bitrate=int(getattr(info, "bitrate", 0) or 0),
+        codec=codec,
+        track_gain=gain,
+        track_peak=peak,
+    )
+
+
+def _read_wave(path: str) -> StreamInfo | None:
+    # Solo l'header RIFF: i frame non vengono letti
+    try:
+        with wave.open(path, "rb") as handle:
+            rate = handle.getframerate()
+            channels = handle.getnchannels()
+            return StreamInfo(
+                duration=handle.getnframes() / rate if rate else 0.0,
+                sample_rate=rate,
+                channels=channels,
+                bitrate=rate * channels * handle.getsampwidth() * 8,
+                codec="WAV",
+            )
+    except (wave.Error, EOFError):
+        return None
+
+
+def probe_stream(path: str) -> StreamInfo:
+    """
+    Duration and stream parameters read from the container header (mutagen,
+    stdlib `wave` as fallback), never decoding audio. Cached per
+    (path, size, mtime), for the CACHE_MAX_ENTRIES most recent paths.
+    """
+    key = _file_key(path)
+    if key is None:
+        return _UNKNOWN
+    with _cache_lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == key:
+            _cache.move_to_end(path)
+            return cached[1]
+
+    info = None
+    try:
+        info = _read_mutagen(path)
+        if (info is None or info.duration <= 0) and path.lower().endswith(".wav"):
+            info = _read_wave(path) or info
+    except Exception as e:
+        print(f"[AudioProbe] Could not read header of {path}: {e}")
+    info = info or _UNKNOWN
+
+    with _cache_lock:
+        _cache[path] = (key, info)
+        _cache.move_to_end(path)
+        while len(_cache) > CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+    return info
+
+
+def probe_duration(path: str) -> float:
+    """Duration in seconds from the file header; 0.0 when unknown."""
+    return probe_stream(path).duration
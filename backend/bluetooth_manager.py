@@ -1,11 +1,15 @@
 # backend/bluetooth_manager.py
 
+import threading
 import time
 import traceback
 import dbus
-from PyQt6.QtCore import QThread, pyqtSignal, QVariant, QObject, pyqtSlot
+from PyQt6.QtCore import QThread, QTimer, pyqtSignal, QVariant, QObject, pyqtSlot
 from PyQt6.QtDBus import QDBusConnection, QDBusInterface, QDBusMessage, QDBusVariant, QDBusObjectPath
 
+from .bluez_object_tree import BluezObjectTree
+from .media_position import PositionAnchor
+
 # Constants for BlueZ D-Bus
 BLUEZ_SERVICE = "org.bluez"
 DBUS_OM_IFACE = "org.freedesktop.DBus.ObjectManager"
@@ -15,6 +19,21 @@ ADAPTER_IFACE = "org.bluez.Adapter1"
 DEVICE_IFACE = "org.bluez.Device1"
 MEDIA_PLAYER_IFACE = "org.bluez.MediaPlayer1"
 MEDIA_CONTROL_IFACE = "org.bluez.MediaControl1"
+MEDIA_ITEM_IFACE = "org.bluez.MediaItem1"
+BATTERY_IFACE = "org.bluez.Battery1"
+
+# Gli aggiornamenti arrivano dai segnali D-Bus: il polling resta come rete di sicurezza
+FALLBACK_POLL_MS = 10000
+SIGNALLESS_POLL_MS = 500  # se la sottoscrizione ai segnali fallisce
+# Con i segnali attivi il poll rilegge solo dispositivo e player collegati;
+# la GetManagedObjects completa solo ogni tanto o dopo un errore
+FULL_RESYNC_SECONDS = 300
+# BlueZ segnala Position solo su play/pausa/seek: tra un report e l'altro la
+# posizione si interpola in locale, e ogni tanto si riallinea con una lettura
+POSITION_RESYNC_MS = 5000
+POSITION_TICK_MS = 250  # aggiornamento della seek bar
+# Proprietà di Device1 che cambiano lo stato della connessione (RSSI & co. no)
+DEVICE_STATE_PROPERTIES = {"Connected", "Name", "Alias"}
 
 # Constants for UPower D-Bus
 UPOWER_SERVICE = "org.freedesktop.UPower"
@@ -53,6 +72,60 @@ def qvariant_dict_to_python(variant_value):
         return value
 
 
+def _object_path(value):
+    """D-Bus object paths arrive as QDBusObjectPath or str depending on the marshalling."""
+    return value.path() if isinstance(value, QDBusObjectPath) else str(value)
+
+
+class _BluezEventReceiver(QObject):
+    """
+    Lives in the BluetoothManager thread and gets the BlueZ signals as whole
+    messages: a PyQt slot with a typed signature can't match a{sv} /
+    a{sa{sv}} arguments, which is why the typed PropertiesChanged slots
+    never fired. Also drives the fallback poll timer.
+    """
+
+    def __init__(self, manager):
+        super().__init__()
+        self._manager = manager
+
+    @pyqtSlot(QDBusMessage)
+    def properties_changed(self, message):
+        args = message.arguments()
+        if len(args) < 2:
+            return
+        invalidated = list(qvariant_dict_to_python(args[2]) or []) if len(args) > 2 else []
+        self._manager.on_properties_changed(
+            message.path(), args[0], qvariant_dict_to_python(args[1]) or {}, invalidated
+        )
+
+    @pyqtSlot(QDBusMessage)
+    def interfaces_added(self, message):
+        args = message.arguments()
+        if len(args) < 2:
+            return
+        self._manager.on_interfaces_added(_object_path(args[0]), qvariant_dict_to_python(args[1]) or {})
+
+    @pyqtSlot(QDBusMessage)
+    def interfaces_removed(self, message):
+        args = message.arguments()
+        if len(args) < 2:
+            return
+        self._manager.on_interfaces_removed(_object_path(args[0]), list(qvariant_dict_to_python(args[1]) or []))
+
+    @pyqtSlot()
+    def poll(self):
+        self._manager.poll_state()
+
+    @pyqtSlot()
+    def poll_position(self):
+        self._manager.poll_position()
+
+    @pyqtSlot()
+    def tick_position(self):
+        self._manager.emit_interpolated_position()
+
+
 class BluetoothManager(QThread):
     # Signals
     connection_changed = pyqtSignal(bool, str)
@@ -60,6 +133,7 @@ class BluetoothManager(QThread):
     media_properties_changed = pyqtSignal(dict)
     playback_status_changed = pyqtSignal(str)
     devices_discovered = pyqtSignal(list) # List of dictionaries {path, name, address, paired, connected, trusted}
+    media_position_updated = pyqtSignal(int, int)  # interpolated position, duration (ms)
 
     def __init__(self, settings_manager=None):
         super().__init__()
@@ -94,40 +168,67 @@ class BluetoothManager(QThread):
         self.media_player_path = None
         self.media_properties = {}
         self.playback_status = "stopped"
-        self.dbus_receiver = QObject()  # Potentially needed if sender context required
+        self.position_anchor = PositionAnchor()
+        self._last_emitted_position = None
+        self.dbus_receiver = None  # _BluezEventReceiver, creato nel thread da run()
+        self.object_tree = BluezObjectTree()
+        self._proxies = {}  # (service, path, interface) -> QDBusInterface
+        self._proxies_lock = threading.Lock()  # usati dal thread della GUI e dal manager
+        self._last_full_resync = 0.0
+        self.signals_connected = False
         self.scanning = False
 
     def find_adapter(self):
-        print("DEBUG: BluetoothManager.find_adapter - Entered")
-        """Finds the first available Bluetooth adapter."""
-        om = QDBusInterface(BLUEZ_SERVICE, "/", DBUS_OM_IFACE, self.bus)
-        print("DEBUG: BluetoothManager.find_adapter - Calling GetManagedObjects...")
-        reply_message = om.call("GetManagedObjects")
-        print(
-            f"DEBUG: BluetoothManager.find_adapter - GetManagedObjects returned type: {reply_message.type()}"
-        )
+        """Finds the first available Bluetooth adapter (loads the object tree mirror)."""
+        if not self.load_object_tree():
+            return None
+        adapters = self.object_tree.objects_with(ADAPTER_IFACE)
+        if adapters:
+            print(f"BT Manager: Found adapter at {adapters[0][0]}")
+            return adapters[0][0]
+        print("BT Manager: No Bluetooth adapter found.")
+        return None
+
+    def load_object_tree(self):
+        """One GetManagedObjects into the local mirror; afterwards the signals keep it current."""
+        reply_message = self._proxy("/", DBUS_OM_IFACE).call("GetManagedObjects")
         if reply_message.type() == QDBusMessage.MessageType.ErrorMessage:
             print(
                 "BT Manager: Error getting managed objects:",
                 reply_message.errorMessage(),
             )
-            return None
+            return False
         if not reply_message.arguments():
             print("BT Manager: GetManagedObjects reply has no arguments.")
-            return None
-
-        objects_dict_variant = reply_message.arguments()[0]
-        objects_dict = qvariant_dict_to_python(objects_dict_variant)
+            return False
+        objects_dict = qvariant_dict_to_python(reply_message.arguments()[0])
+        self.object_tree.load(objects_dict)
+        self._last_full_resync = time.monotonic()
+        print(f"DEBUG: BluetoothManager - Object tree loaded: {len(objects_dict)} objects")
+        return True
 
-        print(
-            f"DEBUG: BluetoothManager.find_adapter - Processing {len(objects_dict)} managed objects..."
-        )
-        for path, interfaces in objects_dict.items():
-            if "org.bluez.Adapter1" in interfaces:
-                print(f"BT Manager: Found adapter at {path}")
-                return path
-        print("BT Manager: No Bluetooth adapter found.")
-        return None
+    def _proxy(self, path, interface_name, service=BLUEZ_SERVICE):
+        """
+        Cached QDBusInterface: building one introspects the remote object, a
+        round trip per call site. Proxies of objects that don't exist (yet)
+        are invalid and not kept.
+        """
+        key = (service, path, interface_name)
+        with self._proxies_lock:
+            proxy = self._proxies.get(key)
+        if proxy is None:
+            # Introspezione fuori dal lock: non blocca l'altro thread
+            proxy = QDBusInterface(service, path, interface_name, self.bus)
+            if proxy.isValid():
+                with self._proxies_lock:
+                    proxy = self._proxies.setdefault(key, proxy)
+        return proxy
+
+    def _drop_proxies(self, path):
+        """Forget the proxies of a removed object and of its children."""
+        with self._proxies_lock:
+            for key in [key for key in self._proxies if key[1] == path or key[1].startswith(path + "/")]:
+                del self._proxies[key]
 
     def _get_upower_device_path(self, device_bluez_path):
         """Tries to find the corresponding UPower D-Bus path for a BlueZ device path."""
@@ -145,9 +246,7 @@ class BluetoothManager(QThread):
             print(f"DEBUG: Constructed UPower path guess: {upower_path}")
 
             # Verify the path exists on UPower's D-Bus interface
-            upower_obj = QDBusInterface(
-                UPOWER_SERVICE, upower_path, DBUS_PROP_IFACE, self.bus
-            )
+            upower_obj = self._proxy(upower_path, DBUS_PROP_IFACE, UPOWER_SERVICE)
             reply = upower_obj.call(
                 "Get", UPOWER_DEVICE_IFACE, "Type"
             )  # Check if object/interface/prop exists
@@ -170,9 +269,7 @@ class BluetoothManager(QThread):
         if not upower_device_path:
             return None
         try:
-            upower_props = QDBusInterface(
-                UPOWER_SERVICE, upower_device_path, DBUS_PROP_IFACE, self.bus
-            )
+            upower_props = self._proxy(upower_device_path, DBUS_PROP_IFACE, UPOWER_SERVICE)
             reply_message = upower_props.call("Get", UPOWER_DEVICE_IFACE, "Percentage")
 
             if (
@@ -202,19 +299,6 @@ class BluetoothManager(QThread):
     def _reset_connection_state(self):
         """Resets all connection and media state variables and emits signals."""
         print("BT Manager: Resetting connection state...")
-        
-        # Disconnect signal if active
-        if self.media_player_path and self.bus and self.bus.isConnected():
-            try:
-                self.bus.disconnect(
-                    BLUEZ_SERVICE,
-                    self.media_player_path,
-                    DBUS_PROP_IFACE,
-                    "PropertiesChanged",
-                    self.on_media_properties_changed,
-                )
-            except Exception:
-                pass # Ignore errors during disconnect
 
         self.connected_device_path = None
         self.connected_device_name = "Disconnected"
@@ -222,6 +306,7 @@ class BluetoothManager(QThread):
         self.media_player_path = None
         self.media_properties = {}
         self.playback_status = "stopped"
+        self.position_anchor.reset()
         
         print("DEBUG: Emitting connection_changed(False, ...)")
         self.connection_changed.emit(False, "Disconnected")
@@ -292,56 +377,20 @@ class BluetoothManager(QThread):
     def find_media_player(self, device_path_hint=None):
         # ... (Implementation remains the same as the previous working version) ...
         print(f"DEBUG: BluetoothManager.find_media_player - Hint: {device_path_hint}")
-        om = QDBusInterface(BLUEZ_SERVICE, "/", DBUS_OM_IFACE, self.bus)
-        reply_message = om.call("GetManagedObjects")
-        if (
-            reply_message.type() == QDBusMessage.MessageType.ErrorMessage
-        ):  # ... error handling ...
-            return False
-        if not reply_message.arguments():  # ... error handling ...
-            return False
-
-        objects_dict = qvariant_dict_to_python(reply_message.arguments()[0])
-        found_player_path = None
-        # ... (Loop through objects, find matching player) ...
-        for path, interfaces in objects_dict.items():
-            if MEDIA_PLAYER_IFACE in interfaces:
-                player_props = interfaces.get(MEDIA_PLAYER_IFACE, {})
-                player_device = player_props.get("Device", "")
-                if device_path_hint and player_device == device_path_hint:
-                    found_player_path = path
-                    break
-                elif not device_path_hint and not found_player_path:
-                    if player_device and player_device.startswith("/org/bluez/hci"):
-                        found_player_path = path
+        found_player_path = self.object_tree.media_player(device_path_hint)
 
         if found_player_path and found_player_path != self.media_player_path:
             print(f"BT Manager: Media player activated at {found_player_path}")
-            if self.media_player_path and self.bus.isConnected():
-                self.bus.disconnect(
-                    BLUEZ_SERVICE,
-                    self.media_player_path,
-                    DBUS_PROP_IFACE,
-                    "PropertiesChanged",
-                    self.on_media_properties_changed,
-                )
             self.media_player_path = found_player_path
             self.monitor_media_player(found_player_path)
             return True
         elif not found_player_path and self.media_player_path:
             print("BT Manager: Active media player seems to be gone.")
-            if self.media_player_path and self.bus.isConnected():
-                self.bus.disconnect(
-                    BLUEZ_SERVICE,
-                    self.media_player_path,
-                    DBUS_PROP_IFACE,
-                    "PropertiesChanged",
-                    self.on_media_properties_changed,
-                )
             # ... (clear state and emit signals) ...
             self.media_player_path = None
             self.media_properties = {}
             self.playback_status = "stopped"
+            self.position_anchor.reset()
             self.media_properties_changed.emit({})
             self.playback_status_changed.emit("stopped")
             return False
@@ -349,31 +398,58 @@ class BluetoothManager(QThread):
         return found_player_path is not None
 
     def monitor_media_player(self, player_path):
-        # ... (Implementation remains the same - Get initial props via GetAll on Properties IFace) ...
         print(f"DEBUG: BluetoothManager.monitor_media_player - Path: {player_path}")
         if not player_path:
             return
-        props_iface = QDBusInterface(
-            BLUEZ_SERVICE, player_path, DBUS_PROP_IFACE, self.bus
-        )
-        reply_message = props_iface.call("GetAll", MEDIA_PLAYER_IFACE)
-        if (
-            reply_message.type() != QDBusMessage.MessageType.ErrorMessage
-            and reply_message.arguments()
-        ):
-            initial_props = qvariant_dict_to_python(reply_message.arguments()[0])
+        initial_props = self.object_tree.properties(player_path, MEDIA_PLAYER_IFACE)
+        if initial_props is not None:
             self.update_media_state(initial_props)
-        # else: # Error logging
 
-    # --- Slots (Only the working InterfacesRemoved is connected/used by signals) ---
+    # --- D-Bus signal handlers (called by _BluezEventReceiver) ---
+
+    def on_properties_changed(self, path, interface_name, changed, invalidated=()):
+        """PropertiesChanged from any BlueZ object; `changed` holds only the changed properties."""
+        try:
+            self.object_tree.properties_changed(path, interface_name, changed, invalidated)
+            if interface_name == MEDIA_PLAYER_IFACE:
+                self.on_media_properties_changed(path, changed)
+            elif interface_name == DEVICE_IFACE:
+                self.on_device_properties_changed(path, changed)
+            elif interface_name == BATTERY_IFACE and path == self.connected_device_path:
+                battery = changed.get("Percentage")
+                if battery is not None and battery != self.current_battery:
+                    self.current_battery = int(battery)
+                    self.battery_updated.emit(self.current_battery)
+        except Exception as e:
+            print(f"ERROR in on_properties_changed for {path}: {e}")
+            traceback.print_exc()
 
-    # Method kept, but not connected to failing signal
-    # @pyqtSlot(str, object, "QStringList")
-    def on_media_properties_changed(
-        self, interface_name, changed_properties_obj, invalidated_properties
-    ):
-        print("!!! on_media_properties_changed called unexpectedly !!!")
-        pass
+    def on_media_properties_changed(self, path, changed):
+        if path == self.media_player_path:
+            self.update_media_state(changed)
+        elif self.connected_device_path and not self.media_player_path:
+            # Il player esisteva già ma non era stato ancora trovato
+            self.find_media_player(self.connected_device_path)
+
+    def on_device_properties_changed(self, path, changed):
+        if path != self.connected_device_path and not changed.get("Connected"):
+            return  # RSSI e simili dei dispositivi vicini durante la scansione
+        if not DEVICE_STATE_PROPERTIES.intersection(changed):
+            return
+        if changed.get("Connected") is False:
+            self.process_device_properties(path, {"Connected": False})
+            return
+        # Il segnale porta solo le proprietà cambiate: lo stato completo è nel mirror
+        props = self.object_tree.properties(path, DEVICE_IFACE)
+        self.process_device_properties(path, props if props is not None else {"Connected": False})
+
+    def _get_all(self, path, interface_name):
+        """Properties.GetAll as a Python dict, None on error."""
+        props_iface = self._proxy(path, DBUS_PROP_IFACE)
+        reply = props_iface.call("GetAll", interface_name)
+        if reply.type() == QDBusMessage.MessageType.ErrorMessage or not reply.arguments():
+            return None
+        return qvariant_dict_to_python(reply.arguments()[0])
 
     # This method IS called by polling loop and initial setup
     def update_media_state(self, properties):
@@ -402,6 +478,17 @@ class BluetoothManager(QThread):
                 position_changed = True
             if "Track" in self.media_properties or track_changed:
                 self.media_properties["Position"] = position_value
+        # Nuovo punto di partenza per l'interpolazione
+        if track_changed:
+            self.position_anchor.set_duration(self.media_properties["Track"].get("Duration", 0))
+            if position_value < 0:
+                position_value = 0  # brano nuovo senza Position: riparte da capo
+                self.media_properties["Position"] = 0
+        if position_value >= 0 or "Status" in properties:
+            self.position_anchor.anchor(
+                position_value if position_value >= 0 else None,
+                properties.get("Status", self.playback_status),
+            )
         # Emit signals
         if status_changed:
             self.playback_status_changed.emit(self.playback_status)
@@ -410,18 +497,23 @@ class BluetoothManager(QThread):
                 self.media_properties["Position"] = position_value
             self.media_properties_changed.emit(self.media_properties)
 
-    # Method kept, but not connected to failing signal
-    # @pyqtSlot(str, object)
-    def on_interfaces_added(self, path, interfaces_and_properties_obj):
-        print("!!! on_interfaces_added called unexpectedly !!!")
-        pass
+    def on_interfaces_added(self, path, interfaces):
+        """Handles D-Bus InterfacesAdded: a device connecting for the first time or a new media player."""
+        try:
+            self.object_tree.interfaces_added(path, interfaces)
+            device_props = interfaces.get(DEVICE_IFACE)
+            if device_props and device_props.get("Connected") and not self.connected_device_path:
+                self.process_device_properties(path, device_props)
+            if MEDIA_PLAYER_IFACE in interfaces and self.connected_device_path:
+                self.find_media_player(self.connected_device_path)
+        except Exception as e:
+            print(f"ERROR in on_interfaces_added: {e}")
 
-    # Keep working slot connected to signal
-    @pyqtSlot(str, "QStringList")
     def on_interfaces_removed(self, path, interfaces):
         """Handles D-Bus InterfacesRemoved signal."""
-        # ... (Implementation remains the same) ...
         try:
+            if self.object_tree.interfaces_removed(path, interfaces):
+                self._drop_proxies(path)
             if DEVICE_IFACE in interfaces and path == self.connected_device_path:
                 self.process_device_properties(path, {"Connected": False})
             elif MEDIA_PLAYER_IFACE in interfaces and path == self.media_player_path:
@@ -429,19 +521,15 @@ class BluetoothManager(QThread):
                 self.media_player_path = None
                 self.media_properties = {}
                 self.playback_status = "stopped"
+                self.position_anchor.reset()
                 self.media_properties_changed.emit({})
                 self.playback_status_changed.emit("stopped")
+                # Alcuni telefoni ricreano il player (cambio app)
+                if self.connected_device_path:
+                    self.find_media_player(self.connected_device_path)
         except Exception as e:  # ... Error handling ...
             print(f"ERROR in on_interfaces_removed: {e}")
 
-    # Method kept, but not connected to failing signal
-    # @pyqtSlot(str, object, "QStringList")
-    def on_device_properties_changed(
-        self, interface_name, changed_properties_obj, invalidated_properties
-    ):
-        print("!!! on_device_properties_changed called unexpectedly !!!")
-        pass
-
     # --- Scanning and Device Management Methods ---
 
     def start_scan(self):
@@ -459,7 +547,7 @@ class BluetoothManager(QThread):
             return False
 
         try:
-            adapter = QDBusInterface(BLUEZ_SERVICE, self.adapter_path, ADAPTER_IFACE, self.bus)
+            adapter = self._proxy(self.adapter_path, ADAPTER_IFACE)
             reply = adapter.call("StartDiscovery")
             if reply.type() != QDBusMessage.MessageType.ErrorMessage:
                 print("BT Manager: Scanning started.")
@@ -483,7 +571,7 @@ class BluetoothManager(QThread):
             return False
 
         try:
-            adapter = QDBusInterface(BLUEZ_SERVICE, self.adapter_path, ADAPTER_IFACE, self.bus)
+            adapter = self._proxy(self.adapter_path, ADAPTER_IFACE)
             reply = adapter.call("StopDiscovery")
             if reply.type() != QDBusMessage.MessageType.ErrorMessage:
                 print("BT Manager: Scanning stopped.")
@@ -516,43 +604,8 @@ class BluetoothManager(QThread):
                  })
             return self.mock_devices
 
-        devices = []
-        try:
-            om = QDBusInterface(BLUEZ_SERVICE, "/", DBUS_OM_IFACE, self.bus)
-            reply = om.call("GetManagedObjects")
-            
-            if reply.type() == QDBusMessage.MessageType.ErrorMessage:
-                return []
-
-            objects = qvariant_dict_to_python(reply.arguments()[0])
-            
-            for path, interfaces in objects.items():
-                if DEVICE_IFACE in interfaces:
-                    props = interfaces.get(DEVICE_IFACE, {})
-                    address = props.get("Address", "")
-                    name = props.get("Name", props.get("Alias", address))
-                    paired = props.get("Paired", False)
-                    connected = props.get("Connected", False)
-                    trusted = props.get("Trusted", False)
-                    rssi = props.get("RSSI", -100) # Signal strength
-
-                    devices.append({
-                        "path": path,
-                        "name": name,
-                        "address": address,
-                        "paired": paired,
-                        "connected": connected,
-                        "trusted": trusted,
-                        "rssi": rssi
-                    })
-            
-            # Sort by connected (first), then paired (second), then RSSI (desc)
-            devices.sort(key=lambda x: (not x['connected'], not x['paired'], -x['rssi']))
-            return devices
-
-        except Exception as e:
-            print(f"BT Manager: Error getting available devices: {e}")
-            return []
+        # Dal mirror dell'object tree: nessuna chiamata D-Bus
+        return self.object_tree.devices()
 
     def pair_device(self, device_path):
         """Pairs with a device."""
@@ -567,14 +620,14 @@ class BluetoothManager(QThread):
             return True, "Pairing initiated"
 
         try:
-            device = QDBusInterface(BLUEZ_SERVICE, device_path, DEVICE_IFACE, self.bus)
+            device = self._proxy(device_path, DEVICE_IFACE)
             print(f"BT Manager: Pairing with {device_path}...")
             reply = device.call("Pair")
             
             if reply.type() != QDBusMessage.MessageType.ErrorMessage:
                 print(f"BT Manager: Pair request sent/successful for {device_path}")
                 # Often good to set Trusted after pairing
-                props = QDBusInterface(BLUEZ_SERVICE, device_path, DBUS_PROP_IFACE, self.bus)
+                props = self._proxy(device_path, DBUS_PROP_IFACE)
                 props.call("Set", DEVICE_IFACE, "Trusted", QDBusVariant(True))
                 return True, "Pairing initiated"
             else:
@@ -605,7 +658,7 @@ class BluetoothManager(QThread):
             return True, "Connected"
 
         try:
-            device = QDBusInterface(BLUEZ_SERVICE, device_path, DEVICE_IFACE, self.bus)
+            device = self._proxy(device_path, DEVICE_IFACE)
             print(f"BT Manager: Connecting to {device_path}...")
             # Connect is often blocking, consider running in worker if UI freezes
             reply = device.call("Connect")
@@ -634,7 +687,7 @@ class BluetoothManager(QThread):
             return True, "Disconnected"
 
         try:
-            device = QDBusInterface(BLUEZ_SERVICE, device_path, DEVICE_IFACE, self.bus)
+            device = self._proxy(device_path, DEVICE_IFACE)
             print(f"BT Manager: Disconnecting from {device_path}...")
             reply = device.call("Disconnect")
             
@@ -664,7 +717,7 @@ class BluetoothManager(QThread):
              return False, "No adapter"
              
         try:
-            adapter = QDBusInterface(BLUEZ_SERVICE, self.adapter_path, ADAPTER_IFACE, self.bus)
+            adapter = self._proxy(self.adapter_path, ADAPTER_IFACE)
             print(f"BT Manager: Removing device {device_path}...")
             reply = adapter.call("RemoveDevice", QDBusObjectPath(device_path))
             
@@ -678,7 +731,7 @@ class BluetoothManager(QThread):
         except Exception as e:
             return False, str(e)
 
-    # --- run Method (Polling Implementation) ---
+    # --- run Method (D-Bus signals + slow fallback poll) ---
     def run(self):
         print("BluetoothManager thread started.")
         if self.emulation_mode:
@@ -686,15 +739,8 @@ class BluetoothManager(QThread):
             print("[BT Manager] Entering EMULATION polling loop")
             while self._is_running:
                 # Simulate media position update if playing
-                if self.playback_status == "playing":
-                    current_pos = self.media_properties.get("Position", 0)
-                    new_pos = current_pos + 1000 # +1 sec
-                    self.media_properties["Position"] = new_pos
-                    # Emit sometimes to update UI
-                    # self.media_properties_changed.emit(self.media_properties) 
-                    # (Actually UI updates on event, let's just sleep)
-                
-                self.msleep(1000)
+                self.emit_interpolated_position()
+                self.msleep(POSITION_TICK_MS)
             return
 
         if not self.bus.isConnected():  # ... error handling ...
@@ -704,139 +750,156 @@ class BluetoothManager(QThread):
             return
         print(f"DEBUG: BluetoothManager.run - Adapter found: {self.adapter_path}")
 
-        # Get initial state
-        om = QDBusInterface(BLUEZ_SERVICE, "/", DBUS_OM_IFACE, self.bus)
-        managed_objects_reply = om.call("GetManagedObjects")
-        if (
-            managed_objects_reply.type() != QDBusMessage.MessageType.ErrorMessage
-            and managed_objects_reply.arguments()
-        ):
-            objects_dict = qvariant_dict_to_python(managed_objects_reply.arguments()[0])
-            print(
-                f"DEBUG: BluetoothManager.run - Processing {len(objects_dict)} initial objects..."
-            )
-            for path, interfaces in objects_dict.items():
-                if DEVICE_IFACE in interfaces:
-                    dev_props = interfaces.get(DEVICE_IFACE, {})
-                    self.process_device_properties(
-                        path, dev_props
-                    )  # Handles initial connect + battery check
-            print("DEBUG: BluetoothManager.run - Initial object processing done.")
-        # else: # Error logging
-
-        # Connect ONLY working signals
+        # Get initial state (find_adapter ha già caricato il mirror)
+        for path, dev_props in self.object_tree.objects_with(DEVICE_IFACE):
+            self.process_device_properties(path, dev_props)  # Handles initial connect + battery check
+        print("DEBUG: BluetoothManager.run - Initial object processing done.")
+
+        # Segnali BlueZ ricevuti nel thread del manager (event loop avviato sotto)
+        self.dbus_receiver = _BluezEventReceiver(self)
+        self.signals_connected = self._connect_bluez_signals(True)
+
+        # Fallback: poll lento se i segnali arrivano, quello vecchio se la sottoscrizione fallisce
+        poll_timer = QTimer()
+        poll_timer.timeout.connect(self.dbus_receiver.poll)
+        poll_timer.start(FALLBACK_POLL_MS if self.signals_connected else SIGNALLESS_POLL_MS)
+        position_timer = QTimer()
+        position_timer.timeout.connect(self.dbus_receiver.poll_position)
+        if self.signals_connected:
+            position_timer.start(POSITION_RESYNC_MS)
+        tick_timer = QTimer()
+        tick_timer.timeout.connect(self.dbus_receiver.tick_position)
+        tick_timer.start(POSITION_TICK_MS)
         print(
-            "DEBUG: BluetoothManager.run - Connecting D-Bus signals (Polling approach)..."
+            f"BT Manager: Entering event loop (signals={self.signals_connected}, "
+            f"poll every {poll_timer.interval()} ms)."
         )
-        sig2_ok = self.bus.connect(
-            BLUEZ_SERVICE,
-            "/",
-            DBUS_OM_IFACE,
-            "InterfacesRemoved",
-            self.on_interfaces_removed,
-        )
-        print(f"DEBUG: Signal connection status: InterfacesRemoved={sig2_ok}")
-
-        print("BT Manager: Entering polling loop.")
-        poll_interval_ms = 500  # Poll every 0.5 seconds for responsive media controls
-        loop_count = 0
-        om_iface = QDBusInterface(BLUEZ_SERVICE, "/", DBUS_OM_IFACE, self.bus)
-
-        while self._is_running:
-            # --- POLLING LOGIC ---
-            try:
-                # 1. Poll Connected Device Properties (BlueZ + UPower implicitly via process_device_properties)
-                current_connected_path = self.connected_device_path
-                if current_connected_path:
-                    dev_props_iface = QDBusInterface(
-                        BLUEZ_SERVICE, current_connected_path, DBUS_PROP_IFACE, self.bus
-                    )
-                    dev_reply = dev_props_iface.call("GetAll", DEVICE_IFACE)
-                    if (
-                        dev_reply.type() != QDBusMessage.MessageType.ErrorMessage
-                        and dev_reply.arguments()
-                    ):
-                        dev_props_all = qvariant_dict_to_python(
-                            dev_reply.arguments()[0]
-                        )
-                        self.process_device_properties(
-                            current_connected_path, dev_props_all
-                        )
-                        if not self.connected_device_path:
-                            continue  # Skip rest if disconnected by previous call
-                    else:  # Failed to poll device, assume disconnect
-                        print(
-                            f"DEBUG: Failed to poll device {current_connected_path}, assuming disconnect."
-                        )
-                        self.process_device_properties(
-                            current_connected_path, {"Connected": False}
-                        )
-                        continue
-
-                # 2. Poll Media Player Properties
-                current_media_path = self.media_player_path
-                if current_media_path:
-                    media_props_iface = QDBusInterface(
-                        BLUEZ_SERVICE, current_media_path, DBUS_PROP_IFACE, self.bus
-                    )
-                    media_reply = media_props_iface.call("GetAll", MEDIA_PLAYER_IFACE)
-                    if (
-                        media_reply.type() != QDBusMessage.MessageType.ErrorMessage
-                        and media_reply.arguments()
-                    ):
-                        media_props_all = qvariant_dict_to_python(
-                            media_reply.arguments()[0]
-                        )
-                        self.update_media_state(media_props_all)
-                    # else: print(f"DEBUG: Failed to poll media player {current_media_path}")
-
-                # 3. Poll for NEW devices/players (less frequent?)
-                if loop_count % 6 == 0:  # Check every ~3 seconds (6 * 0.5s)
-                    om_reply = om_iface.call("GetManagedObjects")
-                    if (
-                        om_reply.type() != QDBusMessage.MessageType.ErrorMessage
-                        and om_reply.arguments()
-                    ):
-                        obj_dict = qvariant_dict_to_python(om_reply.arguments()[0])
-                        # Find newly connected device
-                        if not self.connected_device_path:
-                            for path, interfaces in obj_dict.items():
-                                if DEVICE_IFACE in interfaces:
-                                    dev_props = interfaces.get(DEVICE_IFACE, {})
-                                    if dev_props.get("Connected", False):
-                                        print(
-                                            "DEBUG: New device connection detected via polling."
-                                        )
-                                        self.process_device_properties(path, dev_props)
-                                        break
-                        # Find newly appeared media player
-                        elif not self.media_player_path and self.connected_device_path:
-                            self.find_media_player(self.connected_device_path)
-
-            except Exception as e:
-                print(f"!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-                print(f"ERROR in BluetoothManager polling loop: {e}")
-                traceback.print_exc()
-                print(f"!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
-
-            loop_count += 1
-            self.msleep(poll_interval_ms)
+        if self._is_running:
+            self.exec()
 
+        poll_timer.stop()
+        position_timer.stop()
+        tick_timer.stop()
         # Disconnect signals on exit
         print("BT Manager: Disconnecting D-Bus signals.")
         if self.bus.isConnected():
-            self.bus.disconnect(
-                BLUEZ_SERVICE,
-                "/",
-                DBUS_OM_IFACE,
-                "InterfacesRemoved",
-                self.on_interfaces_removed,
-            )
+            self._connect_bluez_signals(False)
         print("BluetoothManager thread finished.")
 
+    def _connect_bluez_signals(self, connect):
+        """
+        (Un)subscribes PropertiesChanged for every BlueZ object (devices,
+        players, batteries) and the ObjectManager signals. True if all
+        subscriptions succeeded.
+        """
+        subscriptions = [
+            ("", DBUS_PROP_IFACE, "PropertiesChanged", self.dbus_receiver.properties_changed),
+            ("/", DBUS_OM_IFACE, "InterfacesAdded", self.dbus_receiver.interfaces_added),
+            ("/", DBUS_OM_IFACE, "InterfacesRemoved", self.dbus_receiver.interfaces_removed),
+        ]
+        ok = True
+        for path, interface_name, name, slot in subscriptions:
+            method = self.bus.connect if connect else self.bus.disconnect
+            result = method(BLUEZ_SERVICE, path, interface_name, name, slot)
+            if connect:
+                print(f"DEBUG: Signal connection status: {name}={result}")
+            ok = ok and result
+        return ok
+
+    def _refresh_properties(self, path, interface_name):
+        """GetAll of one object into the mirror; False if the read failed."""
+        props = self._get_all(path, interface_name)
+        if props is None:
+            return False
+        self.object_tree.properties_changed(path, interface_name, props)
+        return True
+
+    def _resync_object_tree(self):
+        """
+        Full GetManagedObjects without signals, every FULL_RESYNC_SECONDS or
+        after a failed read; otherwise a GetAll of the connected device and
+        player only.
+        """
+        stale = time.monotonic() - self._last_full_resync >= FULL_RESYNC_SECONDS
+        if self.signals_connected and not stale:
+            targets = [(self.connected_device_path, DEVICE_IFACE), (self.media_player_path, MEDIA_PLAYER_IFACE)]
+            if all(self._refresh_properties(path, iface) for path, iface in targets if path):
+                return True
+            # Oggetto sparito o errore D-Bus: meglio rileggere tutto
+        return self.load_object_tree()
+
+    def poll_state(self):
+        """Fallback: resyncs the object tree mirror in case a signal was missed."""
+        try:
+            if not self._resync_object_tree():
+                return
+            # 1. Connected Device Properties (BlueZ + UPower implicitly via process_device_properties)
+            current_connected_path = self.connected_device_path
+            if current_connected_path:
+                dev_props_all = self.object_tree.properties(current_connected_path, DEVICE_IFACE)
+                if dev_props_all is None:  # Device gone, assume disconnect
+                    print(
+                        f"DEBUG: Device {current_connected_path} not in object tree, assuming disconnect."
+                    )
+                    dev_props_all = {"Connected": False}
+                self.process_device_properties(current_connected_path, dev_props_all)
+                if not self.connected_device_path:
+                    return  # Skip rest if disconnected by previous call
+
+            # 2. Media Player Properties
+            current_media_path = self.media_player_path
+            if current_media_path:
+                media_props_all = self.object_tree.properties(current_media_path, MEDIA_PLAYER_IFACE)
+                if media_props_all is not None:
+                    self.update_media_state(media_props_all)
+
+            # 3. NEW devices/players
+            if not self.connected_device_path:
+                connected = self.object_tree.connected_device()
+                if connected:
+                    print("DEBUG: New device connection detected via polling.")
+                    self.process_device_properties(*connected)
+            elif not self.media_player_path:
+                self.find_media_player(self.connected_device_path)
+
+        except Exception as e:
+            print(f"!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+            print(f"ERROR in BluetoothManager fallback poll: {e}")
+            traceback.print_exc()
+            print(f"!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!!")
+
+    def poll_position(self):
+        """Re-anchors the interpolated position while playing: reads only Position."""
+        player_path = self.media_player_path
+        if self.playback_status != "playing" or not player_path:
+            return
+        try:
+            props_iface = self._proxy(player_path, DBUS_PROP_IFACE)
+            reply = props_iface.call("Get", MEDIA_PLAYER_IFACE, "Position")
+            if reply.type() != QDBusMessage.MessageType.ErrorMessage and reply.arguments():
+                position = {"Position": qvariant_dict_to_python(reply.arguments()[0])}
+                self.object_tree.properties_changed(player_path, MEDIA_PLAYER_IFACE, position)
+                self.update_media_state(position)
+        except Exception as e:
+            print(f"Error polling media position: {e}")
+
+    def current_position(self):
+        """Position of the Bluetooth track in ms, interpolated since the last report."""
+        return self.position_anchor.position()
+
+    def emit_interpolated_position(self):
+        if self.playback_status != "playing" or not self.media_player_path:
+            self._last_emitted_position = None
+            return
+        position = self.position_anchor.position()
+        if position != self._last_emitted_position:
+            self._last_emitted_position = position
+            self.media_position_updated.emit(position, self.position_anchor.duration_ms)
+
     def stop(self):
         print("BluetoothManager: Stop requested.")
         self._is_running = False
+        self.quit()  # esce dall'event loop di run()
 
     def poll_media_player_immediately(self):
         """Poll media player immediately for instant feedback after commands."""
@@ -844,22 +907,49 @@ class BluetoothManager(QThread):
             return
 
         try:
-            media_props_iface = QDBusInterface(
-                BLUEZ_SERVICE, self.media_player_path, DBUS_PROP_IFACE, self.bus
-            )
-            media_reply = media_props_iface.call("GetAll", MEDIA_PLAYER_IFACE)
-            if (
-                media_reply.type() != QDBusMessage.MessageType.ErrorMessage
-                and media_reply.arguments()
-            ):
-                media_props_all = qvariant_dict_to_python(
-                    media_reply.arguments()[0]
-                )
+            player_path = self.media_player_path
+            media_props_all = self._get_all(player_path, MEDIA_PLAYER_IFACE)
+            if media_props_all is not None:
+                self.object_tree.properties_changed(player_path, MEDIA_PLAYER_IFACE, media_props_all)
                 self.update_media_state(media_props_all)
                 print("BT Manager: Immediate media poll completed")
         except Exception as e:
             print(f"Error in immediate media poll: {e}")
 
+    def get_now_playing_queue(self, limit=3):
+        """
+        Returns the next `limit` tracks of the AVRCP NowPlaying list as
+        [{"Title": ..., "Artist": ...}], when the phone exposes it (browsing
+        support). Empty list when unavailable.
+        """
+        if self.emulation_mode or not self.media_player_path:
+            return []
+
+        player_props = self.object_tree.properties(self.media_player_path, MEDIA_PLAYER_IFACE) or {}
+        # Items of the NowPlaying list live under the player's "Playlist" object
+        queue_root = player_props.get("Playlist") or self.media_player_path
+        items = []
+        for path, item_props in self.object_tree.objects_with(MEDIA_ITEM_IFACE, queue_root + "/"):
+            metadata = item_props.get("Metadata", {}) or {}
+            if not item_props.get("Playable", True) or not metadata.get("Title"):
+                continue
+            number = metadata.get("Number") or 0
+            items.append((number, path, metadata))
+        if not items:
+            return []
+        items.sort(key=lambda entry: (entry[0], entry[1]))
+
+        current_title = self.media_properties.get("Track", {}).get("Title")
+        start = 0
+        for index, (_, _, metadata) in enumerate(items):
+            if metadata.get("Title") == current_title:
+                start = index + 1
+                break
+        return [
+            {"Title": metadata.get("Title", ""), "Artist": metadata.get("Artist", "")}
+            for _, _, metadata in items[start:start + limit]
+        ]
+
     # --- Media Control Methods ---
     def _send_media_command(self, command):
         """Sends a simple command (Play, Pause, Next, Previous) to the media player."""
@@ -871,9 +961,7 @@ class BluetoothManager(QThread):
             return False
         print(f"BT Manager: Sending command '{command}' to {self.media_player_path}")
         try:
-            player_iface = QDBusInterface(
-                BLUEZ_SERVICE, self.media_player_path, MEDIA_PLAYER_IFACE, self.bus
-            )
+            player_iface = self._proxy(self.media_player_path, MEDIA_PLAYER_IFACE)
             reply_message = player_iface.call(command)
             if reply_message.type() == QDBusMessage.MessageType.ErrorMessage:
                 print(
@@ -918,12 +1006,8 @@ class BluetoothManager(QThread):
 
         print(f"--- Impostazione visibilità a: {state} ---")
         try:
-            adapter_iface = QDBusInterface(
-                BLUEZ_SERVICE, self.adapter_path, ADAPTER_IFACE, self.bus
-            )
-            props_iface = QDBusInterface(
-                BLUEZ_SERVICE, self.adapter_path, DBUS_PROP_IFACE, self.bus
-            )
+            adapter_iface = self._proxy(self.adapter_path, ADAPTER_IFACE)
+            props_iface = self._proxy(self.adapter_path, DBUS_PROP_IFACE)
 
             # 1. Imposta le proprietà di base
             props_iface.call("Set", ADAPTER_IFACE, "Pairable", QDBusVariant(state))
@@ -974,10 +1058,11 @@ class BluetoothManager(QThread):
         """
         if not self.adapter_path or not self.bus.isConnected():
             return False
+        adapter_props = self.object_tree.properties(self.adapter_path, ADAPTER_IFACE) or {}
+        if "Discoverable" in adapter_props:
+            return bool(adapter_props["Discoverable"])  # aggiornato da PropertiesChanged
         try:
-            props_iface = QDBusInterface(
-                BLUEZ_SERVICE, self.adapter_path, DBUS_PROP_IFACE, self.bus
-            )
+            props_iface = self._proxy(self.adapter_path, DBUS_PROP_IFACE)
             reply = props_iface.call("Get", ADAPTER_IFACE, "Discoverable")
             if reply.type() == QDBusMessage.MessageType.ErrorMessage:
                 return False
@@ -0,0 +1,114 @@
+# backend/bluez_object_tree.py
+"""
+Local mirror of the BlueZ object tree (path -> interface -> properties):
+filled once from GetManagedObjects, then kept current from the
+InterfacesAdded / InterfacesRemoved / PropertiesChanged signals, so device
+lists and player lookups need no D-Bus round trip.
+"""
+
+from __future__ import annotations
+
+import threading
+
+DEVICE_IFACE = "org.bluez.Device1"
+MEDIA_PLAYER_IFACE = "org.bluez.MediaPlayer1"
+
+
+class BluezObjectTree:
+    """Thread-safe; readers get copies. `generation` grows on every change."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._objects: dict[str, dict[str, dict]] = {}
+        self.generation = 0
+
+    # --- Updates (from GetManagedObjects and the D-Bus signals) ---
+    def load(self, objects: dict) -> None:
+        """Replaces the whole tree with a GetManagedObjects result."""
+        with self._lock:
+            self._objects = {
+                path: {name: dict(props or {}) for name, props in interfaces.items()}
+                for path, interfaces in objects.items()
+            }
+            self.generation += 1
+
+    def interfaces_added(self, path: str, interfaces: dict) -> None:
+        with self._lock:
+            entry = self._objects.setdefault(path, {})
+            for name, props in interfaces.items():
+                entry[name] = dict(props or {})
+            self.generation += 1
+
+    def interfaces_removed(self, path: str, interfaces) -> bool:
+        """True if the object is gone altogether."""
+        with self._lock:
+            entry = self._objects.get(path, {})
+            for name in interfaces:
+                entry.pop(name, None)
+            gone = not entry
+            if gone:
+                self._objects.pop(path, None)
+            self.generation += 1
+            return gone
+
+    def properties_changed(self, path: str, interface_name: str, changed: dict, invalidated=()) -> None:
+        with self._lock:
+            props = self._objects.setdefault(path, {}).setdefault(interface_name, {})
+            props.update(changed)
+            for name in invalidated:
+                props.pop(name, None)
+            self.generation += 1
+
+    # --- Queries ---
+    def has(self, path: str, interface_name: str) -> bool:
+        with self._lock:
+            return interface_name in self._objects.get(path, {})
+
+    def properties(self, path: str, interface_name: str) -> dict | None:
+        with self._lock:
+            props = self._objects.get(path, {}).get(interface_name)
+            return dict(props) if props is not None else None
+
+    def objects_with(self, interface_name: str, prefix: str = "") -> list[tuple[str, dict]]:
+        """(path, properties) of the objects implementing `interface_name`, sorted by path."""
+        with self._lock:
+            found = [
+                (path, dict(interfaces[interface_name]))
+                for path, interfaces in self._objects.items()
+                if interface_name in interfaces and path.startswith(prefix)
+            ]
+        return sorted(found)
+
+    def devices(self) -> list[dict]:
+        """Known devices as used by BluetoothDialog: connected first, then paired, then by RSSI."""
+        devices = []
+        for path, props in self.objects_with(DEVICE_IFACE):
+            address = props.get("Address", "")
+            devices.append({
+                "path": path,
+                "name": props.get("Name", props.get("Alias", address)),
+                "address": address,
+                "paired": props.get("Paired", False),
+                "connected": props.get("Connected", False),
+                "trusted": props.get("Trusted", False),
+                "rssi": props.get("RSSI", -100),  # Signal strength
+            })
+        devices.sort(key=lambda x: (not x["connected"], not x["paired"], -x["rssi"]))
+        return devices
+
+    def connected_device(self) -> tuple[str, dict] | None:
+        for path, props in self.objects_with(DEVICE_IFACE):
+            if props.get("Connected", False):
+                return path, props
+        return None
+
+    def media_player(self, device_path: str | None = None) -> str | None:
+        """Player of `device_path`, or without a hint the first player of any device."""
+        for path, props in self.objects_with(MEDIA_PLAYER_IFACE):
+            player_device = props.get("Device", "")
+            if device_path:
+                if player_device == device_path:
+                    return path
+            elif player_device and player_device.startswith("/org/bluez/hci"):
+                return path
+        return None
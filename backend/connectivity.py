@@ -0,0 +1,240 @@
+# backend/connectivity.py
+"""Shared connectivity monitor with a circuit breaker for network lookups."""
+
+from __future__ import annotations
+
+import socket
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+PROBE_HOST = ("8.8.8.8", 53)
+PROBE_TIMEOUT = 3  # seconds
+# A half-open trial that never reports back is considered lost after this long
+TRIAL_TIMEOUT = 30.0  # seconds
+
+CLOSED = "closed"  # online: requests go through
+OPEN = "open"  # offline: requests are short-circuited
+HALF_OPEN = "half_open"  # one trial request allowed to test recovery
+
+
+class CircuitBreaker:
+    """
+    Classic three-state breaker. After `failure_threshold` consecutive
+    connectivity failures it opens; after `reset_timeout` seconds one trial
+    request is let through (half-open). Each failed trial doubles the wait,
+    up to `max_reset_timeout`.
+    """
+
+    def __init__(
+        self,
+        failure_threshold=2,
+        reset_timeout=15.0,
+        max_reset_timeout=300.0,
+        clock=time.monotonic,
+    ):
+        self.failure_threshold = failure_threshold
+        self.base_reset_timeout = reset_timeout
+        self.max_reset_timeout = max_reset_timeout
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state = CLOSED
+        self._failures = 0
+        self._reset_timeout = reset_timeout
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trial_started = 0.0
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state
+
+    def retry_in(self):
+        """Seconds until a half-open trial is allowed (0 when not open)."""
+        with self._lock:
+            if self._state != OPEN:
+                return 0.0
+            return max(0.0, self._opened_at + self._reset_timeout - self._clock())
+
+    def allow_request(self):
+        with self._lock:
+            if self._state == CLOSED:
+                return True
+            if self._state == OPEN:
+                if self._clock() - self._opened_at < self._reset_timeout:
+                    return False
+                self._state = HALF_OPEN
+                self._trial_in_flight = False
+            # HALF_OPEN: only one trial at a time
+            now = self._clock()
+            if self._trial_in_flight and now - self._trial_started < TRIAL_TIMEOUT:
+                return False
+            self._trial_in_flight = True
+            self._trial_started = now
+            return True
+
+    def record_success(self):
+        """Returns True if this closed a previously open/half-open breaker."""
+        with self._lock:
+            recovered = self._state != CLOSED
+            self._state = CLOSED
+            self._failures = 0
+            self._reset_timeout = self.base_reset_timeout
+            self._trial_in_flight = False
+            return recovered
+
+    def record_failure(self):
+        """Returns True if this failure opened the breaker."""
+        with self._lock:
+            self._failures += 1
+            if self._state == HALF_OPEN:
+                self._reset_timeout = min(self._reset_timeout * 2, self.max_reset_timeout)
+                return self._trip()
+            if self._state == CLOSED and self._failures >= self.failure_threshold:
+                return self._trip()
+            return False
+
+    def force_open(self):
+        """Known offline (e.g. Wi-Fi dropped): short-circuit right away."""
+        with self._lock:
+            was_open = self._state == OPEN
+            self._trip()
+            return not was_open
+
+    def allow_trial_now(self):
+        """Known link change (e.g. Wi-Fi joined): let the next request probe."""
+        with self._lock:
+            if self._state == OPEN:
+                self._opened_at = self._clock() - self._reset_timeout
+
+    def _trip(self):
+        self._state = OPEN
+        self._opened_at = self._clock()
+        self._trial_in_flight = False
+        return True
+
+
+class ConnectivityMonitor(QObject):
+    """
+    Process-wide view of "are we online". Network helpers ask `allow_request`
+    before touching the network and report the outcome; while the breaker is
+    open a background thread probes for recovery, and deferred lookups are
+    run (on the GUI thread) once the link is back.
+    """
+
+    online_changed = pyqtSignal(bool)
+    _recovered = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.breaker = CircuitBreaker()
+        self._deferred = {}
+        self._deferred_lock = threading.Lock()
+        self._wake = threading.Event()
+        self._stopping = False
+        self._recovered.connect(self._drain_deferred)
+        self._probe_thread = threading.Thread(target=self._probe_loop, daemon=True)
+        self._probe_thread.start()
+
+    # --- Queries used by network code (any thread) ---
+    def is_online(self):
+        return self.breaker.state != OPEN
+
+    def allow_request(self):
+        return self.breaker.allow_request()
+
+    def record_success(self):
+        if self.breaker.record_success():
+            print("[Connectivity] Back online.")
+            self.online_changed.emit(True)
+            self._recovered.emit()
+
+    def record_failure(self):
+        if self.breaker.record_failure():
+            print("[Connectivity] Network unreachable, short-circuiting lookups.")
+            self.online_changed.emit(False)
+            self._wake.set()
+
+    def defer(self, key, callback):
+        """
+        Run `callback` on the GUI thread when connectivity returns.
+        A later defer with the same key replaces the earlier callback.
+        """
+        with self._deferred_lock:
+            self._deferred[key] = callback
+        if self.is_online():
+            self._recovered.emit()
+        else:
+            self._wake.set()
+
+    # --- Wi-Fi driven updates ---
+    def attach_wifi_manager(self, wifi_manager):
+        wifi_manager.connection_changed.connect(self._on_wifi_connection_changed)
+
+    @pyqtSlot(bool, str)
+    def _on_wifi_connection_changed(self, connected, ssid):
+        if connected:
+            # New link: probe right away instead of waiting for the backoff
+            print(f"[Connectivity] Wi-Fi connected ({ssid}), probing.")
+            self.breaker.allow_trial_now()
+            self._wake.set()
+        elif self.breaker.force_open():
+            print("[Connectivity] Wi-Fi disconnected.")
+            self.online_changed.emit(False)
+
+    def stop(self):
+        self._stopping = True
+        self._wake.set()
+
+    # --- Internals ---
+    def _probe_loop(self):
+        while not self._stopping:
+            if self.breaker.state == CLOSED:
+                self._wake.wait()
+                self._wake.clear()
+                continue
+            wait = self.breaker.retry_in()
+            if wait > 0 and self._wake.wait(wait):
+                self._wake.clear()
+                continue
+            if not self.breaker.allow_request():
+                # Someone else's trial is in flight; check again shortly
+                self._wake.wait(1.0)
+                self._wake.clear()
+                continue
+            if self._probe():
+                self.record_success()
+            else:
+                self.record_failure()
+
+    @staticmethod
+    def _probe():
+        try:
+            with socket.create_connection(PROBE_HOST, timeout=PROBE_TIMEOUT):
+                return True
+        except OSError:
+            return False
+
+    @pyqtSlot()
+    def _drain_deferred(self):
+        with self._deferred_lock:
+            callbacks = list(self._deferred.values())
+            self._deferred.clear()
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                print(f"[Connectivity] Deferred lookup failed: {e}")
+
+
+_shared_monitor = None
+
+
+def get_connectivity_monitor():
+    """Process-wide monitor. The first call must happen on the GUI thread."""
+    global _shared_monitor
+    if _shared_monitor is None:
+        _shared_monitor = ConnectivityMonitor()
+    return _shared_monitor
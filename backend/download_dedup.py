@@ -0,0 +1,64 @@
+# backend/download_dedup.py
+"""
+Skip downloads of songs that are already in the library: a candidate is a
+duplicate if its source id was downloaded before, or if its cleaned-up
+artist/title matches a library track.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+
+from .post_download import normalize_tags
+
+_NON_WORD = re.compile(r"[\W_]+", re.UNICODE)
+
+
+def _fold(text: str) -> str:
+    # Niente maiuscole, punteggiatura e spazi: "AC/DC" == "ac dc" == "acdc"
+    return _NON_WORD.sub("", (text or "").casefold())
+
+
+def track_key(title: str, artist: str, from_channel: bool = False) -> str:
+    title, artist = normalize_tags(title, artist, from_channel)
+    return f"{_fold(artist)}\0{_fold(title)}"
+
+
+class LibraryDedup:
+    """Keys of the library tracks and known source ids; `add` covers a batch."""
+
+    def __init__(self, tracks=(), source_ids=()):
+        self._keys = set()
+        self._sources = set(source_ids)
+        for track in tracks:
+            title = track.get("title") or os.path.splitext(os.path.basename(track.get("path", "")))[0]
+            self._add(title, track.get("artist", ""))
+
+    def _add(self, title, artist, from_channel=False):
+        self._keys.add(track_key(title, artist, from_channel))
+
+    def contains(self, title, artist="", source_id="", from_channel=False) -> bool:
+        if source_id and source_id in self._sources:
+            return True
+        # Un file senza tag artista non combacia con un artista qualunque:
+        # stesso titolo di un altro artista è un altro brano
+        return track_key(title, artist, from_channel) in self._keys
+
+    def add(self, title, artist="", source_id="", from_channel=False) -> None:
+        if source_id:
+            self._sources.add(source_id)
+        self._add(title, artist, from_channel)
+
+    def partition(self, entries):
+        """(new, duplicates) of entries {title, uploader, id}; also dedups within the batch."""
+        new, duplicates = [], []
+        for entry in entries:
+            title, artist, source_id = entry.get("title", ""), entry.get("uploader", ""), entry.get("id", "")
+            # L'"artista" di un risultato è il canale che l'ha caricato
+            if self.contains(title, artist, source_id, from_channel=True):
+                duplicates.append(entry)
+            else:
+                self.add(title, artist, source_id, from_channel=True)
+                new.append(entry)
+        return new, duplicates
@@ -0,0 +1,276 @@
+# backend/download_manager.py
+"""
+Runs the persistent download queue: up to `max_parallel` yt-dlp processes,
+progress from their templated output, retries with backoff, and one
+completion event per job. Finished files then go through DownloadPipeline.
+"""
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .connectivity import get_connectivity_monitor
+from .post_download import DownloadPipeline
+from .download_queue import (
+    DONE,
+    QUEUED,
+    RUNNING,
+    DownloadQueue,
+    download_command,
+    parse_file_line,
+    parse_progress_line,
+)
+
+DEFAULT_PARALLEL = 2
+MAX_PARALLEL = 4
+OFFLINE_POLL_SECONDS = 10.0
+SAVE_INTERVAL_SECONDS = 2.0
+
+# Messaggi di yt-dlp che indicano un problema di connessione (non del video)
+NETWORK_ERROR_HINTS = (
+    "Temporary failure in name resolution",
+    "Network is unreachable",
+    "getaddrinfo",
+)
+
+
+def looks_like_network_error(text):
+    return any(hint in text for hint in NETWORK_ERROR_HINTS)
+
+
+class DownloadManager(QObject):
+    """
+    Scheduler thread + one worker thread per running job. Queue changes are
+    saved (batched) so a restart resumes where it stopped.
+    """
+
+    job_started = pyqtSignal(str, str)  # job id, title
+    job_progress = pyqtSignal(str, float)  # job id, percent
+    # job id, ok, final path (ok) or error message; only for the final outcome
+    job_finished = pyqtSignal(str, bool, str)
+    # queued, running, failed
+    queue_changed = pyqtSignal(int, int, int)
+
+    def __init__(self, queue=None, pipeline=None, parent=None):
+        super().__init__(parent)
+        self.queue = queue or DownloadQueue()
+        self.pipeline = pipeline or DownloadPipeline()
+        self._ytdlp = shutil.which("yt-dlp") or "yt-dlp"
+        self._cond = threading.Condition()
+        self._max_parallel = DEFAULT_PARALLEL
+        self._processes = {}
+        self._cancelled = set()
+        self._running = 0
+        self._dirty = False
+        self._stopping = False
+        self._thread = None
+
+    # --- API (GUI thread) ---
+    def start(self):
+        if self._thread is None:
+            self.pipeline.start()
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+            self._emit_counts()
+
+    def shutdown(self):
+        """Stops the scheduler and kills running downloads; they resume at the next start."""
+        with self._cond:
+            self._stopping = True
+            processes = list(self._processes.values())
+            self._cond.notify_all()
+        for process in processes:
+            process.kill()
+        self.pipeline.stop()
+        self.queue.save()
+
+    def set_max_parallel(self, count):
+        with self._cond:
+            self._max_parallel = max(1, min(MAX_PARALLEL, int(count)))
+            self._cond.notify_all()
+
+    def enqueue(self, query, output_template, title="", artist="", art_id="", source_id=""):
+        """Returns the job id, or None if that download is already queued."""
+        job = self.queue.add(query, output_template, title, artist, art_id, source_id)
+        if job is None:
+            return None
+        self._changed()
+        return job.job_id
+
+    def enqueue_many(self, items):
+        """
+        items: iterable of (query, output_template[, title, artist, art_id,
+        source_id]) tuples. Returns one entry per item, in order: the new job
+        id, or None if that download was already queued.
+        """
+        jobs = [self.queue.add(*item) for item in items]
+        ids = [job.job_id if job is not None else None for job in jobs]
+        if any(ids):
+            self._changed()
+        return ids
+
+    def cancel(self, job_id):
+        job = self.queue.remove(job_id)
+        if job is None:
+            return
+        with self._cond:
+            process = self._processes.get(job_id)
+            if job.state == RUNNING:
+                # Anche senza processo (yt-dlp non ancora avviato): _download lo controlla
+                self._cancelled.add(job_id)
+        if process is not None:
+            process.kill()
+        self._changed()
+        self.job_finished.emit(job_id, False, "Cancelled")
+
+    def retry(self, job_id):
+        if self.queue.retry(job_id):
+            self._changed()
+
+    def job(self, job_id):
+        return self.queue.get(job_id)
+
+    # --- Scheduler thread ---
+    def _changed(self):
+        with self._cond:
+            self._dirty = True
+            self._cond.notify_all()
+        self._emit_counts()
+
+    def _emit_counts(self):
+        counts = self.queue.counts()
+        self.queue_changed.emit(counts["queued"], counts["running"], counts["failed"])
+
+    def _run(self):
+        last_save = 0.0
+        while True:
+            save = False
+            with self._cond:
+                if self._stopping:
+                    return
+                online = get_connectivity_monitor().is_online()
+                while online and self._running < self._max_parallel:
+                    job = self.queue.take_ready(time.time())
+                    if job is None:
+                        break
+                    self._running += 1
+                    self._dirty = True
+                    threading.Thread(target=self._work, args=(job,), daemon=True).start()
+
+                timeout = None
+                if not online:
+                    timeout = OFFLINE_POLL_SECONDS
+                elif self._running < self._max_parallel:
+                    timeout = self.queue.next_wakeup(time.time())
+                if self._dirty:
+                    save_in = last_save + SAVE_INTERVAL_SECONDS - time.monotonic()
+                    if save_in <= 0:
+                        self._dirty = False
+                        save = True
+                    else:
+                        timeout = save_in if timeout is None else min(timeout, save_in)
+                if not save:
+                    self._cond.wait(timeout)
+            if save:
+                # Scrittura fuori dal lock: migliaia di job non bloccano i worker
+                self.queue.save()
+                last_save = time.monotonic()
+
+    # --- Worker threads ---
+    def _work(self, job):
+        self.job_started.emit(job.job_id, job.title)
+        self._emit_counts()
+        try:
+            ok, final_path, error, network_error = self._download(job)
+        except Exception as e:
+            ok, final_path, error, network_error = False, "", str(e), False
+
+        with self._cond:
+            self._processes.pop(job.job_id, None)
+            cancelled = job.job_id in self._cancelled
+            self._cancelled.discard(job.job_id)
+            stopping = self._stopping
+
+        monitor = get_connectivity_monitor()
+        if ok:
+            monitor.record_success()
+        elif network_error:
+            monitor.record_failure()
+
+        if cancelled or (stopping and not ok):
+            state = None  # annullato, o interrotto: riparte al prossimo avvio
+        else:
+            state = self.queue.finish(job.job_id, time.time(), ok, final_path, error)
+        if state == DONE:
+            # Registrato nella pipeline prima dell'evento: sopravvive a un crash
+            self.pipeline.submit(final_path, job.title, job.artist, job.art_id, job.source_id)
+            self.job_finished.emit(job.job_id, True, final_path)
+        elif state == QUEUED:
+            print(f"[DownloadManager] {job.title or job.query}: retry scheduled ({error})")
+        elif state is not None:
+            self.job_finished.emit(job.job_id, False, error or "Download failed")
+
+        with self._cond:
+            self._running -= 1
+            self._dirty = True
+            self._cond.notify_all()
+        self._emit_counts()
+
+    def _download(self, job):
+        """Runs yt-dlp once: (ok, final path, error text, network error)."""
+        process = subprocess.Popen(
+            download_command(job, self._ytdlp),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            text=True,
+            bufsize=1,
+        )
+        with self._cond:
+            self._processes[job.job_id] = process
+            if self._stopping or job.job_id in self._cancelled:
+                process.kill()
+
+        final_path = ""
+        last_error = ""
+        network_error = False
+        last_percent = -1
+        for line in process.stdout:
+            percent = parse_progress_line(line)
+            if percent is not None:
+                # Solo quando cambia il punto percentuale: niente raffiche di segnali
+                if int(percent) != last_percent:
+                    last_percent = int(percent)
+                    self.job_progress.emit(job.job_id, percent)
+                continue
+            path = parse_file_line(line)
+            if path:
+                final_path = path
+                continue
+            if looks_like_network_error(line):
+                network_error = True
+            if line.startswith("ERROR:"):
+                last_error = line[len("ERROR:"):].strip()
+        returncode = process.wait()
+
+        if returncode == 0 and not final_path:
+            # Versioni vecchie di yt-dlp senza after_move: il file atteso è l'mp3
+            final_path = job.output_template.replace("%(ext)s", "mp3")
+        ok = returncode == 0 and os.path.isfile(final_path)
+        if not ok and not last_error:
+            last_error = "Network error. Check connection." if network_error else "Download failed."
+        return ok, final_path, last_error, network_error
+
+
+_shared_manager = None
+
+
+def get_download_manager():
+    """Process-wide download manager. The first call must happen on the GUI thread."""
+    global _shared_manager
+    if _shared_manager is None:
+        _shared_manager = DownloadManager()
+    return _shared_manager
@@ -0,0 +1,248 @@
+# backend/download_queue.py
+"""
+Persistent queue of yt-dlp download jobs: survives restarts, schedules
+retries with exponential backoff, and parses yt-dlp's templated output.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import uuid
+from collections import OrderedDict
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+DEFAULT_QUEUE_PATH = Path(__file__).resolve().parents[1] / "music" / "download_queue.json"
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+MAX_ATTEMPTS = 5
+BACKOFF_BASE_SECONDS = 15.0
+BACKOFF_MAX_SECONDS = 600.0
+
+# Righe emesse da --progress-template / --print (vedi download_command)
+PROGRESS_PREFIX = "[dl-progress]"
+FILE_PREFIX = "[dl-file]"
+PROGRESS_TEMPLATE = (
+    "download:" + PROGRESS_PREFIX + " %(progress.downloaded_bytes)s"
+    " %(progress.total_bytes)s %(progress.total_bytes_estimate)s"
+)
+FILE_TEMPLATE = "after_move:" + FILE_PREFIX + " %(filepath)s"
+
+# Errori per cui riprovare non serve
+PERMANENT_ERROR_HINTS = (
+    "Video unavailable",
+    "Private video",
+    "Unsupported URL",
+    "copyright",
+    "This video is not available",
+)
+
+
+@dataclass
+class DownloadJob:
+    job_id: str
+    query: str
+    output_template: str
+    title: str = ""
+    artist: str = ""
+    art_id: str = ""  # copertina già in ArtStore (brano in riproduzione)
+    source_id: str = ""  # id del video, per non riscaricarlo
+    state: str = QUEUED
+    attempts: int = 0
+    next_attempt_at: float = 0.0  # time.time(): vale anche dopo un riavvio
+    error: str = ""
+    final_path: str = ""
+
+
+def backoff_delay(attempts: int) -> float:
+    """Seconds to wait before attempt number `attempts + 1`."""
+    return min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** max(0, attempts - 1))
+
+
+def _pending_key(job: DownloadJob) -> tuple[str, str]:
+    return job.query, job.output_template
+
+
+def is_permanent_error(text: str) -> bool:
+    return any(hint in text for hint in PERMANENT_ERROR_HINTS)
+
+
+def download_command(job: DownloadJob, ytdlp="yt-dlp") -> list[str]:
+    return [
+        ytdlp,
+        "--extract-audio",
+        "--audio-format", "mp3",
+        "--audio-quality", "0",  # Best quality
+        "--output", job.output_template,
+        "--no-playlist",
+        "--default-search", "ytsearch",
+        # --print implica --quiet: --progress rimette l'avanzamento, una riga per aggiornamento
+        "--progress", "--newline",
+        "--progress-template", PROGRESS_TEMPLATE,
+        "--print", FILE_TEMPLATE,
+        job.query,
+    ]
+
+
+def _number(text):
+    try:
+        return float(text)
+    except ValueError:
+        return None  # yt-dlp scrive "NA" per i campi sconosciuti
+
+
+def parse_progress_line(line: str) -> float | None:
+    """Percent (0-100) from a PROGRESS_TEMPLATE line, None for any other line."""
+    if not line.startswith(PROGRESS_PREFIX):
+        return None
+    parts = line[len(PROGRESS_PREFIX):].split()
+    if len(parts) != 3:
+        return None
+    downloaded, total, estimate = (_number(part) for part in parts)
+    total = total or estimate
+    if downloaded is None or not total:
+        return None
+    return max(0.0, min(100.0, downloaded * 100.0 / total))
+
+
+def parse_file_line(line: str) -> str | None:
+    """Final path from a FILE_TEMPLATE line (after conversion and move)."""
+    if line.startswith(FILE_PREFIX):
+        return line[len(FILE_PREFIX):].strip() or None
+    return None
+
+
+class DownloadQueue:
+    """
+    Jobs in FIFO order, stored as JSON. Completed jobs are dropped; failed
+    ones stay (state "failed") until retried or cancelled. Thread-safe.
+    """
+
+    def __init__(self, path=DEFAULT_QUEUE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._jobs: OrderedDict[str, DownloadJob] = OrderedDict()
+        # (query, output_template) -> job_id dei job in coda o in corso
+        self._pending: dict[tuple[str, str], str] = {}
+        self._load()
+
+    def _load(self):
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"[DownloadQueue] Could not read {self.path}: {e}")
+            return
+        known = {field.name for field in fields(DownloadJob)}
+        for item in data.get("jobs", []):
+            try:
+                job = DownloadJob(**{k: v for k, v in item.items() if k in known})
+            except TypeError:
+                continue
+            if job.state == RUNNING:
+                # Interrotto dallo spegnimento: yt-dlp riprende dal file .part
+                job.state = QUEUED
+            self._jobs[job.job_id] = job
+            if job.state == QUEUED:
+                self._pending.setdefault(_pending_key(job), job.job_id)
+
+    def save(self) -> None:
+        with self._lock:
+            data = {"jobs": [asdict(job) for job in self._jobs.values()]}
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps(data))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[DownloadQueue] Could not save {self.path}: {e}")
+
+    # --- Jobs ---
+    def add(self, query, output_template, title="", artist="", art_id="", source_id="") -> DownloadJob | None:
+        """New queued job, or None if the same download is already pending."""
+        with self._lock:
+            if (query, output_template) in self._pending:
+                return None
+            job = DownloadJob(
+                uuid.uuid4().hex, query, output_template, title, artist, art_id, source_id
+            )
+            self._jobs[job.job_id] = job
+            self._pending[_pending_key(job)] = job.job_id
+            return job
+
+    def get(self, job_id) -> DownloadJob | None:
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def jobs(self) -> list[DownloadJob]:
+        with self._lock:
+            return list(self._jobs.values())
+
+    def counts(self) -> dict:
+        counts = {QUEUED: 0, RUNNING: 0, FAILED: 0}
+        with self._lock:
+            for job in self._jobs.values():
+                counts[job.state] = counts.get(job.state, 0) + 1
+        return counts
+
+    def take_ready(self, now: float) -> DownloadJob | None:
+        """First queued job whose backoff has expired, marked running."""
+        with self._lock:
+            for job in self._jobs.values():
+                if job.state == QUEUED and job.next_attempt_at <= now:
+                    job.state = RUNNING
+                    job.attempts += 1
+                    return job
+        return None
+
+    def next_wakeup(self, now: float) -> float | None:
+        """Seconds until the earliest waiting job becomes ready (None: nothing queued)."""
+        with self._lock:
+            times = [job.next_attempt_at for job in self._jobs.values() if job.state == QUEUED]
+        return max(0.0, min(times) - now) if times else None
+
+    def finish(self, job_id, now: float, ok: bool, final_path="", error="", retry=True) -> str:
+        """Record the outcome of a run; returns the new state (QUEUED means retry)."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None:
+                return DONE if ok else FAILED
+            if ok:
+                job.state = DONE
+                job.final_path = final_path
+                del self._jobs[job_id]
+                self._unpend(job)
+            elif retry and job.attempts < MAX_ATTEMPTS and not is_permanent_error(error):
+                job.state = QUEUED
+                job.error = error
+                job.next_attempt_at = now + backoff_delay(job.attempts)
+            else:
+                job.state = FAILED
+                job.error = error
+                self._unpend(job)
+            return job.state
+
+    def retry(self, job_id) -> bool:
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if job is None or job.state != FAILED:
+                return False
+            job.state, job.attempts, job.next_attempt_at, job.error = QUEUED, 0, 0.0, ""
+            self._pending.setdefault(_pending_key(job), job.job_id)
+            return True
+
+    def remove(self, job_id) -> DownloadJob | None:
+        with self._lock:
+            job = self._jobs.pop(job_id, None)
+            if job is not None:
+                self._unpend(job)
+            return job
+
+    def _unpend(self, job):
+        key = _pending_key(job)
+        if self._pending.get(key) == job.job_id:
+            del self._pending[key]
@@ -0,0 +1,548 @@
+# backend/library_index.py
+"""Persistent music library index (SQLite) shared by the Qt and HTML UIs."""
+
+from __future__ import annotations
+
+import hashlib
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from concurrent.futures.process import BrokenProcessPool
+from pathlib import Path
+
+try:
+    from mutagen import File as MutagenFile
+except ImportError:  # pragma: no cover - mutagen is listed in requirements.txt
+    MutagenFile = None
+
+PROJECT_ROOT = Path(__file__).resolve().parents[1]
+DEFAULT_DB_PATH = PROJECT_ROOT / "music" / "library_index.sqlite3"
+
+AUDIO_EXTENSIONS = (
+    ".mp3", ".wav", ".ogg", ".flac", ".m4a",
+    ".aac", ".wma", ".opus", ".alac", ".aiff",
+)
+
+# Tag parsing is CPU bound (GIL): big imports are spread over processes,
+# one per core on the Pi. Small rescans stay in-process.
+MAX_WORKERS = min(4, os.cpu_count() or 1)
+PARALLEL_MIN_FILES = 64
+CHUNK_SIZE = 32  # files per worker task (amortizes the IPC round trip)
+BATCH_SIZE = 256  # rows per SQLite transaction while streaming results
+
+# Bump when the columns or the extraction logic change: the index is only a
+# cache, so an old one is simply dropped and rebuilt.
+SCHEMA_VERSION = 1
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracks (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    title TEXT NOT NULL DEFAULT '',
+    artist TEXT NOT NULL DEFAULT '',
+    album TEXT NOT NULL DEFAULT '',
+    duration REAL NOT NULL DEFAULT 0,
+    format TEXT NOT NULL DEFAULT '',
+    art_hash TEXT NOT NULL DEFAULT '',
+    indexed_at REAL NOT NULL DEFAULT 0
+)
+"""
+
+# Play counts survive index rebuilds (schema bumps only drop `tracks`)
+_PLAYS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plays (
+    path TEXT PRIMARY KEY,
+    count INTEGER NOT NULL DEFAULT 0,
+    last_played REAL NOT NULL DEFAULT 0
+)
+"""
+
+# Where downloaded files came from (e.g. YouTube video id), for deduplication
+_SOURCES_SCHEMA = """
+CREATE TABLE IF NOT EXISTS sources (
+    path TEXT PRIMARY KEY,
+    source_id TEXT NOT NULL
+)
+"""
+
+# Loudness analysis (slow to compute): kept across rebuilds, valid while
+# size/mtime match the file. NULL values mark files that could not be decoded.
+_LOUDNESS_SCHEMA = """
+CREATE TABLE IF NOT EXISTS loudness (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    integrated REAL,
+    true_peak REAL,
+    gain REAL,
+    analyzed_at REAL NOT NULL DEFAULT 0
+)
+"""
+
+TRACK_COLUMNS = ("path", "size", "mtime_ns", "title", "artist", "album",
+                 "duration", "format", "art_hash")
+
+# (ID3, MP4, Vorbis/FLAC) tag keys
+_TAG_KEYS = {
+    "title": ("TIT2", "\xa9nam", "title"),
+    "artist": ("TPE1", "\xa9ART", "artist"),
+    "album": ("TALB", "\xa9alb", "album"),
+}
+
+
+def is_audio_file(path: str) -> bool:
+    return path.lower().endswith(AUDIO_EXTENSIONS)
+
+
+def _first_tag(tags, keys) -> str:
+    for key in keys:
+        try:
+            value = tags.get(key)
+        except (KeyError, ValueError, TypeError):
+            value = None
+        if value is None:
+            continue
+        # ID3 frames expose .text, MP4/Vorbis return plain lists
+        value = getattr(value, "text", value)
+        if isinstance(value, (list, tuple)):
+            value = value[0] if value else ""
+        text = str(value).strip()
+        if text:
+            return text
+    return ""
+
+
+def _embedded_art(audio) -> bytes:
+    tags = audio.tags
+    if tags is not None and hasattr(tags, "getall"):  # ID3
+        for frame in tags.getall("APIC"):
+            if frame.data:
+                return frame.data
+    pictures = getattr(audio, "pictures", None)  # FLAC
+    if pictures:
+        return pictures[0].data
+    if tags is not None:
+        try:
+            covers = tags.get("covr")  # MP4
+        except (KeyError, ValueError, TypeError):
+            covers = None
+        if covers:
+            return bytes(covers[0])
+    return b""
+
+
+def read_track_metadata(path: str) -> dict:
+    """
+    Tags, duration, format and embedded-art hash of one file.
+    Missing tags fall back to the file name, unreadable files to empty values.
+    """
+    stem, ext = os.path.splitext(os.path.basename(path))
+    meta = {
+        "title": stem,
+        "artist": "",
+        "album": "",
+        "duration": 0.0,
+        "format": ext.lower().lstrip("."),
+        "art_hash": "",
+    }
+    if MutagenFile is None:
+        return meta
+    try:
+        audio = MutagenFile(path)
+    except Exception as e:
+        print(f"[LibraryIndex] Could not read {path}: {e}")
+        return meta
+    if audio is None:
+        return meta
+
+    info = getattr(audio, "info", None)
+    if info is not None:
+        meta["duration"] = float(getattr(info, "length", 0.0) or 0.0)
+    if audio.tags:
+        for field, keys in _TAG_KEYS.items():
+            meta[field] = _first_tag(audio.tags, keys) or meta[field]
+    art = _embedded_art(audio)
+    if art:
+        # Same content hash as art_store.art_id_for, so ids can be shared
+        meta["art_hash"] = hashlib.sha1(art).hexdigest()[:20]
+    return meta
+
+
+def extract_rows(reader, stale) -> list[tuple]:
+    """[(path, size, mtime_ns)] -> full rows in TRACK_COLUMNS order."""
+    rows = []
+    for path, size, mtime_ns in stale:
+        meta = reader(path)
+        rows.append((path, size, mtime_ns, meta["title"], meta["artist"], meta["album"],
+                     meta["duration"], meta["format"], meta["art_hash"]))
+    return rows
+
+
+def _default_extract(stale) -> list[tuple]:
+    # Module-level so it can be pickled into the worker processes
+    return extract_rows(read_track_metadata, stale)
+
+
+class ScanResult:
+    """Counts from one incremental scan."""
+
+    __slots__ = ("added", "updated", "removed", "unchanged")
+
+    def __init__(self, added=0, updated=0, removed=0, unchanged=0):
+        self.added = added
+        self.updated = updated
+        self.removed = removed
+        self.unchanged = unchanged
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.updated or self.removed)
+
+    def __repr__(self):
+        return (f"ScanResult(added={self.added}, updated={self.updated}, "
+                f"removed={self.removed}, unchanged={self.unchanged})")
+
+
+class LibraryIndex:
+    """
+    path -> (size, mtime, tags, duration, format, art hash).
+    Rescans only stat the tree; tags are re-read just for new files and files
+    whose size or mtime changed. Safe to use from several threads.
+    """
+
+    def __init__(self, db_path=DEFAULT_DB_PATH, reader=read_track_metadata, max_workers=MAX_WORKERS):
+        self.db_path = str(db_path)
+        self._reader = reader
+        self.max_workers = max_workers
+        self.batch_size = BATCH_SIZE
+        self._lock = threading.Lock()
+        # Incremented on every change, used by the UIs to skip useless redraws
+        self.generation = 0
+        if self.db_path != ":memory:":
+            Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        self._conn.row_factory = sqlite3.Row
+        self._init_schema()
+
+    def _init_schema(self):
+        with self._lock, self._conn:
+            version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+            if version != SCHEMA_VERSION:
+                self._conn.execute("DROP TABLE IF EXISTS tracks")
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(_SCHEMA)
+            self._conn.execute(_PLAYS_SCHEMA)
+            self._conn.execute(_LOUDNESS_SCHEMA)
+            self._conn.execute(_SOURCES_SCHEMA)
+            self._conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+
+    @staticmethod
+    def _prefix(root: str) -> str:
+        return os.path.join(os.path.abspath(root), "")
+
+    def _known_files(self, prefix: str) -> dict:
+        # Range query on the primary key: everything whose path starts with prefix
+        rows = self._conn.execute(
+            "SELECT path, size, mtime_ns FROM tracks WHERE path >= ? AND path < ?",
+            (prefix, prefix + "\U0010ffff"),
+        )
+        return {row["path"]: (row["size"], row["mtime_ns"]) for row in rows}
+
+    @staticmethod
+    def walk(root: str):
+        """Yields (path, size, mtime_ns) for every audio file under root."""
+        for dirpath, _, files in os.walk(root):
+            for name in files:
+                if not is_audio_file(name):
+                    continue
+                path = os.path.join(dirpath, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime_ns
+
+    def scan(self, root: str, progress=None) -> ScanResult:
+        """
+        Bring the rows under `root` in sync with the filesystem.
+        Re-read files are committed in batches as they come in, and
+        `progress(done, total)` is called (from this thread) after each one.
+        """
+        result, stale, removed = self._diff_tree(root)
+        self.apply([], removed)
+        self._read_and_store(stale, progress)
+        return result
+
+    def _diff_tree(self, root: str):
+        """(ScanResult, stale [(path, size, mtime_ns)], removed paths) for a subtree."""
+        prefix = self._prefix(root)
+        with self._lock:
+            known = self._known_files(prefix)
+
+        result = ScanResult()
+        stale = []
+        seen = set()
+        for path, size, mtime_ns in self.walk(os.path.abspath(root)):
+            seen.add(path)
+            previous = known.get(path)
+            if previous == (size, mtime_ns):
+                result.unchanged += 1
+                continue
+            if previous is None:
+                result.added += 1
+            else:
+                result.updated += 1
+            stale.append((path, size, mtime_ns))
+
+        removed = [path for path in known if path not in seen]
+        result.removed = len(removed)
+        return result, stale, removed
+
+    def _read_and_store(self, stale, progress=None):
+        done = 0
+        for rows in self._extract_batches(stale):
+            self.apply(rows)
+            done += len(rows)
+            if progress is not None:
+                progress(done, len(stale))
+
+    def refresh_paths(self, paths) -> list[tuple[str, str]]:
+        """
+        Incremental update for paths reported by the filesystem watcher.
+        Files are re-read only if size/mtime changed; a directory is diffed
+        as a subtree; a vanished path drops its row and anything below it.
+        Returns [(kind, path)] with kind in "added", "updated", "removed".
+        """
+        changes = []
+        stale = []
+        removed = []
+        handled = set()
+        # Sorted: a directory comes before the files below it, which it covers
+        for path in sorted({os.path.abspath(p) for p in paths}):
+            if path in handled:
+                continue
+            if os.path.isdir(path):
+                with self._lock:
+                    known = self._known_files(self._prefix(path))
+                _, tree_stale, tree_removed = self._diff_tree(path)
+                changes.extend(
+                    ("updated" if item[0] in known else "added", item[0]) for item in tree_stale
+                )
+                stale.extend(tree_stale)
+                removed.extend(tree_removed)
+                handled.update(item[0] for item in tree_stale)
+                handled.update(tree_removed)
+                continue
+
+            try:
+                stat = os.stat(path)
+            except OSError:
+                stat = None
+            previous = self.track(path)
+            if stat is None or not is_audio_file(path):
+                if previous is not None:
+                    removed.append(path)
+                if stat is None:
+                    # Potrebbe essere una cartella rimossa o spostata via
+                    with self._lock:
+                        below = list(self._known_files(self._prefix(path)))
+                    removed.extend(below)
+                    handled.update(below)
+                continue
+            if previous is not None and (previous["size"], previous["mtime_ns"]) == (
+                stat.st_size, stat.st_mtime_ns
+            ):
+                continue
+            changes.append(("updated" if previous is not None else "added", path))
+            stale.append((path, stat.st_size, stat.st_mtime_ns))
+
+        changes.extend(("removed", path) for path in removed)
+        self.apply([], removed)
+        self._read_and_store(stale)
+        return changes
+
+    def _extract_batches(self, stale):
+        """Yields lists of at most `batch_size` rows as the tag reads complete."""
+        if self.max_workers <= 1 or len(stale) < PARALLEL_MIN_FILES:
+            for start in range(0, len(stale), self.batch_size):
+                yield extract_rows(self._reader, stale[start:start + self.batch_size])
+            return
+
+        chunks = [stale[i:i + CHUNK_SIZE] for i in range(0, len(stale), CHUNK_SIZE)]
+        completed = set()
+        try:
+            for rows in self._extract_parallel(chunks):
+                completed.update(row[0] for row in rows)
+                yield rows
+        except (BrokenProcessPool, OSError) as e:
+            # es. /dev/shm non disponibile: si ripiega sulla lettura sequenziale
+            print(f"[LibraryIndex] Worker pool unavailable ({e}), reading sequentially.")
+            remaining = [item for item in stale if item[0] not in completed]
+            for start in range(0, len(remaining), self.batch_size):
+                yield extract_rows(self._reader, remaining[start:start + self.batch_size])
+
+    def _make_pool(self):
+        if self._reader is read_track_metadata:
+            # forkserver: niente fork() di un processo con thread Qt attivi
+            context = multiprocessing.get_context("forkserver")
+            return ProcessPoolExecutor(self.max_workers, mp_context=context), _default_extract
+        # Custom readers (tests, tools) may not be picklable: use threads
+        reader = self._reader
+        return ThreadPoolExecutor(self.max_workers), lambda chunk: extract_rows(reader, chunk)
+
+    def _extract_parallel(self, chunks):
+        pool, extract = self._make_pool()
+        with pool:
+            queue = iter(chunks)
+            in_flight = set()
+            # Bounded submission: at most two chunks queued per worker
+            for chunk in queue:
+                in_flight.add(pool.submit(extract, chunk))
+                if len(in_flight) >= self.max_workers * 2:
+                    break
+            batch = []
+            while in_flight:
+                finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    batch.extend(future.result())
+                    next_chunk = next(queue, None)
+                    if next_chunk is not None:
+                        in_flight.add(pool.submit(extract, next_chunk))
+                while len(batch) >= self.batch_size:
+                    yield batch[:self.batch_size]
+                    batch = batch[self.batch_size:]
+            if batch:
+                yield batch
+
+    def apply(self, rows, removed_paths=()):
+        """Upsert full rows (TRACK_COLUMNS order) and drop removed paths."""
+        if not rows and not removed_paths:
+            return
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO tracks ({', '.join(TRACK_COLUMNS)}, indexed_at) "
+                f"VALUES ({', '.join('?' * len(TRACK_COLUMNS))}, ?)",
+                [tuple(row) + (now,) for row in rows],
+            )
+            self._conn.executemany(
+                "DELETE FROM tracks WHERE path = ?", [(p,) for p in removed_paths]
+            )
+            self.generation += 1
+
+    def tracks(self, root: str) -> list[dict]:
+        """All indexed tracks under root, ordered by path (case-insensitive)."""
+        prefix = self._prefix(root)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {', '.join(TRACK_COLUMNS)} FROM tracks "
+                "WHERE path >= ? AND path < ? ORDER BY path COLLATE NOCASE",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def track(self, path: str) -> dict | None:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {', '.join(TRACK_COLUMNS)} FROM tracks WHERE path = ?",
+                (os.path.abspath(path),),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def record_play(self, path: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT INTO plays (path, count, last_played) VALUES (?, 1, ?) "
+                "ON CONFLICT(path) DO UPDATE SET count = count + 1, last_played = excluded.last_played",
+                (os.path.abspath(path), time.time()),
+            )
+
+    def play_counts(self) -> dict:
+        with self._lock:
+            rows = self._conn.execute("SELECT path, count FROM plays").fetchall()
+        return {row["path"]: row["count"] for row in rows}
+
+    def record_source(self, path: str, source_id: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO sources (path, source_id) VALUES (?, ?)",
+                (os.path.abspath(path), source_id),
+            )
+
+    def source_ids(self, root: str) -> set:
+        """Source ids of the downloads still present under root."""
+        prefix = self._prefix(root)
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT s.source_id FROM sources s JOIN tracks t ON t.path = s.path "
+                "WHERE s.path >= ? AND s.path < ?",
+                (prefix, prefix + "\U0010ffff"),
+            ).fetchall()
+        return {row["source_id"] for row in rows}
+
+    def loudness_pending(self, limit: int = 100) -> list[tuple[str, int, int]]:
+        """(path, size, mtime_ns) of indexed tracks without an up-to-date analysis."""
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT t.path, t.size, t.mtime_ns FROM tracks t "
+                "LEFT JOIN loudness l ON l.path = t.path "
+                "WHERE l.path IS NULL OR l.size != t.size OR l.mtime_ns != t.mtime_ns "
+                "ORDER BY t.path LIMIT ?",
+                (limit,),
+            ).fetchall()
+        return [(row["path"], row["size"], row["mtime_ns"]) for row in rows]
+
+    def loudness_counts(self) -> tuple[int, int]:
+        """(analyzed, total) indexed tracks."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*), COUNT(l.path) FROM tracks t LEFT JOIN loudness l "
+                "ON l.path = t.path AND l.size = t.size AND l.mtime_ns = t.mtime_ns"
+            ).fetchone()
+        return row[1], row[0]
+
+    def store_loudness(self, path, size, mtime_ns, integrated=None, true_peak=None, gain=None):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO loudness "
+                "(path, size, mtime_ns, integrated, true_peak, gain, analyzed_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (path, size, mtime_ns, integrated, true_peak, gain, time.time()),
+            )
+
+    def loudness(self, path: str) -> dict | None:
+        """Stored analysis of `path` if it matches the indexed file, else None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT l.integrated, l.true_peak, l.gain FROM loudness l "
+                "JOIN tracks t ON t.path = l.path AND t.size = l.size AND t.mtime_ns = l.mtime_ns "
+                "WHERE l.path = ? AND l.gain IS NOT NULL",
+                (os.path.abspath(path),),
+            ).fetchone()
+        return dict(row) if row is not None else None
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+_shared_index = None
+_shared_index_lock = threading.Lock()
+
+
+def get_library_index() -> LibraryIndex:
+    """Process-wide index stored in music/library_index.sqlite3."""
+    global _shared_index
+    with _shared_index_lock:
+        if _shared_index is None:
+            _shared_index = LibraryIndex()
+        return _shared_index
@@ -0,0 +1,66 @@
+# backend/library_scanner.py
+"""Background rescans of the library index, shared by the Qt and HTML UIs."""
+
+import os
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .library_index import get_library_index
+
+
+class LibraryScanner(QObject):
+    """
+    Runs `LibraryIndex.scan` in a daemon thread. Requests for a root that is
+    already being scanned are coalesced into one follow-up scan.
+    """
+
+    # (root, changed): emitted from the scan thread, delivered queued to the GUI
+    scan_finished = pyqtSignal(str, bool)
+    # (root, done, total): files re-read so far, emitted after each committed batch
+    scan_progress = pyqtSignal(str, int, int)
+
+    def __init__(self, index=None, parent=None):
+        super().__init__(parent)
+        self.index = index or get_library_index()
+        self._lock = threading.Lock()
+        self._running = set()
+        self._pending = set()
+
+    def request_scan(self, root):
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self._running:
+                self._pending.add(root)
+                return
+            self._running.add(root)
+        threading.Thread(target=self._scan_thread, args=(root,), daemon=True).start()
+
+    def _scan_thread(self, root):
+        while True:
+            changed = False
+            try:
+                result = self.index.scan(
+                    root, progress=lambda done, total: self.scan_progress.emit(root, done, total)
+                )
+                changed = result.changed
+                print(f"[LibraryScanner] {root}: {result}")
+            except Exception as e:
+                print(f"[LibraryScanner] Scan of {root} failed: {e}")
+            self.scan_finished.emit(root, changed)
+            with self._lock:
+                if root not in self._pending:
+                    self._running.discard(root)
+                    return
+                self._pending.discard(root)
+
+
+_shared_scanner = None
+
+
+def get_library_scanner():
+    """Process-wide scanner. The first call must happen on the GUI thread."""
+    global _shared_scanner
+    if _shared_scanner is None:
+        _shared_scanner = LibraryScanner()
+    return _shared_scanner
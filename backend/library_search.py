@@ -0,0 +1,121 @@
+# backend/library_search.py
+"""Prefix search over the library (title, artist, album, file name)."""
+
+from __future__ import annotations
+
+import heapq
+import math
+import os
+import re
+import unicodedata
+from bisect import bisect_left
+
+# Peso del campo: un match nel titolo conta più di uno nel nome file
+FIELD_WEIGHTS = (
+    ("title", 10.0),
+    ("artist", 8.0),
+    ("album", 4.0),
+    ("filename", 2.0),
+)
+PREFIX_FACTOR = 0.6  # "bohem" -> "bohemian" vale meno di un token completo
+PLAY_COUNT_WEIGHT = 1.5
+# Prefissi corti selezionano metà libreria: i loro risultati sono precalcolati
+PRECOMPUTED_PREFIX_LEN = 2
+DEFAULT_LIMIT = 100
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize(text: str) -> str:
+    """Casefolded, accent-folded text ("Beyoncé" -> "beyonce")."""
+    decomposed = unicodedata.normalize("NFKD", text or "")
+    return "".join(ch for ch in decomposed if not unicodedata.combining(ch)).casefold()
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(normalize(text))
+
+
+class LibrarySearchIndex:
+    """
+    Inverted index token -> {doc: weight} plus a sorted vocabulary for
+    prefix ranges. Documents are the track dicts of LibraryIndex.tracks.
+    """
+
+    def __init__(self, tracks, play_counts=None):
+        self.tracks = list(tracks)
+        # Riferimento condiviso: i nuovi ascolti pesano subito nel ranking
+        self.play_counts = play_counts if play_counts is not None else {}
+        self._postings: dict[str, dict[int, float]] = {}
+        self._short_prefixes: dict[str, dict[int, float]] = {}
+
+        for doc, track in enumerate(self.tracks):
+            fields = {
+                "title": track.get("title", ""),
+                "artist": track.get("artist", ""),
+                "album": track.get("album", ""),
+                "filename": os.path.splitext(os.path.basename(track["path"]))[0],
+            }
+            for field, weight in FIELD_WEIGHTS:
+                for token in tokenize(fields[field]):
+                    postings = self._postings.setdefault(token, {})
+                    if postings.get(doc, 0.0) < weight:
+                        postings[doc] = weight
+                    for length in range(1, PRECOMPUTED_PREFIX_LEN + 1):
+                        prefix = token[:length]
+                        score = weight if prefix == token else weight * PREFIX_FACTOR
+                        short = self._short_prefixes.setdefault(prefix, {})
+                        if short.get(doc, 0.0) < score:
+                            short[doc] = score
+        self._vocabulary = sorted(self._postings)
+
+    def __len__(self) -> int:
+        return len(self.tracks)
+
+    def _match(self, token: str) -> dict[int, float]:
+        """doc -> best weight for a query token used as a prefix."""
+        if len(token) <= PRECOMPUTED_PREFIX_LEN:
+            return self._short_prefixes.get(token, {})
+        matches: dict[int, float] = {}
+        start = bisect_left(self._vocabulary, token)
+        for word in self._vocabulary[start:]:
+            if not word.startswith(token):
+                break
+            factor = 1.0 if word == token else PREFIX_FACTOR
+            for doc, weight in self._postings[word].items():
+                score = weight * factor
+                if matches.get(doc, 0.0) < score:
+                    matches[doc] = score
+        return matches
+
+    def search(self, query: str, limit: int = DEFAULT_LIMIT) -> list[dict]:
+        """
+        Tracks matching every query token (as a prefix), best first:
+        field/exactness score plus a bonus for frequently played tracks.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        # Parti dal token più selettivo, poi interseca
+        per_token = sorted((self._match(token) for token in tokens), key=len)
+        if not per_token[0]:
+            return []
+        scores = dict(per_token[0])
+        for matches in per_token[1:]:
+            scores = {doc: score + matches[doc] for doc, score in scores.items() if doc in matches}
+            if not scores:
+                return []
+
+        play_counts = self.play_counts
+        tracks = self.tracks
+
+        def rank(item):
+            doc, score = item
+            plays = play_counts.get(tracks[doc]["path"], 0)
+            if plays:
+                score += PLAY_COUNT_WEIGHT * math.log1p(plays)
+            # A parità di punteggio: ordine alfabetico del percorso
+            return score, -doc
+
+        best = heapq.nlargest(limit, scores.items(), key=rank)
+        return [tracks[doc] for doc, _ in best]
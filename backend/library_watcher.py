@@ -0,0 +1,203 @@
+# backend/library_watcher.py
+"""Live library updates: inotify events -> incremental index changes."""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .library_index import get_library_index
+
+# <sys/inotify.h>
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+    | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR
+)
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+# Una copia di massa genera centinaia di eventi: si aspetta che si calmino,
+# ma senza rimandare all'infinito l'aggiornamento della lista.
+DEBOUNCE_SECONDS = 0.75
+MAX_DELAY_SECONDS = 5.0
+
+
+def _load_libc():
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1  # noqa: B018 - raises AttributeError off Linux
+    except (OSError, AttributeError):
+        return None
+    libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+    return libc
+
+
+class LibraryWatcher(QObject):
+    """
+    Watches music directories (recursively) with inotify. Create/modify/move/
+    delete events are debounced, applied to the library index with
+    `refresh_paths`, and the resulting row changes are emitted.
+    """
+
+    # [(kind, path)] with kind in "added", "updated", "removed"
+    library_changed = pyqtSignal(list)
+
+    def __init__(self, index=None, parent=None):
+        super().__init__(parent)
+        self.index = index or get_library_index()
+        self._libc = _load_libc()
+        self._fd = -1
+        self._lock = threading.Lock()
+        self._wd_paths = {}
+        self._roots = set()
+        self._thread = None
+        self._stopping = False
+        self._wake_r, self._wake_w = os.pipe()
+
+        if self._libc is not None:
+            self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            print("[LibraryWatcher] inotify not available, live library updates disabled.")
+
+    @property
+    def available(self):
+        return self._fd >= 0
+
+    def is_watching(self, root):
+        with self._lock:
+            return self.available and os.path.abspath(root) in self._roots
+
+    def watch(self, root):
+        if not self.available:
+            return False
+        root = os.path.abspath(root)
+        with self._lock:
+            if root in self._roots:
+                return True
+            self._roots.add(root)
+        self._add_tree(root)
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._event_loop, daemon=True)
+            self._thread.start()
+        print(f"[LibraryWatcher] Watching {root}")
+        return True
+
+    def stop(self):
+        self._stopping = True
+        os.write(self._wake_w, b"x")
+
+    # --- Internals (watcher thread) ---
+    def _add_watch(self, path):
+        wd = self._libc.inotify_add_watch(self._fd, os.fsencode(path), WATCH_MASK)
+        if wd < 0:
+            err = ctypes.get_errno()
+            print(f"[LibraryWatcher] Cannot watch {path}: {os.strerror(err)}")
+            return
+        with self._lock:
+            self._wd_paths[wd] = path
+
+    def _add_tree(self, root):
+        for dirpath, _, _ in os.walk(root):
+            self._add_watch(dirpath)
+
+    def _read_events(self):
+        """Yields (mask, path) for every queued event."""
+        try:
+            data = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _, name_len = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + name_len].rstrip(b"\0")
+            offset += name_len
+            with self._lock:
+                if mask & IN_IGNORED:
+                    self._wd_paths.pop(wd, None)
+                    continue
+                directory = self._wd_paths.get(wd)
+            if mask & IN_Q_OVERFLOW:
+                yield mask, None
+            elif directory is not None:
+                yield mask, os.path.join(directory, os.fsdecode(name)) if name else directory
+
+    def _event_loop(self):
+        dirty = set()
+        first_event = last_event = 0.0
+        while not self._stopping:
+            timeout = None
+            if dirty:
+                now = time.monotonic()
+                timeout = max(0.0, min(last_event + DEBOUNCE_SECONDS,
+                                       first_event + MAX_DELAY_SECONDS) - now)
+            readable, _, _ = select.select([self._fd, self._wake_r], [], [], timeout)
+            if self._wake_r in readable:
+                os.read(self._wake_r, 64)
+                continue
+
+            if self._fd in readable:
+                for mask, path in self._read_events():
+                    if path is None:
+                        # Coda del kernel piena: si ricontrollano le radici (solo stat)
+                        with self._lock:
+                            dirty.update(self._roots)
+                    elif mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                        dirty.add(path)
+                    elif mask & IN_ISDIR:
+                        if mask & (IN_CREATE | IN_MOVED_TO):
+                            self._add_tree(path)
+                        dirty.add(path)
+                    elif mask & (IN_CLOSE_WRITE | IN_MOVED_TO | IN_MOVED_FROM | IN_DELETE):
+                        # IN_CREATE dei file si ignora: si aspetta la chiusura dopo la scrittura
+                        dirty.add(path)
+                now = time.monotonic()
+                if dirty and not first_event:
+                    first_event = now
+                last_event = now
+
+            now = time.monotonic()
+            if dirty and (now - last_event >= DEBOUNCE_SECONDS
+                          or now - first_event >= MAX_DELAY_SECONDS):
+                self._flush(dirty)
+                dirty = set()
+                first_event = 0.0
+
+    def _flush(self, paths):
+        try:
+            changes = self.index.refresh_paths(paths)
+        except Exception as e:
+            print(f"[LibraryWatcher] Index update failed: {e}")
+            return
+        if changes:
+            print(f"[LibraryWatcher] {len(changes)} library change(s)")
+            self.library_changed.emit(changes)
+
+
+_shared_watcher = None
+
+
+def get_library_watcher():
+    """Process-wide watcher. The first call must happen on the GUI thread."""
+    global _shared_watcher
+    if _shared_watcher is None:
+        _shared_watcher = LibraryWatcher()
+    return _shared_watcher
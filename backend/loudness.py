@@ -0,0 +1,296 @@
+# backend/loudness.py
+"""
+Background loudness analysis of the library (EBU R128 / ITU-R BS.1770):
+integrated loudness, true peak and ReplayGain 2.0 track gain, stored in the
+library index so playback never has to analyze anything.
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import subprocess
+import threading
+import time
+from functools import lru_cache
+
+from PyQt6.QtCore import QObject, pyqtSignal, pyqtSlot
+
+from .audio_probe import probe_stream
+from .library_index import get_library_index
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is listed in requirements.txt
+    np = None
+
+try:
+    import psutil
+except ImportError:  # pragma: no cover - psutil is listed in requirements.txt
+    psutil = None
+
+# I coefficienti BS.1770 sono definiti a 48 kHz: si decodifica direttamente lì
+SAMPLE_RATE = 48000
+CHUNK_FRAMES = SAMPLE_RATE  # 1 s per lettura
+REFERENCE_LUFS = -18.0  # ReplayGain 2.0
+BLOCK_HOPS = 4  # blocchi da 400 ms con 75% di sovrapposizione
+HOP_FRAMES = SAMPLE_RATE // 10
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+FIR_TAPS = 4096  # risposta all'impulso del K-weighting, troncata sotto -120 dB
+OVERSAMPLE = 4  # true peak
+OVERSAMPLE_TAPS = 48 * OVERSAMPLE
+
+# BS.1770-4, 48 kHz: shelving (testa) + high-pass RLB
+_SHELF = ((1.53512485958697, -2.69169618940638, 1.19839281085285),
+          (1.0, -1.69065929318241, 0.73248077421585))
+_HIGHPASS = ((1.0, -2.0, 1.0),
+             (1.0, -1.99004745483398, 0.99007225036621))
+
+# Quando analizzare: auto ferma (o in carica) e sistema scarico
+IDLE_POLL_SECONDS = 10.0
+RESCAN_SECONDS = 300.0
+SPEED_STALE_SECONDS = 10.0
+MAX_LOAD_PER_CPU = 0.75
+PENDING_BATCH = 50
+
+
+def _biquad_impulse(coefficients, signal):
+    (b0, b1, b2), (_, a1, a2) = coefficients
+    out = [0.0] * len(signal)
+    x1 = x2 = y1 = y2 = 0.0
+    for i, x in enumerate(signal):
+        y = b0 * x + b1 * x1 + b2 * x2 - a1 * y1 - a2 * y2
+        out[i] = y
+        x2, x1, y2, y1 = x1, x, y1, y
+    return out
+
+
+@lru_cache(maxsize=1)
+def k_weighting_ir():
+    """K-weighting as a FIR: impulse response of the two BS.1770 biquads (computed once)."""
+    impulse = [1.0] + [0.0] * (FIR_TAPS - 1)
+    return np.asarray(_biquad_impulse(_HIGHPASS, _biquad_impulse(_SHELF, impulse)))
+
+
+@lru_cache(maxsize=1)
+def oversampling_ir():
+    """Windowed-sinc low-pass for 4x interpolation (unity gain after zero stuffing)."""
+    n = np.arange(OVERSAMPLE_TAPS) - (OVERSAMPLE_TAPS - 1) / 2
+    return np.sinc(n / OVERSAMPLE) * np.hanning(OVERSAMPLE_TAPS)
+
+
+class StreamingFir:
+    """FFT overlap-add convolution of (frames, channels) blocks, state kept across calls."""
+
+    def __init__(self, ir, channels):
+        self._ir = ir
+        self._tail = np.zeros((len(ir) - 1, channels))
+        self._spectra = {}
+
+    def process(self, block):
+        frames = len(block)
+        taps = len(self._ir)
+        size = 1 << (frames + taps - 2).bit_length()
+        spectrum = self._spectra.get(size)
+        if spectrum is None:
+            spectrum = self._spectra[size] = np.fft.rfft(self._ir, size)[:, None]
+        out = np.fft.irfft(np.fft.rfft(block, size, axis=0) * spectrum, size, axis=0)
+        out = out[:frames + taps - 1]
+        out[:taps - 1] += self._tail
+        self._tail = out[frames:].copy()
+        return out[:frames]
+
+
+class LoudnessMeter:
+    """Feed float blocks (frames, channels) at 48 kHz, then read `result()`."""
+
+    def __init__(self, channels):
+        self.channels = channels
+        self._weighting = StreamingFir(k_weighting_ir(), channels)
+        self._interpolator = StreamingFir(oversampling_ir(), channels)
+        self._hop_energy = []
+        self._partial = np.zeros(0)
+        self._peak = 0.0
+
+    def feed(self, block):
+        # Energia K-pesata, somma sui canali (G = 1 per L/R)
+        power = np.square(self._weighting.process(block)).sum(axis=1)
+        power = np.concatenate((self._partial, power))
+        hops = len(power) // HOP_FRAMES
+        if hops:
+            self._hop_energy.extend(power[:hops * HOP_FRAMES].reshape(hops, HOP_FRAMES).sum(axis=1))
+        self._partial = power[hops * HOP_FRAMES:]
+
+        stuffed = np.zeros((len(block) * OVERSAMPLE, self.channels))
+        stuffed[::OVERSAMPLE] = block
+        peak = np.abs(self._interpolator.process(stuffed)).max(initial=0.0)
+        self._peak = max(self._peak, peak, np.abs(block).max(initial=0.0))
+
+    def result(self) -> dict | None:
+        """integrated (LUFS), true_peak (dBTP), gain (dB) or None if too short/silent."""
+        if len(self._hop_energy) < BLOCK_HOPS:
+            return None
+        hops = np.asarray(self._hop_energy)
+        blocks = np.convolve(hops, np.ones(BLOCK_HOPS), "valid") / (BLOCK_HOPS * HOP_FRAMES)
+        with np.errstate(divide="ignore"):
+            levels = -0.691 + 10 * np.log10(blocks)
+        gated = blocks[levels > ABSOLUTE_GATE_LUFS]
+        if not len(gated):
+            return None
+        threshold = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+        # Entrambi i gate: il relativo può scendere sotto -70 LUFS
+        gated = blocks[levels > max(threshold, ABSOLUTE_GATE_LUFS)]
+        integrated = -0.691 + 10 * np.log10(gated.mean())
+        true_peak = 20 * np.log10(self._peak) if self._peak > 0 else -120.0
+        return {
+            "integrated": round(float(integrated), 2),
+            "true_peak": round(float(true_peak), 2),
+            "gain": round(REFERENCE_LUFS - float(integrated), 2),
+        }
+
+
+def _lower_priority():
+    os.nice(19)
+
+
+def analyze_file(path, should_continue=None, ffmpeg="ffmpeg"):
+    """
+    Decode `path` in 1 s chunks (ffmpeg, nice 19) and measure it.
+    `should_continue()` is called between chunks and may block; returning
+    False aborts the analysis (None is returned).
+    """
+    channels = max(1, min(probe_stream(path).channels or 2, 2))
+    cmd = [
+        ffmpeg, "-v", "error", "-nostdin", "-i", path, "-vn",
+        "-f", "f32le", "-ac", str(channels), "-ar", str(SAMPLE_RATE), "pipe:1",
+    ]
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, preexec_fn=_lower_priority
+    )
+    meter = LoudnessMeter(channels)
+    frame_bytes = 4 * channels
+    carry = b""
+    try:
+        while True:
+            chunk = process.stdout.read(CHUNK_FRAMES * frame_bytes)
+            if not chunk:
+                break
+            chunk = carry + chunk
+            usable = len(chunk) - len(chunk) % frame_bytes
+            carry = chunk[usable:]
+            meter.feed(np.frombuffer(chunk[:usable], dtype="<f4").reshape(-1, channels))
+            if should_continue is not None and not should_continue():
+                return None
+    finally:
+        process.kill()
+        process.wait()
+    return meter.result()
+
+
+class LoudnessAnalyzer(QObject):
+    """
+    Daemon thread that works through the tracks without an up-to-date
+    analysis, one at a time, only while `is_idle()` (car stopped or
+    charging, system not busy). Every result is committed right away, so a
+    restart resumes from the first track still missing.
+    """
+
+    # (analyzed, total) tracks in the index
+    progress = pyqtSignal(int, int)
+    track_analyzed = pyqtSignal(str)
+
+    def __init__(self, index=None, parent=None):
+        super().__init__(parent)
+        self.index = index or get_library_index()
+        self._ffmpeg = shutil.which("ffmpeg")
+        self._stop = threading.Event()
+        self._thread = None
+        self._speed = None
+        self._speed_at = 0.0
+
+    @property
+    def available(self):
+        return np is not None and self._ffmpeg is not None
+
+    def start(self):
+        if not self.available:
+            print("[LoudnessAnalyzer] numpy or ffmpeg missing, analysis disabled.")
+            return
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    @pyqtSlot(dict)
+    def update_vehicle_data(self, data):
+        """OBDManager.data_updated: tracks the vehicle speed."""
+        if "SPEED" in data:
+            self._speed = data["SPEED"]
+            self._speed_at = time.monotonic()
+
+    def _charging(self):
+        battery = psutil.sensors_battery() if psutil is not None else None
+        return bool(battery and battery.power_plugged)
+
+    def _vehicle_idle(self):
+        # Senza OBD (o dati vecchi) la velocità è sconosciuta: decide il carico
+        if self._speed is None or time.monotonic() - self._speed_at > SPEED_STALE_SECONDS:
+            return True
+        try:
+            return float(self._speed) == 0.0
+        except (TypeError, ValueError):
+            return True
+
+    def _system_idle(self):
+        try:
+            load = os.getloadavg()[0]
+        except OSError:
+            return True
+        return load < MAX_LOAD_PER_CPU * (os.cpu_count() or 1)
+
+    def is_idle(self):
+        """Background work may run now: car stopped or charging, system not busy. Any thread."""
+        return (self._charging() or self._vehicle_idle()) and self._system_idle()
+
+    def _wait_allowed(self):
+        """Blocks until analysis may run; False when stopping."""
+        while not self._stop.is_set():
+            if self.is_idle():
+                return True
+            self._stop.wait(IDLE_POLL_SECONDS)
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            pending = self.index.loudness_pending(PENDING_BATCH)
+            if not pending:
+                self._stop.wait(RESCAN_SECONDS)
+                continue
+            for path, size, mtime_ns in pending:
+                if not self._wait_allowed():
+                    return
+                try:
+                    result = analyze_file(path, self._wait_allowed, self._ffmpeg)
+                except Exception as e:
+                    print(f"[LoudnessAnalyzer] {path}: {e}")
+                    result = None
+                if self._stop.is_set():
+                    return  # interrotta: si riprende da qui al prossimo avvio
+                # Anche i file non decodificabili vengono registrati: niente retry continui
+                self.index.store_loudness(path, size, mtime_ns, **(result or {}))
+                self.track_analyzed.emit(path)
+                self.progress.emit(*self.index.loudness_counts())
+
+
+_shared_analyzer = None
+
+
+def get_loudness_analyzer():
+    """Process-wide analyzer. The first call must happen on the GUI thread."""
+    global _shared_analyzer
+    if _shared_analyzer is None:
+        _shared_analyzer = LoudnessAnalyzer()
+    return _shared_analyzer
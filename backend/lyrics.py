@@ -0,0 +1,199 @@
+# backend/lyrics.py
+"""Time-synced lyrics: LRC parsing, local sources and indexed line lookup."""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+from bisect import bisect_right
+from pathlib import Path
+
+try:
+    from mutagen import File as MutagenFile
+except ImportError:  # pragma: no cover - mutagen is listed in requirements.txt
+    MutagenFile = None
+
+LYRICS_CACHE_DIR = Path(__file__).resolve().parents[1] / "music" / "lyrics_cache"
+
+# [mm:ss], [mm:ss.xx] or [mm:ss:xx]; a line may carry several stamps.
+TIMESTAMP_RE = re.compile(r"\[(\d{1,3}):(\d{1,2})(?:[.:](\d{1,3}))?\]")
+OFFSET_RE = re.compile(r"^\s*\[offset:\s*([+-]?\d+)\s*\]\s*$", re.IGNORECASE)
+# ID3 tags / metadata lines such as [ar:Artist] or [length: 03:20]
+TAG_LINE_RE = re.compile(r"^\s*\[[a-zA-Z#]+:[^\]]*\]\s*$")
+
+
+class SyncedLyrics:
+    """Lyric lines with their start times (ms), sorted by time."""
+
+    def __init__(self, lines: list[str], times: list[int], timed: bool):
+        self.lines = lines
+        self.times = times
+        # True for real LRC timestamps, False for evenly spread estimates
+        self.timed = timed
+
+    def __len__(self) -> int:
+        return len(self.lines)
+
+    def line_index_at(self, position_ms: int) -> int:
+        """Index of the line active at `position_ms` (0 before the first stamp)."""
+        if not self.times:
+            return 0
+        return max(0, bisect_right(self.times, position_ms) - 1)
+
+
+def is_lrc(text: str | None) -> bool:
+    """True when the text carries at least one LRC line timestamp."""
+    return bool(text) and TIMESTAMP_RE.search(text) is not None
+
+
+def parse_lrc(text: str) -> SyncedLyrics | None:
+    """Parse LRC text. Returns None if there are no timestamps."""
+    offset_ms = 0
+    entries: list[tuple[int, int, str]] = []
+    for order, raw_line in enumerate(text.splitlines()):
+        offset_match = OFFSET_RE.match(raw_line)
+        if offset_match:
+            # Positive offset means lyrics should appear earlier
+            offset_ms = int(offset_match.group(1))
+            continue
+        stamps = list(TIMESTAMP_RE.finditer(raw_line))
+        if not stamps:
+            continue
+        lyric = TIMESTAMP_RE.sub("", raw_line).strip()
+        for stamp in stamps:
+            minutes, seconds, fraction = stamp.groups()
+            fraction = fraction or "0"
+            # ".5" -> 500 ms, ".05" -> 50 ms, ".005" -> 5 ms
+            millis = int(fraction.ljust(3, "0")[:3])
+            start = (int(minutes) * 60 + int(seconds)) * 1000 + millis
+            entries.append((start, order, lyric))
+
+    if not entries:
+        return None
+    entries.sort()
+    lines = [lyric for _, _, lyric in entries]
+    times = [max(0, start - offset_ms) for start, _, _ in entries]
+    return SyncedLyrics(lines, times, timed=True)
+
+
+def spread_evenly(text: str, duration_ms: int) -> SyncedLyrics:
+    """Plain lyrics: distribute the non-empty lines evenly over the duration."""
+    lines = [
+        line.strip()
+        for line in text.split("\n")
+        if line.strip() and not TAG_LINE_RE.match(line)
+    ]
+    if not lines or duration_ms <= 0:
+        return SyncedLyrics(lines, [], timed=False)
+    time_per_line = duration_ms / len(lines)
+    times = [int(i * time_per_line) for i in range(len(lines))]
+    return SyncedLyrics(lines, times, timed=False)
+
+
+def parse_lyrics_text(text: str | None, duration_ms: int) -> SyncedLyrics:
+    """LRC when timestamped, evenly spread plain text otherwise."""
+    if not text:
+        return SyncedLyrics([], [], timed=False)
+    synced = parse_lrc(text) if is_lrc(text) else None
+    return synced if synced is not None else spread_evenly(text, duration_ms)
+
+
+def _format_stamp(ms: int) -> str:
+    return f"[{ms // 60000:02d}:{(ms // 1000) % 60:02d}.{(ms % 1000) // 10:02d}]"
+
+
+def read_embedded_lyrics(file_path: str) -> str | None:
+    """
+    Lyrics stored in the file tags: ID3 SYLT (converted to LRC) or USLT,
+    Vorbis/FLAC LYRICS/UNSYNCEDLYRICS, MP4 ©lyr.
+    """
+    if MutagenFile is None:
+        return None
+    try:
+        audio = MutagenFile(file_path)
+    except Exception as e:
+        print(f"[Lyrics] Could not read tags of {file_path}: {e}")
+        return None
+    if audio is None or not audio.tags:
+        return None
+    tags = audio.tags
+
+    if hasattr(tags, "getall"):  # ID3
+        for frame in tags.getall("SYLT"):
+            # format 2 = absolute milliseconds (1 = MPEG frames, not supported)
+            if getattr(frame, "format", 2) == 2 and frame.text:
+                return "\n".join(f"{_format_stamp(int(ms))}{line}" for line, ms in frame.text)
+        for frame in tags.getall("USLT"):
+            if frame.text and frame.text.strip():
+                return frame.text
+        return None
+
+    for key in ("LYRICS", "lyrics", "UNSYNCEDLYRICS", "unsyncedlyrics", "\xa9lyr"):
+        try:
+            value = tags.get(key)
+        except (KeyError, ValueError, TypeError):
+            value = None
+        if value:
+            text = value[0] if isinstance(value, list) else value
+            if str(text).strip():
+                return str(text)
+    return None
+
+
+def read_sidecar_lyrics(file_path: str) -> str | None:
+    """`song.lrc` next to `song.mp3`."""
+    sidecar = os.path.splitext(file_path)[0] + ".lrc"
+    try:
+        with open(sidecar, "r", encoding="utf-8-sig", errors="replace") as handle:
+            text = handle.read()
+    except OSError:
+        return None
+    return text if text.strip() else None
+
+
+def _cache_file(title: str | None, artist: str | None) -> Path:
+    key = f"{(artist or '').strip().casefold()}\x1f{(title or '').strip().casefold()}"
+    return LYRICS_CACHE_DIR / (hashlib.sha1(key.encode("utf-8")).hexdigest() + ".lrc")
+
+
+def load_cached_lyrics(title: str | None, artist: str | None) -> str | None:
+    try:
+        text = _cache_file(title, artist).read_text(encoding="utf-8")
+    except OSError:
+        return None
+    return text if text.strip() else None
+
+
+def save_cached_lyrics(title: str | None, artist: str | None, text: str) -> None:
+    """Store lyrics fetched online so they are available offline next time."""
+    if not text or not text.strip():
+        return
+    target = _cache_file(title, artist)
+    try:
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = target.with_suffix(".tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        os.replace(tmp_path, target)
+    except OSError as e:
+        print(f"[Lyrics] Could not write lyrics cache: {e}")
+
+
+def load_local_lyrics(file_path: str, title: str | None = None, artist: str | None = None) -> str | None:
+    """
+    First local source with lyrics, preferring timestamped ones:
+    embedded tags, then the .lrc sidecar, then the on-disk cache.
+    """
+    candidates = []
+    for reader in (read_embedded_lyrics, read_sidecar_lyrics):
+        text = reader(file_path)
+        if text:
+            if is_lrc(text):
+                return text
+            candidates.append(text)
+    cached = load_cached_lyrics(title, artist) if (title or artist) else None
+    if cached and is_lrc(cached):
+        return cached
+    if candidates:
+        return candidates[0]
+    return cached
@@ -9,10 +9,16 @@ from typing import Optional
 
 import requests
 
+from .connectivity import get_connectivity_monitor
+
 ITUNES_SEARCH_ENDPOINT = "https://itunes.apple.com/search"
 LYRICS_ENDPOINT_TEMPLATE = "https://api.lyrics.ovh/v1/{artist}/{title}"
 REQUEST_TIMEOUT = 5  # seconds
 
+LYRICS_UNAVAILABLE = "Lyrics not available."
+LYRICS_NETWORK_ERROR = "Lyrics not available (network error)."
+LYRICS_NOT_FOUND = "Lyrics not found."
+
 
 def _build_data_url(binary: bytes, content_type: str | None) -> str:
     """Encode binary payload as a data URL usable by both Qt and HTML layouts."""
@@ -23,6 +29,29 @@ def _build_data_url(binary: bytes, content_type: str | None) -> str:
     return f"data:{mime};base64,{encoded}"
 
 
+def _get(url: str, **kwargs) -> requests.Response | None:
+    """
+    requests.get guarded by the shared circuit breaker. Returns None right away
+    while offline; connection errors/timeouts count as connectivity failures,
+    any HTTP answer (even 4xx/5xx) proves the network is reachable.
+    """
+    monitor = get_connectivity_monitor()
+    if not monitor.allow_request():
+        return None
+    try:
+        response = requests.get(url, timeout=REQUEST_TIMEOUT, **kwargs)
+    except (requests.ConnectionError, requests.Timeout):
+        monitor.record_failure()
+        raise
+    monitor.record_success()
+    return response
+
+
+def is_online() -> bool:
+    """False while the connectivity breaker is open (lookups short-circuit)."""
+    return get_connectivity_monitor().is_online()
+
+
 def _best_artwork_url(entry: dict) -> Optional[str]:
     """
     Try to pick the highest-resolution artwork URL from an iTunes API result.
@@ -35,68 +64,83 @@ def _best_artwork_url(entry: dict) -> Optional[str]:
     return artwork.replace("100x100bb", "512x512bb").replace("60x60bb", "512x512bb")
 
 
-def get_album_art_data_url(title: str | None, artist: str | None) -> str:
+def fetch_album_art(title: str | None, artist: str | None) -> tuple[bytes, str]:
     """
-    Look up album artwork using the iTunes Search API and return it as a data URL.
-    Returns an empty string when the network is unavailable or no art is found.
+    Look up album artwork using the iTunes Search API.
+    Returns the raw image bytes and their content type, or (b"", "") when the
+    network is unavailable or no art is found.
     """
     if not title and not artist:
-        return ""
+        return b"", ""
 
     query = " ".join(part for part in (artist, title) if part).strip()
     if not query:
-        return ""
+        return b"", ""
 
     params = {"term": query, "entity": "song", "limit": 1}
     try:
-        response = requests.get(
-            ITUNES_SEARCH_ENDPOINT, params=params, timeout=REQUEST_TIMEOUT
-        )
+        response = _get(ITUNES_SEARCH_ENDPOINT, params=params)
+        if response is None:
+            return b"", ""
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"NETWORK ERROR fetching album art metadata: {exc}")
-        return ""
+        return b"", ""
 
     try:
         results = response.json().get("results") or []
     except ValueError as exc:
         print(f"ERROR parsing album art metadata response: {exc}")
-        return ""
+        return b"", ""
     if not results:
-        return ""
+        return b"", ""
 
     artwork_url = _best_artwork_url(results[0])
     if not artwork_url:
-        return ""
+        return b"", ""
 
     try:
-        art_response = requests.get(artwork_url, timeout=REQUEST_TIMEOUT)
+        art_response = _get(artwork_url)
+        if art_response is None:
+            return b"", ""
         art_response.raise_for_status()
     except requests.RequestException as exc:
         print(f"NETWORK ERROR downloading album art: {exc}")
-        return ""
+        return b"", ""
 
     content_type = art_response.headers.get("Content-Type")
     if not content_type:
         guessed_type, _ = mimetypes.guess_type(artwork_url)
         content_type = guessed_type or "image/jpeg"
 
-    return _build_data_url(art_response.content, content_type)
+    return art_response.content, content_type
+
+
+def get_album_art_data_url(title: str | None, artist: str | None) -> str:
+    """
+    Look up album artwork and return it as a data URL.
+    Prefer `fetch_album_art` + the art store; this is kept for callers that
+    really need an inline URL.
+    """
+    binary, content_type = fetch_album_art(title, artist)
+    return _build_data_url(binary, content_type)
 
 
 def get_lyrics(title: str | None, artist: str | None) -> str:
     """Fetch lyrics from lyrics.ovh, returning descriptive fallbacks on failure."""
     if not title or not artist:
-        return "Lyrics not available."
+        return LYRICS_UNAVAILABLE
 
     url = LYRICS_ENDPOINT_TEMPLATE.format(artist=artist, title=title)
 
     try:
-        response = requests.get(url, timeout=REQUEST_TIMEOUT)
+        response = _get(url)
+        if response is None:
+            return LYRICS_NETWORK_ERROR
         response.raise_for_status()
     except requests.RequestException as exc:
         print(f"NETWORK ERROR fetching lyrics: {exc}")
-        return "Lyrics not available (network error)."
+        return LYRICS_NETWORK_ERROR
 
     if response.headers.get("Content-Type", "").startswith("application/json"):
         try:
@@ -108,7 +152,7 @@ def get_lyrics(title: str | None, artist: str | None) -> str:
         data = {}
     lyrics = (data or {}).get("lyrics")
     if not lyrics:
-        return "Lyrics not found."
+        return LYRICS_NOT_FOUND
     return lyrics.replace("\r\n", "\n").strip()
 
 
@@ -0,0 +1,45 @@
+# backend/media_position.py
+"""
+Playback position of the Bluetooth player between AVRCP reports: the last
+reported (position, status) is kept with its monotonic timestamp and, while
+playing, the position is extrapolated locally.
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class PositionAnchor:
+    """Last (position, status, time) reported by the phone. Positions are in ms."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self) -> None:
+        self.position_ms = 0
+        self.duration_ms = 0
+        self.status = "stopped"
+        self.anchored_at = time.monotonic()
+
+    def anchor(self, position_ms=None, status=None, now=None) -> None:
+        """Re-anchor on a report; a status change alone keeps the position reached so far."""
+        now = time.monotonic() if now is None else now
+        if position_ms is None:
+            position_ms = self.position(now)
+        self.position_ms = max(0, int(position_ms))
+        if status is not None:
+            self.status = status
+        self.anchored_at = now
+
+    def set_duration(self, duration_ms) -> None:
+        self.duration_ms = max(0, int(duration_ms or 0))
+
+    def position(self, now=None) -> int:
+        if self.status != "playing":
+            return self.position_ms
+        now = time.monotonic() if now is None else now
+        position = self.position_ms + max(0.0, now - self.anchored_at) * 1000
+        if self.duration_ms > 0:
+            position = min(position, self.duration_ms)  # fine brano: aspetta il telefono
+        return int(position)
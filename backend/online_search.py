@@ -0,0 +1,209 @@
+# backend/online_search.py
+"""
+Online song search with yt-dlp used as a library: one long-lived worker
+keeps a YoutubeDL instance (extractors already loaded), results are cached
+per normalized query, and bursts of queries collapse into the latest one.
+A playlist or album URL as query is expanded into its tracks.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from .connectivity import get_connectivity_monitor
+from .download_manager import looks_like_network_error
+
+try:
+    import yt_dlp
+except ImportError:  # pragma: no cover - yt-dlp is listed in requirements.txt
+    yt_dlp = None
+
+RESULT_COUNT = 10
+DEBOUNCE_SECONDS = 0.4
+CACHE_TTL_SECONDS = 30 * 60
+CACHE_MAX_ENTRIES = 100
+
+YDL_OPTIONS = {
+    "quiet": True,
+    "no_warnings": True,
+    "skip_download": True,
+    "extract_flat": "in_playlist",  # solo la lista dei risultati, niente pagine dei video
+    "noplaylist": True,
+    "ignoreerrors": True,
+}
+# Per gli URL: una playlist/album va espansa, non ridotta al primo video
+URL_OPTIONS = dict(YDL_OPTIONS, noplaylist=False)
+
+
+def is_url(query):
+    return query.strip().startswith(("http://", "https://"))
+
+
+def normalize_query(query):
+    if is_url(query):
+        return query.strip()  # gli id nei link distinguono le maiuscole
+    return " ".join(query.casefold().split())
+
+
+def _result(entry):
+    # Solo i campi usati da SearchDialog: il resto dell'info dict è grande
+    url = entry.get("webpage_url") or entry.get("url") or ""
+    return {
+        "id": entry.get("id"),
+        "title": entry.get("title") or "Unknown",
+        "uploader": entry.get("uploader") or entry.get("channel") or "",
+        "duration": entry.get("duration"),
+        "url": url if is_url(url) else "",
+    }
+
+
+class SearchCache:
+    """LRU of normalized query -> results, entries expire after `ttl` seconds."""
+
+    def __init__(self, ttl=CACHE_TTL_SECONDS, max_entries=CACHE_MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, query, now=None):
+        key = normalize_query(query)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            stored_at, results = entry
+            if now - stored_at > self.ttl:
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return results
+
+    def put(self, query, results, now=None):
+        key = normalize_query(query)
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            self._entries[key] = (now, results)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+
+class OnlineSearch(QObject):
+    """
+    `search()` answers from the cache right away, otherwise hands the query
+    to the worker, which waits DEBOUNCE_SECONDS of quiet and runs only the
+    newest query.
+    """
+
+    results_ready = pyqtSignal(str, list)  # query, [{id, title, uploader, duration, url}]
+    search_failed = pyqtSignal(str, str)  # query, message
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.cache = SearchCache()
+        self._cond = threading.Condition()
+        self._pending = None
+        self._pending_at = 0.0
+        self._immediate = False
+        self._thread = None
+        self._ydl = None
+        self._url_ydl = None
+
+    @property
+    def available(self):
+        return yt_dlp is not None
+
+    def search(self, query, immediate=False):
+        """`immediate` skips the debounce (explicit Search button / Enter)."""
+        if not normalize_query(query):
+            return
+        cached = self.cache.get(query)
+        if cached is not None:
+            self.results_ready.emit(query, cached)
+            return
+        if not self.available:
+            self.search_failed.emit(query, "yt-dlp not found. Install it: pip install yt-dlp")
+            return
+        with self._cond:
+            self._pending = query
+            self._pending_at = time.monotonic()
+            self._immediate = immediate
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+            self._cond.notify()
+
+    # --- Worker thread ---
+    def _next_query(self):
+        """Blocks until a query has been stable for DEBOUNCE_SECONDS (or is immediate)."""
+        with self._cond:
+            while True:
+                if self._pending is None:
+                    self._cond.wait()
+                    continue
+                quiet_for = time.monotonic() - self._pending_at
+                if self._immediate or quiet_for >= DEBOUNCE_SECONDS:
+                    query, self._pending = self._pending, None
+                    return query
+                self._cond.wait(DEBOUNCE_SECONDS - quiet_for)
+
+    def _run(self):
+        monitor = get_connectivity_monitor()
+        while True:
+            query = self._next_query()
+            try:
+                self._search(query, monitor)
+            except Exception as e:
+                # Qualunque errore, anche fuori da extract_info: il worker resta vivo
+                message = str(e) or type(e).__name__
+                if looks_like_network_error(message):
+                    monitor.record_failure()
+                    message = "Network error. Check connection."
+                print(f"[OnlineSearch] '{query}': {message}")
+                self.search_failed.emit(query, message)
+
+    def _search(self, query, monitor):
+        # Un'altra ricerca nel frattempo ha già riempito la cache
+        cached = self.cache.get(query)
+        if cached is not None:
+            self.results_ready.emit(query, cached)
+            return
+        if not monitor.allow_request():
+            self.search_failed.emit(query, "Network error. Check connection.")
+            return
+        if is_url(query):
+            if self._url_ydl is None:
+                self._url_ydl = yt_dlp.YoutubeDL(dict(URL_OPTIONS))
+            info = self._url_ydl.extract_info(query.strip(), download=False)
+        else:
+            if self._ydl is None:
+                # Creato una volta sola: le classi degli extractor restano caricate
+                ydl = yt_dlp.YoutubeDL(dict(YDL_OPTIONS))
+                ydl.get_info_extractor("YoutubeSearch")
+                ydl.get_info_extractor("Youtube")
+                self._ydl = ydl
+            info = self._ydl.extract_info(f"ytsearch{RESULT_COUNT}:{query}", download=False)
+        monitor.record_success()
+        info = info or {}
+        if "entries" in info:
+            entries = info["entries"] or []
+        else:
+            entries = [info] if info.get("id") else []  # link a un singolo video
+        results = [_result(entry) for entry in entries if entry]
+        self.cache.put(query, results)
+        self.results_ready.emit(query, results)
+
+
+_shared_search = None
+
+
+def get_online_search():
+    """Process-wide search worker. The first call must happen on the GUI thread."""
+    global _shared_search
+    if _shared_search is None:
+        _shared_search = OnlineSearch()
+    return _shared_search
@@ -0,0 +1,207 @@
+# backend/play_queue.py
+"""Play queue of the local library, independent from the list widgets."""
+
+from __future__ import annotations
+
+import random
+from collections import deque
+
+REPEAT_OFF = "off"
+REPEAT_ALL = "all"
+REPEAT_ONE = "one"
+REPEAT_MODES = (REPEAT_OFF, REPEAT_ALL, REPEAT_ONE)
+
+
+class PlayQueue:
+    """
+    Playback order over a list of track paths.
+
+    `_order` is the play order: the library order, or a permutation computed
+    once when shuffle is turned on. `_positions` maps path -> position in
+    `_order`, so jumping to a track and next/previous are O(1). Tracks added
+    with `play_next` are played before the order resumes, without moving the
+    cursor.
+    """
+
+    def __init__(self, paths=(), repeat=REPEAT_ALL, shuffle=False, rng=None):
+        self._rng = rng or random.Random()
+        self._library: list[str] = []
+        self._order: list[str] = []
+        self._positions: dict[str, int] = {}
+        self._cursor = -1  # posizione in _order dell'ultima traccia "di ordine" suonata
+        self._current: str | None = None
+        # True se la traccia corrente non è _order[_cursor] (play next, rimossa)
+        self._detached = False
+        self._up_next: deque[str] = deque()
+        self.repeat = repeat if repeat in REPEAT_MODES else REPEAT_ALL
+        self.shuffle = bool(shuffle)
+        self.set_paths(paths)
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, path) -> bool:
+        return path in self._positions
+
+    @property
+    def current_path(self) -> str | None:
+        return self._current
+
+    def index_of(self, path) -> int:
+        """Position of `path` in the play order, or -1."""
+        return self._positions.get(path, -1)
+
+    def up_next(self) -> list[str]:
+        return list(self._up_next)
+
+    # --- Contents ---
+    def set_paths(self, paths):
+        """Replace the tracks (library order). The current track is kept."""
+        self._library = list(dict.fromkeys(paths))
+        known = set(self._library)
+        self._up_next = deque(p for p in self._up_next if p in known)
+        self._build_order()
+
+    def insert(self, path, row=None):
+        """
+        Add a track at library `row` (appended if None). In shuffle mode it
+        lands at a random position among the tracks still to be played.
+        """
+        if path in self._positions:
+            return
+        row = len(self._library) if row is None else max(0, min(row, len(self._library)))
+        self._library.insert(row, path)
+        if self.shuffle:
+            position = self._rng.randint(self._cursor + 1, len(self._order))
+        else:
+            position = row
+        self._order.insert(position, path)
+        self._reindex(position)
+        if position <= self._cursor:
+            self._cursor += 1
+
+    def remove(self, path):
+        position = self._positions.pop(path, -1)
+        if position < 0:
+            return
+        self._library.remove(path)
+        del self._order[position]
+        self._reindex(position)
+        if path in self._up_next:
+            self._up_next.remove(path)
+        if position < self._cursor:
+            self._cursor -= 1
+        elif position == self._cursor:
+            # La traccia continua a suonare: "next" riparte da quella successiva
+            self._cursor -= 1
+            self._detached = True
+
+    def play_next(self, path):
+        """Queue `path` right after the current track (the latest request first)."""
+        if path in self._up_next:
+            self._up_next.remove(path)
+        self._up_next.appendleft(path)
+
+    # --- Modes ---
+    def set_shuffle(self, enabled):
+        enabled = bool(enabled)
+        if enabled != self.shuffle:
+            self.shuffle = enabled
+            self._build_order()
+
+    def set_repeat(self, mode):
+        if mode in REPEAT_MODES:
+            self.repeat = mode
+
+    def cycle_repeat(self) -> str:
+        self.repeat = REPEAT_MODES[(REPEAT_MODES.index(self.repeat) + 1) % len(REPEAT_MODES)]
+        return self.repeat
+
+    # --- Navigation ---
+    def jump(self, path) -> bool:
+        """Make `path` the current track (user picked it). False if unknown."""
+        position = self._positions.get(path, -1)
+        if position < 0:
+            return False
+        self._cursor = position
+        self._current = path
+        self._detached = False
+        return True
+
+    def next(self, auto=False) -> str | None:
+        """
+        Advance and return the new current path, or None at the end.
+        `auto` is True when the previous track finished by itself: only then
+        does REPEAT_ONE replay the same track.
+        """
+        if auto and self.repeat == REPEAT_ONE and self._current is not None:
+            return self._current
+        if self._up_next:
+            self._current = self._up_next.popleft()
+            self._detached = True
+            return self._current
+        position = self._step(self._cursor, 1)
+        if position < 0:
+            return None
+        self._cursor = position
+        self._current = self._order[position]
+        self._detached = False
+        return self._current
+
+    def previous(self) -> str | None:
+        if not self._order:
+            return None
+        if self._detached and self._cursor >= 0:
+            # Dopo un "play next" si torna alla traccia da cui si era partiti
+            position = self._cursor
+        else:
+            position = self._step(self._cursor, -1)
+            if position < 0:
+                return None
+        self._cursor = position
+        self._current = self._order[position]
+        self._detached = False
+        return self._current
+
+    def peek(self, count) -> list[str]:
+        """The next `count` paths that `next()` would return, without moving."""
+        upcoming = list(self._up_next)[:count]
+        count = min(count, len(upcoming) + len(self._order))
+        position = self._cursor
+        while len(upcoming) < count:
+            position = self._step(position, 1)
+            if position < 0 or self._order[position] == self._current:
+                break
+            upcoming.append(self._order[position])
+        return upcoming
+
+    # --- Internals ---
+    def _step(self, position, delta) -> int:
+        size = len(self._order)
+        if not size:
+            return -1
+        position += delta
+        if 0 <= position < size:
+            return position
+        if self.repeat == REPEAT_OFF:
+            return -1
+        return position % size
+
+    def _reindex(self, start=0):
+        for position in range(start, len(self._order)):
+            self._positions[self._order[position]] = position
+
+    def _build_order(self):
+        order = list(self._library)
+        current = self._current
+        if self.shuffle:
+            self._rng.shuffle(order)
+            if current in order:
+                # La traccia in corso apre la permutazione: nessuna si ripete
+                order.remove(current)
+                order.insert(0, current)
+        self._order = order
+        self._positions = {}
+        self._reindex()
+        self._cursor = self._positions.get(current, -1)
+        self._detached = current is not None and self._cursor < 0
@@ -0,0 +1,470 @@
+# backend/playback_engine.py
+"""
+Streaming playback: ffmpeg decodes into a PCM ring buffer on a worker
+thread, a feeder thread hands fixed-size periods to a pygame mixer channel.
+Position comes from the count of frames the device has played.
+"""
+
+import collections
+import shutil
+import subprocess
+import threading
+import time
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from . import audio_dsp
+
+try:
+    import pygame
+except ImportError:  # pragma: no cover - pygame is listed in requirements.txt
+    pygame = None
+
+PERIOD_FRAMES = 2048  # ~46 ms a 44.1 kHz
+DEVICE_PERIODS = 2  # uno in riproduzione + uno in coda sul canale
+BUFFER_SECONDS = 2.0
+POSITION_INTERVAL = 0.05  # s tra due position_changed
+FEED_SLEEP = 0.005
+READ_CHUNK = 64 * 1024
+
+
+class PcmRingBuffer:
+    """Fixed-capacity byte ring: blocking writes (decoder), non-blocking reads (feeder)."""
+
+    def __init__(self, capacity):
+        self._buf = bytearray(capacity)
+        self._capacity = capacity
+        self._start = 0
+        self._size = 0
+        self._closed = False
+        self._generation = 0
+        self._cond = threading.Condition()
+
+    def __len__(self):
+        with self._cond:
+            return self._size
+
+    def write(self, data, generation=None):
+        """
+        Blocks while full. Returns False if the buffer was closed meanwhile,
+        or was reset for another generation than the writer's.
+        """
+        view = memoryview(data)
+        with self._cond:
+            while view:
+                while self._size == self._capacity and not self._closed:
+                    self._cond.wait()
+                if self._closed or generation not in (None, self._generation):
+                    return False
+                end = (self._start + self._size) % self._capacity
+                count = min(len(view), self._capacity - self._size, self._capacity - end)
+                self._buf[end:end + count] = view[:count]
+                self._size += count
+                view = view[count:]
+        return True
+
+    def read(self, count):
+        """Up to `count` bytes, possibly fewer (or none)."""
+        with self._cond:
+            count = min(count, self._size)
+            first = min(count, self._capacity - self._start)
+            data = bytes(self._buf[self._start:self._start + first]) + bytes(self._buf[:count - first])
+            self._start = (self._start + count) % self._capacity
+            self._size -= count
+            self._cond.notify_all()
+            return data
+
+    def close(self):
+        """Wakes up a blocked writer; writes fail until `reset`."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    def reset(self, generation=0):
+        with self._cond:
+            self._start = self._size = 0
+            self._closed = False
+            self._generation = generation
+            self._cond.notify_all()
+
+
+class TrackMarks:
+    """
+    Gapless hand-offs still ahead of the device: (absolute frame, path) of
+    each appended track, in decoding order.
+    """
+
+    def __init__(self):
+        self._marks = collections.deque()
+
+    def __len__(self):
+        return len(self._marks)
+
+    def add(self, frame, path):
+        self._marks.append((frame, path))
+
+    def clear(self):
+        self._marks.clear()
+
+    def reached(self, consumed):
+        """Hand-offs the device has played past `consumed` frames, oldest first."""
+        passed = []
+        while self._marks and consumed >= self._marks[0][0]:
+            passed.append(self._marks.popleft())
+        return passed
+
+
+class PlaybackEngine(QObject):
+    """
+    One track at a time, plus an optional next track (`set_next`) that is
+    decoded into the same buffer right after the current one: the device
+    never sees a gap between them.
+
+    All methods are meant for the GUI thread; signals are emitted from the
+    feeder thread.
+    """
+
+    position_changed = pyqtSignal(int)  # ms dall'inizio della traccia corrente
+    # (finished path, started path): passaggio gapless alla traccia successiva
+    track_changed = pyqtSignal(str, str)
+    finished = pyqtSignal(str)  # fine dello stream, nessuna traccia successiva
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._ffmpeg = shutil.which("ffmpeg")
+        self.available = False
+        if pygame is not None and pygame.mixer.get_init():
+            rate, size, channels = pygame.mixer.get_init()
+            self.sample_rate = rate
+            self.channels = channels
+            self.frame_bytes = abs(size) // 8 * channels
+            self._format = "s16le" if abs(size) == 16 else "f32le" if size == 32 else None
+            # Canale riservato: i Sound.play() altrui non lo rubano
+            pygame.mixer.set_reserved(1)
+            self._channel = pygame.mixer.Channel(0)
+            self.available = bool(self._ffmpeg and self._format)
+        if not self.available:
+            print("[PlaybackEngine] ffmpeg or audio mixer not available, playback disabled.")
+            return
+
+        self._lock = threading.Lock()
+        self._ring = PcmRingBuffer(int(self.sample_rate * BUFFER_SECONDS) * self.frame_bytes)
+        self._generation = 0
+        self._decoder = None
+        self._process = None
+
+        # Stato della traccia (protetto da _lock)
+        self._path = None
+        self._next_path = None
+        self._start_ms = 0  # offset del seek
+        self._track_frame = 0  # frame assoluto d'inizio della traccia corrente
+        self._marks = TrackMarks()  # passaggi gapless
+        self._eof_frame = None  # frame totali decodificati, noto a fine stream
+        self._playing = False
+        self._crossfade_frames = 0
+        self._gain_provider = None  # path -> gain lineare
+
+        # Contatori del feeder
+        self._consumed = 0  # frame già suonati dal device
+        self._in_device = collections.deque()  # frame dei periodi consegnati al canale
+        self._period_started = 0.0
+        self._paused_within = 0
+
+        self._shutdown = False
+        self._feeder = threading.Thread(target=self._feed_loop, daemon=True)
+        self._feeder.start()
+
+    # --- Controllo (GUI thread) ---
+    def load(self, path, start_ms=0):
+        """Prepare `path` from `start_ms`; decoding starts at once, playback on `play`."""
+        if not self.available:
+            return
+        self._stop_decoder()
+        with self._lock:
+            self._path = path
+            self._start_ms = max(0, int(start_ms))
+            self._track_frame = 0
+            self._marks.clear()
+            self._eof_frame = None
+            self._consumed = 0
+            self._in_device.clear()
+            self._paused_within = 0
+            self._generation += 1
+            generation = self._generation
+        self._channel.stop()
+        self._ring.reset(generation)
+        self._decoder = threading.Thread(
+            target=self._decode_loop, args=(generation, path, self._start_ms), daemon=True
+        )
+        self._decoder.start()
+
+    def set_next(self, path):
+        """Track to decode right after the current one (None to clear)."""
+        if self.available:
+            with self._lock:
+                self._next_path = path
+
+    def set_crossfade(self, seconds):
+        """Overlap between consecutive tracks (0 = gapless, no overlap)."""
+        if self.available:
+            self._crossfade_frames = int(max(0.0, seconds) * self.sample_rate)
+
+    def set_gain_provider(self, provider):
+        """`provider(path) -> linear gain`, called once per track on the decoder thread."""
+        if self.available:
+            self._gain_provider = provider
+
+    def play(self):
+        if not self.available or self._path is None:
+            return
+        with self._lock:
+            if self._playing:
+                return
+            self._playing = True
+            # Riprende il periodo interrotto dalla pausa senza perdere i frame già suonati
+            self._period_started = time.monotonic() - self._paused_within / self.sample_rate
+        self._channel.unpause()
+
+    def pause(self):
+        if not self.available:
+            return
+        with self._lock:
+            if not self._playing:
+                return
+            self._paused_within = self._within_period()
+            self._playing = False
+        self._channel.pause()
+
+    def stop(self):
+        if not self.available:
+            return
+        with self._lock:
+            self._playing = False
+        self._stop_decoder()
+        self._channel.stop()
+        with self._lock:
+            self._path = None
+            self._in_device.clear()
+
+    def seek(self, position_ms):
+        """Restart decoding at `position_ms`, keeping the play/pause state."""
+        if not self.available or self._path is None:
+            return
+        with self._lock:
+            was_playing = self._playing
+            self._playing = False
+        self.load(self._path, position_ms)
+        if was_playing:
+            self.play()
+
+    def position(self):
+        """Milliseconds into the current track, from the played-frame counter."""
+        if not self.available:
+            return 0
+        with self._lock:
+            frames = self._consumed - self._track_frame + self._within_period()
+            return self._start_ms + int(max(0, frames) * 1000 / self.sample_rate)
+
+    def shutdown(self):
+        if self.available:
+            self._shutdown = True
+            self.stop()
+
+    # --- Decoder thread ---
+    def _spawn(self, path, start_ms):
+        cmd = [self._ffmpeg, "-v", "error", "-nostdin"]
+        if start_ms:
+            cmd += ["-ss", f"{start_ms / 1000:.3f}"]
+        cmd += [
+            "-i", path, "-vn",
+            "-f", self._format, "-ac", str(self.channels), "-ar", str(self.sample_rate),
+            "pipe:1",
+        ]
+        return subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL)
+
+    def _decode_loop(self, generation, path, start_ms):
+        written = 0  # frame assoluti già nel ring
+        tail = None  # coda della traccia precedente, da mescolare con l'inizio di questa
+
+        def commit(data):
+            nonlocal written
+            if not data:
+                return True
+            # Un decoder sopravvissuto al join di _stop_decoder non deve
+            # scrivere nel ring della traccia nuova
+            with self._lock:
+                if generation != self._generation:
+                    return False
+            if not self._ring.write(data, generation):
+                return False
+            written += len(data) // self.frame_bytes
+            return True
+
+        while path:
+            gain = self._track_gain(path)
+            # Frame trattenuti a fine traccia per un eventuale crossfade
+            hold = self._crossfade_frames * self.frame_bytes if audio_dsp.available() else 0
+            try:
+                process = self._spawn(path, start_ms)
+            except OSError as e:
+                print(f"[PlaybackEngine] Cannot start decoder for {path}: {e}")
+                break
+            with self._lock:
+                if generation != self._generation:
+                    process.kill()
+                    return
+                self._process = process
+
+            carry = b""
+            pending = bytearray()
+            ok = True
+            while ok:
+                chunk = process.stdout.read(READ_CHUNK)
+                if not chunk:
+                    break
+                chunk = carry + chunk
+                # Solo frame interi nel buffer: il resto passa al prossimo chunk
+                usable = len(chunk) - len(chunk) % self.frame_bytes
+                carry = chunk[usable:]
+                pending += audio_dsp.apply_gain(chunk[:usable], gain, self._format)
+
+                if tail is not None:
+                    if len(pending) < len(tail):
+                        continue
+                    mixed = audio_dsp.crossfade(tail, bytes(pending[:len(tail)]), self.channels, self._format)
+                    del pending[:len(tail)]
+                    tail = None
+                    ok = commit(mixed)
+                if ok and len(pending) > hold:
+                    count = len(pending) - hold
+                    ok = commit(bytes(pending[:count]))
+                    del pending[:count]
+            if not ok:
+                process.kill()
+                process.wait()
+                return
+            process.wait()
+            if process.returncode:
+                print(f"[PlaybackEngine] Decoder exited with {process.returncode} for {path}")
+            if tail is not None:
+                # Traccia più corta della dissolvenza: niente mix
+                pending[:0] = tail
+                tail = None
+
+            path = self._wait_next(generation)
+            start_ms = 0
+            if path and hold and pending:
+                # La traccia successiva parte (e conta la sua posizione) con il crossfade
+                tail = bytes(pending)
+            elif not commit(bytes(pending)):
+                return
+            if path:
+                with self._lock:
+                    self._marks.add(written, path)
+
+        with self._lock:
+            if generation == self._generation:
+                self._process = None
+                self._eof_frame = written
+
+    def _track_gain(self, path):
+        provider = self._gain_provider
+        if provider is None:
+            return 1.0
+        try:
+            return provider(path)
+        except Exception as e:
+            print(f"[PlaybackEngine] Gain lookup failed for {path}: {e}")
+            return 1.0
+
+    def _wait_next(self, generation):
+        """
+        Next track to append, waiting while the buffer still has audio: the
+        next track can still be chosen until the current one is about to end.
+        """
+        while True:
+            with self._lock:
+                if generation != self._generation:
+                    return None
+                if self._next_path:
+                    path, self._next_path = self._next_path, None
+                    return path
+            if len(self._ring) < PERIOD_FRAMES * DEVICE_PERIODS * self.frame_bytes:
+                return None
+            time.sleep(POSITION_INTERVAL)
+
+    def _stop_decoder(self):
+        with self._lock:
+            self._generation += 1
+            process, self._process = self._process, None
+        self._ring.close()
+        if process is not None:
+            process.kill()
+        if self._decoder is not None:
+            self._decoder.join(timeout=1.0)
+            self._decoder = None
+
+    # --- Feeder thread ---
+    def _within_period(self):
+        """Frames of the playing period already heard (caller holds _lock)."""
+        if not self._in_device:
+            return 0
+        if not self._playing:
+            return self._paused_within
+        elapsed = int((time.monotonic() - self._period_started) * self.sample_rate)
+        return max(0, min(elapsed, self._in_device[0]))
+
+    def _retire_periods(self):
+        """Count the periods the channel finished playing (caller holds _lock)."""
+        if not self._in_device:
+            return
+        if not self._channel.get_busy():
+            self._consumed += sum(self._in_device)
+            self._in_device.clear()
+        elif len(self._in_device) > 1 and self._channel.get_queue() is None:
+            self._consumed += self._in_device.popleft()
+            self._period_started = time.monotonic()
+
+    def _feed_loop(self):
+        period_bytes = PERIOD_FRAMES * self.frame_bytes
+        last_position = 0.0
+        while not self._shutdown:
+            events = []
+            with self._lock:
+                if self._playing:
+                    self._retire_periods()
+                    if len(self._in_device) < DEVICE_PERIODS:
+                        data = self._ring.read(period_bytes)
+                        if data:
+                            sound = pygame.mixer.Sound(buffer=data)
+                            if self._channel.get_busy():
+                                self._channel.queue(sound)
+                            else:
+                                self._channel.play(sound)
+                                self._period_started = time.monotonic()
+                            self._in_device.append(len(data) // self.frame_bytes)
+
+                    # Passaggi gapless: la traccia successiva è già nel device
+                    for frame, path in self._marks.reached(self._consumed):
+                        events.append(("changed", self._path, path))
+                        self._path = path
+                        self._track_frame = frame
+                        self._start_ms = 0
+
+                    if (self._eof_frame is not None and not self._in_device
+                            and self._consumed >= self._eof_frame and not self._marks):
+                        events.append(("finished", self._path, None))
+                        self._playing = False
+                        self._eof_frame = None
+
+            for kind, old, new in events:
+                if kind == "changed":
+                    self.track_changed.emit(old or "", new)
+                else:
+                    self.finished.emit(old or "")
+
+            now = time.monotonic()
+            if self._playing and now - last_position >= POSITION_INTERVAL:
+                last_position = now
+                self.position_changed.emit(self.position())
+            time.sleep(FEED_SLEEP)
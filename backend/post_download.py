@@ -0,0 +1,292 @@
+# backend/post_download.py
+"""
+Post-download pipeline: stage order, tag clean-up of yt-dlp titles, the
+on-disk record of which stages each new file has completed (so processing
+resumes after a crash or power cut), and the workers that run the stages.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import re
+import shutil
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from . import waveform_cache
+from .art_store import get_art_store
+from .connectivity import get_connectivity_monitor
+from .library_index import get_library_index, read_track_metadata
+from .loudness import IDLE_POLL_SECONDS, analyze_file, get_loudness_analyzer
+from .media_info import fetch_album_art
+
+try:
+    from mutagen import File as MutagenFile
+    from mutagen.id3 import APIC, ID3, ID3NoHeaderError
+except ImportError:  # pragma: no cover - mutagen is listed in requirements.txt
+    MutagenFile = None
+
+DEFAULT_STATE_PATH = Path(__file__).resolve().parents[1] / "music" / "download_pipeline.json"
+
+# L'indice viene prima della loudness: l'analisi si lega a size/mtime della riga
+STAGES = ("tags", "art", "index", "loudness", "waveform")
+# Pochi worker e ffmpeg a nice 19: la riproduzione ha la precedenza
+PIPELINE_WORKERS = 2
+BACKGROUND_NICENESS = 19
+
+# Suffissi tipici dei titoli di YouTube
+_TITLE_NOISE = re.compile(
+    r"\s*[\(\[](?:official\s*)?(?:music\s*|lyric\s*)?"
+    r"(?:video|audio|lyrics?|visuali[sz]er|hd|hq|4k)[\)\]]",
+    re.IGNORECASE,
+)
+_CHANNEL_NOISE = re.compile(r"(?:\s*-\s*topic|vevo|\s+official)$", re.IGNORECASE)
+
+
+def normalize_tags(title: str, artist: str, from_channel: bool = False) -> tuple[str, str]:
+    """
+    Clean (title, artist) from a download: drops "(Official Video)" and
+    similar, strips VEVO / " - Topic" from channel names used as artist.
+    "Artist - Title" titles are split only when no real artist is known:
+    `artist` is empty, looks like a channel, or `from_channel` says it is
+    the uploader of the video.
+    """
+    title = " ".join(_TITLE_NOISE.sub("", title or "").split())
+    artist = " ".join((artist or "").split())
+    # Con un artista vero "Hey Jude - Remastered 2015" resta il titolo
+    if " - " in title and (from_channel or not artist or _CHANNEL_NOISE.search(artist)):
+        # Convenzione dei video musicali: l'artista nel titolo vale più del canale
+        left, right = title.split(" - ", 1)
+        if left.strip() and right.strip():
+            artist, title = left.strip(), right.strip()
+    artist = _CHANNEL_NOISE.sub("", artist).strip()
+    return title, artist
+
+
+class PipelineState:
+    """
+    path -> {title, artist, art_id, source_id, done: [stages]} for files
+    still being processed, stored as JSON after every completed stage.
+    Thread-safe.
+    """
+
+    def __init__(self, path=DEFAULT_STATE_PATH):
+        self.path = Path(path)
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, dict] = OrderedDict()
+        try:
+            data = json.loads(self.path.read_text())
+        except FileNotFoundError:
+            data = {}
+        except (OSError, ValueError) as e:
+            print(f"[PipelineState] Could not read {self.path}: {e}")
+            data = {}
+        for path, entry in data.get("files", {}).items():
+            entry.setdefault("done", [])
+            self._entries[path] = entry
+
+    def _save_locked(self):
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = self.path.with_suffix(".tmp")
+            tmp.write_text(json.dumps({"files": self._entries}))
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"[PipelineState] Could not save {self.path}: {e}")
+
+    def add(self, path, title="", artist="", art_id="", source_id="") -> bool:
+        """Registers a new file; False if it is already pending."""
+        path = os.path.abspath(path)
+        with self._lock:
+            if path in self._entries:
+                return False
+            self._entries[path] = {
+                "title": title, "artist": artist, "art_id": art_id, "source_id": source_id, "done": [],
+            }
+            self._save_locked()
+            return True
+
+    def get(self, path) -> dict | None:
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+            return dict(entry, done=list(entry["done"])) if entry is not None else None
+
+    def pending(self) -> list[str]:
+        with self._lock:
+            return list(self._entries)
+
+    def remaining(self, path) -> list[str]:
+        entry = self.get(path)
+        if entry is None:
+            return []
+        return [stage for stage in STAGES if stage not in entry["done"]]
+
+    def mark_done(self, path, stage) -> None:
+        with self._lock:
+            entry = self._entries.get(os.path.abspath(path))
+            if entry is not None and stage not in entry["done"]:
+                entry["done"].append(stage)
+                self._save_locked()
+
+    def finish(self, path) -> None:
+        with self._lock:
+            if self._entries.pop(os.path.abspath(path), None) is not None:
+                self._save_locked()
+
+
+class DownloadPipeline(QObject):
+    """
+    Post-download processing on a bounded pool of daemon threads. Each file
+    goes through STAGES in order; every stage is idempotent and recorded in
+    PipelineState when done, so an interrupted file resumes from the first
+    missing stage.
+    """
+
+    track_processed = pyqtSignal(str)
+    # Stesso formato di LibraryWatcher.library_changed: [(kind, path)]
+    library_changed = pyqtSignal(list)
+
+    def __init__(self, state=None, index=None, idle_gate=None, workers=PIPELINE_WORKERS, parent=None):
+        super().__init__(parent)
+        self.state = state or PipelineState()
+        self.index = index or get_library_index()
+        # idle_gate() -> bool: stesso criterio dell'analisi della libreria
+        # (auto ferma o in carica, sistema scarico)
+        self._idle_gate = idle_gate or get_loudness_analyzer().is_idle
+        self._ffmpeg = shutil.which("ffmpeg")
+        self._queue = queue.Queue()
+        self._workers = workers
+        self._threads = []
+        self._stop = threading.Event()
+
+    def start(self):
+        """Starts the workers and resumes the files left half-processed."""
+        if self._threads:
+            return
+        for path in self.state.pending():
+            self._queue.put(path)
+        for _ in range(self._workers):
+            thread = threading.Thread(target=self._run, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+
+    def submit(self, path, title="", artist="", art_id="", source_id=""):
+        """Any thread. The file is recorded before it is queued."""
+        if self.state.add(path, title, artist, art_id, source_id):
+            self._queue.put(os.path.abspath(path))
+
+    def _should_continue(self):
+        """Blocks while the idle gate is closed; False only after `stop()`."""
+        while not self._stop.is_set():
+            if self._idle_gate():
+                return True
+            self._stop.wait(IDLE_POLL_SECONDS)
+        return False
+
+    def _run(self):
+        while not self._stop.is_set():
+            path = self._queue.get()
+            try:
+                self._process(path)
+            except Exception as e:
+                print(f"[DownloadPipeline] {path}: {e}")
+
+    def _process(self, path):
+        entry = self.state.get(path)
+        if entry is None:
+            return
+        if not os.path.isfile(path):
+            self.state.finish(path)  # cancellato o spostato nel frattempo
+            return
+        # I download dalla ricerca (con id del video) hanno il canale come artista
+        entry["title"], entry["artist"] = normalize_tags(
+            entry["title"], entry["artist"], from_channel=bool(entry.get("source_id"))
+        )
+        for stage in STAGES:
+            if stage in entry["done"]:
+                continue
+            try:
+                getattr(self, f"_stage_{stage}")(path, entry)
+            except Exception as e:
+                # Best effort: un passo fallito non blocca gli altri né si ripete all'infinito
+                print(f"[DownloadPipeline] {stage} failed for {path}: {e}")
+            if self._stop.is_set():
+                return  # passo forse incompleto: si ripete al prossimo avvio
+            self.state.mark_done(path, stage)
+        self.state.finish(path)
+        self.track_processed.emit(path)
+
+    # --- Stages (idempotent) ---
+    def _stage_tags(self, path, entry):
+        if MutagenFile is None:
+            return
+        audio = MutagenFile(path, easy=True)
+        if audio is None:
+            return
+        if audio.tags is None:
+            audio.add_tags()
+        changed = False
+        for key in ("title", "artist"):
+            value = entry[key]
+            if value and list(audio.tags.get(key) or []) != [value]:
+                audio.tags[key] = [value]
+                changed = True
+        if changed:
+            audio.save()
+
+    def _stage_art(self, path, entry):
+        if MutagenFile is None or not path.lower().endswith(".mp3"):
+            return
+        if read_track_metadata(path)["art_hash"]:
+            return  # copertina già presente
+        # Prima la copertina già scaricata per il brano in riproduzione
+        cached = get_art_store().raw(entry["art_id"]) if entry["art_id"] else None
+        if cached is not None:
+            binary, mime = cached
+        elif get_connectivity_monitor().allow_request():
+            binary, mime = fetch_album_art(entry["title"], entry["artist"])
+        else:
+            return
+        if not binary or not mime.startswith("image/") or mime == "image/svg+xml":
+            return
+        try:
+            tags = ID3(path)
+        except ID3NoHeaderError:
+            tags = ID3()
+        tags.add(APIC(encoding=3, mime=mime, type=3, desc="Cover", data=binary))
+        tags.save(path)
+
+    def _stage_index(self, path, entry):
+        if entry.get("source_id"):
+            self.index.record_source(path, entry["source_id"])
+        changes = self.index.refresh_paths([path])
+        if changes:
+            self.library_changed.emit(changes)
+
+    def _stage_loudness(self, path, entry):
+        if self._ffmpeg is None or self.index.loudness(path) is not None:
+            return
+        track = self.index.track(path)
+        if track is None or not self._should_continue():
+            return
+        result = analyze_file(path, self._should_continue, self._ffmpeg)
+        if self._stop.is_set():
+            return
+        self.index.store_loudness(path, track["size"], track["mtime_ns"], **(result or {}))
+
+    def _stage_waveform(self, path, entry):
+        if waveform_cache.load_cached(path) is not None or not self._should_continue():
+            return
+        waveform = waveform_cache.generate(
+            path, self._should_continue, self._ffmpeg, niceness=BACKGROUND_NICENESS
+        )
+        if waveform is not None:
+            waveform_cache.store(path, waveform)
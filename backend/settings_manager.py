@@ -21,6 +21,12 @@ class SettingsManager:
             "ui_scale_mode": "auto",  # Options: "auto", "fixed_small", "fixed_medium", "fixed_large"
             "ui_render_mode": "native",  # Options: "native", "html"
             "emulation_mode": False, # Enable PC Emulation (Mock Hardware)
+            "music_shuffle": False,
+            "music_repeat": "all",  # Options: "off", "all", "one"
+            "music_crossfade_seconds": 0,  # 0 = gapless, no overlap
+            "music_replaygain": True,  # Per-track gain (loudness analysis, else ReplayGain tags)
+            "loudness_analysis": True,  # Background EBU R128 analysis while parked/charging
+            "download_parallel": 2,  # Concurrent yt-dlp downloads (1-4)
         }
         self.settings = self._load_settings()
 
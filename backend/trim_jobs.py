@@ -0,0 +1,236 @@
+# backend/trim_jobs.py
+"""
+Background trimming of library files: ffmpeg jobs run one at a time on a
+worker thread, with progress, cancel and an atomic replace of the original.
+"""
+
+import itertools
+import os
+import queue
+import shutil
+import subprocess
+import threading
+
+from PyQt6.QtCore import QObject, pyqtSignal
+
+from . import waveform_cache
+from .library_index import get_library_index
+
+# Muxer per estensione: il file temporaneo non ha un'estensione audio,
+# così il watcher della libreria non lo indicizza.
+MUXERS = {
+    ".mp3": "mp3", ".m4a": "ipod", ".aac": "adts", ".ogg": "ogg", ".opus": "opus",
+    ".flac": "flac", ".wav": "wav", ".aiff": "aiff", ".wma": "asf", ".alac": "ipod",
+}
+# Fallback quando lo stream copy non è possibile
+REENCODE_ARGS = {
+    ".mp3": ["-c:a", "libmp3lame", "-q:a", "2"],
+    ".m4a": ["-c:a", "aac", "-b:a", "192k"],
+    ".aac": ["-c:a", "aac", "-b:a", "192k"],
+    ".ogg": ["-c:a", "libvorbis", "-q:a", "5"],
+    ".opus": ["-c:a", "libopus", "-b:a", "160k"],
+    ".flac": ["-c:a", "flac"],
+    ".wav": ["-c:a", "pcm_s16le"],
+    ".aiff": ["-c:a", "pcm_s16be"],
+    ".wma": ["-c:a", "wmav2", "-b:a", "192k"],
+    ".alac": ["-c:a", "alac"],
+}
+
+# Muxer che accettano la copertina come stream video "attached_pic";
+# per gli altri (ipod, ogg, wav, ...) si copia solo l'audio.
+COVER_ART_MUXERS = {"mp3", "flac"}
+
+QUEUED, RUNNING, DONE, FAILED, CANCELLED = "queued", "running", "done", "failed", "cancelled"
+
+
+class TrimJob:
+    """Keep [start, end) seconds of `path`."""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, path, start, end):
+        self.job_id = next(self._ids)
+        self.path = os.path.abspath(path)
+        self.start = max(0.0, float(start))
+        self.end = float(end)
+        self.state = QUEUED
+        self.progress = 0.0
+        self.message = ""
+        self.cancelled = threading.Event()
+        self.process = None
+
+    @property
+    def temp_path(self):
+        folder, name = os.path.split(self.path)
+        return os.path.join(folder, f".{name}.trim-{self.job_id}.tmp")
+
+
+def _ffmpeg_command(ffmpeg, job, codec_args):
+    ext = os.path.splitext(job.path)[1].lower()
+    muxer = MUXERS.get(ext)
+    maps = ["-map", "0:a"]
+    if muxer in COVER_ART_MUXERS:
+        maps += ["-map", "0:v?"]  # "?": nessun errore se manca la copertina
+    cmd = [
+        ffmpeg, "-v", "error", "-nostdin", "-y",
+        "-i", job.path,
+        # -ss dopo -i: taglio accurato al pacchetto anche in stream copy
+        "-ss", f"{job.start:.3f}", "-to", f"{job.end:.3f}",
+        *maps, "-map_metadata", "0",
+        *codec_args,
+        "-progress", "pipe:1", "-nostats",
+    ]
+    if muxer:
+        cmd += ["-f", muxer]
+    return cmd + [job.temp_path]
+
+
+def parse_progress_line(line, duration):
+    """Fraction done from one `-progress` line, or None if it carries no time."""
+    key, _, value = line.strip().partition("=")
+    if key in ("out_time_us", "out_time_ms"):
+        # ffmpeg scrive out_time_ms in microsecondi (bug storico): stessi numeri
+        try:
+            seconds = int(value) / 1_000_000
+        except ValueError:
+            return None
+        return min(1.0, max(0.0, seconds / duration)) if duration > 0 else None
+    if key == "progress" and value == "end":
+        return 1.0
+    return None
+
+
+class TrimQueue(QObject):
+    """FIFO of TrimJobs processed by a single daemon thread."""
+
+    job_progress = pyqtSignal(int, float)  # job id, 0..1
+    job_finished = pyqtSignal(int, str, str)  # job id, state, message
+    # Stesso formato di LibraryWatcher.library_changed: [(kind, path)]
+    library_changed = pyqtSignal(list)
+
+    def __init__(self, index=None, parent=None):
+        super().__init__(parent)
+        self.index = index or get_library_index()
+        self._ffmpeg = shutil.which("ffmpeg")
+        self._queue = queue.Queue()
+        self._jobs = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def submit(self, path, start, end):
+        job = TrimJob(path, start, end)
+        with self._lock:
+            self._jobs[job.job_id] = job
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+        self._queue.put(job)
+        return job
+
+    def job(self, job_id):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def cancel(self, job_id):
+        job = self.job(job_id)
+        if job is None or job.state not in (QUEUED, RUNNING):
+            return
+        job.cancelled.set()
+        process = job.process
+        if process is not None:
+            process.kill()
+
+    # --- Worker thread ---
+    def _run(self):
+        while True:
+            job = self._queue.get()
+            if job.cancelled.is_set():
+                self._finish(job, CANCELLED, "Cancelled")
+                continue
+            job.state = RUNNING
+            try:
+                self._process(job)
+            except Exception as e:
+                self._cleanup(job)
+                self._finish(job, FAILED, str(e))
+
+    def _process(self, job):
+        if self._ffmpeg is None:
+            self._finish(job, FAILED, "FFmpeg is not installed")
+            return
+        if job.end <= job.start:
+            self._finish(job, FAILED, "Empty selection")
+            return
+
+        ext = os.path.splitext(job.path)[1].lower()
+        # Prima lo stream copy (nessuna perdita), poi la ricodifica
+        attempts = [("copy", ["-c", "copy"])]
+        if ext in REENCODE_ARGS:
+            attempts.append(("re-encode", ["-c:v", "copy", *REENCODE_ARGS[ext]]))
+        for mode, codec_args in attempts:
+            ok = self._run_ffmpeg(job, codec_args)
+            if job.cancelled.is_set():
+                self._cleanup(job)
+                self._finish(job, CANCELLED, "Cancelled")
+                return
+            if ok:
+                self._replace(job)
+                self._finish(job, DONE, f"Saved ({mode})")
+                return
+            print(f"[TrimQueue] {mode} failed for {job.path}")
+            self._cleanup(job)
+        self._finish(job, FAILED, "Processing failed")
+
+    def _run_ffmpeg(self, job, codec_args):
+        duration = job.end - job.start
+        job.process = subprocess.Popen(
+            _ffmpeg_command(self._ffmpeg, job, codec_args),
+            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True,
+        )
+        if job.cancelled.is_set():
+            job.process.kill()  # annullato mentre il processo partiva
+        try:
+            for line in job.process.stdout:
+                fraction = parse_progress_line(line, duration)
+                if fraction is not None and fraction != job.progress:
+                    job.progress = fraction
+                    self.job_progress.emit(job.job_id, fraction)
+        finally:
+            returncode = job.process.wait()
+            job.process = None
+        return returncode == 0 and os.path.getsize(job.temp_path) > 0
+
+    def _replace(self, job):
+        # La cache è indicizzata per contenuto: va tolta finché il vecchio file esiste
+        waveform_cache.invalidate(job.path)
+        os.replace(job.temp_path, job.path)
+        # Solo la riga di questo file: size/mtime nuovi invalidano anche la loudness.
+        # Il watcher vedrà il rename ma la riga è già aggiornata: le modifiche
+        # vanno quindi notificate da qui.
+        changes = self.index.refresh_paths([job.path])
+        if changes:
+            self.library_changed.emit(changes)
+
+    @staticmethod
+    def _cleanup(job):
+        try:
+            os.remove(job.temp_path)
+        except OSError:
+            pass
+
+    def _finish(self, job, state, message):
+        job.state = state
+        job.message = message
+        print(f"[TrimQueue] Job {job.job_id} {state}: {os.path.basename(job.path)} {message}")
+        self.job_finished.emit(job.job_id, state, message)
+
+
+_shared_queue = None
+
+
+def get_trim_queue():
+    """Process-wide trim queue. The first call must happen on the GUI thread."""
+    global _shared_queue
+    if _shared_queue is None:
+        _shared_queue = TrimQueue()
+    return _shared_queue
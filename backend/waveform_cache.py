@@ -0,0 +1,231 @@
+# backend/waveform_cache.py
+"""
+Waveform overviews for the audio editor: min/max peak envelopes at several
+zoom levels, computed once per file and kept in a compact binary cache.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import shutil
+import struct
+import subprocess
+from pathlib import Path
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - numpy is listed in requirements.txt
+    np = None
+
+WAVEFORM_CACHE_DIR = Path(__file__).resolve().parents[1] / "music" / "waveform_cache"
+
+SAMPLE_RATE = 44100
+BASE_BIN_FRAMES = 512  # livello più fine: ~86 colonne al secondo
+LEVEL_FACTOR = 4  # ogni livello riduce di 4 il precedente
+LEVEL_COUNT = 5  # fino a 131072 frame (~3 s) per colonna
+READ_CHUNK_FRAMES = BASE_BIN_FRAMES * 256
+FINGERPRINT_BYTES = 64 * 1024
+
+# magic, version, sample rate, frames, levels
+_HEADER = struct.Struct("<4sHIQB")
+_LEVEL = struct.Struct("<II")  # frames per bin, bins
+_MAGIC = b"WFM1"
+_VERSION = 1
+
+
+class Waveform:
+    """Peak envelopes: per level, int8 min/max arrays (full scale = 127)."""
+
+    def __init__(self, sample_rate, frames, levels):
+        self.sample_rate = sample_rate
+        self.frames = frames
+        # [(frames per bin, mins, maxs)], dal più fine al più grossolano
+        self.levels = levels
+
+    @property
+    def duration(self) -> float:
+        return self.frames / self.sample_rate if self.sample_rate else 0.0
+
+    def level_for(self, seconds: float, columns: int):
+        """Coarsest level that still has at least one bin per column over `seconds`."""
+        wanted = seconds * self.sample_rate / max(1, columns)
+        best = self.levels[0]
+        for level in self.levels:
+            if level[0] <= wanted:
+                best = level
+        return best
+
+    def envelope(self, start: float, end: float, columns: int):
+        """(mins, maxs) int arrays with one value per column for [start, end) seconds."""
+        bin_frames, mins, maxs = self.level_for(end - start, columns)
+        first = int(start * self.sample_rate / bin_frames)
+        last = int(np.ceil(end * self.sample_rate / bin_frames))
+        first = max(0, min(first, len(mins)))
+        last = max(first, min(last, len(mins)))
+        if last == first or columns <= 0:
+            return np.zeros(max(columns, 0), np.int8), np.zeros(max(columns, 0), np.int8)
+        # Inizio di ogni colonna in bin del livello scelto, poi min/max per gruppo
+        edges = first + (np.arange(columns) * (last - first)) // columns
+        return np.minimum.reduceat(mins[first:last], edges - first), np.maximum.reduceat(maxs[first:last], edges - first)
+
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(_MAGIC, _VERSION, self.sample_rate, self.frames, len(self.levels))]
+        parts += [_LEVEL.pack(bin_frames, len(mins)) for bin_frames, mins, _ in self.levels]
+        for _, mins, maxs in self.levels:
+            parts.append(np.stack((mins, maxs), axis=1).astype(np.int8).tobytes())
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "Waveform | None":
+        try:
+            magic, version, rate, frames, count = _HEADER.unpack_from(data)
+        except struct.error:
+            return None
+        if magic != _MAGIC or version != _VERSION:
+            return None
+        offset = _HEADER.size
+        shapes = []
+        levels = []
+        try:
+            for _ in range(count):
+                shapes.append(_LEVEL.unpack_from(data, offset))
+                offset += _LEVEL.size
+            for bin_frames, bins in shapes:
+                pairs = np.frombuffer(data, dtype=np.int8, count=bins * 2, offset=offset).reshape(bins, 2)
+                levels.append((bin_frames, pairs[:, 0].copy(), pairs[:, 1].copy()))
+                offset += bins * 2
+        except (struct.error, ValueError):
+            return None  # file troncato (spegnimento durante la scrittura)
+        return cls(rate, frames, levels)
+
+
+def file_key(path) -> str:
+    """
+    Content fingerprint (size + first/last 64 KiB): survives renames and
+    copies, changes when the audio is trimmed or re-encoded.
+    """
+    digest = hashlib.sha1()
+    with open(path, "rb") as handle:
+        size = os.fstat(handle.fileno()).st_size
+        digest.update(str(size).encode())
+        digest.update(handle.read(FINGERPRINT_BYTES))
+        if size > FINGERPRINT_BYTES:
+            handle.seek(max(FINGERPRINT_BYTES, size - FINGERPRINT_BYTES))
+            digest.update(handle.read(FINGERPRINT_BYTES))
+    return digest.hexdigest()
+
+
+def cache_path(path) -> Path:
+    return WAVEFORM_CACHE_DIR / f"{file_key(path)}.wfm"
+
+
+def load_cached(path) -> Waveform | None:
+    if np is None:
+        return None
+    try:
+        cached = cache_path(path)
+        waveform = Waveform.from_bytes(cached.read_bytes())
+        if waveform is None:
+            # Illeggibile: lo si cancella, get_waveform lo rigenera
+            cached.unlink()
+        return waveform
+    except OSError:
+        return None
+
+
+def _reduce(mins, maxs, factor):
+    # Completa l'ultimo gruppo ripetendo il valore finale, poi riduce per righe
+    pad = (-len(mins)) % factor
+    if pad:
+        mins = np.concatenate((mins, np.repeat(mins[-1:], pad)))
+        maxs = np.concatenate((maxs, np.repeat(maxs[-1:], pad)))
+    return mins.reshape(-1, factor).min(axis=1), maxs.reshape(-1, factor).max(axis=1)
+
+
+def generate(path, should_continue=None, ffmpeg=None, niceness=0) -> Waveform | None:
+    """
+    Decode `path` with ffmpeg in chunks and build the envelopes; only the
+    finest level is computed from samples, the others from it.
+    Returns None on failure or if `should_continue()` turns False.
+    `niceness` > 0 runs ffmpeg at lower CPU priority (background work).
+    """
+    ffmpeg = ffmpeg or shutil.which("ffmpeg")
+    if np is None or ffmpeg is None:
+        return None
+    cmd = [
+        ffmpeg, "-v", "error", "-nostdin", "-i", str(path), "-vn",
+        "-f", "s16le", "-ac", "2", "-ar", str(SAMPLE_RATE), "pipe:1",
+    ]
+    process = subprocess.Popen(
+        cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+        preexec_fn=(lambda: os.nice(niceness)) if niceness else None,
+    )
+    bin_bytes = BASE_BIN_FRAMES * 4
+    mins, maxs = [], []
+    frames = 0
+    carry = b""
+    try:
+        while True:
+            chunk = process.stdout.read(READ_CHUNK_FRAMES * 4)
+            if not chunk:
+                break
+            if should_continue is not None and not should_continue():
+                return None
+            chunk = carry + chunk
+            usable = len(chunk) - len(chunk) % bin_bytes
+            carry = chunk[usable:]
+            if usable:
+                samples = np.frombuffer(chunk[:usable], dtype="<i2").reshape(-1, BASE_BIN_FRAMES * 2)
+                # >> 8: da 16 bit a int8, min/max su entrambi i canali
+                mins.append((samples.min(axis=1) >> 8).astype(np.int8))
+                maxs.append((samples.max(axis=1) >> 8).astype(np.int8))
+                frames += usable // 4
+        carry = carry[:len(carry) - len(carry) % 4]
+        if carry:
+            samples = np.frombuffer(carry, dtype="<i2")
+            mins.append(np.array([samples.min() >> 8], np.int8))
+            maxs.append(np.array([samples.max() >> 8], np.int8))
+            frames += len(carry) // 4
+    finally:
+        process.kill()
+        process.wait()
+    if process.returncode not in (0, -9) or not mins:
+        return None
+
+    level_mins, level_maxs = np.concatenate(mins), np.concatenate(maxs)
+    levels = [(BASE_BIN_FRAMES, level_mins, level_maxs)]
+    for step in range(1, LEVEL_COUNT):
+        level_mins, level_maxs = _reduce(level_mins, level_maxs, LEVEL_FACTOR)
+        levels.append((BASE_BIN_FRAMES * LEVEL_FACTOR ** step, level_mins, level_maxs))
+    return Waveform(SAMPLE_RATE, frames, levels)
+
+
+def get_waveform(path, should_continue=None) -> Waveform | None:
+    """Cached waveform, generated (and stored) on the first request."""
+    waveform = load_cached(path)
+    if waveform is not None:
+        return waveform
+    waveform = generate(path, should_continue)
+    if waveform is not None:
+        store(path, waveform)
+    return waveform
+
+
+def store(path, waveform: Waveform) -> None:
+    try:
+        target = cache_path(path)
+        target.parent.mkdir(parents=True, exist_ok=True)
+        tmp = target.with_suffix(".tmp")
+        tmp.write_bytes(waveform.to_bytes())
+        os.replace(tmp, target)
+    except OSError as e:
+        print(f"[WaveformCache] Could not store waveform of {path}: {e}")
+
+
+def invalidate(path) -> None:
+    """Drop the cached waveform of `path` (call before the file is rewritten)."""
+    try:
+        cache_path(path).unlink(missing_ok=True)
+    except OSError:
+        pass
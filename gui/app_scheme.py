@@ -0,0 +1,177 @@
+"""`app://` URL scheme used by the HTML UI to pull large data lazily.
+
+Instead of pushing base64 artwork and whole track lists through
+`runJavaScript`, the page fetches them from Python-side caches:
+
+    app://art/<art_id>               original cover bytes from the ArtStore
+    app://library?page=N&v=<version> one JSON page of the library listing
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Any, Callable
+
+from PyQt6.QtCore import QBuffer, QByteArray, QIODevice, QUrl, QUrlQuery
+
+try:
+    from PyQt6.QtWebEngineCore import (
+        QWebEngineUrlRequestJob,
+        QWebEngineUrlScheme,
+        QWebEngineUrlSchemeHandler,
+    )
+except ImportError as exc:  # pragma: no cover - handled at runtime
+    raise ImportError(
+        "PyQt6-WebEngine is required to use the app:// scheme handler."
+    ) from exc
+
+from backend.art_store import get_art_store
+
+SCHEME_NAME = b"app"
+LIBRARY_PAGE_SIZE = 100
+
+# Art ids are content hashes, so a given URL never changes: cache forever.
+ART_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+# Library pages are keyed by the listing version (the `v` query item).
+LIBRARY_CACHE_CONTROL = b"public, max-age=31536000, immutable"
+UNVERSIONED_CACHE_CONTROL = b"no-cache"
+LIBRARY_MAX_PAGE_SIZE = 500
+
+
+def register_app_scheme() -> None:
+    """Declare the scheme to Chromium. Must run before QApplication is created."""
+    scheme = QWebEngineUrlScheme(SCHEME_NAME)
+    scheme.setSyntax(QWebEngineUrlScheme.Syntax.Host)
+    flags = (
+        QWebEngineUrlScheme.Flag.SecureScheme
+        | QWebEngineUrlScheme.Flag.CorsEnabled
+    )
+    fetch_flag = getattr(QWebEngineUrlScheme.Flag, "FetchApiAllowed", None)
+    if fetch_flag is not None:
+        flags |= fetch_flag
+    scheme.setFlags(flags)
+    QWebEngineUrlScheme.registerScheme(scheme)
+
+
+def supports_response_headers() -> bool:
+    """Custom headers (Cache-Control, CORS) need Qt >= 6.6."""
+    return hasattr(QWebEngineUrlRequestJob, "setAdditionalResponseHeaders")
+
+
+def parse_library_query(page: str, size: str) -> tuple[int, int] | None:
+    """(page, page size) from the `app://library` query items; None if not numbers."""
+    try:
+        page_number = max(0, int(page or 0))
+        page_size = int(size or LIBRARY_PAGE_SIZE)
+    except ValueError:
+        return None
+    return page_number, max(1, min(page_size, LIBRARY_MAX_PAGE_SIZE))
+
+
+def library_page(version: int, tracks: list[dict[str, Any]], page: int, size: int) -> bytes:
+    """JSON body of one library page (empty `tracks` past the end)."""
+    start = page * size
+    return json.dumps(
+        {
+            "version": version,
+            "page": page,
+            "page_size": size,
+            "total": len(tracks),
+            "tracks": tracks[start:start + size],
+        }
+    ).encode("utf-8")
+
+
+def library_cache_control(requested_version: str, version: int) -> bytes:
+    """A page is immutable only when asked for by the version it was built from."""
+    return LIBRARY_CACHE_CONTROL if requested_version == str(version) else UNVERSIONED_CACHE_CONTROL
+
+
+def response_headers(cache_control: bytes, etag: str, supported: bool) -> dict[bytes, bytes]:
+    """Extra reply headers, or none where Qt can't set them (< 6.6)."""
+    if not supported:
+        return {}
+    return {
+        b"Cache-Control": cache_control,
+        b"ETag": f'"{etag}"'.encode("ascii"),
+        # The page itself is loaded from file://, so fetch() is cross-origin.
+        b"Access-Control-Allow-Origin": b"*",
+    }
+
+
+class AppSchemeHandler(QWebEngineUrlSchemeHandler):
+    """Serves `app://` requests straight from the in-memory caches."""
+
+    def __init__(
+        self,
+        library_provider: Callable[[], tuple[int, list[dict[str, Any]]]],
+        parent=None,
+    ) -> None:
+        super().__init__(parent)
+        self._library_provider = library_provider
+        self._art_store = get_art_store()
+        # Serialised pages for the current library version only.
+        self._page_cache_version: int | None = None
+        self._page_cache: dict[tuple[int, int], bytes] = {}
+
+    def requestStarted(self, job: QWebEngineUrlRequestJob) -> None:
+        url = job.requestUrl()
+        host = url.host()
+        if host == "art":
+            self._serve_art(job, url)
+        elif host == "library":
+            self._serve_library(job, url)
+        else:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+
+    def _serve_art(self, job: QWebEngineUrlRequestJob, url: QUrl) -> None:
+        art_id = url.path().strip("/")
+        raw = self._art_store.raw(art_id)
+        if raw is None:
+            job.fail(QWebEngineUrlRequestJob.Error.UrlNotFound)
+            return
+        binary, mime = raw
+        self._reply(job, mime, binary, ART_CACHE_CONTROL, etag=art_id)
+
+    def _serve_library(self, job: QWebEngineUrlRequestJob, url: QUrl) -> None:
+        query = QUrlQuery(url)
+        parsed = parse_library_query(query.queryItemValue("page"), query.queryItemValue("size"))
+        if parsed is None:
+            job.fail(QWebEngineUrlRequestJob.Error.RequestFailed)
+            return
+        page, size = parsed
+        requested_version = query.queryItemValue("v")
+
+        version, tracks = self._library_provider()
+        if self._page_cache_version != version:
+            self._page_cache_version = version
+            self._page_cache = {}
+        key = (page, size)
+        body = self._page_cache.get(key)
+        if body is None:
+            body = library_page(version, tracks, page, size)
+            self._page_cache[key] = body
+
+        cache_control = library_cache_control(requested_version, version)
+        self._reply(
+            job, "application/json", body, cache_control, etag=f"lib-{version}-{page}-{size}"
+        )
+
+    def _reply(
+        self,
+        job: QWebEngineUrlRequestJob,
+        mime: str,
+        body: bytes,
+        cache_control: bytes,
+        etag: str,
+    ) -> None:
+        headers = response_headers(cache_control, etag, supports_response_headers())
+        if headers:
+            job.setAdditionalResponseHeaders(
+                {QByteArray(name): QByteArray(value) for name, value in headers.items()}
+            )
+        # The buffer is parented to the job so it lives exactly as long as the reply.
+        buffer = QBuffer(job)
+        buffer.setData(QByteArray(body))
+        buffer.open(QIODevice.OpenModeFlag.ReadOnly)
+        job.reply(mime.encode("ascii"), buffer)
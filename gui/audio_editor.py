@@ -1,19 +1,25 @@
 import os
-import subprocess
 import pygame
 from PyQt6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, 
-    QSlider, QMessageBox, QWidget
+    QSlider, QMessageBox, QWidget, QProgressBar
 )
 from PyQt6.QtCore import Qt, QTimer
 
+from backend.audio_probe import StreamInfo, probe_stream
+from backend.trim_jobs import CANCELLED, DONE, get_trim_queue
+from .widgets.waveform_view import WaveformLoader, WaveformView
+
 class AudioEditorDialog(QDialog):
     def __init__(self, file_path, parent=None):
         super().__init__(parent)
         self.file_path = file_path
         self.duration = 0
+        self.stream_info = StreamInfo()
         self.start_time = 0
         self.end_time = 0
+        self._last_marker = "start"  # centro dello zoom
+        self._job_id = None  # salvataggio in corso nella coda di trim
         self.preview_timer = QTimer()
         self.preview_timer.timeout.connect(self.check_preview_end)
         
@@ -34,12 +40,20 @@ class AudioEditorDialog(QDialog):
         self.init_audio()
         self.setup_ui()
 
+        # Forma d'onda dalla cache (generata solo alla prima apertura del file)
+        self.waveform_loader = WaveformLoader(self)
+        self.waveform_loader.loaded.connect(self.on_waveform_loaded)
+        self.waveform_loader.load(self.file_path)
+
     def init_audio(self):
         try:
             if not pygame.mixer.get_init():
                 pygame.mixer.init()
-            sound = pygame.mixer.Sound(self.file_path)
-            self.duration = sound.get_length()
+            # Solo l'header del file: niente decodifica completa in RAM
+            self.stream_info = probe_stream(self.file_path)
+            self.duration = self.stream_info.duration
+            if self.duration <= 0:
+                raise ValueError("unknown duration (unreadable header)")
             self.end_time = self.duration
         except Exception as e:
             QMessageBox.critical(self, "Error", f"Could not load audio: {e}")
@@ -51,6 +65,24 @@ class AudioEditorDialog(QDialog):
         # Info
         layout.addWidget(QLabel(f"Editing: {os.path.basename(self.file_path)}"))
         layout.addWidget(QLabel(f"Total Duration: {self.format_time(self.duration)}"))
+        if self.stream_info.describe():
+            layout.addWidget(QLabel(self.stream_info.describe()))
+
+        # Waveform: i marker si trascinano direttamente
+        self.waveform_view = WaveformView()
+        self.waveform_view.set_duration(self.duration)
+        self.waveform_view.trim_changed.connect(self.on_waveform_trim_changed)
+        layout.addWidget(self.waveform_view, 1)
+
+        zoom_layout = QHBoxLayout()
+        zoom_out = QPushButton("Zoom −")
+        zoom_out.clicked.connect(lambda: self.zoom_waveform(0.5))
+        zoom_in = QPushButton("Zoom +")
+        zoom_in.clicked.connect(lambda: self.zoom_waveform(2.0))
+        zoom_layout.addStretch(1)
+        zoom_layout.addWidget(zoom_out)
+        zoom_layout.addWidget(zoom_in)
+        layout.addLayout(zoom_layout)
         
         # Start Trim Control
         layout.addWidget(QLabel("Start Time (Cut from beginning):"))
@@ -95,6 +127,13 @@ class AudioEditorDialog(QDialog):
         end_layout.addWidget(self.end_label)
         layout.addLayout(end_layout)
 
+        # Avanzamento del salvataggio (ffmpeg in background)
+        self.save_progress = QProgressBar()
+        self.save_progress.setRange(0, 1000)
+        self.save_progress.setTextVisible(False)
+        self.save_progress.setVisible(False)
+        layout.addWidget(self.save_progress)
+
         # Buttons
         btn_layout = QHBoxLayout()
         
@@ -102,16 +141,16 @@ class AudioEditorDialog(QDialog):
         self.preview_btn.setStyleSheet("background-color: #FF9500; color: white; font-weight: bold;")
         self.preview_btn.clicked.connect(self.toggle_preview)
         
-        save_btn = QPushButton("Save & Overwrite")
-        save_btn.setStyleSheet("background-color: #34C759; color: white; font-weight: bold;")
-        save_btn.clicked.connect(self.save_audio)
+        self.save_btn = QPushButton("Save & Overwrite")
+        self.save_btn.setStyleSheet("background-color: #34C759; color: white; font-weight: bold;")
+        self.save_btn.clicked.connect(self.save_audio)
         
-        cancel_btn = QPushButton("Cancel")
-        cancel_btn.clicked.connect(self.reject)
+        self.cancel_btn = QPushButton("Cancel")
+        self.cancel_btn.clicked.connect(self.on_cancel_clicked)
         
-        btn_layout.addWidget(cancel_btn)
+        btn_layout.addWidget(self.cancel_btn)
         btn_layout.addWidget(self.preview_btn)
-        btn_layout.addWidget(save_btn)
+        btn_layout.addWidget(self.save_btn)
         layout.addLayout(btn_layout)
 
     def format_time(self, seconds):
@@ -130,6 +169,8 @@ class AudioEditorDialog(QDialog):
             self.start_slider.blockSignals(False)
             
         self.start_label.setText(self.format_time(self.start_time))
+        self._last_marker = "start"
+        self.waveform_view.set_trim(self.start_time, self.end_time)
 
     def on_end_changed(self, val):
         self.end_time = val / 10.0
@@ -141,6 +182,33 @@ class AudioEditorDialog(QDialog):
             self.end_slider.blockSignals(False)
             
         self.end_label.setText(self.format_time(self.end_time))
+        self._last_marker = "end"
+        self.waveform_view.set_trim(self.start_time, self.end_time)
+
+    def on_waveform_loaded(self, path, waveform):
+        if path == self.file_path:
+            self.waveform_view.set_waveform(waveform)
+
+    def on_waveform_trim_changed(self, start, end):
+        # Gli slider restano la fonte di verità (passi da 0.1 s)
+        if int(start * 10) != self.start_slider.value():
+            self.start_slider.setValue(int(start * 10))
+        if int(end * 10) != self.end_slider.value():
+            self.end_slider.setValue(int(end * 10))
+
+    def zoom_waveform(self, factor):
+        center = self.start_time if self._last_marker == "start" else self.end_time
+        self.waveform_view.zoom(factor, center)
+
+    def done(self, result):
+        # init_audio può rifiutare il dialog prima che il loader esista
+        loader = getattr(self, "waveform_loader", None)
+        if loader is not None:
+            loader.cancel()
+        if self._job_id is not None:
+            # Chiuso durante il salvataggio: il job prosegue in background
+            self._set_saving(False)
+        super().done(result)
 
     def adjust_start(self, seconds):
         new_val = self.start_slider.value() + int(seconds * 10)
@@ -180,44 +248,54 @@ class AudioEditorDialog(QDialog):
         # Stop preview
         if pygame.mixer.music.get_busy():
             pygame.mixer.music.stop()
+            self.check_preview_end()
             
         # Confirm
         if QMessageBox.question(self, "Confirm", "Overwrite original file? This cannot be undone.") != QMessageBox.StandardButton.Yes:
             return
-            
-        temp_file = self.file_path + ".temp" + os.path.splitext(self.file_path)[1]
-        
+
         try:
-            # Unload file from pygame so we can overwrite it
-            pygame.mixer.music.unload() 
-        except:
-            pass # Some pygame versions don't have unload, but load(None) works or just stop.
-            # Actually pygame mixer keeps file open? `music.load` keeps it open.
-            # We must verify if we can overwrite.
-            # Using temp file and then os.replace works on Linux (atomic rename).
+            # Il file dell'anteprima resta aperto in pygame finché non si scarica
+            pygame.mixer.music.unload()
+        except (AttributeError, pygame.error):
             pass
 
-        try:
-            # We use re-encoding to ensure precise cuts, especially for MP3s where copy might be inaccurate at frames.
-            # -ss before -i is faster seeking
-            cmd = [
-                "ffmpeg", "-y",
-                "-i", self.file_path,
-                "-ss", str(self.start_time),
-                "-to", str(self.end_time),
-                "-c:a", "libmp3lame" if self.file_path.lower().endswith(".mp3") else "copy",
-                temp_file
-            ]
-            
-            subprocess.run(cmd, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-            
-            # Replace
-            os.replace(temp_file, self.file_path)
-            
+        # ffmpeg gira nella coda di trim: la UI resta libera e il job annullabile
+        job = get_trim_queue().submit(self.file_path, self.start_time, self.end_time)
+        self._job_id = job.job_id
+        self._set_saving(True)
+
+    def _set_saving(self, saving):
+        queue = get_trim_queue()
+        if saving:
+            queue.job_progress.connect(self.on_job_progress)
+            queue.job_finished.connect(self.on_job_finished)
+        else:
+            queue.job_progress.disconnect(self.on_job_progress)
+            queue.job_finished.disconnect(self.on_job_finished)
+            self._job_id = None
+        self.save_progress.setValue(0)
+        self.save_progress.setVisible(saving)
+        for widget in (self.save_btn, self.preview_btn, self.start_slider, self.end_slider, self.waveform_view):
+            widget.setEnabled(not saving)
+        self.cancel_btn.setText("Stop Saving" if saving else "Cancel")
+
+    def on_cancel_clicked(self):
+        if self._job_id is not None:
+            get_trim_queue().cancel(self._job_id)
+        else:
+            self.reject()
+
+    def on_job_progress(self, job_id, fraction):
+        if job_id == self._job_id:
+            self.save_progress.setValue(int(fraction * 1000))
+
+    def on_job_finished(self, job_id, state, message):
+        if job_id != self._job_id:
+            return
+        self._set_saving(False)
+        if state == DONE:
             QMessageBox.information(self, "Success", "File saved.")
             self.accept()
-            
-        except subprocess.CalledProcessError:
-            QMessageBox.critical(self, "Error", "Processing failed. Is FFmpeg installed?")
-        except Exception as e:
-            QMessageBox.critical(self, "Error", str(e))
+        elif state != CANCELLED:
+            QMessageBox.critical(self, "Error", message)
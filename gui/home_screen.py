@@ -13,8 +13,6 @@ from PyQt6.QtWidgets import (
 from PyQt6.QtCore import Qt, pyqtSlot
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkReply
-import base64
-import binascii
 
 # --- Import scale_value helper ---
 try:
@@ -32,7 +30,7 @@ except ImportError:
     print("WARNING: ScrollingLabel not found. Falling back to standard QLabel.")
     ScrollingLabel = QLabel  # Fallback
 
-from backend.media_info import load_local_placeholder_data_url
+from backend.art_store import get_art_store
 
 
 class HomeScreen(QWidget):
@@ -57,10 +55,10 @@ class HomeScreen(QWidget):
         # --- Current track info ---
         self.current_title = ""
         self.current_artist = ""
-        self.default_art_data_url = load_local_placeholder_data_url(
-            "gui/html/assets/media/album_placeholder.svg"
-        )
-        self.default_album_art = self._pixmap_from_data_url(self.default_art_data_url)
+        self.art_store = get_art_store()
+        self.art_store.art_ready.connect(self._on_art_decoded)
+        self._pending_art_id = ""
+        self.default_album_art = self.art_store.pixmap(self.art_store.placeholder_id(), 200)
         if not self.default_album_art or self.default_album_art.isNull():
             # Create a default album art if the asset cannot be loaded
             self.default_album_art = QPixmap(100, 100)
@@ -235,37 +233,13 @@ class HomeScreen(QWidget):
         # --- Initial state ---
         self.clear_media_info()
 
-    def _pixmap_from_data_url(self, data_url):
-        """Decode a data URL into a QPixmap, returning None on failure."""
-        if not data_url or not isinstance(data_url, str):
+    def _art_pixmap(self, art_id):
+        """Cached art store thumbnail sized to the home screen artwork label."""
+        if not self.art_store.has(art_id):
             return None
-        if not data_url.startswith("data:"):
-            return None
-        try:
-            _, encoded = data_url.split(",", 1)
-        except ValueError:
-            return None
-        try:
-            binary = base64.b64decode(encoded)
-        except (binascii.Error, ValueError):
-            return None
-        pixmap = QPixmap()
-        if pixmap.loadFromData(binary):
-            return pixmap
-        return None
-
-    def _scale_album_art(self, pixmap):
-        """Scale incoming pixmaps to match the home screen artwork label."""
-        if not pixmap or pixmap.isNull():
-            return self.default_album_art
         target_width = self.album_art_label.width() or self.album_art_label.minimumWidth()
         target_height = self.album_art_label.height() or self.album_art_label.minimumHeight()
-        return pixmap.scaled(
-            target_width,
-            target_height,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        return self.art_store.pixmap(art_id, target_width, target_height)
 
     def update_scaling(self, scale_factor, scaled_main_margin):
         """Applies scaling to internal layouts."""
@@ -316,13 +290,7 @@ class HomeScreen(QWidget):
         self.album_name_label.setText(album if album else "(Album Unknown)")
 
         # Update time label
-        duration_ms = track_info.get("Duration", 0)
-        position_ms = properties.get("Position", 0)
-        pos_sec = position_ms // 1000
-        dur_sec = duration_ms // 1000
-        pos_str = f"{pos_sec // 60:02d}:{pos_sec % 60:02d}"
-        dur_str = f"{dur_sec // 60:02d}:{dur_sec % 60:02d}" if dur_sec > 0 else "--:--"
-        self.track_time_label.setText(f"{pos_str} / {dur_str}")
+        self.update_time_label(position_ms, duration_ms)
 
         # Fetch album art if title or artist changed
         if title != self.current_title or artist != self.current_artist:
@@ -345,21 +313,29 @@ class HomeScreen(QWidget):
                 self.clear_media_info()
 
     
-    @pyqtSlot(QPixmap)
-    def update_album_art(self, pixmap):
+    @pyqtSlot(str)
+    def update_album_art(self, art_id):
         """
-        Questo slot riceve la copertina dell'album direttamente da un'altra schermata (es. MusicPlayerScreen).
+        Questo slot riceve l'id della copertina (ArtStore) da un'altra schermata (es. MusicPlayerScreen).
         """
         print("[HomeScreen] Ricevuto segnale per aggiornare la copertina.")
-        if not pixmap.isNull():
-            # Ridimensiona il pixmap per adattarlo alla label della HomeScreen
-            # Usiamo self.album_art_label.size() per ottenere le dimensioni attuali,
-            # che potrebbero essere state modificate dallo scaling.
-            scaled_pixmap = self._scale_album_art(pixmap)
-            self.album_art_label.setPixmap(scaled_pixmap)
+        # La miniatura è già decodificata e ridimensionata: qui la prendiamo
+        # dalla cache alla dimensione attuale della label (che dipende dallo scaling).
+        pixmap = self._art_pixmap(art_id)
+        if pixmap is not None and not pixmap.isNull():
+            self.album_art_label.setPixmap(pixmap)
         else:
             self.album_art_label.setPixmap(self.default_album_art)
 
+    @pyqtSlot(int, int)
+    def update_time_label(self, position_ms, duration_ms):
+        """Sets the "mm:ss / mm:ss" label (also fed by the interpolated BT position)."""
+        pos_sec = position_ms // 1000
+        dur_sec = duration_ms // 1000
+        pos_str = f"{pos_sec // 60:02d}:{pos_sec % 60:02d}"
+        dur_str = f"{dur_sec // 60:02d}:{dur_sec % 60:02d}" if dur_sec > 0 else "--:--"
+        self.track_time_label.setText(f"{pos_str} / {dur_str}")
+
     @pyqtSlot(int, int)
     def update_position(self, _position, _duration):
         """Updates the position for local playback."""
@@ -380,21 +356,22 @@ class HomeScreen(QWidget):
         self.current_artist = ""
 
     def on_album_art_downloaded(self, reply):
-        """Handle downloaded album art"""
+        """Handle downloaded album art: decoding happens on the art store pool."""
         if reply.error() == QNetworkReply.NetworkError.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                scaled_pixmap = self._scale_album_art(pixmap)
-                self.album_art_label.setPixmap(scaled_pixmap)
-            else:
+            self._pending_art_id = self.art_store.submit(bytes(reply.readAll()))
+            if not self._pending_art_id:
                 self.album_art_label.setPixmap(self.default_album_art)
         else:
             print(f"Error downloading album art: {reply.errorString()}")
             self.album_art_label.setPixmap(self.default_album_art)
         reply.deleteLater()
 
+    @pyqtSlot(str)
+    def _on_art_decoded(self, art_id):
+        if art_id and art_id == self._pending_art_id:
+            self._pending_art_id = ""
+            self.update_album_art(art_id)
+
     # --- Click Handlers ---
     def on_play_pause_clicked(self):
         print("Play/Pause button clicked")
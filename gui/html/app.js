@@ -252,81 +252,194 @@
         }
     };
 
-    function renderLibrary(tracks) {
+    // =================================================================================
+    // Library (virtual list)
+    // =================================================================================
+    // Solo le righe visibili sono nel DOM; le tracce arrivano a pagine mentre si
+    // scorre e le modifiche successive come diff per id. Aprire la libreria costa
+    // uguale con 100 o 20.000 brani.
+    const LIBRARY_ROW_HEIGHT = 88; // .track-item (80px) + spazio tra le righe
+    const LIBRARY_OVERSCAN = 4;
+
+    const library = {
+        version: null,
+        total: 0,
+        pageSize: 100,
+        url: null,
+        tracks: [],           // sparso: undefined finché la pagina non arriva
+        requested: new Set(), // pagine in caricamento
+        firstRow: -1,
+        lastRow: -1,
+        frame: null,
+    };
+
+    function escapeHtml(value) {
+        return String(value ?? "").replace(/[&<>"']/g, (ch) => ({
+            "&": "&amp;", "<": "&lt;", ">": "&gt;", '"': "&quot;", "'": "&#39;",
+        })[ch]);
+    }
+
+    function libraryElements() {
         const container = document.getElementById("library-items");
-        if (!container) {
-            console.warn("[HTML] library-items container not found");
-            return;
-        }
+        if (!container) return null;
+        const scroller = container.closest(".scroll") || container.parentElement;
+        if (!container.dataset.virtual) {
+            container.dataset.virtual = "1";
+            scroller.addEventListener("scroll", scheduleLibraryRender, { passive: true });
+            window.addEventListener("resize", scheduleLibraryRender);
+            container.addEventListener("click", onLibraryClick);
+        }
+        return { container, scroller };
+    }
 
-        container.innerHTML = "";
+    function resetLibrary(meta) {
+        library.version = meta.version;
+        library.total = meta.total || 0;
+        library.pageSize = meta.page_size || 100;
+        library.url = meta.url || null;
+        library.tracks = new Array(library.total);
+        library.requested.clear();
+        storeLibraryPage(0, meta.first_page || []);
+        const refs = libraryElements();
+        if (refs) refs.scroller.scrollTop = 0;
+        renderLibraryRows(true);
+    }
 
-        if (!tracks || !tracks.length) {
-            container.innerHTML = `<p class="empty-state">No tracks found in library.</p>`;
+    function storeLibraryPage(page, tracks) {
+        const start = page * library.pageSize;
+        tracks.forEach((track, offset) => {
+            if (start + offset < library.total) library.tracks[start + offset] = track;
+        });
+    }
+
+    function requestLibraryPage(page) {
+        if (library.requested.has(page)) return;
+        library.requested.add(page);
+        const version = library.version;
+        if (!library.url) {
+            emit("library_page_request", { page, version });
             return;
         }
+        // Le URL includono la versione: pagine già viste arrivano dalla cache
+        fetch(`${library.url}?page=${page}&size=${library.pageSize}&v=${version}`)
+            .then((response) => {
+                if (!response.ok) throw new Error(`${response.status} ${response.statusText}`);
+                return response.json();
+            })
+            .then((data) => onLibraryPage({ version: data.version, page, tracks: data.tracks || [] }))
+            .catch((error) => {
+                library.requested.delete(page);
+                console.error("[HTML] Failed to load library page:", error);
+            });
+    }
 
-        tracks.forEach((track, index) => {
-            const isActive = index === 0; // se vuoi il primo evidenziato
-            
-            const btn = document.createElement("button");
-            btn.className = "track-item";
-            btn.dataset.trackId = track.id || track.filename || `track-${index}`;
+    function onLibraryPage(data) {
+        library.requested.delete(data.page);
+        if (data.version !== library.version) return; // superata da un diff o da una nuova lista
+        storeLibraryPage(data.page, data.tracks);
+        renderLibraryRows(true);
+    }
 
-            btn.innerHTML = `
+    function scheduleLibraryRender() {
+        if (library.frame !== null) return;
+        library.frame = requestAnimationFrame(() => {
+            library.frame = null;
+            renderLibraryRows(false);
+        });
+    }
+
+    function libraryRowHtml(track, index) {
+        if (!track) {
+            return `<div class="track-item track-item--placeholder" style="top:${index * LIBRARY_ROW_HEIGHT}px"></div>`;
+        }
+        return `
+            <div class="track-item" role="button" data-index="${index}" style="top:${index * LIBRARY_ROW_HEIGHT}px">
             <div class="track-item__left">
                 <div class="track-item__icon">
-                <span class="material-symbols-outlined">
-                    ${isActive ? "volume_up" : "music_note"}
-                </span>
+                <span class="material-symbols-outlined">music_note</span>
                 </div>
                 <div class="track-item__meta">
                 <p class="track-item__title">
-                    ${track.title || track.filename || "Unknown"}
+                    ${escapeHtml(track.title || track.filename || "Unknown")}
                 </p>
                 <p class="track-item__subtitle">
-                    ${track.artist ? track.artist : (track.filename || "")}${track.album ? " · " + track.album : ""}
+                    ${escapeHtml(track.artist ? track.artist : (track.filename || ""))}${track.album ? " · " + escapeHtml(track.album) : ""}
                 </p>
                 </div>
             </div>
             <div style="display: flex; align-items: center; gap: 10px;">
-                <span class="track-item__duration ${isActive ? "track-item__duration--active" : ""}">
-                    ${track.duration || "--:--"}
+                <span class="track-item__duration">
+                    ${escapeHtml(track.duration || "--:--")}
                 </span>
                 <button class="track-edit-btn" style="background: none; border: none; color: inherit; padding: 8px;">
                     <span class="material-symbols-outlined" style="font-size: 24px;">edit</span>
                 </button>
             </div>
-            `;
-
-            // Edit button handler
-            const editBtn = btn.querySelector(".track-edit-btn");
-            if (editBtn) {
-                editBtn.addEventListener("click", (e) => {
-                    e.stopPropagation();
-                    console.log("[LIBRARY] Edit clicked for", track.filename);
-                    emit("edit_audio", { filename: track.filename });
-                });
-            }
+            </div>`;
+    }
 
-            // Play handler
-            btn.addEventListener("click", (e) => {
-                // Ignore if clicked on edit button (though stopPropagation should handle it)
-                if (e.target.closest(".track-edit-btn")) return;
-                
-                emit("play_track", { filename: track.filename });
-
-                // opzionale: passa subito alla schermata music player
-                // se hai già un evento di sistema per questo, meglio usarlo:
-                // emit("system_action", { action: "music" });
-                // oppure, se hai setActiveScreen:
-                // setActiveScreen("music_player");
-            });
+    function renderLibraryRows(force) {
+        const refs = libraryElements();
+        if (!refs) return;
+        const { container, scroller } = refs;
 
-            container.appendChild(btn);
-        });
+        if (!library.total) {
+            container.style.height = "";
+            container.innerHTML = `<p class="empty-state">No tracks found in library.</p>`;
+            library.firstRow = library.lastRow = -1;
+            return;
+        }
+        container.style.height = `${library.total * LIBRARY_ROW_HEIGHT}px`;
+
+        const offset = scroller.scrollTop - container.offsetTop + scroller.offsetTop;
+        const first = Math.max(0, Math.floor(offset / LIBRARY_ROW_HEIGHT) - LIBRARY_OVERSCAN);
+        const visible = Math.ceil(scroller.clientHeight / LIBRARY_ROW_HEIGHT) + LIBRARY_OVERSCAN * 2;
+        const last = Math.min(library.total - 1, first + visible);
+        if (!force && first === library.firstRow && last === library.lastRow) return;
+        library.firstRow = first;
+        library.lastRow = last;
+
+        const rows = [];
+        for (let index = first; index <= last; index += 1) {
+            const track = library.tracks[index];
+            if (!track) requestLibraryPage(Math.floor(index / library.pageSize));
+            rows.push(libraryRowHtml(track, index));
+        }
+        container.innerHTML = rows.join("");
     }
 
+    function onLibraryClick(event) {
+        const row = event.target.closest(".track-item[data-index]");
+        if (!row) return;
+        const track = library.tracks[Number(row.dataset.index)];
+        if (!track) return;
+        if (event.target.closest(".track-edit-btn")) {
+            event.stopPropagation();
+            console.log("[LIBRARY] Edit clicked for", track.filename);
+            emit("edit_audio", { filename: track.filename });
+            return;
+        }
+        emit("play_track", { filename: track.filename });
+    }
+
+    function applyLibraryDiff(diff) {
+        if (diff.base_version !== library.version) {
+            // Persa una versione intermedia: si riparte da una lista completa
+            emit("library_request", {});
+            return;
+        }
+        // splice() mantiene i buchi delle pagine non ancora caricate
+        (diff.removed || []).forEach(({ index }) => library.tracks.splice(index, 1));
+        (diff.inserted || []).forEach(({ index, track }) => library.tracks.splice(index, 0, track));
+        (diff.updated || []).forEach(({ index, track }) => {
+            library.tracks[index] = track;
+        });
+        library.version = diff.version;
+        library.total = diff.total;
+        library.tracks.length = library.total;
+        library.requested.clear();
+        renderLibraryRows(true);
+    }
 
     const handlers = {
         init(payload) {
@@ -355,9 +468,9 @@
         },
         media: updateMedia,
         settings: updateSettings,
-        library_update(payload) {
-            renderLibrary(payload.tracks || []);
-        },
+        library_update: resetLibrary,
+        library_page: onLibraryPage,
+        library_diff: applyLibraryDiff,
 
     };
 
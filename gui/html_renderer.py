@@ -5,7 +5,6 @@ from __future__ import annotations
 import json
 import os
 from typing import Any, Dict
-from mutagen import File as MutagenFile
 import math
 
 from PyQt6.QtCore import QObject, QUrl, pyqtSignal, pyqtSlot
@@ -20,8 +19,51 @@ except ImportError as exc:  # pragma: no cover - handled at runtime
     ) from exc
 
 import logging
-from mutagen import File as MutagenFile
-from mutagen.easyid3 import EasyID3
+
+from backend.download_manager import get_download_manager
+from backend.library_index import get_library_index
+from backend.library_scanner import get_library_scanner
+from backend.library_watcher import get_library_watcher
+from backend.trim_jobs import get_trim_queue
+
+from .app_scheme import (
+    LIBRARY_PAGE_SIZE,
+    SCHEME_NAME,
+    AppSchemeHandler,
+    supports_response_headers,
+)
+
+# Oltre questa soglia conviene ricaricare la lista invece di applicare un diff
+LIBRARY_DIFF_MAX_OPS = 500
+
+
+def _diff_tracks(old: list[dict[str, Any]], new: list[dict[str, Any]]) -> dict[str, Any]:
+    """
+    Diff by track id between two listings sorted the same way. Indices let
+    the page patch rows it has not loaded yet: removals (old index, in
+    descending order) first, then inserts in ascending new index, then
+    in-place updates; the result is exactly `new`.
+    """
+    old_by_id = {track["id"]: track for track in old}
+    new_ids = {track["id"] for track in new}
+    return {
+        "removed": [
+            {"index": index, "id": track["id"]}
+            for index, track in reversed(list(enumerate(old)))
+            if track["id"] not in new_ids
+        ],
+        "inserted": [
+            {"index": index, "track": track}
+            for index, track in enumerate(new)
+            if track["id"] not in old_by_id
+        ],
+        "updated": [
+            {"index": index, "track": track}
+            for index, track in enumerate(new)
+            if track["id"] in old_by_id and old_by_id[track["id"]] != track
+        ],
+    }
+
 
 logging.basicConfig(
     level=logging.INFO,
@@ -74,6 +116,28 @@ class HtmlView(QWidget):
         self._bridge = HtmlBridge(self)
         self._bridge.event_received.connect(self._on_event)
 
+        # Stato della libreria servito via app://library (versionato per la cache)
+        self._library_tracks: list[dict[str, Any]] = []
+        self._library_version = 0
+        self._library_requested = False
+        # Stesso indice SQLite della schermata Qt: la lista arriva subito dal
+        # DB e viene aggiornata solo se il rescan in background trova modifiche.
+        self._library_index = get_library_index()
+        self._library_scanner = get_library_scanner()
+        self._library_scanner.scan_finished.connect(self._on_library_scan_finished)
+        get_library_watcher().library_changed.connect(self._on_library_changed)
+        # Trim e download aggiornano l'indice da soli: quando il watcher vede il
+        # file, size/mtime sono già allineati e lui non segnala nulla
+        get_trim_queue().library_changed.connect(self._on_library_changed)
+        get_download_manager().pipeline.library_changed.connect(self._on_library_changed)
+
+        # Dati pesanti (copertine, libreria) passano dallo schema app:// invece
+        # che da runJavaScript.
+        self._scheme_handler = AppSchemeHandler(self._library_snapshot, self)
+        profile = self._view.page().profile()
+        if profile.urlSchemeHandler(SCHEME_NAME) is None:
+            profile.installUrlSchemeHandler(SCHEME_NAME, self._scheme_handler)
+
         channel = QWebChannel(self._view.page())
         channel.registerObject("bridge", self._bridge)
         self._view.page().setWebChannel(channel)
@@ -91,114 +155,123 @@ class HtmlView(QWidget):
         # Gestione interna della libreria
         if name == "library_request":
             logging.debug("Handling library_request...")
-            tracks = self._scan_music_library()
-            logging.debug(f"Sending library_update with {len(tracks)} tracks")
-            self.send_event("library_update", {"tracks": tracks})
+            self._library_requested = True
+            self._refresh_library_tracks()
+            self._send_library_snapshot()
+            self._library_scanner.request_scan(self._music_dir())
+            return
+        if name == "library_page_request":
+            # Qt < 6.6: niente fetch() da app://, le pagine passano dal bridge
+            self._send_library_page(payload)
             return
 
         # Propaga comunque l'evento a chi si è collegato da fuori (se serve)
         self.event_received.emit(name, payload)
 
-    def _scan_music_library(self) -> list[dict[str, Any]]:
-        """Legge la cartella music/library e ritorna una lista di tracce."""
-        logging.info("Scanning music library...")
-
+    @staticmethod
+    def _music_dir() -> str:
         # html_renderer.py sta in: gui/
         base_dir = os.path.dirname(__file__)          # .../gui
         project_root = os.path.dirname(base_dir)      # .../ (root progetto)
-        music_dir = os.path.join(project_root, "music", "library")
+        return os.path.join(project_root, "music", "library")
 
-        logging.info(f"Music folder resolved to: {music_dir}")
-
-        exts = {".mp3", ".wav", ".flac", ".ogg"}
+    def _load_library_tracks(self) -> list[dict[str, Any]]:
+        """Tracce di music/library lette dall'indice (nessun accesso ai file)."""
+        music_dir = self._music_dir()
         tracks: list[dict[str, Any]] = []
+        for row in self._library_index.tracks(music_dir):
+            # filename relativo: MainWindow lo unisce a music_dir per play/edit
+            filename = os.path.relpath(row["path"], music_dir)
+            seconds = int(row["duration"])
+            tracks.append(
+                {
+                    # Chiave dei diff: unica anche con "song.mp3" e "song.flac"
+                    "id": filename,
+                    "title": row["title"],
+                    "artist": row["artist"],
+                    "album": row["album"],
+                    "duration": f"{seconds // 60}:{seconds % 60:02d}" if seconds else "",
+                    "filename": filename,
+                }
+            )
+        return tracks
 
-        if not os.path.isdir(music_dir):
-            logging.error(f"Music directory not found: {music_dir}")
-            return tracks
-
-        for filename in sorted(os.listdir(music_dir)):
-            logging.debug(f"Found file: {filename}")
-
-            name, ext = os.path.splitext(filename)
-            if ext.lower() not in exts:
-                logging.debug(f"Skipping unsupported extension: {ext}")
-                continue
-
-            full_path = os.path.join(music_dir, filename)
-            logging.debug(f"Processing audio file: {full_path}")
-
-
-
-            
-            # ---------- DURATA ----------
-            duration = ""
-            try:
-                audio = MutagenFile(full_path)
-                logging.debug(f"Mutagen loaded: {audio}")
-
-                if audio is not None and hasattr(audio, "info") and hasattr(audio.info, "length"):
-                    seconds = int(audio.info.length)
-                    minutes = seconds // 60
-                    sec = seconds % 60
-                    duration = f"{minutes}:{sec:02d}"
-                    logging.debug(f"Duration computed: {duration}")
-                else:
-                    logging.warning(f"No duration info for file: {filename}")
-            except Exception as e:
-                logging.error(f"Error reading {filename} with mutagen: {e}")
-
-            
-            
-            # ---------- METADATA (title, artist, album) ----------
-            title = name
-            artist = ""
-            album = ""
+    @pyqtSlot(list)
+    def _on_library_changed(self, changes: list) -> None:
+        # Modifiche live (inotify, trim, download) già applicate all'indice
+        prefix = os.path.join(os.path.abspath(self._music_dir()), "")
+        if self._library_requested and any(path.startswith(prefix) for _, path in changes):
+            self._send_library_diff()
+
+    @pyqtSlot(str, bool)
+    def _on_library_scan_finished(self, root: str, changed: bool) -> None:
+        # Spinge le modifiche solo se la pagina ha già chiesto la lista
+        if changed and self._library_requested and root == os.path.abspath(self._music_dir()):
+            self._send_library_diff()
+
+    def _refresh_library_tracks(self) -> list[dict[str, Any]]:
+        """Reload from the index; bumps the version if anything changed. Returns the old list."""
+        previous = self._library_tracks
+        tracks = self._load_library_tracks()
+        if tracks != previous:
+            self._library_tracks = tracks
+            self._library_version += 1
+        return previous
+
+    def _send_library_snapshot(self) -> None:
+        """
+        Metadati + prima pagina nello stesso evento: la lista compare subito,
+        il resto viene caricato a pagine mentre si scorre (costo costante).
+        """
+        tracks = self._library_tracks
+        logging.debug(f"Sending library_update ({len(tracks)} tracks)")
+        payload = {
+            "version": self._library_version,
+            "total": len(tracks),
+            "page_size": LIBRARY_PAGE_SIZE,
+            "first_page": tracks[:LIBRARY_PAGE_SIZE],
+        }
+        if supports_response_headers():
+            payload["url"] = "app://library"
+        self.send_event("library_update", payload)
+
+    def _send_library_page(self, payload: dict) -> None:
+        try:
+            page = max(0, int(payload.get("page", 0)))
+        except (TypeError, ValueError):
+            return
+        start = page * LIBRARY_PAGE_SIZE
+        self.send_event(
+            "library_page",
+            {
+                "version": self._library_version,
+                "page": page,
+                "tracks": self._library_tracks[start:start + LIBRARY_PAGE_SIZE],
+            },
+        )
 
-            try:
-                if ext.lower() == ".mp3":
-                    # per gli MP3 usiamo EasyID3 (sono quelli su cui hai scritto i tag)
-                    try:
-                        tags = EasyID3(full_path)
-                        logging.debug(f"EasyID3 tags for {filename}: {dict(tags)}")
-
-                        if "title" in tags and tags["title"]:
-                            title = tags["title"][0]
-                        if "artist" in tags and tags["artist"]:
-                            artist = tags["artist"][0]
-                        if "album" in tags and tags["album"]:
-                            album = tags["album"][0]
-                    except Exception as e:
-                        logging.warning(f"No EasyID3 tags for {filename}: {e}")
-                else:
-                    # per altri formati proviamo a leggere i tag generici
-                    if audio is not None and audio.tags:
-                        tags = audio.tags
-                        logging.debug(f"Generic tags for {filename}: {tags}")
-
-                        # questi campi dipendono dal formato; fallback semplice
-                        title = str(tags.get("title", [title])[0]) if "title" in tags else title
-                        artist = str(tags.get("artist", [""])[0]) if "artist" in tags else artist
-                        album = str(tags.get("album", [""])[0]) if "album" in tags else album
-
-            except Exception as e:
-                logging.error(f"Error reading metadata from {filename}: {e}")
-
-            track = {
-                "id": name,
-                "title": title,
-                "artist": artist,
-                "album": album,
-                "duration": duration,
-                "filename": filename,
+    def _send_library_diff(self) -> None:
+        base_version = self._library_version
+        previous = self._refresh_library_tracks()
+        if self._library_version == base_version:
+            return
+        diff = _diff_tracks(previous, self._library_tracks)
+        operations = len(diff["removed"]) + len(diff["inserted"]) + len(diff["updated"])
+        if operations > LIBRARY_DIFF_MAX_OPS:
+            self._send_library_snapshot()
+            return
+        diff.update(
+            {
+                "base_version": base_version,
+                "version": self._library_version,
+                "total": len(self._library_tracks),
             }
+        )
+        self.send_event("library_diff", diff)
 
-            logging.debug(f"Track entry: {track}")
-            tracks.append(track)
-
-        logging.info(f"Library scan complete: {len(tracks)} tracks found")
-        return tracks
-
+    def _library_snapshot(self) -> tuple[int, list[dict[str, Any]]]:
+        """Current (version, tracks) pair served by the app:// handler."""
+        return self._library_version, self._library_tracks
 
     @property
     def view(self) -> QWebEngineView:
@@ -0,0 +1,201 @@
+# gui/library_model.py
+"""Model/view library list: track rows from the index, painted by a delegate."""
+
+import os
+from bisect import bisect_left
+
+from PyQt6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QRect,
+    QSize,
+    Qt,
+    pyqtSignal,
+)
+from PyQt6.QtGui import QColor, QFont, QPainter
+from PyQt6.QtWidgets import QStyle, QStyledItemDelegate
+
+PathRole = Qt.ItemDataRole.UserRole
+TrackRole = Qt.ItemDataRole.UserRole + 1
+
+
+def _sort_key(path):
+    # Stesso ordine dell'indice: path, case-insensitive
+    return path.casefold()
+
+
+class LibraryModel(QAbstractListModel):
+    """
+    Flat list of track dicts (as returned by LibraryIndex.tracks).
+    Keeps a path -> row map so lookups by path do not scan the rows.
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._tracks = []
+        self._keys = []
+        self._rows = {}
+
+    # --- Qt model API ---
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._tracks)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or not 0 <= index.row() < len(self._tracks):
+            return None
+        track = self._tracks[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return os.path.basename(track["path"])
+        if role == PathRole:
+            return track["path"]
+        if role == TrackRole:
+            return track
+        return None
+
+    # --- Helpers ---
+    def set_tracks(self, tracks, sort=True):
+        """Replace all rows. sort=False keeps the given order (search results)."""
+        self.beginResetModel()
+        self._tracks = list(tracks)
+        if sort:
+            self._tracks.sort(key=lambda track: _sort_key(track["path"]))
+        self._keys = [_sort_key(track["path"]) for track in self._tracks]
+        self._rows = {}
+        self._rebuild_rows()
+        self.endResetModel()
+
+    def tracks(self):
+        return list(self._tracks)
+
+    def _rebuild_rows(self, start=0):
+        for row in range(start, len(self._tracks)):
+            self._rows[self._tracks[row]["path"]] = row
+
+    def path_at(self, row):
+        if 0 <= row < len(self._tracks):
+            return self._tracks[row]["path"]
+        return None
+
+    def track_at(self, row):
+        if 0 <= row < len(self._tracks):
+            return self._tracks[row]
+        return None
+
+    def row_of(self, path):
+        return self._rows.get(path, -1)
+
+    def insert_track(self, track):
+        """Insert at the sorted position; returns the row (existing row if present)."""
+        existing = self.row_of(track["path"])
+        if existing >= 0:
+            self.update_track(track)
+            return existing
+        key = _sort_key(track["path"])
+        row = bisect_left(self._keys, key)
+        self.beginInsertRows(QModelIndex(), row, row)
+        self._tracks.insert(row, track)
+        self._keys.insert(row, key)
+        self._rebuild_rows(row)
+        self.endInsertRows()
+        return row
+
+    def remove_path(self, path):
+        """Returns the removed row, or -1."""
+        row = self.row_of(path)
+        if row < 0:
+            return -1
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self._tracks[row]
+        del self._keys[row]
+        del self._rows[path]
+        self._rebuild_rows(row)
+        self.endRemoveRows()
+        return row
+
+    def update_track(self, track):
+        row = self.row_of(track["path"])
+        if row < 0:
+            return
+        self._tracks[row] = track
+        index = self.index(row)
+        self.dataChanged.emit(index, index)
+
+
+class LibraryDelegate(QStyledItemDelegate):
+    """
+    Paints a library row (file name + "Edit" button) without any child
+    widgets. The button is hit-tested on mouse release.
+    """
+
+    edit_requested = pyqtSignal(str)
+
+    ROW_HEIGHT = 50
+    MARGIN = 5
+    BUTTON_SIZE = QSize(70, 40)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._font = QFont()
+        self._font.setPixelSize(16)
+        self._edit_clicked = False
+
+    def button_rect(self, row_rect):
+        size = self.BUTTON_SIZE
+        return QRect(
+            row_rect.right() - self.MARGIN - size.width() + 1,
+            row_rect.top() + (row_rect.height() - size.height()) // 2,
+            size.width(),
+            size.height(),
+        )
+
+    def sizeHint(self, option, index):
+        return QSize(option.rect.width(), self.ROW_HEIGHT)
+
+    def paint(self, painter, option, index):
+        painter.save()
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        rect = option.rect
+
+        # Sfondo/selezione dallo stile corrente (rispetta il QSS di #libraryList)
+        style = option.widget.style() if option.widget else None
+        if style is not None:
+            style.drawPrimitive(QStyle.PrimitiveElement.PE_PanelItemViewItem, option, painter, option.widget)
+
+        button = self.button_rect(rect)
+        text_rect = QRect(
+            rect.left() + self.MARGIN * 2,
+            rect.top(),
+            button.left() - rect.left() - self.MARGIN * 3,
+            rect.height(),
+        )
+        painter.setFont(self._font)
+        painter.setPen(QColor("#333"))
+        name = painter.fontMetrics().elidedText(
+            index.data(Qt.ItemDataRole.DisplayRole) or "",
+            Qt.TextElideMode.ElideRight,
+            text_rect.width(),
+        )
+        painter.drawText(text_rect, Qt.AlignmentFlag.AlignVCenter | Qt.AlignmentFlag.AlignLeft, name)
+
+        painter.setPen(Qt.PenStyle.NoPen)
+        painter.setBrush(QColor("#ddd"))
+        painter.drawRoundedRect(button, 5, 5)
+        painter.setPen(QColor("#333"))
+        painter.drawText(button, Qt.AlignmentFlag.AlignCenter, "Edit")
+        painter.restore()
+
+    def editorEvent(self, event, model, option, index):
+        if event.type() == QEvent.Type.MouseButtonRelease:
+            if self.button_rect(option.rect).contains(event.position().toPoint()):
+                # La view emette comunque clicked(): take_edit_click() lo segnala
+                self._edit_clicked = True
+                self.edit_requested.emit(index.data(PathRole))
+                return True
+        return super().editorEvent(event, model, option, index)
+
+    def take_edit_click(self):
+        """True (once) if the last click landed on the Edit button."""
+        clicked = self._edit_clicked
+        self._edit_clicked = False
+        return clicked
@@ -1,6 +1,5 @@
 # gui/main_window.py
 
-import base64
 import os
 import re
 import sys
@@ -20,7 +19,7 @@ from PyQt6.QtWidgets import (
     QSpacerItem,
     QSizePolicy,
 )  # Added QSpacerItem, QSizePolicy
-from PyQt6.QtCore import pyqtSlot, Qt, QTimer, QDateTime, QSize, QBuffer, QIODevice
+from PyQt6.QtCore import pyqtSlot, Qt, QTimer, QDateTime, QSize
 from PyQt6.QtGui import QIcon, QShortcut, QKeySequence
 
 from .styling import apply_theme, scale_value
@@ -34,6 +33,9 @@ from backend.obd_manager import OBDManager
 from backend.radio_manager import RadioManager
 from backend.airplay_manager import AirPlayManager
 from backend.wifi_manager import WiFiManager
+from backend.connectivity import get_connectivity_monitor
+from backend.loudness import get_loudness_analyzer
+from backend.download_manager import get_download_manager
 
 # Import screens
 from .home_screen import HomeScreen
@@ -74,7 +76,17 @@ class MainWindow(QMainWindow):
         self.audio_manager = AudioManager()
         self.bluetooth_manager = BluetoothManager(self.settings_manager)
         self.wifi_manager = WiFiManager(emulation_mode=self.settings_manager.get("emulation_mode"))
+        # Gli eventi Wi-Fi aprono/chiudono subito il circuit breaker di rete
+        get_connectivity_monitor().attach_wifi_manager(self.wifi_manager)
         self.airplay_manager = AirPlayManager()
+        # Analisi loudness della libreria: solo ad auto ferma o in carica
+        self.loudness_analyzer = get_loudness_analyzer()
+        if self.settings_manager.get("loudness_analysis"):
+            self.loudness_analyzer.start()
+        # Coda download: la UI HTML mostra l'avanzamento del job attivo
+        get_download_manager().job_progress.connect(
+            lambda job_id, percent: self._html_send("download_progress", {"percent": percent})
+        )
         
 
         # Flag for initial scaling
@@ -351,6 +363,7 @@ class MainWindow(QMainWindow):
         # --- Connect Backend Signals ---
         self.obd_manager.connection_status.connect(self.update_obd_status)
         self.obd_manager.data_updated.connect(self.obd_screen.update_data)
+        self.obd_manager.data_updated.connect(self.loudness_analyzer.update_vehicle_data)
         self.radio_manager.radio_status.connect(self.update_radio_status)
         self.radio_manager.frequency_updated.connect(self.radio_screen.update_frequency)
         self.radio_manager.signal_strength.connect(
@@ -384,6 +397,16 @@ class MainWindow(QMainWindow):
         self.bluetooth_manager.playback_status_changed.connect(
             self.music_player_screen.update_playback_status
         )
+        # Posizione interpolata in locale tra un report AVRCP e l'altro
+        self.bluetooth_manager.media_position_updated.connect(
+            self.home_screen.update_time_label
+        )
+        self.bluetooth_manager.media_position_updated.connect(
+            self.music_player_screen.update_bluetooth_position
+        )
+        self.bluetooth_manager.media_position_updated.connect(
+            self._handle_bluetooth_position
+        )
 
         # Connect local playback signals from music player to home screen
         self.music_player_screen.local_playback_started.connect(
@@ -610,18 +633,6 @@ class MainWindow(QMainWindow):
             return
         self._html_send("clock", {"value": self.header_clock_label.text()})
 
-    def _pixmap_to_data_url(self, pixmap):
-        if pixmap is None or pixmap.isNull():
-            return None
-        buffer = QBuffer()
-        buffer.open(QIODevice.OpenModeFlag.WriteOnly)
-        success = pixmap.save(buffer, "PNG")
-        buffer.close()
-        if not success:
-            return None
-        encoded = base64.b64encode(bytes(buffer.data()))
-        return f"data:image/png;base64,{encoded.decode('ascii')}"
-
     def _update_media_state(self, payload):
         if not isinstance(payload, dict):
             return
@@ -684,14 +695,20 @@ class MainWindow(QMainWindow):
     def _handle_local_playback_status(self, status):
         self._update_media_state({"status": status, "source": "local"})
 
+    def _handle_bluetooth_position(self, position, duration):
+        self._update_media_state(
+            {"position": position, "duration": duration, "source": "bluetooth"}
+        )
+
     def _handle_local_playback_position(self, position, duration):
         self._update_media_state(
             {"position": position, "duration": duration, "source": "local"}
         )
 
-    def _handle_local_album_art(self, pixmap):
-        data_url = self._pixmap_to_data_url(pixmap)
-        self._update_media_state({"art": data_url, "source": "local"})
+    def _handle_local_album_art(self, art_id):
+        # The page fetches the cover bytes itself from the app:// scheme handler.
+        art_url = f"app://art/{art_id}" if art_id else None
+        self._update_media_state({"art": art_url, "source": "local"})
 
     def resizeEvent(self, event):
         """Override resizeEvent to apply scaling ONLY after fullscreen is settled."""
@@ -893,6 +910,10 @@ class MainWindow(QMainWindow):
             self.music_player_screen.on_next_clicked()
         elif action == "previous":
             self.music_player_screen.on_previous_clicked()
+        elif action == "shuffle":
+            self.music_player_screen.toggle_shuffle()
+        elif action == "repeat":
+            self.music_player_screen.cycle_repeat()
 
     def _handle_html_download_current_song(self, payload):
         """HTML: richiesta di scaricare la canzone corrente."""
@@ -905,7 +926,8 @@ class MainWindow(QMainWindow):
     def _handle_html_play_track(self, payload):
         """
         HTML: richiesta di riprodurre una traccia dalla Library.
-        Si aspetta almeno 'filename' nel payload.
+        Si aspetta almeno 'filename' nel payload; con 'play_next' la traccia
+        viene solo messa in coda dopo quella corrente.
         """
         if not hasattr(self, "music_player_screen") or self.music_player_screen is None:
             print("[HTML] play_track: music_player_screen not available")
@@ -927,6 +949,11 @@ class MainWindow(QMainWindow):
             print(f"[HTML] play_track: file not found: {file_path}")
             return
 
+        if payload.get("play_next"):
+            print(f"[HTML] play_track: queued next {file_path}")
+            self.music_player_screen.queue_play_next(file_path)
+            return
+
         print(f"[HTML] play_track: playing {file_path}")
         # Attiva la schermata Music Player (anche lato HTML)
         self._set_active_screen(self.music_player_screen)
@@ -1301,6 +1328,7 @@ class MainWindow(QMainWindow):
             )
             self.obd_manager.connection_status.connect(self.update_obd_status)
             self.obd_manager.data_updated.connect(self.obd_screen.update_data)
+            self.obd_manager.data_updated.connect(self.loudness_analyzer.update_vehicle_data)
             self.obd_manager.start()
         else:
             print("OBD connection settings saved, but OBD manager remains disabled.")
@@ -1357,6 +1385,7 @@ class MainWindow(QMainWindow):
                     )
                     self.obd_manager.connection_status.connect(self.update_obd_status)
                     self.obd_manager.data_updated.connect(self.obd_screen.update_data)
+                    self.obd_manager.data_updated.connect(self.loudness_analyzer.update_vehicle_data)
                 # Start the thread
                 self.obd_manager.start()
                 # Initial status will be emitted by the manager
@@ -1575,6 +1604,12 @@ class MainWindow(QMainWindow):
         if hasattr(self, "audio_manager"):
             self.audio_manager.cleanup()
 
+        self.loudness_analyzer.stop()
+        # I download interrotti restano in coda e ripartono al prossimo avvio
+        get_download_manager().shutdown()
+        # Ferma decoder ffmpeg e feeder del player locale
+        if hasattr(self, "music_player_screen"):
+            self.music_player_screen.media_player.shutdown()
 
         if hasattr(self, "airplay_manager"):
             print("Stopping AirPlay Manager...")
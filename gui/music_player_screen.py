@@ -11,6 +11,7 @@ from PyQt6.QtWidgets import (
     QFileDialog,
     QListWidget,
     QListWidgetItem,
+    QListView,
     QStackedWidget,
     QMessageBox,
     QProgressBar,
@@ -19,36 +20,44 @@ from PyQt6.QtWidgets import (
     QDialog,
     QLineEdit,
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSlot, pyqtSignal, QUrl
+from PyQt6.QtCore import QObject, Qt, QTimer, pyqtSlot, pyqtSignal, QUrl
 from PyQt6.QtGui import QPixmap
 from PyQt6.QtNetwork import QNetworkAccessManager, QNetworkRequest, QNetworkReply
-import base64
-import binascii
 import os
+import shutil
 import subprocess
-import threading
-import socket
 import pygame  # Using pygame for audio playback instead of QtMultimedia
-from mutagen.easyid3 import EasyID3
-from mutagen.id3 import ID3NoHeaderError
 import logging
-import re
-import json
 
-from backend.media_info import load_local_placeholder_data_url
+from backend import audio_dsp
+from backend.art_store import get_art_store
+from backend.audio_probe import probe_duration, probe_stream
+from backend.connectivity import get_connectivity_monitor
+from backend.download_dedup import LibraryDedup
+from backend.download_manager import get_download_manager
+from backend.library_index import get_library_index
+from backend.library_scanner import get_library_scanner
+from backend.library_search import LibrarySearchIndex
+from backend.library_watcher import get_library_watcher
+from backend.online_search import get_online_search, is_url, normalize_query
+from backend.lyrics import SyncedLyrics, load_local_lyrics, parse_lyrics_text
+from backend.play_queue import PlayQueue, REPEAT_ALL, REPEAT_OFF, REPEAT_ONE
+from backend.playback_engine import PlaybackEngine
+from backend.trim_jobs import get_trim_queue
 from .widgets.scrolling_label import ScrollingLabel
 from .virtual_keyboard import VirtualKeyboard
 from .audio_editor import AudioEditorDialog
-
+from .library_model import LibraryDelegate, LibraryModel, PathRole
 
 class SearchDialog(QDialog):
     """Dialog for searching music online using yt-dlp."""
     
-    song_selected = pyqtSignal(dict) # Emits {title, id, uploader}
-    search_results_ready = pyqtSignal(list) # Internal signal for thread communication
+    songs_selected = pyqtSignal(list) # Emits [{title, id, uploader, url}]
 
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, dedup=None):
         super().__init__(parent)
+        # LibraryDedup: i brani già in libreria sono segnati e non preselezionati
+        self.dedup = dedup
         self.setWindowTitle("Search Music")
         self.resize(800, 600)
         self.setModal(True)
@@ -58,8 +67,10 @@ class SearchDialog(QDialog):
         # Apply object name for styling
         self.setObjectName("networkDialog") # Reuse the dialog style
         
-        # Connect signals
-        self.search_results_ready.connect(self.update_results_list)
+        # Ricerca in-process condivisa: cache e extractor sopravvivono al dialog
+        self.online_search = get_online_search()
+        self.online_search.results_ready.connect(self.on_search_results)
+        self.online_search.search_failed.connect(self.on_search_failed)
 
     def setup_ui(self):
         layout = QVBoxLayout(self)
@@ -67,7 +78,7 @@ class SearchDialog(QDialog):
         # Input Area
         input_layout = QHBoxLayout()
         self.search_input = QLineEdit()
-        self.search_input.setPlaceholderText("Search song...")
+        self.search_input.setPlaceholderText("Search song or paste a playlist/album link...")
         self.search_input.setMinimumHeight(50)
         # Use a lambda or proper connection to pass event if needed, 
         # but QLineEdit.mousePressEvent override is cleaner if subclassing.
@@ -89,6 +100,8 @@ class SearchDialog(QDialog):
         # Results List
         self.results_list = QListWidget()
         self.results_list.setStyleSheet("font-size: 16px; padding: 5px;")
+        # Più risultati in una volta: finiscono tutti nella coda di download
+        self.results_list.setSelectionMode(QListWidget.SelectionMode.MultiSelection)
         layout.addWidget(self.results_list)
         
         # Actions
@@ -108,82 +121,45 @@ class SearchDialog(QDialog):
 
     def open_keyboard(self, event):
         keyboard = VirtualKeyboard(self.search_input.text(), self)
+        # Ricerca mentre si digita: il worker esegue solo l'ultima query
+        keyboard.text_edited.connect(self.on_query_edited)
         if keyboard.exec() == QDialog.DialogCode.Accepted:
             self.search_input.setText(keyboard.get_text())
             self.perform_search() # Auto-search on enter
 
+    def on_query_edited(self, text):
+        self.search_input.setText(text)
+        if len(normalize_query(text)) >= 3:
+            self._start_search(text, immediate=False)
+
     def perform_search(self):
         query = self.search_input.text().strip()
         if not query: return
-        
+        self._start_search(query, immediate=True)
+
+    def _start_search(self, query, immediate):
         self.results_list.clear()
         self.results_list.addItem("Searching...")
         self.results = []
-        
-        # Run in thread
-        threading.Thread(target=self._search_thread, args=(query,), daemon=True).start()
+        # Dalla cache i risultati arrivano subito (on_search_results)
+        self.online_search.search(query, immediate=immediate)
 
-    def _search_thread(self, query):
-        print(f"[Search Thread] Starting search for: {query}")
-        try:
-            # yt-dlp search command
-            cmd = [
-                "yt-dlp",
-                "--dump-json",
-                "--flat-playlist", 
-                "--default-search", "ytsearch10", # Get 10 results
-                "--no-playlist",
-                "--ignore-errors", # Don't crash on individual video errors
-                query
-            ]
-            
-            print(f"Executing search command: {' '.join(cmd)}")
-            
-            process = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
-            try:
-                stdout, stderr = process.communicate(timeout=30)
-            except subprocess.TimeoutExpired:
-                process.kill()
-                stdout, stderr = process.communicate()
-                print("[Search Thread] Timeout expired")
-                QTimer.singleShot(0, lambda: self.results_list.addItem("Error: Search timed out."))
-                return
-            
-            print(f"[Search Thread] Process finished. Return code: {process.returncode}")
-            
-            if process.returncode != 0:
-                print(f"Stderr: {stderr}")
-                error_msg = "Unknown error"
-                if "command not found" in stderr or "No such file" in stderr:
-                    error_msg = "yt-dlp not found. Install it: pip install yt-dlp"
-                elif "Network is unreachable" in stderr:
-                    error_msg = "Network error. Check connection."
-                else:
-                    error_msg = stderr.strip().split('\n')[-1]
-                
-                QTimer.singleShot(0, lambda: self.results_list.addItem(f"Error: {error_msg}"))
-                return
+    def _is_current(self, query):
+        return normalize_query(query) == normalize_query(self.search_input.text())
 
-            results = []
-            for line in stdout.strip().split('\n'):
-                if line:
-                    try:
-                        data = json.loads(line)
-                        results.append(data)
-                    except json.JSONDecodeError:
-                        pass
-            
-            print(f"[Search Thread] Found {len(results)} results.")
-            
-            # Update UI safely via signal
-            self.search_results_ready.emit(results)
-            
-        except FileNotFoundError:
-             print("[Search Thread] yt-dlp executable not found.")
-             self.search_results_ready.emit([{"error": "yt-dlp not found. Install it."}])
-        except Exception as e:
-            print(f"Search error: {e}")
-            self.search_results_ready.emit([{"error": str(e)}])
+    def on_search_results(self, query, results):
+        if self._is_current(query):
+            self.update_results_list(results)
+
+    def on_search_failed(self, query, message):
+        if self._is_current(query):
+            self.update_results_list([{"error": message}])
+
+    def done(self, result):
+        # Il worker è condiviso: niente risultati verso un dialog chiuso
+        self.online_search.results_ready.disconnect(self.on_search_results)
+        self.online_search.search_failed.disconnect(self.on_search_failed)
+        super().done(result)
 
     def update_results_list(self, results):
         print(f"[UI Thread] update_results_list called with {len(results)} items.")
@@ -204,11 +180,17 @@ class SearchDialog(QDialog):
 
                 title = vid.get('title', 'Unknown')
                 uploader = vid.get('uploader', 'Unknown')
+                known = self.dedup is not None and self.dedup.contains(
+                    title, vid.get('uploader', ''), vid.get('id') or ''
+                )
                 
-                item_text = f"{title}\n{uploader}"
+                item_text = f"{title}\n{uploader}" + ("  ✓ In library" if known else "")
                 item = QListWidgetItem(item_text)
                 item.setData(Qt.ItemDataRole.UserRole, vid)
                 self.results_list.addItem(item)
+                # Playlist/album: tutto selezionato tranne ciò che c'è già
+                if is_url(self.search_input.text()) and not known:
+                    item.setSelected(True)
             
             print(f"[UI Thread] List populated with {self.results_list.count()} items.")
         except Exception as e:
@@ -216,18 +198,25 @@ class SearchDialog(QDialog):
             self.results_list.addItem(f"UI Error: {e}")
 
     def accept_selection(self):
-        current_item = self.results_list.currentItem()
-        if current_item:
-            data = current_item.data(Qt.ItemDataRole.UserRole)
-            if data and isinstance(data, dict):
-                self.song_selected.emit(data)
-                self.accept()
+        items = self.results_list.selectedItems() or [self.results_list.currentItem()]
+        selected = [
+            data for data in (item.data(Qt.ItemDataRole.UserRole) for item in items if item)
+            if data and isinstance(data, dict)
+        ]
+        if selected:
+            self.songs_selected.emit(selected)
+            self.accept()
 
 
-class PygameMediaPlayer:
-    """A simple media player using pygame.mixer to replace QMediaPlayer."""
+class PygameMediaPlayer(QObject):
+    """
+    QMediaPlayer-like callback API over the streaming PlaybackEngine
+    (ffmpeg -> ring buffer -> pygame mixer channel). Without ffmpeg it falls
+    back to pygame.mixer.music: no gapless, crossfade or ReplayGain.
+    """
 
     def __init__(self):
+        super().__init__()
         # Initialize pygame mixer with error handling
         try:
             pygame.mixer.init()
@@ -237,9 +226,19 @@ class PygameMediaPlayer:
             print("Music playback will be disabled.")
             self._mixer_available = False
 
+        self._engine = PlaybackEngine(self)
+        self._streaming = self._engine.available
+        if self._mixer_available and not self._streaming:
+            print("ffmpeg not found: playing through pygame.mixer.music (no gapless or crossfade).")
+        self._fallback_timer = None
+        self._seek_offset = 0  # pygame.mixer.music.get_pos() riparte da 0 a ogni play()
+        self._music_started = False
+        self._engine.position_changed.connect(self._on_engine_position)
+        self._engine.track_changed.connect(self._on_engine_track_changed)
+        self._engine.finished.connect(self._on_engine_finished)
+
         self._position = 0
         self._duration = 0
-        self._position_timer = None
         self._callbacks = {
             "position_changed": [],
             "duration_changed": [],
@@ -248,12 +247,27 @@ class PygameMediaPlayer:
         }
         self._playing = False
         self._current_file = None
-        self._seek_offset = 0
+        self._loaded = False  # False dopo stop(): il prossimo play() ricarica il file
+        self._gapless_file = None  # traccia già avviata dal passaggio gapless
 
     def songFinished(self, callback):
         """Connect a callback to the song finished event."""
         self._callbacks["song_finished"].append(callback)
 
+    def _notify(self, event, *args):
+        for callback in self._callbacks[event]:
+            callback(*args)
+
+    def _set_duration(self, file_path):
+        # Durata dall'header (spesso già in cache dal prefetch): mai
+        # pygame.mixer.Sound, che decodificherebbe tutto il file in RAM.
+        # Se l'header non la riporta resta 0 (durata sconosciuta).
+        duration_seconds = probe_duration(file_path)
+        if duration_seconds <= 0:
+            print(f"Duration unknown for {file_path}")
+        self._duration = int(duration_seconds * 1000)  # Convert to ms
+        self._notify("duration_changed", self._duration)
+
     def setSource(self, url):
         """Set the source file to play."""
         if not self._mixer_available:
@@ -265,131 +279,170 @@ class PygameMediaPlayer:
         else:
             file_path = str(url)
 
-        self._current_file = file_path
-
-        self._seek_offset = 0
-
         # Stop any current playback
         self.stop()
+        self._current_file = file_path
+        self._gapless_file = None
 
+        if self._streaming:
+            # La decodifica parte subito: il primo periodo è pronto al play()
+            self._engine.load(file_path)
+        elif not self._load_music(file_path):
+            return False
+        self._loaded = True
+        self._set_duration(file_path)
+        return True
+
+    def _load_music(self, file_path):
         try:
-            # Load the sound file
             pygame.mixer.music.load(file_path)
-
-            # Get duration (this is a bit tricky with pygame)
-            sound = pygame.mixer.Sound(file_path)
-            duration_seconds = sound.get_length()
-            self._duration = int(duration_seconds * 1000)  # Convert to ms
-
-            # Notify duration change
-            for callback in self._callbacks["duration_changed"]:
-                callback(self._duration)
-
-            return True
-        except Exception as e:
+        except pygame.error as e:
             print(f"Error loading audio file: {e}")
             return False
+        self._music_started = False
+        return True
+
+    def set_crossfade(self, seconds):
+        """Crossfade between consecutive queued tracks (0 = gapless)."""
+        if self._streaming:
+            self._engine.set_crossfade(seconds)
+
+    def set_replaygain(self, enabled):
+        """Per-track gain from the ReplayGain tags, applied while decoding."""
+        if self._streaming:
+            self._engine.set_gain_provider(self._replaygain_for if enabled else None)
+
+    @staticmethod
+    def _replaygain_for(file_path):
+        # Analisi già salvata dal LoudnessAnalyzer, altrimenti i tag ReplayGain
+        analysis = get_library_index().loudness(file_path)
+        if analysis is not None:
+            return audio_dsp.track_gain(analysis["gain"], 10 ** (analysis["true_peak"] / 20))
+        info = probe_stream(file_path)
+        return audio_dsp.track_gain(info.track_gain, info.track_peak)
+
+    def setNextSource(self, file_path):
+        """Track to pre-decode after the current one, for a gapless transition."""
+        if self._streaming:
+            self._engine.set_next(file_path)
+
+    def take_gapless(self, file_path):
+        """True (once) if `file_path` is already playing after a gapless transition."""
+        if file_path and file_path == self._gapless_file:
+            self._gapless_file = None
+            return True
+        return False
 
     def play(self):
-        """Start playback."""
+        """Start playback (or resume after pause)."""
         if not self._mixer_available:
             print("Audio mixer not available, cannot play")
             return False
 
         if self._current_file:
-            try:
-                # Se la canzone è in pausa (posizione > 0 e non sta suonando),
-                # usa unpause() per riprendere.
-                if self._position > 0 and not self._playing:
-                    pygame.mixer.music.unpause()
-                else:
-                    # Altrimenti, avviala dall'inizio.
-                    pygame.mixer.music.play()
-                
-                self._playing = True
-
-                # Start position tracking
-                if self._position_timer is None:
-                    self._position_timer = QTimer()
-                    self._position_timer.timeout.connect(self._update_position)
-                    self._position_timer.start(
-                        50
-                    )  # Update every 50ms for smoother tracking
-
-                # Notify state change
-                for callback in self._callbacks["state_changed"]:
-                    callback(1)  # 1 = playing (similar to QMediaPlayer.PlayingState)
-                
-                return True
-            except Exception as e:
-                print(f"Error playing audio: {e}")
-                return False
+            if not self._streaming:
+                return self._play_music()
+            if not self._loaded:
+                self._engine.load(self._current_file)
+                self._loaded = True
+            self._engine.play()
+            self._playing = True
+            self._notify("state_changed", 1)  # 1 = playing (similar to QMediaPlayer.PlayingState)
+            return True
         return False
 
+    def _play_music(self):
+        """play() without ffmpeg: pygame.mixer.music, position from get_pos()."""
+        try:
+            if not self._loaded:
+                if not self._load_music(self._current_file):
+                    return False
+                self._loaded = True
+            if self._music_started:
+                pygame.mixer.music.unpause()
+            else:
+                pygame.mixer.music.play(start=self._seek_offset / 1000.0)
+                self._music_started = True
+        except pygame.error as e:
+            print(f"Error playing audio: {e}")
+            return False
+        if self._fallback_timer is None:
+            self._fallback_timer = QTimer(self)
+            self._fallback_timer.timeout.connect(self._update_music_position)
+            self._fallback_timer.start(50)
+        self._playing = True
+        self._notify("state_changed", 1)
+        return True
+
+    def _update_music_position(self):
+        if not self._playing:
+            return
+        if pygame.mixer.music.get_busy():
+            elapsed_ms = pygame.mixer.music.get_pos()
+            if elapsed_ms >= 0:
+                self._position = self._seek_offset + elapsed_ms
+                self._notify("position_changed", self._position)
+        else:
+            self._music_started = False
+            self._seek_offset = 0
+            self._on_engine_finished(self._current_file or "")
+
     def pause(self):
         """Pause playback."""
         if not self._mixer_available:
             return
 
         if self._playing:
-            pygame.mixer.music.pause()
+            if self._streaming:
+                self._engine.pause()
+            else:
+                pygame.mixer.music.pause()
             self._playing = False
-
-            # Notify state change
-            for callback in self._callbacks["state_changed"]:
-                callback(2)  # 2 = paused (similar to QMediaPlayer.PausedState)
+            self._notify("state_changed", 2)  # 2 = paused (similar to QMediaPlayer.PausedState)
 
     def stop(self):
         """Stop playback."""
-        if self._mixer_available:
+        if self._streaming:
+            self._engine.stop()
+        elif self._mixer_available:
             pygame.mixer.music.stop()
+            self._music_started = False
+            self._seek_offset = 0
         self._playing = False
         self._position = 0
-        self._seek_offset = 0
-
-        # Notify position change
-        for callback in self._callbacks["position_changed"]:
-            callback(0)
+        self._loaded = False
+        self._gapless_file = None
 
-        # Notify state change
-        for callback in self._callbacks["state_changed"]:
-            callback(0)  # 0 = stopped (similar to QMediaPlayer.StoppedState)
+        self._notify("position_changed", 0)
+        self._notify("state_changed", 0)  # 0 = stopped (similar to QMediaPlayer.StoppedState)
 
     def setPosition(self, position):
-        """
-        Sets the playback position robustly, handling both playing and paused states.
-        This method stops and restarts playback from the new position to ensure accuracy.
-        """
+        """Seek: the engine restarts decoding at `position`, keeping play/pause."""
         if not self._mixer_available or not self._current_file:
             return
-
-        # Memorizza lo stato di riproduzione attuale (se era in play o in pausa)
-        was_playing = self._playing
-
-        # Ferma la musica per garantire un "seek" pulito.
-        # Questo resetta il timer interno di pygame.mixer.music.get_pos().
-        pygame.mixer.music.stop()
-
-        # Imposta immediatamente la nostra variabile di posizione interna
+        if not self._streaming:
+            self._seek_music(position)
+        elif self._loaded:
+            self._engine.seek(position)
+        else:
+            self._engine.load(self._current_file, position)
+            self._loaded = True
         self._position = position
-        self._seek_offset = position
-        position_seconds = position / 1000.0
+        self._notify("position_changed", self._position)
 
-        # Riavvia la riproduzione dal nuovo punto usando il parametro 'start'.
-        # Questo comando funziona anche se intendiamo mettere in pausa subito dopo.
-        pygame.mixer.music.play(start=position_seconds)
-
-        # Se prima la musica NON era in riproduzione, mettila in pausa immediatamente.
-        # Questo gestisce il caso di spostamento dello slider mentre la musica è ferma.
-        if not was_playing:
-            pygame.mixer.music.pause()
-
-        # Ripristina lo stato di 'playing' a quello che era prima della chiamata
-        self._playing = was_playing
-
-        # Notifica a chi è in ascolto che la posizione è cambiata
-        for callback in self._callbacks["position_changed"]:
-            callback(self._position)
+    def _seek_music(self, position):
+        # Senza ffmpeg: si riparte dal nuovo punto, mantenendo play/pausa
+        self._seek_offset = position
+        if not self._loaded:
+            self._music_started = False
+            return
+        try:
+            pygame.mixer.music.play(start=position / 1000.0)
+            self._music_started = True
+            if not self._playing:
+                pygame.mixer.music.pause()
+        except pygame.error as e:
+            print(f"Error seeking audio: {e}")
 
     def position(self):
         """Get the current playback position in milliseconds."""
@@ -399,37 +452,33 @@ class PygameMediaPlayer:
         """Get the duration of the current media in milliseconds."""
         return self._duration
 
-    def _update_position(self):
-        """Update the current position based on pygame's playback."""
-        if not self._mixer_available:
+    # --- Engine signals (queued from the feeder thread) ---
+    @pyqtSlot(int)
+    def _on_engine_position(self, position):
+        if not self._playing:
             return
+        self._position = position
+        self._notify("position_changed", self._position)
 
-        if self._playing and pygame.mixer.music.get_busy():
-            # This is an approximation since pygame doesn't provide exact position
-            elapsed_ms = pygame.mixer.music.get_pos()
-            if elapsed_ms >= 0:
-                # La posizione assoluta è l'offset + il tempo trascorso
-                self._position = self._seek_offset + elapsed_ms
-                
-                # Notifica la nuova posizione CORRETTA
-                for callback in self._callbacks["position_changed"]:
-                    callback(self._position)
-        else:
-            # Check if playback has ended
-            # Controlla se la canzone è finita NATURALMENTE
-            if self._playing and not pygame.mixer.music.get_busy():
-                print("[PygameMediaPlayer] La canzone è terminata.")
-                self._playing = False
-                self._position = 0
-                self._seek_offset = 0
-
-                # Emetti il nostro nuovo segnale PRIMA di fare altro
-                for callback in self._callbacks["song_finished"]:
-                    callback()
-
-                # Poi, notifica il cambio di stato generico
-                for callback in self._callbacks["state_changed"]:
-                    callback(0)  # 0 = stopped
+    @pyqtSlot(str, str)
+    def _on_engine_track_changed(self, finished_path, started_path):
+        print(f"[PygameMediaPlayer] Gapless: {os.path.basename(started_path)}")
+        self._current_file = started_path
+        self._gapless_file = started_path
+        self._position = 0
+        self._set_duration(started_path)
+        # Chi ascolta songFinished avanza la coda: take_gapless evita il riavvio
+        self._notify("song_finished")
+
+    @pyqtSlot(str)
+    def _on_engine_finished(self, path):
+        if not self._playing:
+            return
+        print("[PygameMediaPlayer] La canzone è terminata.")
+        self._playing = False
+        self._position = 0
+        self._notify("song_finished")
+        self._notify("state_changed", 0)  # 0 = stopped
 
     def positionChanged(self, callback):
         """Connect a callback to position changes."""
@@ -455,6 +504,10 @@ class PygameMediaPlayer:
         else:
             return 0  # Stopped
 
+    def shutdown(self):
+        if self._streaming:
+            self._engine.shutdown()
+
 
 class MusicPlayerScreen(QWidget):
     screen_title = "Music Player"
@@ -463,7 +516,7 @@ class MusicPlayerScreen(QWidget):
     local_playback_started = pyqtSignal(dict)
     local_playback_status_changed = pyqtSignal(str)
     local_playback_position_changed = pyqtSignal(int, int)  # position, duration
-    album_art_updated = pyqtSignal(QPixmap)
+    album_art_updated = pyqtSignal(str)  # art id in the shared ArtStore
 
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -484,8 +537,19 @@ class MusicPlayerScreen(QWidget):
             os.makedirs(self.music_dir, exist_ok=True)
         print(f"Music library directory: {self.music_dir}")
 
-        # --- Download status ---
-        self.is_downloading = False
+        # --- Download queue (persistente, riprende dopo un riavvio) ---
+        self.download_manager = get_download_manager()
+        self.download_manager.job_started.connect(self._on_download_started)
+        self.download_manager.job_progress.connect(self._on_download_progress)
+        self.download_manager.job_finished.connect(self._on_download_finished)
+        self.download_manager.queue_changed.connect(self._on_download_queue_changed)
+        # Tag, copertina, indice, loudness e waveform dei nuovi file (in background)
+        self.download_manager.pipeline.library_changed.connect(self._on_library_changed)
+        self._download_titles = {}
+        self._download_active_id = None
+        self._downloads_pending = 0
+        self._downloads_completed = []
+        self._dedup_cache = None
 
         # --- Network manager for album art ---
         self.network_manager = QNetworkAccessManager()
@@ -502,17 +566,39 @@ class MusicPlayerScreen(QWidget):
         # --- Lyrics syncing variables ---
         self.lyrics_lines = []
         self.current_lyrics_line = 0
-        self.lyrics_line_positions = []  # Estimated time positions for each line
-
-        # --- Playlist tracking ---
-        self.current_playlist_index = -1
+        self.lyrics_line_positions = []  # Start time (ms) of each line: LRC or estimated
+        self.synced_lyrics = SyncedLyrics([], [], timed=False)
+        self._lyrics_from_file = False  # True when the local file provided its own lyrics
+
+        # --- Playlist tracking: coda separata dalla lista (shuffle/repeat/play next) ---
+        self.play_queue = PlayQueue(
+            repeat=self._setting("music_repeat", REPEAT_ALL),
+            shuffle=bool(self._setting("music_shuffle", False)),
+        )
         self.is_local_playback = False
+        self._current_local_path = None
+
+        # --- Library index (SQLite): liste immediate, rescan incrementale in background ---
+        self.library_index = get_library_index()
+        self.library_scanner = get_library_scanner()
+        self.library_scanner.scan_finished.connect(self._on_library_scan_finished)
+        self.library_scanner.scan_progress.connect(self._on_library_scan_progress)
+        self._library_root = None
+        # inotify: download, editor e copie aggiornano solo le righe interessate
+        self.library_watcher = get_library_watcher()
+        self.library_watcher.library_changed.connect(self._on_library_changed)
+        self.library_watcher.watch(self.music_dir)
+        # I trim dell'editor aggiornano l'indice da soli (anche a dialog chiuso)
+        get_trim_queue().library_changed.connect(self._on_library_changed)
+
+        # --- Shared album art cache (decoded once, pre-scaled thumbnails) ---
+        self.art_store = get_art_store()
+        self.art_store.art_ready.connect(self._on_art_decoded)
+        self._pending_art_id = ""
+        self.current_art_id = self.art_store.placeholder_id()
 
         # --- Create default album art ---
-        self.default_art_data_url = load_local_placeholder_data_url(
-            "gui/html/assets/media/album_placeholder.svg"
-        )
-        self.default_album_art = self._pixmap_from_data_url(self.default_art_data_url)
+        self.default_album_art = self._art_pixmap(self.current_art_id)
         if not self.default_album_art or self.default_album_art.isNull():
             # Create a default album art if the asset cannot be loaded
             self.default_album_art = QPixmap(100, 100)
@@ -521,6 +607,9 @@ class MusicPlayerScreen(QWidget):
         # --- Create media player for local files ---
         self.media_player = PygameMediaPlayer()
 
+        self.media_player.set_crossfade(float(self._setting("music_crossfade_seconds", 0)))
+        self.media_player.set_replaygain(bool(self._setting("music_replaygain", True)))
+
         # --- Connect media player signals ---
         self.media_player.positionChanged(self.update_position)
         self.media_player.durationChanged(self.update_duration)
@@ -578,11 +667,20 @@ class MusicPlayerScreen(QWidget):
         self.btn_prev.setObjectName("mediaPrevButton")
         self.btn_play_pause.setObjectName("mediaPlayPauseButton")
         self.btn_next.setObjectName("mediaNextButton")
+        self.btn_shuffle = QPushButton("🔀")
+        self.btn_shuffle.setObjectName("mediaShuffleButton")
+        self.btn_shuffle.setCheckable(True)
+        self.btn_repeat = QPushButton()
+        self.btn_repeat.setObjectName("mediaRepeatButton")
+        self.btn_repeat.setCheckable(True)
+        self._update_queue_mode_buttons()
 
         self.playback_layout.addStretch(1)
+        self.playback_layout.addWidget(self.btn_shuffle)
         self.playback_layout.addWidget(self.btn_prev)
         self.playback_layout.addWidget(self.btn_play_pause)
         self.playback_layout.addWidget(self.btn_next)
+        self.playback_layout.addWidget(self.btn_repeat)
         self.playback_layout.addStretch(1)
 
         # Add playback controls to left side
@@ -726,18 +824,49 @@ class MusicPlayerScreen(QWidget):
         # Hide by default, will be shown if developer mode is enabled
         self.select_folder_button.setVisible(False)
 
+        # Ricerca nella libreria (si aggiorna a ogni tasto della tastiera virtuale)
+        self.library_search_input = QLineEdit()
+        self.library_search_input.setObjectName("librarySearchInput")
+        self.library_search_input.setPlaceholderText("Search library...")
+        self.library_search_input.setClearButtonEnabled(True)
+        self.library_search_input.setMinimumWidth(250)
+        self.library_search_input.mousePressEvent = self.open_library_search_keyboard
+        self.library_search_input.textChanged.connect(self.filter_library)
+
         self.library_header.addWidget(self.library_title)
         self.library_header.addStretch(1)
+        self.library_header.addWidget(self.library_search_input)
         self.library_header.addWidget(self.select_folder_button)
         self.library_header.addWidget(self.back_button)
         self.library_layout.addLayout(self.library_header)
 
         # --- Library file list ---
-        self.library_list = QListWidget()
+        # Model/view: le righe sono dipinte dal delegate, nessun widget per traccia
+        self.library_model = LibraryModel(self)
+        self.library_search_model = LibraryModel(self)
+        self._library_search_index = None
+        self._library_search_key = None
+        self._play_counts = None
+        self.library_delegate = LibraryDelegate(self)
+        # Queued: il dialogo si apre dopo che la view ha finito di gestire il tocco
+        self.library_delegate.edit_requested.connect(
+            self.open_audio_editor, Qt.ConnectionType.QueuedConnection
+        )
+        self.library_list = QListView()
         self.library_list.setObjectName("libraryList")
-        self.library_list.itemClicked.connect(self.play_selected_file)
+        self.library_list.setModel(self.library_model)
+        self.library_list.setItemDelegate(self.library_delegate)
+        # Righe di altezza fissa: la view non misura ogni riga (20k tracce)
+        self.library_list.setUniformItemSizes(True)
+        self.library_list.setVerticalScrollMode(QListView.ScrollMode.ScrollPerPixel)
+        self.library_list.clicked.connect(self._on_library_row_clicked)
         self.library_layout.addWidget(self.library_list)
 
+        self.library_empty_label = QLabel("No music files found in library")
+        self.library_empty_label.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        self.library_empty_label.setVisible(False)
+        self.library_layout.addWidget(self.library_empty_label)
+
         # --- Add widgets to stacked widget ---
         self.stacked_widget.addWidget(self.player_widget)
         self.stacked_widget.addWidget(self.library_widget)
@@ -746,6 +875,8 @@ class MusicPlayerScreen(QWidget):
         self.btn_prev.clicked.connect(self.on_previous_clicked)
         self.btn_play_pause.clicked.connect(self.on_play_pause_clicked)
         self.btn_next.clicked.connect(self.on_next_clicked)
+        self.btn_shuffle.clicked.connect(self.toggle_shuffle)
+        self.btn_repeat.clicked.connect(self.cycle_repeat)
 
         # --- Timer for updating position ---
         self.position_timer = QTimer(self)
@@ -760,35 +891,15 @@ class MusicPlayerScreen(QWidget):
         self.lyrics_scroll_area.setVisible(False)
         self.show_player()
 
+        # Download in coda dalla sessione precedente: ripartono da qui
+        self.download_manager.set_max_parallel(self._setting("download_parallel", 2))
+        self.download_manager.start()
+
         # Connetti il segnale dell'AudioManager a uno slot in questa classe.
         # Questo è il cuore della comunicazione asincrona.
         if self.main_window and hasattr(self.main_window, "audio_manager"):
             self.main_window.audio_manager.metadata_ready.connect(self.on_metadata_received)
 
-        def _write_mp3_tags(self, file_path: str, title: str | None, artist: str | None, album: str | None = None) -> None:
-            """Scrive i metadata ID3 base (title, artist, album) in un file MP3."""
-            print(f"[Download] Writing metadata to {file_path}")
-            try:
-                try:
-                    tags = EasyID3(file_path)
-                except ID3NoHeaderError:
-                    # Se non ci sono ancora tag ID3, li creiamo da zero
-                    tags = EasyID3()
-
-                if title:
-                    tags["title"] = [title]
-                if artist:
-                    tags["artist"] = [artist]
-                if album:
-                    tags["album"] = [album]
-
-                # Salva sempre sul file indicato
-                tags.save(file_path)
-                print(f"[Download] Metadata written: title={title}, artist={artist}, album={album}")
-            except Exception as e:
-                print(f"[Download] Failed to write metadata to {file_path}: {e}")
-
-
     def update_scaling(self, scale_factor, margin):
         """Updates UI element sizes based on the current scale factor."""
         # Scale margins and spacing
@@ -802,12 +913,16 @@ class MusicPlayerScreen(QWidget):
         self.player_layout.setSpacing(scaled_spacing)
         self.library_layout.setSpacing(scaled_spacing)
 
-        # Scale album art
+        # Scale album art (and pick the matching cached thumbnail)
         self.album_art_label.setFixedSize(scaled_album_art_size, scaled_album_art_size)
+        pixmap = self._art_pixmap(self.current_art_id)
+        self.album_art_label.setPixmap(pixmap if pixmap is not None else self.default_album_art)
 
         # Scale buttons
         for btn in [self.btn_prev, self.btn_play_pause, self.btn_next]:
             btn.setFixedSize(scaled_button_size, scaled_button_size)
+        for btn in [self.btn_shuffle, self.btn_repeat]:
+            btn.setFixedSize(scaled_button_size * 3 // 4, scaled_button_size * 3 // 4)
 
     def show_player(self):
         """Switch to the player view."""
@@ -851,7 +966,6 @@ class MusicPlayerScreen(QWidget):
 
         if folder_path:
             # Scan the selected folder for music files
-            self.library_list.clear()
             self.scan_directory_for_music(folder_path)
 
             # Update the library title to show the selected folder
@@ -870,110 +984,173 @@ class MusicPlayerScreen(QWidget):
         if not self.is_local_playback:
             return
 
-        # Controlla se la libreria è vuota per evitare errori
-        num_tracks = self.library_list.count()
-        if num_tracks == 0:
+        # La coda decide: play next, ordine (shuffle) e repeat.
+        # Con repeat "all" dopo l'ultima si torna alla prima (looping).
+        next_path = self.play_queue.next(auto=True)
+        if next_path is None:
+            print("[MusicPlayerScreen] Fine della coda.")
             return
 
-        # Calcola l'indice della prossima canzone usando l'operatore modulo.
-        # Questo gestisce automaticamente il "ritorno alla prima" (looping).
-        # Es: Se ci sono 5 canzoni (indici 0-4) e siamo alla 4,
-        # (4 + 1) % 5 = 5 % 5 = 0. Torna alla prima.
-        next_index = (self.current_playlist_index + 1) % num_tracks
-        
-        # Prendi l'elemento della lista corrispondente al nuovo indice
-        next_item = self.library_list.item(next_index)
-
-        # Se l'elemento esiste, riproducilo
-        if next_item:
-            print(f"Riproduco la traccia all'indice: {next_index}")
-            self.play_selected_file(next_item)
+        print(f"Riproduco la traccia: {next_path}")
+        self._play_local_file(next_path)
 
 
     def load_library_files(self):
         """Load music files from the music directory."""
-        # Clear the current list
-        self.library_list.clear()
+        # Già allineata riga per riga dal watcher: niente da ricostruire
+        if (
+            self._library_root == os.path.abspath(self.music_dir)
+            and self.library_watcher.is_watching(self.music_dir)
+        ):
+            return
 
         # Reset the library title
         self.library_title.setText("Music Library")
 
         try:
-            if os.path.exists(self.music_dir):
-                self.scan_directory_for_music(self.music_dir)
-
-                # Check if we found any files
-                if self.library_list.count() == 0:
-                    item = QListWidgetItem("No music files found in library")
-                    self.library_list.addItem(item)
-            else:
-                # If the music directory doesn't exist, create it and add a placeholder item
+            if not os.path.exists(self.music_dir):
                 os.makedirs(self.music_dir, exist_ok=True)
-                item = QListWidgetItem("Music library is empty")
-                self.library_list.addItem(item)
+            self.scan_directory_for_music(self.music_dir)
         except Exception as e:
             print(f"Error loading library files: {e}")
-            item = QListWidgetItem(f"Error: {str(e)}")
-            self.library_list.addItem(item)
+            self.library_model.set_tracks([])
+            self.library_empty_label.setText(f"Error: {str(e)}")
+            self.library_empty_label.setVisible(True)
 
     def scan_directory_for_music(self, directory):
-        """Scan a directory for music files recursively."""
-        # Expanded list of supported audio formats
-        music_extensions = [
-            ".mp3", ".wav", ".ogg", ".flac", ".m4a", 
-            ".aac", ".wma", ".opus", ".alac", ".aiff"
-        ]
+        """
+        Show the indexed tracks of a directory right away, then rescan it in
+        background: only new or modified files are re-read.
+        """
+        self._library_root = os.path.abspath(directory)
+        self._show_library_tracks(self.library_index.tracks(directory))
+        self.library_scanner.request_scan(directory)
 
-        try:
-            for root, _, files in os.walk(directory):
-                for file in files:
-                    if any(file.lower().endswith(ext) for ext in music_extensions):
-                        full_path = os.path.join(root, file)
-                        display_name = os.path.basename(file)
-                        
-                        # Create List Item
-                        item = QListWidgetItem(self.library_list)
-                        item.setData(Qt.ItemDataRole.UserRole, full_path)
-                        
-                        # Create Custom Widget
-                        widget = QWidget()
-                        layout = QHBoxLayout(widget)
-                        layout.setContentsMargins(5, 5, 5, 5)
-                        
-                        # Song Name Label
-                        label = QLabel(display_name)
-                        label.setStyleSheet("font-size: 16px; color: #333;")
-                        layout.addWidget(label)
-                        
-                        layout.addStretch()
-                        
-                        # Edit Button (Right Aligned)
-                        edit_btn = QPushButton("Edit")
-                        edit_btn.setFixedSize(70, 40)
-                        edit_btn.setStyleSheet("background-color: #ddd; color: #333; border-radius: 5px;")
-                        # Use lambda with default arg to capture current path
-                        edit_btn.clicked.connect(lambda checked, p=full_path: self.open_audio_editor(p))
-                        layout.addWidget(edit_btn)
-                        
-                        widget.setLayout(layout)
-                        item.setSizeHint(widget.sizeHint())
-                        
-                        self.library_list.setItemWidget(item, widget)
-                        
-        except Exception as e:
-            print(f"Error scanning directory: {e}")
+    @pyqtSlot(str, int, int)
+    def _on_library_scan_progress(self, root, done, total):
+        if root != self._library_root:
+            return
+        self.library_title.setText(f"{self._library_title_text()} (indexing {done}/{total})")
+        # Prima indicizzazione: mostra le tracce man mano che arrivano
+        if self.library_model.rowCount() == 0:
+            self._show_library_tracks(self.library_index.tracks(root))
+
+    def _library_title_text(self):
+        if self._library_root == os.path.abspath(self.music_dir):
+            return "Music Library"
+        return f"Music Library - {os.path.basename(self._library_root)}"
+
+    @pyqtSlot(str, bool)
+    def _on_library_scan_finished(self, root, changed):
+        if root != self._library_root:
+            return
+        self.library_title.setText(self._library_title_text())
+        if changed or self.library_model.rowCount() == 0:
+            self._show_library_tracks(self.library_index.tracks(root))
+
+    def _show_library_tracks(self, tracks):
+        self.library_model.set_tracks(tracks)
+        # La traccia in riproduzione resta il punto di partenza per "next"
+        self.play_queue.set_paths(track["path"] for track in self.library_model.tracks())
+        self._update_library_empty_state()
+        self.filter_library(self.library_search_input.text())
+
+    def _update_library_empty_state(self):
+        empty = self.library_model.rowCount() == 0
+        if empty:
+            self.library_empty_label.setText("No music files found in library")
+        self.library_empty_label.setVisible(empty)
+        self.library_list.setVisible(not empty)
+
+    @pyqtSlot(list)
+    def _on_library_changed(self, changes):
+        """Applica le modifiche del watcher alle sole righe coinvolte."""
+        if not self._library_root:
+            return
+        prefix = os.path.join(self._library_root, "")
+        for kind, path in changes:
+            if not path.startswith(prefix):
+                continue
+            if kind == "removed":
+                self.library_model.remove_path(path)
+                self.play_queue.remove(path)
+                continue
+            track = self.library_index.track(path)
+            if track is None:
+                continue
+            if kind == "added" and self.library_model.row_of(path) < 0:
+                row = self.library_model.insert_track(track)
+                self.play_queue.insert(path, row)
+            else:
+                self.library_model.update_track(track)
+        self._update_library_empty_state()
+        self._preload_next_track()
+        self.filter_library(self.library_search_input.text())
+
+    @pyqtSlot("QModelIndex")
+    def _on_library_row_clicked(self, index):
+        # Il tocco sul pulsante "Edit" è già stato gestito dal delegate
+        if self.library_delegate.take_edit_click():
+            return
+        # La view può mostrare i risultati della ricerca: si passa dal path
+        row = self.library_model.row_of(index.data(PathRole))
+        if row >= 0:
+            self.play_selected_file(row)
+
+    def open_library_search_keyboard(self, event):
+        previous = self.library_search_input.text()
+        keyboard = VirtualKeyboard(previous, self)
+        keyboard.text_edited.connect(self.library_search_input.setText)
+        if keyboard.exec() != QDialog.DialogCode.Accepted:
+            self.library_search_input.setText(previous)
+
+    def _search_index(self):
+        """Indice di ricerca delle righe correnti, ricostruito solo se la libreria cambia."""
+        key = (self._library_root, self.library_index.generation, self.library_model.rowCount())
+        if self._library_search_index is None or key != self._library_search_key:
+            if self._play_counts is None:
+                self._play_counts = self.library_index.play_counts()
+            self._library_search_index = LibrarySearchIndex(
+                self.library_model.tracks(), self._play_counts
+            )
+            self._library_search_key = key
+        return self._library_search_index
+
+    @pyqtSlot(str)
+    def filter_library(self, text):
+        if not text.strip():
+            if self.library_list.model() is not self.library_model:
+                self.library_list.setModel(self.library_model)
+            return
+        self.library_search_model.set_tracks(self._search_index().search(text), sort=False)
+        if self.library_list.model() is not self.library_search_model:
+            self.library_list.setModel(self.library_search_model)
+
+    def _refresh_library_after_change(self):
+        # Con inotify attivo le righe sono già state aggiornate dal watcher
+        if not self.library_watcher.is_watching(self.music_dir):
+            self.load_library_files()
 
     def open_audio_editor(self, file_path):
         """Opens the audio editor for the selected file."""
         # Stop playback if playing
         self.media_player.stop()
         
+        # Il salvataggio passa dalla coda di trim, che notifica le righe cambiate
         editor = AudioEditorDialog(file_path, self)
-        if editor.exec() == QDialog.DialogCode.Accepted:
-            # If saved, reload library to reflect changes (e.g. timestamp/duration might change)
-            self.load_library_files()
+        editor.exec()
 
 
+    def _ensure_in_library(self, file_path):
+        """Riga della libreria per il file, aggiungendolo "al volo" (anche alla coda)."""
+        row = self.library_model.row_of(file_path)
+        if row < 0:
+            track = self.library_index.track(file_path) or {"path": file_path}
+            row = self.library_model.insert_track(track)
+            self.play_queue.insert(file_path, row)
+            self._update_library_empty_state()
+        return row
+
     def play_file_from_path(self, file_path: str) -> None:
         """
         Riproduce un file dato il percorso assoluto.
@@ -983,41 +1160,49 @@ class MusicPlayerScreen(QWidget):
             print(f"[MusicPlayerScreen] File non trovato: {file_path}")
             return
 
-        # 1) Prova a trovare l'item corrispondente nella QListWidget della libreria
-        for i in range(self.library_list.count()):
-            item = self.library_list.item(i)
-            if item.data(Qt.ItemDataRole.UserRole) == file_path:
-                self.library_list.setCurrentItem(item)
-                self.play_selected_file(item)
-                return
-
-        # 2) Se non è in lista, crea un item "al volo" e usalo
-        temp_item = QListWidgetItem(os.path.basename(file_path))
-        temp_item.setData(Qt.ItemDataRole.UserRole, file_path)
-        self.library_list.addItem(temp_item)
-        self.library_list.setCurrentItem(temp_item)
-        self.play_selected_file(temp_item)
+        # Riga della libreria corrispondente (lookup per path, niente scansione)
+        row = self._ensure_in_library(file_path)
+        self.library_list.setCurrentIndex(self.library_model.index(row))
+        self.play_selected_file(row)
 
+    def queue_play_next(self, file_path: str) -> None:
+        """Mette il file in coda subito dopo la traccia corrente."""
+        if not file_path or not os.path.exists(file_path):
+            print(f"[MusicPlayerScreen] File non trovato: {file_path}")
+            return
+        self._ensure_in_library(file_path)
+        self.play_queue.play_next(file_path)
+        self._prefetch_local_neighbours()
 
-    def play_selected_file(self, item):
-        """Play the selected music file from the library."""
+    def play_selected_file(self, row):
+        """Play the music file at `row` of the library."""
 
-        file_path = item.data(Qt.ItemDataRole.UserRole)
+        file_path = self.library_model.path_at(row)
         if not file_path:
             return
+        # Scelta dell'utente: la coda riparte da qui
+        self.play_queue.jump(file_path)
+        self._play_local_file(file_path)
+
+    def _play_local_file(self, file_path):
+        """Start playback of a local file already positioned in the queue."""
 
         # 1. Avvia la riproduzione (rimane uguale)
-        self.current_playlist_index = self.library_list.row(item)
         self.is_local_playback = True
-        self.media_player.stop()
-        self.media_player.setSource(QUrl.fromLocalFile(file_path))
-        self.media_player.play()
+        self._current_local_path = file_path
+        # Conteggio ascolti: alza il ranking nella ricerca
+        self.library_index.record_play(file_path)
+        if self._play_counts is not None:
+            self._play_counts[file_path] = self._play_counts.get(file_path, 0) + 1
+        # Dopo un passaggio gapless la traccia sta già suonando
+        if not self.media_player.take_gapless(file_path):
+            self.media_player.stop()
+            self.media_player.setSource(QUrl.fromLocalFile(file_path))
+            self.media_player.play()
         self.btn_play_pause.setText("⏸")
 
         # --- Aggiornamento preliminare della UI (con valori locali) ---
-        filename = os.path.basename(file_path)
-        name_parts = os.path.splitext(filename)[0].split(" - ", 1)
-        artist, title = (name_parts[0], name_parts[1]) if len(name_parts) > 1 else ("Unknown Artist", name_parts[0])
+        artist, title = self._names_from_path(file_path)
 
         self.current_title = title
         self.current_artist = artist
@@ -1029,7 +1214,18 @@ class MusicPlayerScreen(QWidget):
         
         # Pulisci immediatamente le informazioni precedenti per evitare di mostrarle
         self.album_art_label.setPixmap(self.default_album_art)
-        self.lyrics_content.setText("Loading lyrics...")
+        self.current_art_id = self.art_store.placeholder_id()
+
+        # Testo locale (tag, .lrc accanto al file o cache): sincronizzato e
+        # disponibile subito, quello online serve solo se manca.
+        local_lyrics = load_local_lyrics(file_path, title, artist)
+        self._lyrics_from_file = bool(local_lyrics)
+        if local_lyrics:
+            self.current_lyrics = local_lyrics
+            self.parse_lyrics(local_lyrics)
+            self.update_lyrics_display()
+        else:
+            self.lyrics_content.setText("Loading lyrics...")
 
         # --- CAMBIO DI SCHERMATA IMMEDIATO ---
         # Questa è la modifica cruciale: torna al player senza attendere la rete.
@@ -1039,6 +1235,54 @@ class MusicPlayerScreen(QWidget):
         # Questa chiamata ritorna IMMEDIATAMENTE, non blocca nulla.
         if self.main_window and hasattr(self.main_window, "audio_manager"):
             self.main_window.audio_manager.request_media_info(title, artist)
+        self._prefetch_local_neighbours()
+
+    @staticmethod
+    def _names_from_path(file_path):
+        """Ricava (artist, title) dal nome file "Artista - Titolo.ext"."""
+        filename = os.path.basename(file_path)
+        name_parts = os.path.splitext(filename)[0].split(" - ", 1)
+        if len(name_parts) > 1:
+            return name_parts[0], name_parts[1]
+        return "Unknown Artist", name_parts[0]
+
+    def _prefetch_local_neighbours(self):
+        """Precarica i metadati delle tracce che play_next_song suonerà dopo."""
+        self._preload_next_track()
+        audio_manager = getattr(self.main_window, "audio_manager", None)
+        if not audio_manager or not hasattr(audio_manager, "prefetch_media_info"):
+            return
+        upcoming = []
+        for path in self.play_queue.peek(3):
+            artist, title = self._names_from_path(path)
+            upcoming.append((title, artist, path))
+        if upcoming:
+            audio_manager.prefetch_media_info(upcoming)
+
+    def _preload_next_track(self):
+        """Dice al player quale traccia decodificare dopo quella corrente (gapless)."""
+        if not self.is_local_playback:
+            self.media_player.setNextSource(None)
+            return
+        if self.play_queue.repeat == REPEAT_ONE:
+            upcoming = [self.play_queue.current_path]
+        else:
+            upcoming = self.play_queue.peek(1)
+        self.media_player.setNextSource(upcoming[0] if upcoming else None)
+
+    def _prefetch_bluetooth_queue(self):
+        """Precarica i metadati della coda AVRCP, se il telefono la espone."""
+        audio_manager = getattr(self.main_window, "audio_manager", None)
+        bt_manager = getattr(self.main_window, "bluetooth_manager", None)
+        if not audio_manager or not hasattr(audio_manager, "prefetch_media_info"):
+            return
+        if not bt_manager or not hasattr(bt_manager, "get_now_playing_queue"):
+            return
+        queue = bt_manager.get_now_playing_queue()
+        if queue:
+            audio_manager.prefetch_media_info(
+                [(entry["Title"], entry["Artist"], None) for entry in queue]
+            )
 
     @pyqtSlot(str, str)
     def on_metadata_received(self, art_data, lyrics):
@@ -1051,57 +1295,47 @@ class MusicPlayerScreen(QWidget):
 
     def _apply_metadata_payload(self, art_data, lyrics):
         """Shared handler to update lyrics and artwork from metadata payloads."""
-        self.current_lyrics = lyrics if lyrics else "No lyrics available"
-        self.parse_lyrics(self.current_lyrics)
-        self.update_lyrics_display()
+        if not (self.is_local_playback and self._lyrics_from_file):
+            self.current_lyrics = lyrics if lyrics else "No lyrics available"
+            self.parse_lyrics(self.current_lyrics)
+            self.update_lyrics_display()
 
-        if art_data and isinstance(art_data, str) and art_data.startswith("data:"):
-            pixmap = self._pixmap_from_data_url(art_data)
-            if pixmap and not pixmap.isNull():
-                scaled = self._scale_album_art(pixmap)
-                self.album_art_label.setPixmap(scaled)
-                self.album_art_updated.emit(scaled)
-                return
-        elif art_data:
+        if art_data and self.art_store.has(art_data):
+            self._show_album_art(art_data)
+            return
+        if art_data and art_data.startswith(("http://", "https://")):
             # Fallback for legacy HTTP URLs: download via network manager.
             request = QNetworkRequest(QUrl(art_data))
             self.network_manager.get(request)
             return
 
-        self.album_art_label.setPixmap(self.default_album_art)
-        self.album_art_updated.emit(self.default_album_art)
+        self._show_album_art("")
 
-    def _pixmap_from_data_url(self, data_url):
-        """Decode a data URL into a QPixmap, returning None on failure."""
-        if not data_url or not isinstance(data_url, str):
-            return None
-        if not data_url.startswith("data:"):
-            return None
-        try:
-            header, encoded = data_url.split(",", 1)
-        except ValueError:
+    def _art_pixmap(self, art_id):
+        """Cached art store thumbnail sized to the album art label."""
+        if not self.art_store.has(art_id):
             return None
-        try:
-            binary = base64.b64decode(encoded)
-        except (binascii.Error, ValueError):
-            return None
-        pixmap = QPixmap()
-        if pixmap.loadFromData(binary):
-            return pixmap
-        return None
-
-    def _scale_album_art(self, pixmap):
-        """Return a pixmap scaled to the album art label while preserving aspect."""
-        if not pixmap or pixmap.isNull():
-            return self.default_album_art
-        target_width = self.album_art_label.width() or self.base_album_art_size
-        target_height = self.album_art_label.height() or self.base_album_art_size
-        return pixmap.scaled(
-            target_width,
-            target_height,
-            Qt.AspectRatioMode.KeepAspectRatio,
-            Qt.TransformationMode.SmoothTransformation,
-        )
+        label = getattr(self, "album_art_label", None)
+        target_width = (label.width() if label else 0) or self.base_album_art_size
+        target_height = (label.height() if label else 0) or self.base_album_art_size
+        return self.art_store.pixmap(art_id, target_width, target_height)
+
+    def _show_album_art(self, art_id):
+        """Show `art_id` (placeholder when missing) and notify the other screens."""
+        pixmap = self._art_pixmap(art_id)
+        if pixmap is None or pixmap.isNull():
+            art_id = self.art_store.placeholder_id()
+            pixmap = self.default_album_art
+        self.current_art_id = art_id
+        self.album_art_label.setPixmap(pixmap)
+        self.album_art_updated.emit(art_id)
+
+    @pyqtSlot(str)
+    def _on_art_decoded(self, art_id):
+        """Art store finished decoding a downloaded cover."""
+        if art_id and art_id == self._pending_art_id:
+            self._pending_art_id = ""
+            self._show_album_art(art_id)
 
     def update_position(self, position):
         """Update the current position from the media player."""
@@ -1116,10 +1350,27 @@ class MusicPlayerScreen(QWidget):
                 position, self.current_duration_ms
             )
 
+    @pyqtSlot(int, int)
+    def update_bluetooth_position(self, position, duration):
+        """Interpolated position of the Bluetooth track (BluetoothManager.media_position_updated)."""
+        if self.is_local_playback:
+            return
+        if duration and duration != self.current_duration_ms:
+            self.current_duration_ms = duration
+            self.time_slider.setRange(0, duration)
+        if not self.time_slider.isSliderDown():
+            self.time_slider.setValue(position)
+        self.current_position_ms = position
+        self.update_time_display()
+
     def update_duration(self, duration):
         """Update the total duration from the media player."""
         self.time_slider.setRange(0, duration)
+        duration_changed = duration != self.current_duration_ms
         self.current_duration_ms = duration
+        # Estimated line times depend on the duration; LRC stamps do not
+        if duration_changed and self.lyrics_lines and not self.synced_lyrics.timed:
+            self.parse_lyrics(self.current_lyrics)
         self.update_time_display()
 
         # Update track info with new duration if it's local playback
@@ -1201,25 +1452,15 @@ class MusicPlayerScreen(QWidget):
         return f"{minutes:02d}:{seconds:02d}"
 
     def on_album_art_downloaded(self, reply):
-        """Handle downloaded album art."""
-
-        pixmap_to_emit = self.default_album_art
-
+        """Handle downloaded album art: decoding happens on the art store pool."""
         if reply.error() == QNetworkReply.NetworkError.NoError:
-            data = reply.readAll()
-            pixmap = QPixmap()
-            pixmap.loadFromData(data)
-            if not pixmap.isNull():
-                scaled_pixmap = self._scale_album_art(pixmap)
-                self.album_art_label.setPixmap(scaled_pixmap)
-                pixmap_to_emit = scaled_pixmap
-            else:
-                self.album_art_label.setPixmap(self.default_album_art)
+            self._pending_art_id = self.art_store.submit(bytes(reply.readAll()))
+            if not self._pending_art_id:
+                self._show_album_art("")
         else:
             print(f"Error downloading album art: {reply.errorString()}")
-            self.album_art_label.setPixmap(self.default_album_art)
+            self._show_album_art("")
         reply.deleteLater()
-        self.album_art_updated.emit(pixmap_to_emit)
 
     @pyqtSlot(dict)
     def update_media_info(self, properties):
@@ -1254,20 +1495,19 @@ class MusicPlayerScreen(QWidget):
 
             # Only fetch if we have valid title and artist
             if title != "---" and artist != "---" and self.main_window:
-                self.album_art_label.setPixmap(self.default_album_art)
-                self.album_art_updated.emit(self.default_album_art)
+                self._show_album_art("")
                 audio_manager = getattr(self.main_window, "audio_manager", None)
                 if audio_manager and hasattr(audio_manager, "request_media_info"):
                     self.lyrics_content.setText("Loading lyrics...")
                     audio_manager.request_media_info(title, artist)
+                    self._prefetch_bluetooth_queue()
                 elif audio_manager and hasattr(audio_manager, "get_media_info"):
                     art_data, lyrics = audio_manager.get_media_info(title, artist)
                     self._apply_metadata_payload(art_data, lyrics)
                 else:
                     self.lyrics_content.setText("No lyrics available")
             else:
-                self.album_art_label.setPixmap(self.default_album_art)
-                self.album_art_updated.emit(self.default_album_art)
+                self._show_album_art("")
 
     @pyqtSlot(str)
     def update_playback_status(self, status):
@@ -1321,7 +1561,7 @@ class MusicPlayerScreen(QWidget):
 
             # Highlight current lyrics line and scroll to it
             if self.lyrics_lines:
-                self.highlight_current_lyrics_line()
+                self.highlight_current_lyrics_line(force=True)
         else:
             # Switch back to normal view
             self.lyrics_button.setText("Show Lyrics")
@@ -1349,68 +1589,50 @@ class MusicPlayerScreen(QWidget):
             self.track_title_label.setStyleSheet("")
 
     def parse_lyrics(self, lyrics_text):
-        """Parse lyrics into lines and estimate time positions."""
-        # Split lyrics into lines, filtering out empty lines
-        self.lyrics_lines = [
-            line.strip() for line in lyrics_text.split("\n") if line.strip()
-        ]
+        """Parse lyrics into lines with start times (LRC stamps or an even spread)."""
+        self.synced_lyrics = parse_lyrics_text(lyrics_text, self.current_duration_ms)
+        self.lyrics_lines = self.synced_lyrics.lines
+        self.lyrics_line_positions = self.synced_lyrics.times
 
         # Reset current line
         self.current_lyrics_line = 0
 
-        # Estimate time positions for each line (evenly distributed)
-        if self.lyrics_lines and self.current_duration_ms > 0:
-            # Distribute lines evenly across the song duration
-            line_count = len(self.lyrics_lines)
-            time_per_line = self.current_duration_ms / line_count
-
-            self.lyrics_line_positions = []
-            for i in range(line_count):
-                # Start each line a bit earlier than its mathematical position
-                # to account for singing starting before the exact time point
-                position = int(i * time_per_line)
-                self.lyrics_line_positions.append(position)
-        else:
-            self.lyrics_line_positions = []
-
-    def highlight_current_lyrics_line(self):
-        """Highlight the current line in the lyrics based on playback position."""
+    def highlight_current_lyrics_line(self, force=False):
+        """
+        Highlight the current line in the lyrics based on playback position.
+        The widget is rebuilt only when the active line changes (or `force`).
+        """
         if not self.lyrics_lines or not self.lyrics_line_positions:
             return
 
-        # Find the current line based on playback position
-        current_position = self.current_position_ms
-        new_line = 0
-
-        for i, position in enumerate(self.lyrics_line_positions):
-            if current_position >= position:
-                new_line = i
+        # Binary search over the sorted line start times
+        new_line = self.synced_lyrics.line_index_at(self.current_position_ms)
+        if new_line == self.current_lyrics_line and not force:
+            return
 
-        # If the line has changed, update the display
-        if new_line != self.current_lyrics_line or self.lyrics_view_active:
-            self.current_lyrics_line = new_line
-            self.update_lyrics_display()
+        self.current_lyrics_line = new_line
+        self.update_lyrics_display()
 
-            # Auto-scroll to keep the current line in the vertical middle
-            if self.lyrics_view_active:
-                # Get the scroll area viewport height
-                viewport_height = self.lyrics_scroll_area.viewport().height()
-
-                # Estimate line height (can be adjusted based on font size)
-                line_height = 30  # Increased for better spacing
-
-                # Calculate the position to scroll to (center the current line)
-                # We want the current line to be in the middle of the viewport
-                middle_offset = viewport_height // 2
-                scroll_position = max(
-                    0,
-                    (self.current_lyrics_line * line_height)
-                    - middle_offset
-                    + (line_height // 2),
-                )
+        # Auto-scroll to keep the current line in the vertical middle
+        if self.lyrics_view_active:
+            # Get the scroll area viewport height
+            viewport_height = self.lyrics_scroll_area.viewport().height()
+
+            # Estimate line height (can be adjusted based on font size)
+            line_height = 30  # Increased for better spacing
+
+            # Calculate the position to scroll to (center the current line)
+            # We want the current line to be in the middle of the viewport
+            middle_offset = viewport_height // 2
+            scroll_position = max(
+                0,
+                (self.current_lyrics_line * line_height)
+                - middle_offset
+                + (line_height // 2),
+            )
 
-                # Set the scroll position
-                self.lyrics_scroll_area.verticalScrollBar().setValue(scroll_position)
+            # Set the scroll position
+            self.lyrics_scroll_area.verticalScrollBar().setValue(scroll_position)
 
     def update_lyrics_display(self):
         """Update the lyrics display with highlighted current line."""
@@ -1448,6 +1670,7 @@ class MusicPlayerScreen(QWidget):
         self.total_time_label.setText("00:00")
         self.time_slider.setValue(0)
         self.album_art_label.setPixmap(self.default_album_art)
+        self.current_art_id = self.art_store.placeholder_id()
         self.btn_play_pause.setText("▶")
         self.current_title = ""
         self.current_artist = ""
@@ -1457,6 +1680,8 @@ class MusicPlayerScreen(QWidget):
         self.current_lyrics = "No lyrics available"
         self.lyrics_lines = []
         self.lyrics_line_positions = []
+        self.synced_lyrics = SyncedLyrics([], [], timed=False)
+        self._lyrics_from_file = False
         self.current_lyrics_line = 0
         self.lyrics_content.setText("No lyrics available")
 
@@ -1497,56 +1722,54 @@ class MusicPlayerScreen(QWidget):
     def on_previous_clicked(self):
         """Handle previous button click."""
         if self.is_local_playback:
-            # Handle local playback - navigate to previous track in playlist
-            if self.current_playlist_index > 0:
-                prev_index = self.current_playlist_index - 1
-                prev_item = self.library_list.item(prev_index)
-                if prev_item:
-                    self.play_selected_file(prev_item)
+            # Handle local playback - navigate to previous track in the queue
+            prev_path = self.play_queue.previous()
+            if prev_path:
+                self._play_local_file(prev_path)
         elif self.main_window and self.main_window.bluetooth_manager:
             self.main_window.bluetooth_manager.send_previous()
 
     def on_next_clicked(self):
         """Handle next button click."""
         if self.is_local_playback:
-            # Handle local playback - navigate to next track in playlist
-            if self.current_playlist_index < self.library_list.count() - 1:
-                next_index = self.current_playlist_index + 1
-                next_item = self.library_list.item(next_index)
-                if next_item:
-                    self.play_selected_file(next_item)
+            # Handle local playback - navigate to next track in the queue
+            next_path = self.play_queue.next()
+            if next_path:
+                self._play_local_file(next_path)
         elif self.main_window and self.main_window.bluetooth_manager:
             self.main_window.bluetooth_manager.send_next()
 
-    def check_download_completion_by_file(self):
-        """Checks if the target file exists to detect download completion."""
-        if hasattr(self, 'current_download_final_path') and self.current_download_final_path:
-            if os.path.exists(self.current_download_final_path):
-                # Check if size is > 0
-                if os.path.getsize(self.current_download_final_path) > 0:
-                    print(f"[Download Watcher] File detected: {self.current_download_final_path}")
-                    # Ensure progress is 100%
-                    self.update_progress(100)
-                    
-                    # Stop the watcher
-                    if hasattr(self, 'download_watcher_timer'):
-                        self.download_watcher_timer.stop()
-                    
-                    # Trigger download completion logic immediately.
-                    # This handles the case where the thread might be stuck reading stdout or waiting.
-                    # The _update_ui_after_download guard prevents duplicates if the thread also finishes.
-                    self.download_complete(True)
+    def _setting(self, key, default):
+        settings = getattr(self.main_window, "settings_manager", None)
+        value = settings.get(key) if settings else None
+        return default if value is None else value
+
+    def _save_setting(self, key, value):
+        settings = getattr(self.main_window, "settings_manager", None)
+        if settings:
+            settings.set(key, value)
+
+    def _update_queue_mode_buttons(self):
+        self.btn_shuffle.setChecked(self.play_queue.shuffle)
+        repeat = self.play_queue.repeat
+        self.btn_repeat.setText("🔂" if repeat == REPEAT_ONE else "🔁")
+        self.btn_repeat.setChecked(repeat != REPEAT_OFF)
+
+    def toggle_shuffle(self):
+        """Shuffle on/off: the permutation is computed once, starting from the current track."""
+        self.play_queue.set_shuffle(not self.play_queue.shuffle)
+        self._save_setting("music_shuffle", self.play_queue.shuffle)
+        self._update_queue_mode_buttons()
+        self._prefetch_local_neighbours()
+
+    def cycle_repeat(self):
+        """Repeat off -> all -> one."""
+        self._save_setting("music_repeat", self.play_queue.cycle_repeat())
+        self._update_queue_mode_buttons()
+        self._preload_next_track()
 
     def download_current_song(self):
-        """Download the currently playing song."""
-        if self.is_downloading:
-            QMessageBox.information(
-                self,
-                "Download in Progress",
-                "A download is already in progress. Please wait.",
-            )
-            return
-
+        """Queue a download of the currently playing song."""
         # Check if we have valid song info
         if (
             self.current_title == ""
@@ -1589,112 +1812,89 @@ class MusicPlayerScreen(QWidget):
             )
             return
 
-        # Reset and show progress bar
-        self.download_progress_bar.setValue(0)
-        self.download_progress_bar.setVisible(True)
-
-        # Prepare paths and filenames
-        safe_filename = f"{self.current_artist} - {self.current_title}"
-        for char in ["/", "\\", ":", "*", "?", '"', "<", ">", "|"]:
-            safe_filename = safe_filename.replace(char, "_")
-        
-        # Prepare query
         query = f"{self.current_artist} - {self.current_title} audio"
-        self.download_title = self.current_title # For UI label
-        
-        # We need to pass the TEMPLATE to yt-dlp, but we monitor the FINAL file
-        output_template = os.path.join(self.music_dir, f"{safe_filename}.%(ext)s")
-        self.current_download_final_path = os.path.join(self.music_dir, f"{safe_filename}.mp3")
-
-        self.start_download_process(query, output_template)
+        # La copertina già mostrata finisce nei tag senza riscaricarla
+        art_id = self.current_art_id if self.current_art_id != self.art_store.placeholder_id() else ""
+        self.queue_download(
+            query, f"{self.current_artist} - {self.current_title}",
+            self.current_title, self.current_artist, art_id,
+        )
 
     def on_search_clicked(self):
-        """Open a dialog to search and download a song manually."""
-        if self.is_downloading:
-            QMessageBox.information(
-                self,
-                "Download in Progress",
-                "A download is already in progress. Please wait.",
-            )
-            return
-
+        """Open a dialog to search and download songs manually."""
         # Check internet
         if not self._is_internet_available():
             QMessageBox.warning(self, "No Internet", "Cannot download. Check connection.")
             return
 
         # Open Custom Search Dialog
-        dialog = SearchDialog(self)
-        dialog.song_selected.connect(self.start_download_from_search)
+        dialog = SearchDialog(self, self._library_dedup())
+        dialog.songs_selected.connect(self.start_downloads_from_search)
         dialog.exec()
 
-    def start_download_from_search(self, data):
-        """Initiate download for a selected search result."""
-        title = data.get('title', 'Unknown')
-        video_id = data.get('id')
-        uploader = data.get('uploader', '')
-        
-        if not video_id: return
+    def _library_dedup(self):
+        """Library tracks + downloaded/queued source ids, rebuilt only when the index changes."""
+        queued = frozenset(job.source_id for job in self.download_manager.queue.jobs() if job.source_id)
+        key = (self.library_index.generation, queued)
+        if self._dedup_cache is None or self._dedup_cache[0] != key:
+            sources = self.library_index.source_ids(self.music_dir) | queued
+            dedup = LibraryDedup(self.library_index.tracks(self.music_dir), sources)
+            self._dedup_cache = (key, dedup)
+        return self._dedup_cache[1]
+
+    def start_downloads_from_search(self, results):
+        """Queue the selected search / playlist results, skipping songs already in the library."""
+        new, duplicates = self._library_dedup().partition(results)
+        items = []
+        for data in new:
+            title = data.get('title', 'Unknown')
+            video_id = data.get('id')
+            uploader = data.get('uploader', '')
+            # Use video URL for download
+            query = data.get('url') or (f"https://www.youtube.com/watch?v={video_id}" if video_id else "")
+            if not query:
+                continue
+            items.append((query, self._download_template(f"{uploader} - {title}"), title, uploader, "", video_id or ""))
+
+        job_ids = []
+        for job_id, item in zip(self.download_manager.enqueue_many(items), items):
+            if job_id is not None:  # None: già in coda
+                self._download_titles[job_id] = item[2]
+                job_ids.append(job_id)
+        print(f"[Download] Queued {len(job_ids)} song(s), {len(duplicates)} already in library")
+        if job_ids:
+            self.download_status_label.setVisible(True)
+            self._update_download_status()
+        elif duplicates:
+            QMessageBox.information(
+                self, "Already Downloaded", "The selected songs are already in your library."
+            )
 
-        # Set title for UI label
-        self.download_title = title 
-        
-        # Prepare paths
-        safe_filename = f"{uploader} - {title}"
+    def _download_template(self, file_stem):
+        """yt-dlp output template: the file is saved as <file_stem>.mp3 in the library."""
+        safe_filename = file_stem
         for char in ["/", "\\", ":", "*", "?", '"', "<", ">", "|"]:
             safe_filename = safe_filename.replace(char, "_")
-        
-        output_template = os.path.join(self.music_dir, f"{safe_filename}.%(ext)s")
-        self.current_download_final_path = os.path.join(self.music_dir, f"{safe_filename}.mp3")
-        
-        # Use video URL for download
-        query = f"https://www.youtube.com/watch?v={video_id}"
-        
-        self.start_download_process(query, output_template)
-
-    def start_download_process(self, query, output_template):
-        """Starts the download thread and watcher."""
-        # Reset progress UI
-        self.download_status_label.setText(f"Downloading - {self.download_title}")
+        return os.path.join(self.music_dir, f"{safe_filename}.%(ext)s")
+
+    def queue_download(self, query, file_stem, title, artist="", art_id=""):
+        """Adds a download to the shared queue; the file is saved as <file_stem>.mp3."""
+        output_template = self._download_template(file_stem)
+        job_id = self.download_manager.enqueue(query, output_template, title, artist, art_id)
+        if job_id is None:
+            print(f"[Download] Already queued: {title}")
+            return
+        self._download_titles[job_id] = title
         self.download_status_label.setVisible(True)
-        self.download_button.setText("...") 
-
-        # Start watcher
-        self.download_watcher_timer = QTimer(self)
-        self.download_watcher_timer.timeout.connect(self.check_download_completion_by_file)
-        self.download_watcher_timer.start(2000)
-
-        # Start download thread
-        self.is_downloading = True
-        download_thread = threading.Thread(
-            target=self._download_song_thread, 
-            args=(query, output_template, self.current_download_final_path)
-        )
-        download_thread.daemon = True
-        download_thread.start()
+        self._update_download_status()
 
     def _is_ytdlp_available(self):
-        """Check if yt-dlp is installed and available."""
-        try:
-            result = subprocess.run(
-                ["yt-dlp", "--version"],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True,
-                timeout=2,
-            )
-            return result.returncode == 0
-        except (subprocess.SubprocessError, FileNotFoundError):
-            return False
+        """Check if yt-dlp is installed and available (PATH lookup, no process)."""
+        return shutil.which("yt-dlp") is not None
 
     def _is_internet_available(self):
-        """Check if internet connection is available."""
-        try:
-            # Try to connect to Google's DNS server
-            socket.create_connection(("8.8.8.8", 53), timeout=3)
-            return True
-        except OSError:
-            return False
+        """Check if internet connection is available (shared breaker, no blocking probe)."""
+        return get_connectivity_monitor().is_online()
 
     def _is_ffmpeg_available(self):
         """Check if FFmpeg is installed and available."""
@@ -1711,157 +1911,80 @@ class MusicPlayerScreen(QWidget):
         except (subprocess.SubprocessError, FileNotFoundError):
             return False
 
-    def _download_song_thread(self, query, output_template, final_path=None):
-        """Background thread for downloading songs."""
-        try:
-            # Show download status
-            QTimer.singleShot(0, lambda: self.download_button.setText("Downloading..."))
-
-            # Use yt-dlp to download the song with progress reporting
-            cmd = [
-                "yt-dlp",
-                "--extract-audio",
-                "--audio-format",
-                "mp3",
-                "--audio-quality",
-                "0",  # Best quality
-                "--output",
-                output_template,
-                "--no-playlist",
-                "--default-search",
-                "ytsearch",
-                "--newline",  # Important for parsing progress
-                query,
-            ]
-
-            # Run the download command with real-time output processing
-            process = subprocess.Popen(
-                cmd,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                universal_newlines=True,
-                bufsize=1,
-            )
-
-            # Process output line by line to extract progress
-            for line in iter(process.stdout.readline, ""):
-                # Debug output to console to check what yt-dlp is sending
-                # print(f"[yt-dlp output] {line.strip()}")
-                
-                # Detect final path from conversion step if not provided
-                if final_path is None and "[ExtractAudio] Destination: " in line:
-                    parts = line.split("Destination: ")
-                    if len(parts) > 1:
-                        detected = parts[1].strip()
-                        print(f"[Download Thread] Detected final path: {detected}")
-                        final_path = detected
-                        # Update the watcher target safely (using QTimer to run on main thread)
-                        # We simply update the instance variable, assuming watcher reads it
-                        self.current_download_final_path = final_path
-
-                # Detect if file already exists
-                if final_path is None and "has already been downloaded" in line:
-                     # Usually followed by path, but tricky to parse safely.
-                     # We might assume success if we see this.
-                     pass
-
-                # Parse progress information using improved regex
-                if "[download]" in line:
-                    # Regex search for percentage (e.g., 45.0% or 100%)
-                    match = re.search(r"(\d{1,3}\.?\d*)%", line)
-                    if match:
-                        try:
-                            percent = float(match.group(1))
-                            # Update progress bar in the main thread
-                            QTimer.singleShot(0, lambda p=percent: self.update_progress(p))
-                        except ValueError:
-                            pass
-
-            # Wait for process to complete
-            process.stdout.close()
-            return_code = process.wait()
-
-            # Check if download was successful
-            if return_code == 0:
-                if final_path:
-                    print(f"[Download] Expected downloaded file: {final_path}")
-                    if os.path.exists(final_path):
-                        # Only write tags if we have current info matching the download
-                        # For manual search, we might not want to overwrite with "current" song tags if they differ
-                        # Check if query matches current song to decide? 
-                        # Or just skip tagging for manual search for now to be safe.
-                        # Using simple heuristic: if final_path provided explicitly, use current tags.
-                        if self.current_download_final_path == final_path and " - " in query:
-                             # This is likely download_current_song or precise search
-                             # We can try to write tags if we are sure.
-                             pass
-                    else:
-                        print(f"[Download] WARNING: downloaded file not found: {final_path}")
-                
-                # Notifica il completamento alla UI
-                self.download_complete(True)
-            else:
-                # Download fallito
-                self.download_complete(False, "Download failed. Please try again.")
-
-
-        except FileNotFoundError:
-            print("yt-dlp command not found")
-            self.download_complete(
-                False, "Download tool not found. Please install yt-dlp."
-            )
-        except subprocess.TimeoutExpired:
-            print("Download process timed out")
-            self.download_complete(
-                False, "Download timed out. Please check your internet connection."
-            )
-        except Exception as e:
-            print(f"Download exception: {str(e)}")
-            self.download_complete(False, f"An error occurred: {str(e)}")
-
-    def update_progress(self, percent):
+    # --- Download queue (slots) ---
+    @pyqtSlot(str, str)
+    def _on_download_started(self, job_id, title):
+        self._download_titles[job_id] = title
+        self._download_active_id = job_id
+        self._update_download_status()
+
+    @pyqtSlot(str, float)
+    def _on_download_progress(self, job_id, percent):
+        self._download_active_id = job_id
+        self._update_download_status(percent)
+
+    @pyqtSlot(int, int, int)
+    def _on_download_queue_changed(self, queued, running, failed):
+        was_pending, self._downloads_pending = self._downloads_pending, queued + running
+        if self._downloads_pending:
+            self.download_status_label.setVisible(True)
+            self._update_download_status()
+        elif was_pending:
+            # Arriva dopo i job_finished dell'ultimo job: la coda è vuota
+            self._on_download_queue_drained()
+
+    def _update_download_status(self, percent=None):
         """Update the download status label."""
-        if hasattr(self, 'download_status_label') and self.download_status_label.isVisible():
-             self.download_status_label.setText(f"Downloading - {self.download_title} - ({int(percent)}%)")
-
-    def download_complete(self, success, error_message=None):
-        """Called when download completes (from any thread)."""
-        # Schedule UI update on the main thread
-        QTimer.singleShot(
-            0, lambda: self._update_ui_after_download(success, error_message)
-        )
-
-    def _update_ui_after_download(self, success, error_message=None):
-        """Update UI after download (must be called on main thread)."""
-        # Guard clause: If download is already marked as finished, ignore duplicate calls
-        if not self.is_downloading:
-            return
-
-        self.is_downloading = False
-        self.download_button.setText("Download Song")
+        title = self._download_titles.get(self._download_active_id, "")
+        text = f"Downloading - {title}" if title else "Downloading"
+        if percent is not None:
+            text += f" - ({int(percent)}%)"
+        if self._downloads_pending > 1:
+            text += f" · {self._downloads_pending - 1} queued"
+        self.download_status_label.setText(text)
+
+    @pyqtSlot(str, bool, str)
+    def _on_download_finished(self, job_id, success, detail):
+        """Final outcome of one queued download (after any retries)."""
+        title = self._download_titles.pop(job_id, "") or "Song"
+        if job_id == self._download_active_id:
+            self._download_active_id = None
+        if success:
+            self._downloads_completed.append(title)
+        elif detail != "Cancelled":
+            self._update_ui_after_download(False, f"'{title}': {detail}")
+
+    def _on_download_queue_drained(self):
+        completed, self._downloads_completed = self._downloads_completed, []
+        if completed:
+            self._update_ui_after_download(True, completed=completed)
+        else:
+            self.download_status_label.setVisible(False)
 
-        # Set progress to 100% if successful, hide after a delay
+    def _update_ui_after_download(self, success, error_message=None, completed=()):
+        """Update UI after downloads (must be called on main thread)."""
         if success:
-            self.update_progress(100)
+            self.download_status_label.setText("Download complete")
             QTimer.singleShot(
-                3000, lambda: self.download_status_label.setVisible(False)
+                3000, lambda: self.download_status_label.setVisible(self._downloads_pending > 0)
             )
 
             # Show success message with file location
             file_location = os.path.basename(self.music_dir)
+            what = f"'{completed[0]}'" if len(completed) == 1 else f"{len(completed)} songs"
             QMessageBox.information(
                 self,
                 "Download Complete",
-                f"Successfully downloaded '{self.download_title if hasattr(self, 'download_title') else 'Song'}'.\n\n"
+                f"Successfully downloaded {what}.\n\n"
                 f"The file has been saved to the {file_location} folder.",
             )
 
             # Refresh the library if it's currently shown
             if self.stacked_widget.currentWidget() == self.library_widget:
-                self.load_library_files()
+                self._refresh_library_after_change()
         else:
-            # Hide progress bar immediately on failure
-            self.download_status_label.setVisible(False)
+            # Gli altri job in coda continuano
+            self.download_status_label.setVisible(self._downloads_pending > 0)
 
             # Show appropriate error message
             title = "Download Failed"
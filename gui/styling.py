@@ -293,7 +293,8 @@ def get_light_theme(scale_factor=1.0):
         margin-top: {scaled_padding // 3}px; /* Increased margin above time */
         margin-bottom: {scaled_padding // 2}px; /* Increased margin below time */
      }}
-     QPushButton#mediaPrevButton, QPushButton#mediaPlayPauseButton, QPushButton#mediaNextButton {{
+     QPushButton#mediaPrevButton, QPushButton#mediaPlayPauseButton, QPushButton#mediaNextButton,
+     QPushButton#mediaShuffleButton, QPushButton#mediaRepeatButton {{
         min-width: {scale_value(65, scale_factor)}px;
         padding: {scale_value(base_padding_px * 0.7, scale_factor)}px;
      }}
@@ -835,7 +836,8 @@ def get_dark_theme(scale_factor=1.0):
         margin-top: {scaled_padding // 3}px;
         margin-bottom: {scaled_padding // 2}px;
      }}
-     QPushButton#mediaPrevButton, QPushButton#mediaPlayPauseButton, QPushButton#mediaNextButton {{
+     QPushButton#mediaPrevButton, QPushButton#mediaPlayPauseButton, QPushButton#mediaNextButton,
+     QPushButton#mediaShuffleButton, QPushButton#mediaRepeatButton {{
         min-width: {scale_value(65, scale_factor)}px;
         padding: {scale_value(base_padding_px * 0.7, scale_factor)}px;
      }}
@@ -11,6 +11,9 @@ from PyQt6.QtGui import QFont
 class VirtualKeyboard(QDialog):
     """Virtual keyboard for touchscreen text input."""
 
+    # Emitted on every keystroke, for live filtering while the dialog is open
+    text_edited = pyqtSignal(str)
+
     def __init__(self, initial_text="", parent=None):
         super().__init__(parent)
         self.current_text = initial_text
@@ -276,6 +279,7 @@ class VirtualKeyboard(QDialog):
     def on_text_changed(self, text):
         """Handle text change."""
         self.current_text = text
+        self.text_edited.emit(text)
 
     def get_text(self):
         """Get the current text."""
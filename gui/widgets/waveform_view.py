@@ -0,0 +1,169 @@
+# gui/widgets/waveform_view.py
+
+import threading
+
+from PyQt6.QtCore import QLineF, QObject, QRectF, Qt, pyqtSignal
+from PyQt6.QtGui import QColor, QPainter, QPen
+from PyQt6.QtWidgets import QSizePolicy, QWidget
+
+from backend.waveform_cache import get_waveform
+
+
+class WaveformLoader(QObject):
+    """Loads (or generates once) a file's waveform on a daemon thread."""
+
+    loaded = pyqtSignal(str, object)  # path, Waveform or None
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cancelled = False
+
+    def load(self, path):
+        threading.Thread(target=self._load, args=(path,), daemon=True).start()
+
+    def cancel(self):
+        self._cancelled = True
+
+    def _load(self, path):
+        try:
+            waveform = get_waveform(path, should_continue=lambda: not self._cancelled)
+        except Exception as e:
+            print(f"[WaveformLoader] {path}: {e}")
+            waveform = None
+        if not self._cancelled:
+            self.loaded.emit(path, waveform)
+
+
+class WaveformView(QWidget):
+    """
+    Paints a Waveform overview with the trim region, and lets the user drag
+    the start/end markers. The visible span can be zoomed around a marker.
+    """
+
+    # (start, end) in seconds, while dragging
+    trim_changed = pyqtSignal(float, float)
+
+    MARKER_GRAB_PX = 30
+    MAX_ZOOM = 64
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setMinimumHeight(120)
+        self.setSizePolicy(QSizePolicy.Policy.Expanding, QSizePolicy.Policy.Expanding)
+        self._waveform = None
+        self._duration = 0.0
+        self._start = 0.0
+        self._end = 0.0
+        self._view_start = 0.0
+        self._view_end = 0.0
+        self._dragging = None
+        self._message = "Loading waveform..."
+        self._envelope_key = None
+        self._lines = []
+
+    # --- Data ---
+    def set_waveform(self, waveform):
+        self._waveform = waveform
+        self._message = "" if waveform is not None else "Waveform not available"
+        if waveform is not None and not self._duration:
+            self.set_duration(waveform.duration)
+        self._envelope_key = None
+        self.update()
+
+    def set_duration(self, duration):
+        self._duration = max(0.0, duration)
+        self._view_start, self._view_end = 0.0, self._duration
+        self._end = self._end or self._duration
+        self.update()
+
+    def set_trim(self, start, end):
+        self._start, self._end = start, end
+        self.update()
+
+    # --- Zoom ---
+    def zoom(self, factor, center):
+        """Scale the visible span by 1/factor around `center` seconds."""
+        if not self._duration:
+            return
+        span = (self._view_end - self._view_start) / factor
+        span = min(self._duration, max(self._duration / self.MAX_ZOOM, span))
+        start = min(max(0.0, center - span / 2), self._duration - span)
+        self._view_start, self._view_end = start, start + span
+        self._envelope_key = None
+        self.update()
+
+    # --- Coordinates ---
+    def _x_for(self, seconds):
+        span = self._view_end - self._view_start
+        return (seconds - self._view_start) / span * self.width() if span else 0.0
+
+    def _seconds_at(self, x):
+        span = self._view_end - self._view_start
+        seconds = self._view_start + x / max(1, self.width()) * span
+        return min(max(0.0, seconds), self._duration)
+
+    # --- Painting ---
+    def _envelope_lines(self):
+        """One vertical min/max line per pixel column, cached per view/size."""
+        key = (self._view_start, self._view_end, self.width(), self.height())
+        if key != self._envelope_key:
+            self._envelope_key = key
+            mins, maxs = self._waveform.envelope(self._view_start, self._view_end, self.width())
+            mid = self.height() / 2
+            scale = mid / 128.0
+            self._lines = [
+                QLineF(x, mid - int(high) * scale, x, mid - int(low) * scale)
+                for x, (low, high) in enumerate(zip(mins.tolist(), maxs.tolist()))
+            ]
+        return self._lines
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        rect = self.rect()
+        painter.fillRect(rect, QColor("#1c1c1e"))
+
+        if self._waveform is None:
+            painter.setPen(QColor("#aaaaaa"))
+            painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, self._message)
+            return
+
+        painter.setPen(QPen(QColor("#0a84ff"), 1))
+        painter.drawLines(self._envelope_lines())
+
+        # Parti tagliate oscurate, marker di inizio/fine
+        start_x, end_x = self._x_for(self._start), self._x_for(self._end)
+        shade = QColor(0, 0, 0, 150)
+        painter.fillRect(QRectF(0, 0, max(0.0, start_x), rect.height()), shade)
+        painter.fillRect(QRectF(end_x, 0, max(0.0, rect.width() - end_x), rect.height()), shade)
+        painter.setPen(QPen(QColor("#ff9500"), 3))
+        painter.drawLine(QLineF(start_x, 0, start_x, rect.height()))
+        painter.setPen(QPen(QColor("#34c759"), 3))
+        painter.drawLine(QLineF(end_x, 0, end_x, rect.height()))
+
+    # --- Touch / mouse ---
+    def mousePressEvent(self, event):
+        if not self._duration:
+            return
+        x = event.position().x()
+        start_dist = abs(x - self._x_for(self._start))
+        end_dist = abs(x - self._x_for(self._end))
+        if min(start_dist, end_dist) <= self.MARKER_GRAB_PX:
+            self._dragging = "start" if start_dist <= end_dist else "end"
+        else:
+            # Tocco libero: sposta il marker più vicino
+            self._dragging = "start" if start_dist < end_dist else "end"
+            self.mouseMoveEvent(event)
+
+    def mouseMoveEvent(self, event):
+        if self._dragging is None:
+            return
+        seconds = self._seconds_at(event.position().x())
+        if self._dragging == "start":
+            self._start = min(seconds, max(0.0, self._end - 1.0))
+        else:
+            self._end = max(seconds, min(self._duration, self._start + 1.0))
+        self.update()
+        self.trim_changed.emit(self._start, self._end)
+
+    def mouseReleaseEvent(self, event):
+        self._dragging = None
@@ -153,6 +153,15 @@ if __name__ == "__main__":
 
     signal.signal(signal.SIGINT, sigint_handler)  # Handle Ctrl+C
 
+    # Lo schema app:// (copertine e libreria per la UI HTML) va registrato
+    # prima di creare la QApplication.
+    try:
+        from gui.app_scheme import register_app_scheme
+
+        register_app_scheme()
+    except ImportError:
+        logging.warning("PyQt6-WebEngine non disponibile: schema app:// non registrato.")
+
     app = QApplication(sys.argv)
     logging.info("QApplication creata.")
 
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the playback DSP stage (per-track gain and crossfade) on
+synthetic 44.1 kHz stereo s16le audio, in the same block size the playback
+engine decodes. Reports CPU milliseconds per second of audio and fails if
+the budget is exceeded.
+
+    python scripts/bench_audio_dsp.py --seconds 60 --crossfade 6
+"""
+
+import argparse
+import pathlib
+import sys
+import time
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend import audio_dsp
+
+SAMPLE_RATE = 44100
+CHANNELS = 2
+FRAME_BYTES = 2 * CHANNELS
+READ_CHUNK = 64 * 1024  # come il decoder del PlaybackEngine
+BUDGET_MS_PER_SECOND = 20.0  # 2% di un core per secondo di audio
+
+
+def synthetic_pcm(seconds):
+    rng = audio_dsp.np.random.default_rng(1)
+    samples = rng.normal(0, 6000, int(seconds * SAMPLE_RATE) * CHANNELS)
+    return audio_dsp.np.clip(samples, -32768, 32767).astype("<i2").tobytes()
+
+
+def bench_gain(pcm, gain):
+    start = time.process_time()
+    for offset in range(0, len(pcm), READ_CHUNK):
+        audio_dsp.apply_gain(pcm[offset:offset + READ_CHUNK], gain)
+    return time.process_time() - start
+
+
+def bench_crossfade(pcm, seconds):
+    size = int(seconds * SAMPLE_RATE) * FRAME_BYTES
+    tail, head = pcm[:size], pcm[size:size * 2]
+    start = time.process_time()
+    audio_dsp.crossfade(tail, head, CHANNELS)
+    return time.process_time() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=60.0)
+    parser.add_argument("--crossfade", type=float, default=6.0)
+    args = parser.parse_args()
+
+    if not audio_dsp.available():
+        print("numpy not installed, the DSP stage is disabled.")
+        return 1
+
+    pcm = synthetic_pcm(max(args.seconds, args.crossfade * 2))
+    gain_s = bench_gain(pcm, audio_dsp.db_to_gain(-6.5))
+    fade_s = bench_crossfade(pcm, args.crossfade)
+
+    gain_ms = gain_s * 1000 / (len(pcm) / FRAME_BYTES / SAMPLE_RATE)
+    fade_ms = fade_s * 1000 / args.crossfade if args.crossfade else 0.0
+    print(f"{'stage':>10} {'ms per audio s':>15} {'realtime x':>11}")
+    for name, cost in (("gain", gain_ms), ("crossfade", fade_ms)):
+        print(f"{name:>10} {cost:>15.2f} {1000 / max(cost, 1e-6):>11.0f}")
+
+    # Durante il crossfade si paga il gain della traccia entrante più il mix
+    worst = gain_ms * 2 + fade_ms
+    print(f"worst case {worst:.2f} ms/s (budget {BUDGET_MS_PER_SECOND:.0f} ms/s)")
+    return 0 if worst <= BUDGET_MS_PER_SECOND else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
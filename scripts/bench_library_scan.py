@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+"""
+Benchmark of the library indexer on a synthetic tree of small tagged MP3s.
+Measures files/second for the first (full) index with different worker
+counts, plus the cost of a no-change rescan.
+
+    python scripts/bench_library_scan.py --files 5000 --workers 1,2,4
+"""
+
+import argparse
+import os
+import pathlib
+import struct
+import sys
+import tempfile
+import time
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.library_index import LibraryIndex, MutagenFile
+
+# MPEG-1 Layer III, 128 kbps, 44.1 kHz, no padding -> 417 byte frames
+MP3_FRAME = b"\xff\xfb\x90\x00" + b"\x00" * 413
+MP3_FRAMES_PER_FILE = 40  # ~1 s of audio
+
+
+def _id3_text_frame(frame_id, text):
+    payload = b"\x03" + text.encode("utf-8")  # encoding 3 = UTF-8
+    return frame_id.encode("ascii") + struct.pack(">I", len(payload)) + b"\x00\x00" + payload
+
+
+def _synchsafe(size):
+    return bytes(((size >> shift) & 0x7F) for shift in (21, 14, 7, 0))
+
+
+def synthetic_mp3(title, artist, album):
+    frames = (
+        _id3_text_frame("TIT2", title)
+        + _id3_text_frame("TPE1", artist)
+        + _id3_text_frame("TALB", album)
+    )
+    header = b"ID3\x04\x00\x00" + _synchsafe(len(frames))
+    return header + frames + MP3_FRAME * MP3_FRAMES_PER_FILE
+
+
+def build_tree(root, count):
+    """Artist/Album/NN - Title.mp3, 10 tracks per album, 10 albums per artist."""
+    for i in range(count):
+        artist = f"Artist {i // 100:03d}"
+        album = f"Album {i // 10:04d}"
+        folder = os.path.join(root, artist, album)
+        os.makedirs(folder, exist_ok=True)
+        title = f"Track {i:05d}"
+        with open(os.path.join(folder, f"{i % 10:02d} - {title}.mp3"), "wb") as handle:
+            handle.write(synthetic_mp3(title, artist, album))
+
+
+def bench(music_dir, workers, db_dir):
+    db_path = os.path.join(db_dir, f"bench_{workers}.sqlite3")
+    index = LibraryIndex(db_path, max_workers=workers)
+
+    start = time.perf_counter()
+    result = index.scan(music_dir)
+    full = time.perf_counter() - start
+
+    start = time.perf_counter()
+    rescan = index.scan(music_dir)
+    noop = time.perf_counter() - start
+
+    start = time.perf_counter()
+    tracks = index.tracks(music_dir)
+    query = time.perf_counter() - start
+
+    index.close()
+    assert not rescan.changed and len(tracks) == result.added
+    return result.added, full, noop, query
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--files", type=int, default=5000)
+    parser.add_argument("--workers", default="1,4", help="comma separated worker counts")
+    args = parser.parse_args()
+
+    if MutagenFile is None:
+        print("WARNING: mutagen not installed, only file names are indexed.")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        music_dir = os.path.join(tmp, "music")
+        print(f"Building {args.files} synthetic MP3 files...")
+        build_tree(music_dir, args.files)
+
+        print(f"{'workers':>7} {'files':>6} {'full s':>8} {'files/s':>9} {'rescan ms':>10} {'query ms':>9}")
+        for workers in (int(w) for w in args.workers.split(",")):
+            files, full, noop, query = bench(music_dir, workers, tmp)
+            print(f"{workers:>7} {files:>6} {full:>8.2f} {files / full:>9.0f} "
+                  f"{noop * 1000:>10.1f} {query * 1000:>9.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
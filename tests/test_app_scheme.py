@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+
+import json
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from gui.app_scheme import (
+    LIBRARY_CACHE_CONTROL,
+    LIBRARY_MAX_PAGE_SIZE,
+    LIBRARY_PAGE_SIZE,
+    UNVERSIONED_CACHE_CONTROL,
+    library_cache_control,
+    library_page,
+    parse_library_query,
+    response_headers,
+)
+
+
+def test_parse_library_query():
+    assert parse_library_query("", "") == (0, LIBRARY_PAGE_SIZE)
+    assert parse_library_query("3", "20") == (3, 20)
+    # Fuori intervallo: si riporta nei limiti
+    assert parse_library_query("-2", "0") == (0, 1)
+    assert parse_library_query("1", "100000") == (1, LIBRARY_MAX_PAGE_SIZE)
+    assert parse_library_query("abc", "10") is None
+    assert parse_library_query("1", "1.5") is None
+
+
+def test_library_pages():
+    tracks = [{"id": i} for i in range(5)]
+    page = json.loads(library_page(7, tracks, 1, 2))
+    assert page == {
+        "version": 7, "page": 1, "page_size": 2, "total": 5, "tracks": [{"id": 2}, {"id": 3}],
+    }
+    assert json.loads(library_page(7, tracks, 2, 2))["tracks"] == [{"id": 4}]
+    assert json.loads(library_page(7, tracks, 9, 2))["tracks"] == []  # oltre la fine
+
+
+def test_cache_headers_follow_version_and_qt_support():
+    assert library_cache_control("7", 7) == LIBRARY_CACHE_CONTROL
+    # Versione vecchia o assente: la pagina non va tenuta in cache
+    assert library_cache_control("6", 7) == UNVERSIONED_CACHE_CONTROL
+    assert library_cache_control("", 7) == UNVERSIONED_CACHE_CONTROL
+
+    headers = response_headers(LIBRARY_CACHE_CONTROL, "lib-7-0-100", supported=True)
+    assert headers == {
+        b"Cache-Control": LIBRARY_CACHE_CONTROL,
+        b"ETag": b'"lib-7-0-100"',
+        b"Access-Control-Allow-Origin": b"*",
+    }
+    assert response_headers(LIBRARY_CACHE_CONTROL, "lib-7-0-100", supported=False) == {}
+
+
+def main():
+    tests = [
+        test_parse_library_query,
+        test_library_pages,
+        test_cache_headers_follow_version_and_qt_support,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+import struct
+import zlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.art_store import MAX_ENTRIES, THUMBNAIL_SIZES, ArtStore, art_id_for
+
+
+def _png(seed, size=4):
+    """Tiny solid-colour PNG, different for every seed."""
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    pixel = bytes(((seed * 37) % 256, (seed * 91) % 256, seed // 256 % 256))
+    rows = b"".join(b"\0" + pixel * size for _ in range(size))
+    return (
+        b"\x89PNG\r\n\x1a\n"
+        + chunk(b"IHDR", struct.pack(">IIBBBBB", size, size, 8, 2, 0, 0, 0))
+        + chunk(b"IDAT", zlib.compress(rows))
+        + chunk(b"IEND", b"")
+    )
+
+
+def test_lookup_by_content_id():
+    store = ArtStore()
+    data = _png(1)
+    art_id = store.ingest(data, "image/png")
+    assert art_id == art_id_for(data) and store.has(art_id)
+    assert store.ingest(bytes(data)) == art_id  # stessa copertina, stessa voce
+    assert store.raw(art_id) == (data, "image/png")
+    # Miniatura più piccola che copre la richiesta, la più grande oltre
+    assert store.image(art_id, 150).width() == THUMBNAIL_SIZES[1]
+    assert store.image(art_id, 1000).width() == THUMBNAIL_SIZES[-1]
+    assert store.ingest(b"not an image") == "" and store.ingest(b"") == ""
+    assert store.raw("missing") is None and not store.has(None)
+
+
+def test_lru_eviction_keeps_placeholder():
+    store = ArtStore()
+    store._placeholder_id = placeholder = store.ingest(_png(0))
+    ids = [store.ingest(_png(seed)) for seed in range(1, MAX_ENTRIES)]
+    assert all(store.has(art_id) for art_id in ids)
+
+    # Lettura: la prima copertina diventa la più recente
+    store.entry(ids[0])
+    extra = [store.ingest(_png(seed)) for seed in range(MAX_ENTRIES, MAX_ENTRIES + 3)]
+    assert store.has(placeholder) and store.has(ids[0])
+    assert [art_id for art_id in ids if not store.has(art_id)] == ids[1:4]
+    assert all(store.has(art_id) for art_id in extra)
+    # Le pixmap delle voci espulse vanno liberate dal thread della GUI
+    assert store._evicted == ids[1:4]
+    assert store.raw(ids[1]) is None
+
+
+def main():
+    tests = [
+        test_lookup_by_content_id,
+        test_lru_eviction_keeps_placeholder,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
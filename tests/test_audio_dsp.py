@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from backend import audio_dsp
+
+
+def _pcm(values):
+    return np.asarray(values, dtype="<i2").tobytes()
+
+
+def test_gain_scales_and_clips():
+    assert audio_dsp.apply_gain(_pcm([100, -100]), 1.0) == _pcm([100, -100])
+    louder = np.frombuffer(audio_dsp.apply_gain(_pcm([10000, -10000]), 2.0), dtype="<i2")
+    assert louder.tolist() == [20000, -20000]
+    clipped = np.frombuffer(audio_dsp.apply_gain(_pcm([30000, -30000]), 2.0), dtype="<i2")
+    assert clipped.tolist() == [32767, -32768]
+    # Il peak limita il gain: nessun clipping dopo la normalizzazione
+    assert audio_dsp.track_gain(6.0, peak=0.8) == 1.0 / 0.8
+    assert audio_dsp.track_gain(None) == 1.0
+
+
+def test_crossfade_is_equal_power():
+    frames = 1000
+    tail = _pcm([20000] * frames * 2)
+    head = _pcm([-20000] * frames * 2)
+    mixed = np.frombuffer(audio_dsp.crossfade(tail, head, channels=2), dtype="<i2").reshape(-1, 2)
+    assert len(mixed) == frames
+    assert mixed[0].tolist() == [20000, 20000]  # inizio: solo la traccia uscente
+    assert mixed[-1][0] < -19000  # fine: quasi solo la traccia entrante
+    assert abs(int(mixed[frames // 2][0])) < 100  # a metà le due si compensano
+
+
+def main():
+    tests = [
+        test_gain_scales_and_clips,
+        test_crossfade_is_equal_power,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
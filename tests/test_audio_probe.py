@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pathlib
+import tempfile
+import wave
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+import backend.audio_probe as audio_probe
+from backend.audio_probe import probe_stream
+
+
+def _write_wav(path, seconds, rate=8000):
+    with wave.open(path, "wb") as handle:
+        handle.setnchannels(1)
+        handle.setsampwidth(2)
+        handle.setframerate(rate)
+        handle.writeframes(b"\0\0" * int(seconds * rate))
+
+
+def test_changed_file_invalidates_the_entry():
+    with tempfile.TemporaryDirectory() as base:
+        path = os.path.join(base, "tone.wav")
+        _write_wav(path, 1.0)
+        info = probe_stream(path)
+        assert info.duration == 1.0 and info.sample_rate == 8000 and info.channels == 1
+        assert probe_stream(path) is info  # dalla cache
+
+        # Stessa dimensione, mtime diverso: si rilegge l'header
+        _write_wav(path, 1.0, rate=16000)
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+        assert probe_stream(path).sample_rate == 16000
+
+        _write_wav(path, 2.0)  # dimensione diversa
+        assert probe_stream(path).duration == 2.0
+
+        os.remove(path)
+        assert probe_stream(path).duration == 0.0
+
+
+def test_cache_is_bounded():
+    limit = audio_probe.CACHE_MAX_ENTRIES
+    audio_probe.CACHE_MAX_ENTRIES = 3
+    try:
+        with tempfile.TemporaryDirectory() as base:
+            paths = [os.path.join(base, f"{i}.wav") for i in range(5)]
+            for path in paths:
+                _write_wav(path, 0.5)
+                probe_stream(path)
+            probe_stream(paths[2])  # la più usata resta
+            probe_stream(paths[0])
+            assert len(audio_probe._cache) == 3
+            assert list(audio_probe._cache) == [paths[4], paths[2], paths[0]]
+    finally:
+        audio_probe.CACHE_MAX_ENTRIES = limit
+
+
+def main():
+    tests = [
+        test_changed_file_invalidates_the_entry,
+        test_cache_is_bounded,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.bluez_object_tree import DEVICE_IFACE, MEDIA_PLAYER_IFACE, BluezObjectTree
+
+PHONE = "/org/bluez/hci0/dev_11_22_33_44_55_66"
+SPEAKER = "/org/bluez/hci0/dev_AA_BB_CC_DD_EE_FF"
+PLAYER = PHONE + "/player0"
+
+
+def _tree():
+    tree = BluezObjectTree()
+    tree.load({
+        "/org/bluez/hci0": {"org.bluez.Adapter1": {"Address": "00:00:00:00:00:01"}},
+        PHONE: {DEVICE_IFACE: {"Name": "Phone", "Address": "11:22", "Paired": True, "Connected": False}},
+        SPEAKER: {DEVICE_IFACE: {"Alias": "Speaker", "Address": "AA:BB", "RSSI": -40}},
+    })
+    return tree
+
+
+def test_signals_update_the_mirror():
+    tree = _tree()
+    assert [dev["name"] for dev in tree.devices()] == ["Phone", "Speaker"]
+    assert tree.connected_device() is None
+
+    generation = tree.generation
+    tree.properties_changed(PHONE, DEVICE_IFACE, {"Connected": True}, ["Paired"])
+    assert tree.generation > generation
+    path, props = tree.connected_device()
+    assert path == PHONE and props["Name"] == "Phone" and "Paired" not in props
+
+    tree.interfaces_added(PLAYER, {MEDIA_PLAYER_IFACE: {"Device": PHONE, "Status": "playing"}})
+    assert tree.media_player(PHONE) == PLAYER
+    assert tree.media_player() == PLAYER
+    assert tree.media_player(SPEAKER) is None
+
+    assert tree.interfaces_removed(PLAYER, [MEDIA_PLAYER_IFACE])
+    assert tree.media_player(PHONE) is None
+    assert not tree.interfaces_removed(PHONE, ["org.bluez.Battery1"])  # Device1 resta
+    assert tree.has(PHONE, DEVICE_IFACE)
+
+
+def test_readers_get_copies():
+    tree = _tree()
+    props = tree.properties(PHONE, DEVICE_IFACE)
+    props["Connected"] = True
+    assert tree.properties(PHONE, DEVICE_IFACE)["Connected"] is False
+    assert tree.properties(PHONE, MEDIA_PLAYER_IFACE) is None
+    assert [path for path, _ in tree.objects_with(DEVICE_IFACE, PHONE)] == [PHONE]
+
+
+def main():
+    tests = [
+        test_signals_update_the_mirror,
+        test_readers_get_copies,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.connectivity import CLOSED, HALF_OPEN, OPEN, TRIAL_TIMEOUT, CircuitBreaker
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def _open_breaker():
+    clock = FakeClock()
+    breaker = CircuitBreaker(clock=clock)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker, clock
+
+
+def test_threshold_opens_the_breaker():
+    breaker = CircuitBreaker(clock=FakeClock())
+    assert not breaker.record_failure()  # una sola: resta chiuso
+    assert breaker.state == CLOSED and breaker.allow_request()
+    assert breaker.record_failure()
+    assert breaker.state == OPEN and not breaker.allow_request()
+    assert breaker.retry_in() == 15.0
+
+
+def test_failed_trials_double_the_backoff_up_to_the_cap():
+    breaker, clock = _open_breaker()
+    waits = []
+    for _ in range(7):
+        waits.append(breaker.retry_in())
+        clock.now += breaker.retry_in()
+        assert breaker.allow_request() and breaker.state == HALF_OPEN
+        assert breaker.record_failure() and breaker.state == OPEN
+    assert waits == [15.0, 30.0, 60.0, 120.0, 240.0, 300.0, 300.0]
+
+
+def test_half_open_allows_one_trial():
+    breaker, clock = _open_breaker()
+    clock.now += 14.9
+    assert not breaker.allow_request()
+    clock.now += 0.1
+    assert breaker.allow_request()
+    assert breaker.state == HALF_OPEN
+    assert not breaker.allow_request()  # la prova è ancora in corso
+    clock.now += TRIAL_TIMEOUT - 1
+    assert not breaker.allow_request()
+
+
+def test_lost_trial_times_out():
+    breaker, clock = _open_breaker()
+    clock.now += 15.0
+    assert breaker.allow_request()
+    # La prova non riporta mai l'esito: dopo TRIAL_TIMEOUT ne parte un'altra
+    clock.now += TRIAL_TIMEOUT
+    assert breaker.allow_request()
+    assert not breaker.allow_request()
+
+
+def test_success_closes_and_resets_the_backoff():
+    breaker, clock = _open_breaker()
+    for _ in range(3):
+        clock.now += breaker.retry_in()
+        breaker.allow_request()
+        breaker.record_failure()
+    assert breaker.retry_in() == 120.0
+
+    clock.now += breaker.retry_in()
+    assert breaker.allow_request()
+    assert breaker.record_success() and breaker.state == CLOSED
+    assert not breaker.record_success()  # già chiuso
+    assert breaker.allow_request() and breaker.allow_request()
+
+    breaker.record_failure()
+    breaker.record_failure()
+    assert breaker.state == OPEN and breaker.retry_in() == 15.0
+
+
+def main():
+    tests = [
+        test_threshold_opens_the_breaker,
+        test_failed_trials_double_the_backoff_up_to_the_cap,
+        test_half_open_allows_one_trial,
+        test_lost_trial_times_out,
+        test_success_closes_and_resets_the_backoff,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
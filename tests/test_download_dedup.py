@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.download_dedup import LibraryDedup, track_key
+
+
+def test_track_key_ignores_noise():
+    assert track_key("Song (Official Video)", "BandVEVO") == track_key("song", "Band")
+    assert track_key("Band - Song", "Some Channel", from_channel=True) == track_key("Song", "Band")
+    assert track_key("Song - Remastered", "Band") != track_key("Remastered", "Song")
+    assert track_key("Back In Black", "AC/DC") == track_key("back in black", "ac dc")
+    assert track_key("Song", "Band") != track_key("Song", "Other Band")
+
+
+def test_partition_skips_library_and_batch_duplicates():
+    dedup = LibraryDedup(
+        tracks=[
+            {"path": "/music/Band - Song.mp3", "title": "Song", "artist": "Band"},
+            {"path": "/music/Untagged.mp3", "title": "", "artist": ""},
+            {"path": "/music/Band - Other.mp3", "title": "", "artist": ""},
+        ],
+        source_ids={"known-id"},
+    )
+    entries = [
+        {"title": "Song (Official Audio)", "uploader": "Band - Topic", "id": "a"},
+        {"title": "Renamed upload", "uploader": "Someone", "id": "known-id"},
+        {"title": "Untagged", "uploader": "Any Artist", "id": "b"},  # il file non ha artista: nuovo
+        {"title": "New Song", "uploader": "Band", "id": "c"},
+        {"title": "New Song", "uploader": "Band", "id": "c"},  # ripetuto nella playlist
+        {"title": "New Song", "uploader": "Other Band", "id": "d"},
+        {"title": "Band - Other", "uploader": "Some Channel", "id": "e"},  # dal nome del file
+    ]
+    new, duplicates = dedup.partition(entries)
+    assert [entry["id"] for entry in new] == ["b", "c", "d"]
+    assert [entry["id"] for entry in duplicates] == ["a", "known-id", "c", "e"]
+    assert dedup.contains("whatever", source_id="c")
+
+
+def main():
+    tests = [
+        test_track_key_ignores_noise,
+        test_partition_skips_library_and_batch_duplicates,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
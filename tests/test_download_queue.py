@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pathlib
+import tempfile
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.download_queue import (
+    DONE,
+    FAILED,
+    MAX_ATTEMPTS,
+    QUEUED,
+    RUNNING,
+    DownloadQueue,
+    backoff_delay,
+    parse_file_line,
+    parse_progress_line,
+)
+
+
+def test_parse_templated_output():
+    assert parse_progress_line("[dl-progress] 512 1024 NA") == 50.0
+    assert parse_progress_line("[dl-progress] 300 NA 1200") == 25.0  # solo la stima
+    assert parse_progress_line("[dl-progress] 10 NA NA") is None
+    assert parse_progress_line("[download]  45.0% of 3.2MiB") is None
+    assert parse_file_line("[dl-file] /music/A - B.mp3\n") == "/music/A - B.mp3"
+    assert parse_file_line("[ExtractAudio] Destination: x.mp3") is None
+
+
+def test_retry_backoff_and_permanent_failures():
+    with tempfile.TemporaryDirectory() as base:
+        queue = DownloadQueue(os.path.join(base, "queue.json"))
+        job = queue.add("song one", "/music/one.%(ext)s", "One")
+        assert queue.add("song one", "/music/one.%(ext)s") is None  # già in coda
+
+        assert queue.take_ready(100.0) is job and job.state == RUNNING
+        assert queue.finish(job.job_id, 100.0, False, error="timed out") == QUEUED
+        assert job.next_attempt_at == 100.0 + backoff_delay(1)
+        assert queue.take_ready(100.0) is None
+        assert queue.next_wakeup(100.0) == backoff_delay(1)
+        assert backoff_delay(2) == 2 * backoff_delay(1)
+
+        for attempt in range(2, MAX_ATTEMPTS + 1):
+            assert queue.take_ready(10_000.0 * attempt) is job
+            state = queue.finish(job.job_id, 10_000.0 * attempt, False, error="timed out")
+        assert state == FAILED and job.attempts == MAX_ATTEMPTS
+        # Fallito: non è più "in coda", lo si può riaccodare
+        again = queue.add("song one", "/music/one.%(ext)s")
+        assert again is not None and queue.remove(again.job_id) is again
+
+        other = queue.add("song two", "/music/two.%(ext)s")
+        queue.take_ready(0.0)
+        assert queue.finish(other.job_id, 0.0, False, error="Video unavailable") == FAILED
+        assert queue.retry(other.job_id) and other.state == QUEUED and other.attempts == 0
+
+
+def test_queue_survives_restart():
+    with tempfile.TemporaryDirectory() as base:
+        path = os.path.join(base, "queue.json")
+        queue = DownloadQueue(path)
+        jobs = [queue.add(f"song {i}", f"/music/{i}.%(ext)s", f"Song {i}") for i in range(3)]
+        queue.take_ready(0.0)  # interrotto a metà download
+        queue.take_ready(0.0)
+        assert queue.finish(jobs[1].job_id, 0.0, True, "/music/1.mp3") == DONE
+        queue.save()
+
+        restored = DownloadQueue(path)
+        assert [job.job_id for job in restored.jobs()] == [jobs[0].job_id, jobs[2].job_id]
+        assert all(job.state == QUEUED for job in restored.jobs())
+        assert restored.get(jobs[0].job_id).attempts == 1
+        assert restored.counts()[QUEUED] == 2
+        assert restored.add("song 0", "/music/0.%(ext)s") is None
+        assert restored.add("song 1", "/music/1.%(ext)s") is not None
+
+
+def main():
+    tests = [
+        test_parse_templated_output,
+        test_retry_backoff_and_permanent_failures,
+        test_queue_survives_restart,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
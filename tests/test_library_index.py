@@ -0,0 +1,187 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pathlib
+import tempfile
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.library_index import LibraryIndex
+
+
+class CountingReader:
+    """Fake tag reader that records which files were (re)read."""
+
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, path):
+        self.calls.append(os.path.basename(path))
+        return {
+            "title": os.path.splitext(os.path.basename(path))[0],
+            "artist": "Artist",
+            "album": "",
+            "duration": 61.0,
+            "format": "mp3",
+            "art_hash": "",
+        }
+
+
+def _write(path, data=b"x"):
+    with open(path, "wb") as handle:
+        handle.write(data)
+
+
+def test_rescan_only_reads_changed_files():
+    with tempfile.TemporaryDirectory() as music_dir:
+        _write(os.path.join(music_dir, "b.mp3"))
+        _write(os.path.join(music_dir, "A.flac"))
+        _write(os.path.join(music_dir, "cover.jpg"))
+        reader = CountingReader()
+        index = LibraryIndex(":memory:", reader=reader)
+
+        result = index.scan(music_dir)
+        assert (result.added, result.updated, result.removed) == (2, 0, 0)
+        assert sorted(reader.calls) == ["A.flac", "b.mp3"]
+        assert [os.path.basename(t["path"]) for t in index.tracks(music_dir)] == ["A.flac", "b.mp3"]
+
+        # Nothing changed: only stat, no tag reads
+        reader.calls.clear()
+        result = index.scan(music_dir)
+        assert not result.changed and result.unchanged == 2
+        assert reader.calls == []
+
+        # One modified (size changes), one removed, one added
+        _write(os.path.join(music_dir, "b.mp3"), b"longer")
+        os.remove(os.path.join(music_dir, "A.flac"))
+        os.makedirs(os.path.join(music_dir, "sub"))
+        _write(os.path.join(music_dir, "sub", "c.ogg"))
+        result = index.scan(music_dir)
+        assert (result.added, result.updated, result.removed) == (1, 1, 1)
+        assert sorted(reader.calls) == ["b.mp3", "c.ogg"]
+        assert len(index.tracks(music_dir)) == 2
+
+
+def test_tracks_are_scoped_to_the_scanned_root():
+    with tempfile.TemporaryDirectory() as base:
+        library = os.path.join(base, "library")
+        library_other = os.path.join(base, "library2")
+        os.makedirs(library)
+        os.makedirs(library_other)
+        _write(os.path.join(library, "one.mp3"))
+        _write(os.path.join(library_other, "two.mp3"))
+        index = LibraryIndex(":memory:", reader=CountingReader())
+        index.scan(library)
+        index.scan(library_other)
+        assert [t["title"] for t in index.tracks(library)] == ["one"]
+        # Rescanning one root must not drop rows of a sibling root
+        index.scan(library)
+        assert [t["title"] for t in index.tracks(library_other)] == ["two"]
+
+
+def test_parallel_scan_streams_batches_with_progress():
+    with tempfile.TemporaryDirectory() as music_dir:
+        for i in range(300):
+            _write(os.path.join(music_dir, f"track{i:03d}.mp3"))
+        reader = CountingReader()
+        index = LibraryIndex(":memory:", reader=reader, max_workers=4)
+        index.batch_size = 50
+        progress = []
+        result = index.scan(music_dir, progress=lambda done, total: progress.append((done, total)))
+        assert result.added == 300
+        assert len(reader.calls) == 300
+        # Several committed batches, monotonically reaching the total
+        assert len(progress) > 1
+        assert progress[-1] == (300, 300)
+        assert [done for done, _ in progress] == sorted(done for done, _ in progress)
+        assert len(index.tracks(music_dir)) == 300
+
+
+def test_refresh_paths_reports_row_changes():
+    with tempfile.TemporaryDirectory() as music_dir:
+        _write(os.path.join(music_dir, "keep.mp3"))
+        album = os.path.join(music_dir, "album")
+        os.makedirs(album)
+        _write(os.path.join(album, "one.mp3"))
+        reader = CountingReader()
+        index = LibraryIndex(":memory:", reader=reader)
+        index.scan(music_dir)
+        reader.calls.clear()
+
+        new_file = os.path.join(music_dir, "new.mp3")
+        _write(new_file)
+        _write(os.path.join(music_dir, "keep.mp3"), b"edited")
+        changes = index.refresh_paths([new_file, os.path.join(music_dir, "keep.mp3"),
+                                       os.path.join(music_dir, "new.mp3.part")])
+        assert sorted(changes) == [("added", new_file),
+                                   ("updated", os.path.join(music_dir, "keep.mp3"))]
+        assert sorted(reader.calls) == ["keep.mp3", "new.mp3"]
+
+        # A deleted directory drops every row below it
+        os.remove(os.path.join(album, "one.mp3"))
+        os.rmdir(album)
+        assert index.refresh_paths([album]) == [("removed", os.path.join(album, "one.mp3"))]
+        assert len(index.tracks(music_dir)) == 2
+
+
+def test_loudness_results_resume_and_expire():
+    with tempfile.TemporaryDirectory() as music_dir:
+        for name in ("a.mp3", "b.mp3"):
+            _write(os.path.join(music_dir, name))
+        index = LibraryIndex(":memory:", reader=CountingReader())
+        index.scan(music_dir)
+        a, b = (os.path.join(music_dir, name) for name in ("a.mp3", "b.mp3"))
+
+        pending = index.loudness_pending()
+        assert [p[0] for p in pending] == [a, b]
+        index.store_loudness(*pending[0], integrated=-12.0, true_peak=-0.5, gain=-6.0)
+        index.store_loudness(*pending[1])  # non decodificabile: nessun gain
+        assert index.loudness_pending() == []
+        assert index.loudness_counts() == (2, 2)
+        assert index.loudness(a)["gain"] == -6.0 and index.loudness(b) is None
+
+        # File modificato: l'analisi vecchia non vale più
+        _write(a, b"changed")
+        index.scan(music_dir)
+        assert [p[0] for p in index.loudness_pending()] == [a]
+        assert index.loudness(a) is None
+
+
+def test_source_ids_follow_files_in_library():
+    with tempfile.TemporaryDirectory() as music_dir:
+        for name in ("a.mp3", "b.mp3"):
+            _write(os.path.join(music_dir, name))
+        index = LibraryIndex(":memory:", reader=CountingReader())
+        index.scan(music_dir)
+        a, b = (os.path.join(music_dir, name) for name in ("a.mp3", "b.mp3"))
+        index.record_source(a, "id-a")
+        index.record_source(b, "id-b")
+        assert index.source_ids(music_dir) == {"id-a", "id-b"}
+
+        # Un brano cancellato si può riscaricare
+        os.remove(b)
+        index.scan(music_dir)
+        assert index.source_ids(music_dir) == {"id-a"}
+
+
+def main():
+    tests = [
+        test_rescan_only_reads_changed_files,
+        test_tracks_are_scoped_to_the_scanned_root,
+        test_parallel_scan_streams_batches_with_progress,
+        test_refresh_paths_reports_row_changes,
+        test_loudness_results_resume_and_expire,
+        test_source_ids_follow_files_in_library,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
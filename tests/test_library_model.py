@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from PyQt6.QtCore import QCoreApplication
+from PyQt6.QtTest import QAbstractItemModelTester
+
+from gui.library_model import PathRole, TrackRole, LibraryModel
+
+app = QCoreApplication.instance() or QCoreApplication(sys.argv)
+
+
+def _track(path, title=""):
+    return {"path": path, "title": title}
+
+
+def _model(tracks, sort=True):
+    model = LibraryModel()
+    # Verifica a ogni segnale la coerenza del modello (righe, indici, notifiche)
+    model.tester = QAbstractItemModelTester(model, QAbstractItemModelTester.FailureReportingMode.Fatal)
+    model.set_tracks(tracks, sort)
+    return model
+
+
+def _paths(model):
+    return [model.path_at(row) for row in range(model.rowCount())]
+
+
+def _check_rows(model):
+    for row, path in enumerate(_paths(model)):
+        assert model.row_of(path) == row
+
+
+def test_sorted_insert_and_remove_keep_the_row_map():
+    model = _model([_track("/m/c.mp3"), _track("/m/A.mp3"), _track("/m/e.mp3")])
+    assert _paths(model) == ["/m/A.mp3", "/m/c.mp3", "/m/e.mp3"]
+    inserted = []
+    model.rowsInserted.connect(lambda parent, first, last: inserted.append((first, last)))
+
+    # Ordinamento case-insensitive: "B" tra "A" e "c"
+    assert model.insert_track(_track("/m/B.mp3")) == 1
+    assert model.insert_track(_track("/m/z.mp3")) == 4
+    assert model.insert_track(_track("/m/0.mp3")) == 0
+    assert inserted == [(1, 1), (4, 4), (0, 0)]
+    assert _paths(model) == ["/m/0.mp3", "/m/A.mp3", "/m/B.mp3", "/m/c.mp3", "/m/e.mp3", "/m/z.mp3"]
+    _check_rows(model)
+
+    assert model.remove_path("/m/B.mp3") == 2
+    assert model.row_of("/m/B.mp3") == -1
+    assert model.remove_path("/m/B.mp3") == -1
+    assert _paths(model) == ["/m/0.mp3", "/m/A.mp3", "/m/c.mp3", "/m/e.mp3", "/m/z.mp3"]
+    _check_rows(model)
+    assert model.path_at(99) is None and model.track_at(-1) is None
+
+
+def test_existing_path_is_updated_in_place():
+    model = _model([_track("/m/a.mp3", "Old"), _track("/m/b.mp3")])
+    changed = []
+    model.dataChanged.connect(lambda top, bottom, roles=(): changed.append(top.row()))
+
+    assert model.insert_track(_track("/m/b.mp3", "New")) == 1
+    assert model.rowCount() == 2 and changed == [1]
+    assert model.data(model.index(1), TrackRole)["title"] == "New"
+    assert model.data(model.index(1), PathRole) == "/m/b.mp3"
+    assert model.data(model.index(1)) == "b.mp3"
+
+    model.update_track(_track("/m/missing.mp3"))  # non in lista: ignorato
+    assert changed == [1] and model.rowCount() == 2
+
+
+def test_unsorted_results_keep_their_order():
+    model = _model([_track("/m/z.mp3"), _track("/m/a.mp3")], sort=False)
+    assert _paths(model) == ["/m/z.mp3", "/m/a.mp3"]
+    _check_rows(model)
+    model.set_tracks([])
+    assert model.rowCount() == 0 and model.row_of("/m/z.mp3") == -1
+
+
+def main():
+    tests = [
+        test_sorted_insert_and_remove_keep_the_row_map,
+        test_existing_path_is_updated_in_place,
+        test_unsorted_results_keep_their_order,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
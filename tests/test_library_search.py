@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+import time
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.library_search import LibrarySearchIndex, normalize
+
+
+def _track(path, title="", artist="", album=""):
+    return {"path": path, "title": title, "artist": artist, "album": album}
+
+
+TRACKS = [
+    _track("/music/Beyonce - Halo.mp3", "Halo", "Beyoncé", "I Am... Sasha Fierce"),
+    _track("/music/Queen - Bohemian Rhapsody.mp3", "Bohemian Rhapsody", "Queen", "A Night at the Opera"),
+    _track("/music/Halo Effect.mp3", "Days of the Lost", "The Halo Effect", "Days of the Lost"),
+    _track("/music/Queen - Bicycle Race.mp3", "Bicycle Race", "Queen", "Jazz"),
+]
+
+
+def test_normalize_folds_case_and_accents():
+    assert normalize("Beyoncé") == "beyonce"
+    assert normalize("ÁRVÍZTŰRŐ") == "arvizturo"
+
+
+def test_prefix_and_accent_folded_matching():
+    index = LibrarySearchIndex(TRACKS)
+    assert [t["title"] for t in index.search("beyon")] == ["Halo"]
+    assert [t["title"] for t in index.search("bohem rhap")] == ["Bohemian Rhapsody"]
+    # Every query token must match
+    assert index.search("queen halo") == []
+    assert index.search("") == []
+
+
+def test_ranking_prefers_title_matches_then_play_count():
+    index = LibrarySearchIndex(TRACKS)
+    # "halo" is a title for one track and an artist token for the other
+    assert [t["path"] for t in index.search("halo")][0] == "/music/Beyonce - Halo.mp3"
+
+    # Same field and exactness: the more played track wins
+    plays = {"/music/Queen - Bicycle Race.mp3": 12}
+    index = LibrarySearchIndex(TRACKS, plays)
+    assert [t["title"] for t in index.search("queen")] == ["Bicycle Race", "Bohemian Rhapsody"]
+
+
+def test_keystroke_queries_on_large_library():
+    words = ["love", "night", "dance", "fire", "heart", "rain", "summer", "road", "blue", "dream"]
+    tracks = [
+        _track(f"/music/{i:05d}.mp3", f"{words[i % 10]} {words[(i // 10) % 10]} {i}",
+               f"Artist {i % 500}", f"Album {i % 2000}")
+        for i in range(20000)
+    ]
+    index = LibrarySearchIndex(tracks)
+    started = time.perf_counter()
+    for query in ("d", "da", "dan", "danc", "dance", "dance r", "dance ra"):
+        results = index.search(query)
+        assert results
+    elapsed = (time.perf_counter() - started) / 7
+    print(f"   average query time: {elapsed * 1000:.2f} ms")
+    assert all("dance" in t["title"] and "rain" in t["title"] for t in index.search("dance ra"))
+
+
+def main():
+    tests = [
+        test_normalize_folds_case_and_accents,
+        test_prefix_and_accent_folded_matching,
+        test_ranking_prefers_title_matches_then_play_count,
+        test_keystroke_queries_on_large_library,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
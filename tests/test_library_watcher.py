@@ -0,0 +1,165 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pathlib
+import queue
+import tempfile
+import threading
+import time
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from PyQt6.QtCore import Qt
+
+import backend.library_watcher as library_watcher
+from backend.library_watcher import IN_Q_OVERFLOW, LibraryWatcher
+
+
+class FakeIndex:
+    """Every reported path becomes an "updated" change."""
+
+    def refresh_paths(self, paths):
+        return [("updated", path) for path in sorted(paths)]
+
+
+class Batches:
+    def __init__(self, watcher):
+        self._queue = queue.Queue()
+        # Diretta: il segnale parte dal thread del watcher e qui non c'è event loop
+        watcher.library_changed.connect(self._received, Qt.ConnectionType.DirectConnection)
+
+    def _received(self, changes):
+        self._queue.put((time.monotonic(), [path for _, path in changes]))
+
+    def next(self, timeout=3.0):
+        try:
+            return self._queue.get(timeout=timeout)[1]
+        except queue.Empty:
+            return None
+
+    def next_timed(self, timeout=3.0):
+        return self._queue.get(timeout=timeout)
+
+
+def _write(path, data=b"x"):
+    with open(path, "wb") as f:
+        f.write(data)
+
+
+def _watcher():
+    # Finestre corte: il test non aspetta i tempi reali
+    library_watcher.DEBOUNCE_SECONDS = 0.2
+    library_watcher.MAX_DELAY_SECONDS = 1.0
+    return LibraryWatcher(index=FakeIndex())
+
+
+def test_events_are_mapped_and_batched():
+    watcher = _watcher()
+    if not watcher.available:
+        print("inotify not available, skipped")
+        return
+    with tempfile.TemporaryDirectory() as base:
+        root = os.path.join(base, "music")
+        os.mkdir(root)
+        batches = Batches(watcher)
+        assert watcher.watch(root)
+        try:
+            # IN_CREATE di un file si ignora finché non viene chiuso
+            song = os.path.join(root, "song.mp3")
+            f = open(song, "wb")
+            f.write(b"partial")
+            f.flush()
+            assert batches.next(timeout=0.6) is None
+            f.close()
+            assert batches.next() == [song]
+
+            # Più file di fila: un solo batch dopo la finestra di quiete
+            names = [os.path.join(root, f"{i}.mp3") for i in range(3)]
+            for name in names:
+                _write(name)
+            assert batches.next() == sorted(names)
+
+            # Nuova sottocartella: viene osservata anche lei
+            sub = os.path.join(root, "sub")
+            os.mkdir(sub)
+            assert batches.next() == [sub]
+            _write(os.path.join(sub, "a.mp3"))
+            assert batches.next() == [os.path.join(sub, "a.mp3")]
+
+            # Cartella spostata dentro la libreria (IN_ISDIR | IN_MOVED_TO)
+            outside = os.path.join(base, "album")
+            os.mkdir(outside)
+            _write(os.path.join(outside, "b.mp3"))
+            moved = os.path.join(root, "album")
+            os.rename(outside, moved)
+            assert batches.next() == [moved]
+            _write(os.path.join(moved, "c.mp3"))
+            assert batches.next() == [os.path.join(moved, "c.mp3")]
+        finally:
+            watcher.stop()
+
+
+def test_max_delay_flushes_a_continuous_burst():
+    watcher = _watcher()
+    if not watcher.available:
+        print("inotify not available, skipped")
+        return
+    with tempfile.TemporaryDirectory() as root:
+        batches = Batches(watcher)
+        assert watcher.watch(root)
+        try:
+            started = time.monotonic()
+            deadline = started + 2.0
+            i = 0
+            # Un evento ogni 0.1 s: la quiete di 0.2 s non arriva mai
+            while time.monotonic() < deadline:
+                _write(os.path.join(root, f"{i}.mp3"))
+                i += 1
+                time.sleep(0.1)
+            arrived_at, paths = batches.next_timed()
+            assert arrived_at - started < 1.5
+            assert 3 <= len(paths) < i
+        finally:
+            watcher.stop()
+
+
+def test_queue_overflow_rescans_the_roots():
+    watcher = _watcher()
+    if not watcher.available:
+        print("inotify not available, skipped")
+        return
+    # Il kernel non va in overflow a comando: l'evento arriva da una pipe
+    read_fd, write_fd = os.pipe()
+    watcher._fd = read_fd
+    watcher._roots = {"/music", "/usb"}
+    batches = Batches(watcher)
+    thread = threading.Thread(target=watcher._event_loop, daemon=True)
+    thread.start()
+    try:
+        os.write(write_fd, library_watcher._EVENT_HEADER.pack(-1, IN_Q_OVERFLOW, 0, 0))
+        assert batches.next() == ["/music", "/usb"]
+    finally:
+        watcher.stop()
+        thread.join(timeout=2.0)
+        os.close(read_fd)
+        os.close(write_fd)
+
+
+def main():
+    tests = [
+        test_events_are_mapped_and_batched,
+        test_max_delay_flushes_a_continuous_burst,
+        test_queue_overflow_rescans_the_roots,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
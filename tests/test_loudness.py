@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from backend.loudness import SAMPLE_RATE, LoudnessMeter
+
+
+def _sine(dbfs, seconds, frequency=997.0):
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    tone = 10 ** (dbfs / 20) * np.sin(2 * np.pi * frequency * t)
+    return np.column_stack((tone, tone))
+
+
+def _measure(signal):
+    meter = LoudnessMeter(2)
+    for start in range(0, len(signal), SAMPLE_RATE):
+        meter.feed(signal[start:start + SAMPLE_RATE])
+    return meter.result()
+
+
+def test_reference_sine_reads_minus_20_lufs():
+    # BS.1770: sinusoide stereo a 997 Hz, -20 dBFS per canale -> -20 LUFS
+    result = _measure(_sine(-20.0, 10))
+    assert abs(result["integrated"] - -20.0) < 0.1
+    assert abs(result["true_peak"] - -20.0) < 0.1
+    assert abs(result["gain"] - 2.0) < 0.1
+
+
+def test_gates_ignore_quiet_passages():
+    # Il passaggio a -80 dBFS è sotto il gate assoluto, quello a -40 sotto il relativo
+    signal = np.concatenate((_sine(-20.0, 5), _sine(-80.0, 20), _sine(-40.0, 5), _sine(-20.0, 5)))
+    result = _measure(signal)
+    assert abs(result["integrated"] - -20.0) < 0.2
+    assert _measure(_sine(-90.0, 5)) is None
+
+    # Brano molto piano: il gate relativo (-72) scende sotto -70, vale quello assoluto
+    result = _measure(np.concatenate((_sine(-62.0, 5), _sine(-71.0, 20))))
+    assert abs(result["integrated"] - -62.0) < 0.2
+
+
+def main():
+    tests = [
+        test_reference_sine_reads_minus_20_lufs,
+        test_gates_ignore_quiet_passages,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.lyrics import is_lrc, parse_lrc, parse_lyrics_text
+
+SAMPLE_LRC = """[ar:Queen]
+[ti:Bohemian Rhapsody]
+[offset:+100]
+[00:00.50]Is this the real life?
+[00:04.20][01:30.00]Is this just fantasy?
+[00:08]Caught in a landslide
+"""
+
+
+def test_parse_lrc_sorts_and_applies_offset():
+    synced = parse_lrc(SAMPLE_LRC)
+    assert synced is not None and synced.timed
+    assert synced.lines == [
+        "Is this the real life?",
+        "Is this just fantasy?",
+        "Caught in a landslide",
+        "Is this just fantasy?",
+    ]
+    # +100 ms offset shows every line slightly earlier
+    assert synced.times == [400, 4100, 7900, 89900]
+
+
+def test_line_lookup_uses_start_times():
+    synced = parse_lrc(SAMPLE_LRC)
+    assert synced.line_index_at(0) == 0
+    assert synced.line_index_at(4099) == 0
+    assert synced.line_index_at(4100) == 1
+    assert synced.line_index_at(60000) == 2
+    assert synced.line_index_at(10 ** 7) == 3
+
+
+def test_plain_lyrics_are_spread_over_duration():
+    assert not is_lrc("line one\nline two")
+    synced = parse_lyrics_text("line one\n\nline two\n", 10000)
+    assert not synced.timed
+    assert synced.lines == ["line one", "line two"]
+    assert synced.times == [0, 5000]
+
+
+def main():
+    tests = [
+        test_parse_lrc_sorts_and_applies_offset,
+        test_line_lookup_uses_start_times,
+        test_plain_lyrics_are_spread_over_duration,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.media_position import PositionAnchor
+
+
+def test_position_is_extrapolated_only_while_playing():
+    anchor = PositionAnchor()
+    anchor.set_duration(180000)
+    anchor.anchor(10000, "playing", now=100.0)
+    assert anchor.position(now=100.0) == 10000
+    assert anchor.position(now=102.5) == 12500
+
+    # Pausa senza Position nel segnale: resta dove era arrivata
+    anchor.anchor(status="paused", now=104.0)
+    assert anchor.position(now=110.0) == 14000
+    anchor.anchor(status="playing", now=120.0)
+    assert anchor.position(now=121.0) == 15000
+
+    # Un nuovo report dal telefono vince sulla stima
+    anchor.anchor(60000, now=122.0)
+    assert anchor.position(now=123.0) == 61000
+
+
+def test_position_stops_at_track_end():
+    anchor = PositionAnchor()
+    anchor.set_duration(5000)
+    anchor.anchor(4000, "playing", now=0.0)
+    assert anchor.position(now=30.0) == 5000
+    anchor.reset()
+    assert anchor.position() == 0 and anchor.status == "stopped"
+
+
+def main():
+    tests = [
+        test_position_is_extrapolated_only_while_playing,
+        test_position_stops_at_track_end,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.online_search import SearchCache, normalize_query
+
+
+def test_normalize_query():
+    assert normalize_query("  Hey   JUDE\t") == "hey jude"
+    assert normalize_query("   ") == ""
+    # Negli URL le maiuscole contano (id dei video)
+    assert normalize_query(" https://youtu.be/dQw4w9WgXcQ ") == "https://youtu.be/dQw4w9WgXcQ"
+
+
+def test_search_cache_expires_and_evicts():
+    cache = SearchCache(ttl=60, max_entries=2)
+    cache.put("Hey Jude", ["a"], now=0.0)
+    assert cache.get("hey  jude", now=30.0) == ["a"]
+    assert cache.get("hey jude", now=61.0) is None  # scaduta
+    assert cache.get("hey jude", now=0.0) is None  # e rimossa
+
+    cache.put("one", [1], now=0.0)
+    cache.put("two", [2], now=0.0)
+    assert cache.get("one", now=1.0) == [1]  # "two" diventa la meno recente
+    cache.put("three", [3], now=2.0)
+    assert cache.get("two", now=3.0) is None
+    assert cache.get("one", now=3.0) == [1] and cache.get("three", now=3.0) == [3]
+
+
+def main():
+    tests = [
+        test_normalize_query,
+        test_search_cache_expires_and_evicts,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
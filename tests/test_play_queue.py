@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+
+import random
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.play_queue import PlayQueue, REPEAT_ALL, REPEAT_OFF, REPEAT_ONE
+
+PATHS = [f"/music/{i:02d}.mp3" for i in range(6)]
+
+
+def test_next_previous_and_repeat_modes():
+    queue = PlayQueue(PATHS, repeat=REPEAT_OFF)
+    assert queue.jump(PATHS[4]) and queue.index_of(PATHS[4]) == 4
+    assert queue.next() == PATHS[5]
+    assert queue.next() is None  # fine della coda senza repeat
+    assert queue.previous() == PATHS[4]
+
+    queue.set_repeat(REPEAT_ALL)
+    queue.jump(PATHS[5])
+    assert queue.next() == PATHS[0]
+    assert queue.previous() == PATHS[5]
+
+    queue.set_repeat(REPEAT_ONE)
+    assert queue.next(auto=True) == PATHS[5]
+    assert queue.next() == PATHS[0]  # il tasto ">>" salta comunque
+
+
+def test_shuffle_is_a_permutation_starting_from_current():
+    queue = PlayQueue(PATHS, rng=random.Random(7))
+    queue.jump(PATHS[2])
+    queue.set_shuffle(True)
+    played = [queue.current_path] + [queue.next() for _ in range(len(PATHS) - 1)]
+    assert played[0] == PATHS[2]
+    assert sorted(played) == PATHS
+    # Stessa permutazione al giro successivo, e "previous" la ripercorre
+    assert queue.next() == played[0]
+    assert queue.previous() == played[-1]
+
+    queue.set_shuffle(False)
+    queue.jump(PATHS[1])
+    assert queue.next() == PATHS[2]
+
+
+def test_play_next_and_library_changes():
+    queue = PlayQueue(PATHS)
+    queue.jump(PATHS[0])
+    queue.play_next(PATHS[4])
+    queue.play_next(PATHS[3])
+    assert queue.peek(3) == [PATHS[3], PATHS[4], PATHS[1]]
+    assert queue.next() == PATHS[3]
+    assert queue.next() == PATHS[4]
+    assert queue.next() == PATHS[1]  # si riprende dall'ordine
+
+    queue.insert("/music/00b.mp3", row=1)
+    assert queue.index_of(PATHS[1]) == 2 and queue.previous() == "/music/00b.mp3"
+
+    queue.jump(PATHS[2])
+    queue.remove(PATHS[2])  # rimossa mentre suona
+    assert PATHS[2] not in queue and queue.current_path == PATHS[2]
+    assert queue.next() == PATHS[3]
+    assert queue.index_of(PATHS[3]) == 3
+
+
+def main():
+    tests = [
+        test_next_previous_and_repeat_modes,
+        test_shuffle_is_a_permutation_starting_from_current,
+        test_play_next_and_library_changes,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
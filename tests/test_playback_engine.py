@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+import threading
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.playback_engine import PERIOD_FRAMES, PcmRingBuffer, TrackMarks
+
+FRAME_BYTES = 4  # s16le stereo
+
+
+def test_ring_wraps_around():
+    ring = PcmRingBuffer(8)
+    assert ring.write(b"abcdef")
+    assert ring.read(4) == b"abcd"
+    assert ring.write(b"ghijk")  # scrive oltre la fine del buffer e riparte da 0
+    assert len(ring) == 7
+    assert ring.read(100) == b"efghijk"
+    assert ring.read(4) == b"" and len(ring) == 0
+
+
+def test_reset_drops_stale_writers():
+    ring = PcmRingBuffer(4)
+    ring.reset(1)
+    assert ring.write(b"full", 1)
+    result = []
+    # Decoder vecchio bloccato sul buffer pieno
+    writer = threading.Thread(target=lambda: result.append(ring.write(b"late", 1)))
+    writer.start()
+    ring.reset(2)
+    writer.join(timeout=2.0)
+    assert result == [False] and len(ring) == 0
+    assert not ring.write(b"x", 1)
+    assert ring.write(b"new", 2) and ring.read(4) == b"new"
+
+    ring.close()
+    assert not ring.write(b"x", 2)
+    ring.reset(3)
+    assert ring.write(b"x")  # senza generazione: sempre accettato
+
+
+def test_gapless_handoff_at_the_right_frame():
+    # Due tracce in coda nello stesso ring, come fa _decode_loop
+    first_frames, second_frames = 5000, 3000
+    ring = PcmRingBuffer((first_frames + second_frames) * FRAME_BYTES)
+    marks = TrackMarks()
+    assert ring.write(b"\x01" * first_frames * FRAME_BYTES)
+    marks.add(first_frames, "b.mp3")
+    assert ring.write(b"\x02" * second_frames * FRAME_BYTES)
+
+    # Come _feed_loop: un periodo alla volta, il passaggio quando il device lo ha suonato
+    path, track_frame, consumed = "a.mp3", 0, 0
+    changes = []
+    while True:
+        data = ring.read(PERIOD_FRAMES * FRAME_BYTES)
+        if not data:
+            break
+        consumed += len(data) // FRAME_BYTES
+        for frame, new_path in marks.reached(consumed):
+            changes.append((path, new_path, consumed))
+            path, track_frame = new_path, frame
+
+    assert changes == [("a.mp3", "b.mp3", 3 * PERIOD_FRAMES)]
+    assert track_frame == first_frames and len(marks) == 0
+    # Posizione nella seconda traccia: solo i suoi frame
+    assert consumed - track_frame == second_frames
+    assert marks.reached(10 ** 9) == []
+
+
+def main():
+    tests = [
+        test_ring_wraps_around,
+        test_reset_drops_stale_writers,
+        test_gapless_handoff_at_the_right_frame,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
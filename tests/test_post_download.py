@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+
+import os
+import sys
+import pathlib
+import tempfile
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.post_download import STAGES, PipelineState, normalize_tags
+
+
+def test_normalize_tags():
+    assert normalize_tags("Song (Official Video)", "Band") == ("Song", "Band")
+    assert normalize_tags("Band - Song [Official Music Video]", "BandVEVO") == ("Song", "Band")
+    assert normalize_tags("Song  (Lyrics)", "Band - Topic") == ("Song", "Band")
+    assert normalize_tags("Song (Live)", " The  Band ") == ("Song (Live)", "The Band")
+    assert normalize_tags("Band - Song", "") == ("Song", "Band")
+    assert normalize_tags("Band - Song", "Some Channel", from_channel=True) == ("Song", "Band")
+    # Con un artista vero il " - " fa parte del titolo
+    assert normalize_tags("Hey Jude - Remastered 2015", "The Beatles") == (
+        "Hey Jude - Remastered 2015", "The Beatles"
+    )
+    # Idempotente: la pipeline la riapplica a ogni ripresa
+    assert normalize_tags(*normalize_tags("Band - Song (Audio)", "x", True)) == ("Song", "Band")
+
+
+def test_state_resumes_after_restart():
+    with tempfile.TemporaryDirectory() as base:
+        path = os.path.join(base, "pipeline.json")
+        song = os.path.join(base, "song.mp3")
+        state = PipelineState(path)
+        assert state.add(song, "Song", "Band", "abc")
+        assert not state.add(song)  # già in lavorazione
+        state.mark_done(song, "tags")
+        state.mark_done(song, "art")
+
+        # "Crash": un nuovo stato riletto dal disco riparte dal passo mancante
+        restored = PipelineState(path)
+        assert restored.pending() == [song]
+        assert restored.remaining(song) == list(STAGES[2:])
+        assert restored.get(song)["art_id"] == "abc"
+
+        for stage in STAGES:
+            restored.mark_done(song, stage)
+        restored.finish(song)
+        assert PipelineState(path).pending() == []
+
+
+def main():
+    tests = [
+        test_normalize_tags,
+        test_state_resumes_after_restart,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+from backend.trim_jobs import TrimJob, _ffmpeg_command, parse_progress_line
+
+
+def _maps(cmd):
+    return [cmd[i + 1] for i, arg in enumerate(cmd) if arg == "-map"]
+
+
+def test_parse_progress_line():
+    assert parse_progress_line("out_time_us=5000000\n", 20.0) == 0.25
+    # out_time_ms è in realtà in microsecondi
+    assert parse_progress_line("out_time_ms=10000000", 20.0) == 0.5
+    assert parse_progress_line("out_time_us=99000000", 20.0) == 1.0
+    assert parse_progress_line("out_time_us=N/A", 20.0) is None
+    assert parse_progress_line("out_time_us=5000000", 0) is None
+    assert parse_progress_line("progress=end", 20.0) == 1.0
+    assert parse_progress_line("progress=continue", 20.0) is None
+    assert parse_progress_line("bitrate=128.0kbits/s", 20.0) is None
+
+
+def test_ffmpeg_command_maps_cover_only_where_supported():
+    job = TrimJob("/music/song.m4a", 1.5, 30)
+    cmd = _ffmpeg_command("ffmpeg", job, ["-c", "copy"])
+    assert _maps(cmd) == ["0:a"]
+    assert cmd[cmd.index("-f") + 1] == "ipod"
+    assert cmd[cmd.index("-ss") + 1] == "1.500" and cmd[cmd.index("-to") + 1] == "30.000"
+    assert cmd[-1] == job.temp_path and cmd.index("-c") < cmd.index("-f")
+
+    cmd = _ffmpeg_command("ffmpeg", TrimJob("/music/song.MP3", 0, 10), ["-c", "copy"])
+    assert _maps(cmd) == ["0:a", "0:v?"]
+    assert cmd[cmd.index("-f") + 1] == "mp3"
+
+    cmd = _ffmpeg_command("ffmpeg", TrimJob("/music/song.xyz", 0, 10), ["-c", "copy"])
+    assert _maps(cmd) == ["0:a"] and "-f" not in cmd
+
+
+def main():
+    tests = [
+        test_parse_progress_line,
+        test_ffmpeg_command_maps_cover_only_where_supported,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
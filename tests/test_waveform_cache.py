@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+
+import sys
+import pathlib
+
+# Add the project root directory to the Python path
+script_dir = pathlib.Path(__file__).parent
+project_root = script_dir.parent
+sys.path.insert(0, str(project_root))
+
+import numpy as np
+
+from backend.waveform_cache import BASE_BIN_FRAMES, LEVEL_FACTOR, Waveform, _reduce
+
+
+def _waveform(bins=1000):
+    mins = (-np.arange(bins) % 128).astype(np.int8) * -1
+    maxs = (np.arange(bins) % 128).astype(np.int8)
+    levels = [(BASE_BIN_FRAMES, mins, maxs)]
+    for step in range(1, 3):
+        mins, maxs = _reduce(mins, maxs, LEVEL_FACTOR)
+        levels.append((BASE_BIN_FRAMES * LEVEL_FACTOR ** step, mins, maxs))
+    return Waveform(44100, bins * BASE_BIN_FRAMES, levels)
+
+
+def test_levels_reduce_and_round_trip():
+    waveform = _waveform()
+    assert [len(level[1]) for level in waveform.levels] == [1000, 250, 63]
+    assert waveform.levels[1][2][0] == 3  # max dei primi 4 bin
+
+    restored = Waveform.from_bytes(waveform.to_bytes())
+    assert restored.frames == waveform.frames and restored.sample_rate == 44100
+    for (frames_a, mins_a, maxs_a), (frames_b, mins_b, maxs_b) in zip(waveform.levels, restored.levels):
+        assert frames_a == frames_b
+        assert np.array_equal(mins_a, mins_b) and np.array_equal(maxs_a, maxs_b)
+    assert Waveform.from_bytes(b"garbage") is None
+    # File troncato a metà dei livelli (spegnimento durante la scrittura)
+    data = waveform.to_bytes()
+    assert Waveform.from_bytes(data[:-5]) is None
+    assert Waveform.from_bytes(data[:40]) is None
+
+
+def test_envelope_picks_level_per_zoom():
+    waveform = _waveform()
+    duration = waveform.duration
+    # Vista intera su 100 colonne: il livello più grossolano con >= 1 bin per colonna
+    assert waveform.level_for(duration, 100)[0] == BASE_BIN_FRAMES * LEVEL_FACTOR
+    assert waveform.level_for(duration, 20)[0] == BASE_BIN_FRAMES * LEVEL_FACTOR ** 2
+    mins, maxs = waveform.envelope(0.0, duration, 100)
+    assert len(mins) == len(maxs) == 100
+    assert maxs.max() == 127
+    # Zoom su un secondo: livello più fine
+    assert waveform.level_for(1.0, 100)[0] == BASE_BIN_FRAMES
+    mins, maxs = waveform.envelope(1.0, 2.0, 100)
+    assert len(maxs) == 100 and (maxs >= 0).all()
+
+
+def main():
+    tests = [
+        test_levels_reduce_and_round_trip,
+        test_envelope_picks_level_per_zoom,
+    ]
+    for test in tests:
+        test()
+        print(f"✅ {test.__name__}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())